@@ -0,0 +1,161 @@
+"""Executa a suíte de benchmarks e compara com a base gravada no repositório.
+
+Cada benchmark é medido como no timeit: o número de chamadas por amostra cresce
+até a amostra durar AMOSTRA_MINIMA segundos, e fica o menor tempo por chamada
+entre REPETICOES amostras, tomadas em rodadas intercaladas. Os tempos são guardados junto com o de uma carga de
+referência fixa (CPU pura, medida ao longo da mesma execução), e a comparação
+usa a razão tempo/referência, para que a base gravada numa máquina valha em outra.
+
+Uso:
+  python executar.py                  mede e compara com base.json (sai com 1 se algo regredir)
+  python executar.py --gravar         mede e grava base.json
+  python executar.py --filtro listar  só os benchmarks cujo nome contém o texto
+  python executar.py --limite 0.5     regressão tolerada (padrão: 25%)
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "base.json")
+
+# Regressão tolerada antes de falhar (fração do tempo da base)
+LIMITE = 0.25
+REPETICOES = 5
+AMOSTRA_MINIMA = 0.2
+
+
+def _amostra(chamada, numero):
+    gc.collect()
+    inicio = time.perf_counter()
+    for _ in range(numero):
+        chamada()
+    return (time.perf_counter() - inicio) / numero
+
+
+def calibrar(chamada, amostra_minima=AMOSTRA_MINIMA):
+    """Chamadas por amostra para que ela dure pelo menos `amostra_minima` segundos."""
+    chamada()  # aquecimento (caches, imports tardios)
+    numero = 1
+    duracao = _amostra(chamada, numero)
+    while duracao * numero < amostra_minima:
+        numero = max(numero * 2, int(1.2 * amostra_minima / max(duracao, 1e-9)))
+        duracao = _amostra(chamada, numero)
+    return numero
+
+
+def medir(chamada, repeticoes=REPETICOES, amostra_minima=AMOSTRA_MINIMA):
+    """Menor tempo por chamada, em segundos, entre `repeticoes` amostras."""
+    numero = calibrar(chamada, amostra_minima)
+    return min(_amostra(chamada, numero) for _ in range(repeticoes))
+
+
+_REFERENCIA = [{"id": f"pedido-{i}", "total": i * 1.5, "itens": [{"sku": f"SKU-{j}", "quantidade": j} for j in range(5)]}
+               for i in range(200)]
+
+
+def carga_referencia():
+    """Carga fixa de CPU (JSON e ordenação) que serve de unidade de tempo da máquina."""
+    texto = json.dumps(_REFERENCIA)
+    sorted(json.loads(texto), key=lambda p: -p["total"])
+
+
+def executar(filtro=None, repeticoes=REPETICOES, saida=sys.stdout):
+    """Mede a referência e os benchmarks selecionados; retorna o resultado no formato da base.
+
+    As amostras são intercaladas: a cada rodada, uma de cada benchmark e uma da
+    referência. Uma oscilação passageira da máquina afeta uma rodada, não todas
+    as amostras de um benchmark, e o mínimo por benchmark a descarta.
+    """
+    from suite import BENCHMARKS, Ambiente
+
+    nomes = [nome for nome in BENCHMARKS if not filtro or filtro in nome]
+    if not nomes:
+        raise ValueError(f"Nenhum benchmark corresponde a '{filtro}'")
+
+    ambiente = Ambiente()
+    preparados = {"referencia": (None, carga_referencia, calibrar(carga_referencia))}
+    for nome in nomes:
+        chamada = BENCHMARKS[nome](ambiente)
+        preparados[nome] = (ambiente.repositorio, chamada, calibrar(chamada))
+
+    melhores = dict.fromkeys(preparados, float("inf"))
+    for _ in range(repeticoes):
+        for nome, (repositorio, chamada, numero) in preparados.items():
+            ambiente.usar(repositorio)
+            melhores[nome] = min(melhores[nome], _amostra(chamada, numero))
+
+    referencia = melhores.pop("referencia")
+    for nome, tempo in melhores.items():
+        print(f"{nome:<24} {tempo * 1000:>12.3f} ms", file=saida)
+
+    return {
+        "python": platform.python_version(),
+        "referencia": referencia,
+        "resultados": melhores,
+    }
+
+
+def comparar(base, atual, limite=LIMITE):
+    """Compara duas execuções pela razão tempo/referência.
+
+    Retorna [(nome, variação)] de todos os benchmarks presentes nas duas, com
+    variação = razão atual / razão da base - 1, e a lista dos que passaram do limite.
+    """
+    variacoes = []
+    for nome, tempo in atual["resultados"].items():
+        if nome not in base["resultados"]:
+            continue
+        razao_base = base["resultados"][nome] / base["referencia"]
+        razao_atual = tempo / atual["referencia"]
+        variacoes.append((nome, razao_atual / razao_base - 1))
+    return variacoes, [(nome, variacao) for nome, variacao in variacoes if variacao > limite]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gravar", action="store_true", help="grava o resultado como nova base")
+    parser.add_argument("--filtro", help="só os benchmarks cujo nome contém o texto")
+    parser.add_argument("--limite", type=float, default=LIMITE, help="regressão tolerada (fração)")
+    parser.add_argument("--base", default=BASE, help="arquivo da base")
+    args = parser.parse_args(argv)
+
+    atual = executar(args.filtro)
+
+    if args.gravar:
+        base = {"resultados": {}}
+        if args.filtro and os.path.exists(args.base):
+            with open(args.base) as f:
+                base = json.load(f)
+            # Base parcial: os tempos mantidos precisam estar na mesma unidade da nova referência
+            escala = atual["referencia"] / base["referencia"]
+            base["resultados"] = {nome: tempo * escala for nome, tempo in base["resultados"].items()}
+        base["python"], base["referencia"] = atual["python"], atual["referencia"]
+        base["resultados"].update(atual["resultados"])
+        with open(args.base, "w") as f:
+            json.dump(base, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Base gravada em {args.base}")
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    variacoes, regressoes = comparar(base, atual, args.limite)
+    print()
+    for nome, variacao in variacoes:
+        marca = "  REGRESSÃO" if variacao > args.limite else ""
+        print(f"{nome:<24} {variacao:>+8.1%}{marca}")
+    novos = sorted(atual["resultados"].keys() - base["resultados"].keys())
+    if novos:
+        print(f"Sem base (use --gravar): {', '.join(novos)}")
+    if regressoes:
+        print(f"{len(regressoes)} benchmark(s) acima do limite de {args.limite:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
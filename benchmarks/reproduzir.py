@@ -0,0 +1,224 @@
+"""Reproduz uma captura de tráfego (captura.py dos serviços) contra os serviços locais.
+
+Os serviços são os mesmos da suíte (suite.Ambiente): os main.py carregados no
+processo, com o repositório SQLite em memória carregado com --pedidos pedidos e
+a autenticação real com um token local. Cada registro da captura vira uma
+requisição sintética com a mesma forma (rota, quantidade de IDs e de itens,
+campos enviados), gerada de forma determinística a partir da --semente. As
+requisições saem nos instantes da captura divididos pela --velocidade, ou todas
+de uma vez com --velocidade max, num pool de --concorrencia threads.
+
+A latência, em velocidade fixa, conta a partir do instante agendado (inclui a
+espera por uma thread livre, sem omissão coordenada); em max, a partir do
+início da execução.
+
+A captura pode ser o arquivo JSONL do CAPTURA_DESTINO, as linhas de log
+("captura" no JSON) ou a exportação do Cloud Logging (jsonPayload), em JSONL
+ou num array JSON.
+
+Uso: python reproduzir.py captura.jsonl [--velocidade 1|10|max] [--pedidos 10000]
+                          [--semente 0] [--concorrencia 32] [--json relatorio.json]
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from suite import SERVICOS, Ambiente, item
+
+PEDIDOS = 10_000
+CONCORRENCIA = 32
+
+TERMOS_BUSCA = ("silva", "souza", "oliveira", "cliente")
+
+
+def ler_captura(caminho):
+    """Registros da captura, em ordem de chegada."""
+    with open(caminho) as f:
+        texto = f.read()
+    if texto.lstrip().startswith("["):
+        linhas = json.loads(texto)
+    else:
+        linhas = [json.loads(linha) for linha in texto.splitlines() if linha.strip()]
+
+    registros = []
+    for linha in linhas:
+        linha = linha.get("jsonPayload", linha)
+        linha = linha.get("captura", linha)
+        if "servico" in linha and "t" in linha:
+            registros.append(linha)
+    return sorted(registros, key=lambda r: r["t"])
+
+
+def percentil(ordenados, p):
+    """Percentil por posição (nearest-rank) de uma lista já ordenada."""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class Gerador:
+    """Monta requisições com a forma dos registros, sempre iguais para a mesma semente.
+
+    Leituras e atualizações usam pedidos da primeira metade do banco; remoções
+    consomem a segunda metade, do fim para o começo, sem repetir IDs.
+    """
+
+    def __init__(self, pedidos, semente=0):
+        self.pedidos = pedidos
+        self.rng = random.Random(semente)
+        self._removivel = pedidos - 1
+
+    def id_existente(self):
+        return f"pedido-{self.rng.randrange(max(1, self.pedidos // 2)):06d}"
+
+    def id_removivel(self):
+        pedido_id = f"pedido-{self._removivel:06d}"
+        self._removivel -= 1
+        return pedido_id
+
+    def _texto(self, nome, forma):
+        if nome == "ids":
+            return ",".join(self.id_existente() for _ in range(forma.get("partes", 1)))
+        if nome == "q":
+            return self.rng.choice(TERMOS_BUSCA)[:max(2, forma.get("tamanho", 5))]
+        if nome == "email":
+            return f"cliente{self.rng.randrange(10**6)}@exemplo.com"
+        if nome == "cliente":
+            return f"Cliente {self.rng.randrange(10**6)} {self.rng.choice(TERMOS_BUSCA).title()}"
+        return "x" * forma.get("tamanho", 1)
+
+    def _valor(self, nome, forma):
+        if not isinstance(forma, dict):
+            return forma
+        if "itens" in forma:
+            return [item(self.rng.randrange(10**6)) for _ in range(forma["itens"])]
+        if "tamanho" in forma:
+            return self._texto(nome, forma)
+        return None
+
+    def requisicao(self, registro):
+        """(método, caminho, query, corpo) com a forma do registro."""
+        metodo = registro["metodo"]
+        partes = [
+            (self.id_removivel() if metodo == "DELETE" else self.id_existente()) if parte == "{id}" else parte
+            for parte in registro["rota"].split("/")
+        ]
+        consulta = {nome: str(self._valor(nome, forma)) for nome, forma in registro.get("consulta", {}).items()}
+        campos = registro.get("corpo", {}).get("campos")
+        corpo = None
+        if campos is not None:
+            corpo = json.dumps({nome: self._valor(nome, forma) for nome, forma in campos.items()})
+        return metodo, "/".join(partes) or "/", consulta, corpo
+
+
+def preparar(registros, pedidos=PEDIDOS, semente=0, velocidade=1.0):
+    """[(instante agendado em s, endpoint, serviço, requisição)] na ordem da captura.
+
+    Registros de funções fora da suíte são descartados e contados à parte.
+    """
+    apelidos = {entrada: apelido for apelido, (_, entrada) in SERVICOS.items()}
+    gerador = Gerador(pedidos, semente)
+    inicio = registros[0]["t"] if registros else 0
+    plano, ignorados = [], 0
+    for registro in registros:
+        servico = apelidos.get(registro["servico"])
+        if servico is None:
+            ignorados += 1
+            continue
+        agendado = (registro["t"] - inicio) / velocidade if velocidade else 0.0
+        endpoint = f"{registro['servico']} {registro['metodo']} {registro['rota']}"
+        plano.append((agendado, endpoint, servico, gerador.requisicao(registro)))
+    return plano, ignorados
+
+
+def reproduzir(ambiente, plano, concorrencia=CONCORRENCIA, velocidade=1.0):
+    """Executa o plano e retorna ([(endpoint, status, latência em s)], duração total em s)."""
+    def executar(agendado, endpoint, servico, requisicao):
+        inicio = time.perf_counter()
+        try:
+            status = ambiente.requisitar(servico, *requisicao)[1]
+        except Exception:
+            status = None
+        fim = time.perf_counter()
+        return endpoint, status, fim - (agendado if velocidade else inicio)
+
+    origem = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        futuros = []
+        for agendado, endpoint, servico, requisicao in plano:
+            espera = origem + agendado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            futuros.append(executor.submit(executar, origem + agendado, endpoint, servico, requisicao))
+        resultados = [futuro.result() for futuro in futuros]
+    return resultados, time.perf_counter() - origem
+
+
+def relatorio(resultados, duracao):
+    """Requisições, erros, vazão e percentis de latência (ms) por endpoint e no total."""
+    por_endpoint = defaultdict(list)
+    for endpoint, status, latencia in resultados:
+        por_endpoint[endpoint].append((status, latencia))
+        por_endpoint["total"].append((status, latencia))
+
+    linhas = {}
+    for endpoint, medidas in sorted(por_endpoint.items(), key=lambda e: (e[0] == "total", e[0])):
+        latencias = sorted(latencia * 1000 for _, latencia in medidas)
+        linhas[endpoint] = {
+            "requisicoes": len(medidas),
+            "erros": sum(1 for status, _ in medidas if status is None or not 200 <= status < 300),
+            "req_s": round(len(medidas) / duracao, 1) if duracao else None,
+            **{f"p{p}_ms": round(percentil(latencias, p), 3) for p in (50, 90, 99)},
+            "max_ms": round(latencias[-1], 3),
+        }
+    return linhas
+
+
+def imprimir(linhas, saida=sys.stdout):
+    colunas = ("requisicoes", "erros", "req_s", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+    largura = max([len(e) for e in linhas] + [8])
+    print(f"{'endpoint':<{largura}} " + " ".join(f"{c:>11}" for c in colunas), file=saida)
+    for endpoint, linha in linhas.items():
+        print(f"{endpoint:<{largura}} " + " ".join(f"{linha[c]:>11}" for c in colunas), file=saida)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("captura", help="arquivo da captura (JSONL ou array JSON)")
+    parser.add_argument("--velocidade", default="1", help="multiplicador dos intervalos (1, 10...) ou max")
+    parser.add_argument("--pedidos", type=int, default=PEDIDOS, help="pedidos no banco em memória")
+    parser.add_argument("--semente", type=int, default=0, help="semente das requisições sintéticas")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA, help="threads que enviam as requisições")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args(argv)
+
+    velocidade = 0.0 if args.velocidade == "max" else float(args.velocidade)
+    if velocidade < 0:
+        parser.error("--velocidade deve ser positiva ou max")
+
+    registros = ler_captura(args.captura)
+    plano, ignorados = preparar(registros, args.pedidos, args.semente, velocidade)
+    if not plano:
+        print("Nenhuma requisição reproduzível na captura")
+        return 1
+
+    ambiente = Ambiente()
+    ambiente.carregar_pedidos(args.pedidos)
+    resultados, duracao = reproduzir(ambiente, plano, args.concorrencia, velocidade)
+    linhas = relatorio(resultados, duracao)
+
+    print(f"{len(plano)} requisições em {duracao:.2f} s (velocidade {args.velocidade})"
+          + (f", {ignorados} de funções fora da suíte ignoradas" if ignorados else ""))
+    imprimir(linhas)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duracao_s": duracao, "ignorados": ignorados, "endpoints": linhas}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Microbenchmarks dos handlers HTTP sobre um backend em memória.
+
+Os `main.py` dos serviços são carregados num só processo (como no gateway) com
+PEDIDOS_BACKEND=sqlite num banco em memória, recriado para cada benchmark com a
+quantidade de pedidos que ele precisa. A autenticação percorre o caminho real
+do Firebase Admin (verify_id_token, com a assinatura RS256 do token conferida);
+só o download dos certificados do Google é trocado por um certificado local.
+
+Cada benchmark é uma função `preparar(ambiente)` que monta os dados e devolve a
+chamada medida (sem argumentos). Os tamanhos cobrem de 10 a 100 mil pedidos na
+listagem e de 1 a 10 mil itens no carrinho.
+"""
+import datetime
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import time
+
+os.environ["PEDIDOS_BACKEND"] = "sqlite"
+os.environ["PEDIDOS_SQLITE_ARQUIVO"] = ":memory:"
+
+import firebase_admin
+import google.auth.credentials
+import google.oauth2.id_token
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from firebase_admin import credentials
+from flask import Flask, request
+from google.auth import crypt, jwt
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Apelido -> (pasta do serviço, função de entrada)
+SERVICOS = {
+    "salvar": ("services_salvar-pedido", "salvar_pedido"),
+    "listar": ("services_listar-pedidos", "listar_pedidos"),
+    "detalhar": ("services_detalhar-pedido", "obter_pedido"),
+    "atualizar": ("services_atualizar-status-pedido", "atualizar_status_pedido"),
+    "deletar": ("services_delete-pedido", "deletar_pedido"),
+    "buscar": ("services_buscar-pedidos", "buscar_pedidos"),
+    "validar": ("services_validar-token", "validate_token"),
+}
+
+PROJETO = "benchmark-pedidos"
+UID = "usuario-benchmark"
+CHAVE_ID = "benchmark"
+
+
+class ErroBenchmark(Exception):
+    """O handler respondeu com erro: o tempo medido não seria de uma requisição válida."""
+
+
+class CredencialAnonima(credentials.Base):
+    """Credencial do Firebase Admin que não procura as credenciais padrão do Google."""
+
+    def get_credential(self):
+        return google.auth.credentials.AnonymousCredentials()
+
+
+def _chave_e_certificado():
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    nome = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "benchmark")])
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    certificado = (
+        x509.CertificateBuilder()
+        .subject_name(nome).issuer_name(nome)
+        .public_key(chave.public_key())
+        .serial_number(1)
+        .not_valid_before(agora - datetime.timedelta(days=1))
+        .not_valid_after(agora + datetime.timedelta(days=1))
+        .sign(chave, hashes.SHA256())
+    )
+    pem = chave.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                              serialization.NoEncryption())
+    return pem, certificado.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def _token(chave_pem):
+    """ID token do Firebase assinado com a chave local."""
+    agora = int(time.time())
+    assinante = crypt.RSASigner.from_string(chave_pem, key_id=CHAVE_ID)
+    return jwt.encode(assinante, {
+        "iss": f"https://securetoken.google.com/{PROJETO}",
+        "aud": PROJETO,
+        "sub": UID,
+        "auth_time": agora,
+        "iat": agora,
+        "exp": agora + 24 * 3600,
+        "admin": True,  # Custom claim exigida pelos serviços da equipe (ex.: buscar-pedidos)
+    }).decode()
+
+
+def item(i):
+    return {"sku": f"SKU-{i % 500}", "nome": f"Produto {i % 500}", "quantidade": 1 + i % 3, "preco": 9.9 + i % 7}
+
+
+def pedido(i, itens=3):
+    """Documento de pedido como gravado pelo salvar-pedido (com os tokens de busca)."""
+    # Módulos compartilhados dos serviços: importáveis depois que o Ambiente carrega as pastas
+    from busca import CAMPO_TOKENS, tokens_busca
+
+    cliente, email = f"Cliente {i} {('Silva', 'Souza', 'Oliveira')[i % 3]}", f"cliente{i}@exemplo.com"
+    data = f"2024-01-{1 + i % 28:02d}T12:00:00Z"
+    return {
+        "id": f"pedido-{i:06d}", "status": "PENDENTE", "total": 39.7, "total_centavos": 3970,
+        "data_criacao": data, "ultima_atualizacao": data, "cliente": cliente, "email": email,
+        "itens": [item(j) for j in range(itens)], "user_id": UID,
+        CAMPO_TOKENS: tokens_busca(cliente, email),
+    }
+
+
+class Ambiente:
+    """Serviços carregados, token válido e o repositório em memória compartilhado."""
+
+    def __init__(self, servicos=None):
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(CredencialAnonima(), {"projectId": PROJETO})
+
+        chave, certificado = _chave_e_certificado()
+        self.token = _token(chave)
+        # verify_id_token busca as chaves públicas do Google; aqui recebe o certificado local
+        google.oauth2.id_token._fetch_certs = lambda request, url: {CHAVE_ID: certificado}
+
+        self.app = Flask(__name__)
+        self.modulos = {nome: self._carregar(*SERVICOS[nome]) for nome in servicos or SERVICOS}
+        self.repositorio = None
+
+    @staticmethod
+    def _carregar(pasta, entrada):
+        pasta = os.path.join(RAIZ, pasta)
+        if pasta not in sys.path:
+            sys.path.append(pasta)
+        nome_modulo = os.path.basename(pasta).replace("-", "_")
+        spec = importlib.util.spec_from_file_location(nome_modulo, os.path.join(pasta, "main.py"))
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[nome_modulo] = modulo
+        spec.loader.exec_module(modulo)
+        # Todas as requisições vêm do mesmo uid: sem limite por usuário
+        if hasattr(modulo, "limitador"):
+            modulo.limitador.taxa = 0
+        return modulo, getattr(modulo, entrada)
+
+    def carregar_pedidos(self, quantidade, itens=3):
+        """Troca o repositório de todos os serviços por um banco novo com `quantidade` pedidos."""
+        from repositorio import Operacao, RepositorioSQLite
+
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.gravar_em_lote(
+            Operacao("gravar", f"pedido-{i:06d}", pedido(i, itens)) for i in range(quantidade))
+        self.usar(repositorio)
+        return repositorio
+
+    def usar(self, repositorio):
+        """Instala o repositório em todos os serviços carregados."""
+        self.repositorio = repositorio
+        for modulo, _ in self.modulos.values():
+            if hasattr(modulo, "repositorio"):
+                modulo.repositorio = repositorio
+
+    def requisitar(self, servico, metodo="GET", caminho="/", query=None, corpo=None):
+        """Executa o handler com o token no cabeçalho e retorna a resposta."""
+        _, handler = self.modulos[servico]
+        with self.app.test_request_context(caminho, method=metodo, query_string=query, data=corpo,
+                                           content_type="application/json" if corpo is not None else None,
+                                           headers={"Authorization": f"Bearer {self.token}"}):
+            return handler(request)
+
+    def chamar(self, servico, metodo="GET", caminho="/", query=None, corpo=None):
+        """Como `requisitar`, mas com ErroBenchmark se a resposta não for 2xx."""
+        resposta = self.requisitar(servico, metodo, caminho, query, corpo)
+        if not 200 <= resposta[1] < 300:
+            raise ErroBenchmark(f"{servico} {metodo} {caminho}: {resposta[1]} {str(resposta[0])[:200]}")
+        return resposta
+
+
+BENCHMARKS = {}
+
+
+def benchmark(nome):
+    def registrar(preparar):
+        BENCHMARKS[nome] = preparar
+        return preparar
+    return registrar
+
+
+@benchmark("autenticacao")
+def autenticacao(ambiente):
+    ambiente.carregar_pedidos(0)
+    return lambda: ambiente.chamar("validar", "POST")
+
+
+def _listar(quantidade):
+    def preparar(ambiente):
+        ambiente.carregar_pedidos(quantidade)
+        return lambda: ambiente.chamar("listar")
+    return preparar
+
+
+def _salvar(itens):
+    def preparar(ambiente):
+        ambiente.carregar_pedidos(0)
+        corpo = json.dumps({"cliente": "Cliente Silva", "email": "cliente@exemplo.com",
+                            "itens": [item(i) for i in range(itens)]})
+        return lambda: ambiente.chamar("salvar", "POST", corpo=corpo)
+    return preparar
+
+
+for _quantidade in (10, 1_000, 100_000):
+    benchmark(f"listar/pedidos={_quantidade}")(_listar(_quantidade))
+
+for _itens in (1, 100, 10_000):
+    benchmark(f"salvar/itens={_itens}")(_salvar(_itens))
+
+
+@benchmark("detalhar/simples")
+def detalhar_simples(ambiente):
+    ambiente.carregar_pedidos(1_000)
+    ids = itertools.cycle(f"pedido-{i:06d}" for i in range(1_000))
+    return lambda: ambiente.chamar("detalhar", caminho=f"/pedidos/{next(ids)}")
+
+
+@benchmark("detalhar/lote=50")
+def detalhar_lote(ambiente):
+    ambiente.carregar_pedidos(1_000)
+    ids = ",".join(f"pedido-{i:06d}" for i in range(0, 1_000, 20))
+    return lambda: ambiente.chamar("detalhar", caminho="/pedidos", query={"ids": ids})
+
+
+@benchmark("buscar/pedidos=10000")
+def buscar(ambiente):
+    ambiente.carregar_pedidos(10_000)
+    return lambda: ambiente.chamar("buscar", query={"q": "silva"})
+
+
+@benchmark("atualizar/status")
+def atualizar(ambiente):
+    ambiente.carregar_pedidos(1_000)
+    ids = itertools.cycle(f"pedido-{i:06d}" for i in range(1_000))
+    corpo = json.dumps({"status": "ENVIADO"})
+    return lambda: ambiente.chamar("atualizar", "PATCH", f"/pedidos/{next(ids)}", corpo=corpo)
+
+
+@benchmark("deletar")
+def deletar(ambiente):
+    """Cada chamada regrava o pedido antes de removê-lo (o tempo inclui a regravação)."""
+    repositorio = ambiente.carregar_pedidos(0)
+    dados = pedido(0)
+
+    def chamar():
+        repositorio.gravar("pedido-000000", dados)
+        return ambiente.chamar("deletar", "DELETE", "/pedidos/pedido-000000")
+    return chamar
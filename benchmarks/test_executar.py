@@ -0,0 +1,82 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from executar import comparar, main, medir
+
+def execucao(referencia, **resultados):
+    return {"python": "3.11", "referencia": referencia, "resultados": resultados}
+
+class TestComparar(unittest.TestCase):
+
+    def test_regressao_acima_do_limite(self):
+        """Testa se só o benchmark que passou do limite é apontado como regressão"""
+        base = execucao(1.0, listar=2.0, salvar=1.0)
+        atual = execucao(1.0, listar=2.2, salvar=1.5)
+
+        variacoes, regressoes = comparar(base, atual, limite=0.25)
+
+        self.assertEqual([nome for nome, _ in variacoes], ["listar", "salvar"])
+        self.assertEqual([nome for nome, _ in regressoes], ["salvar"])
+        self.assertAlmostEqual(regressoes[0][1], 0.5)
+
+    def test_normaliza_pela_referencia(self):
+        """Testa se uma máquina duas vezes mais lenta não conta como regressão"""
+        base = execucao(1.0, listar=2.0)
+        atual = execucao(2.0, listar=4.0)
+
+        variacoes, regressoes = comparar(base, atual)
+
+        self.assertAlmostEqual(variacoes[0][1], 0.0)
+        self.assertEqual(regressoes, [])
+
+    def test_benchmark_sem_base(self):
+        """Testa se um benchmark novo, ainda sem base, é ignorado na comparação"""
+        variacoes, regressoes = comparar(execucao(1.0), execucao(1.0, novo=9.0))
+
+        self.assertEqual(variacoes, [])
+        self.assertEqual(regressoes, [])
+
+class TestExecutar(unittest.TestCase):
+
+    def test_medir(self):
+        """Testa se a medição agrupa chamadas até a amostra mínima e retorna o tempo por chamada"""
+        chamadas = []
+
+        tempo = medir(lambda: chamadas.append(1), repeticoes=2, amostra_minima=0.001)
+
+        self.assertGreater(len(chamadas), 2)
+        self.assertLess(tempo, 0.001)
+
+    def test_benchmarks_respondem(self):
+        """Testa se os benchmarks pequenos rodam contra os serviços reais sem erro de resposta"""
+        from suite import BENCHMARKS, Ambiente
+
+        ambiente = Ambiente()
+        for nome in ("autenticacao", "listar/pedidos=10", "salvar/itens=100", "detalhar/simples",
+                     "detalhar/lote=50", "atualizar/status", "deletar"):
+            with self.subTest(nome=nome):
+                chamada = BENCHMARKS[nome](ambiente)
+                self.assertEqual(chamada()[1], 200)
+
+    @patch("executar.executar")
+    def test_comparacao_falha_na_regressao(self, mock_executar):
+        """Testa se o comando de comparação sai com 1 quando algum benchmark regride"""
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "base.json")
+            with open(arquivo, "w") as f:
+                json.dump(execucao(1.0, listar=2.0), f)
+
+            mock_executar.return_value = execucao(1.0, listar=2.1)
+            with patch("sys.stdout", io.StringIO()):
+                self.assertEqual(main(["--base", arquivo]), 0)
+
+            mock_executar.return_value = execucao(1.0, listar=3.0)
+            with patch("sys.stdout", io.StringIO()) as saida:
+                self.assertEqual(main(["--base", arquivo]), 1)
+            self.assertIn("REGRESSÃO", saida.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
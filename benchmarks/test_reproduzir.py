@@ -0,0 +1,94 @@
+import unittest
+import json
+import os
+import tempfile
+from reproduzir import Gerador, ler_captura, percentil, preparar, relatorio, reproduzir
+from suite import Ambiente
+
+def registro(t, servico, metodo, rota, consulta=None, campos=None):
+    corpo = {"bytes": 0} if campos is None else {"bytes": 100, "campos": campos}
+    return {"t": t, "servico": servico, "metodo": metodo, "rota": rota, "consulta": consulta or {},
+            "corpo": corpo, "status": 200, "duracao_ms": 1.0}
+
+CAPTURA = [
+    registro(10.0, "listar_pedidos", "GET", "/"),
+    registro(10.1, "obter_pedido", "GET", "/pedidos/{id}"),
+    registro(10.2, "obter_pedido", "GET", "/pedidos", consulta={"ids": {"partes": 3, "tamanho": 41}}),
+    registro(10.3, "salvar_pedido", "POST", "/", campos={"cliente": {"partes": 1, "tamanho": 9},
+                                                       "email": {"partes": 1, "tamanho": 9},
+                                                       "itens": {"itens": 4}}),
+    registro(10.4, "atualizar_status_pedido", "PATCH", "/pedidos/{id}", campos={"status": "ENVIADO"}),
+    registro(10.5, "deletar_pedido", "DELETE", "/pedidos/{id}"),
+    registro(10.6, "deletar_pedido", "DELETE", "/pedidos/{id}"),
+    registro(10.7, "buscar_pedidos", "GET", "/", consulta={"q": {"partes": 1, "tamanho": 5}, "limite": "10"}),
+    registro(10.8, "login_user", "POST", "/"),
+]
+
+class TestReproduzir(unittest.TestCase):
+
+    def test_ler_captura(self):
+        """Testa se a leitura aceita registros puros, linhas de log e a exportação do Cloud Logging"""
+        with tempfile.TemporaryDirectory() as pasta:
+            jsonl = os.path.join(pasta, "captura.jsonl")
+            with open(jsonl, "w") as f:
+                f.write(json.dumps(CAPTURA[1]) + "\n")
+                f.write(json.dumps({"severity": "INFO", "captura": CAPTURA[0]}) + "\n")
+                f.write(json.dumps({"severity": "INFO", "message": "outra coisa"}) + "\n")
+            exportacao = os.path.join(pasta, "exportacao.json")
+            with open(exportacao, "w") as f:
+                json.dump([{"jsonPayload": {"captura": r}} for r in CAPTURA[:2]], f)
+
+            self.assertEqual(ler_captura(jsonl), CAPTURA[:2])
+            self.assertEqual(ler_captura(exportacao), CAPTURA[:2])
+
+    def test_gerador_deterministico(self):
+        """Testa se a mesma semente gera as mesmas requisições, com a forma do registro"""
+        primeiro = [Gerador(100, semente=7).requisicao(r) for r in CAPTURA]
+        segundo = [Gerador(100, semente=7).requisicao(r) for r in CAPTURA]
+
+        self.assertEqual(primeiro, segundo)
+        metodo, caminho, consulta, corpo = primeiro[2]
+        self.assertEqual(len(consulta["ids"].split(",")), 3)
+        self.assertEqual(len(json.loads(primeiro[3][3])["itens"]), 4)
+        self.assertEqual(json.loads(primeiro[4][3]), {"status": "ENVIADO"})
+        self.assertEqual(primeiro[8][:2], ("POST", "/"))
+
+    def test_remocoes_sem_repetir(self):
+        """Testa se cada remoção usa um pedido diferente, fora dos usados nas leituras"""
+        gerador = Gerador(100)
+        caminhos = [gerador.requisicao(CAPTURA[5])[1] for _ in range(3)]
+
+        self.assertEqual(caminhos, ["/pedidos/pedido-000099", "/pedidos/pedido-000098", "/pedidos/pedido-000097"])
+
+    def test_preparar_velocidade(self):
+        """Testa se os instantes são divididos pela velocidade e funções fora da suíte são ignoradas"""
+        plano, ignorados = preparar(CAPTURA, pedidos=100, velocidade=10)
+
+        self.assertEqual(ignorados, 1)
+        self.assertEqual(len(plano), 8)
+        self.assertAlmostEqual(plano[-1][0], 0.07)
+
+    def test_percentil(self):
+        """Testa o percentil por posição"""
+        valores = list(range(1, 101))
+
+        self.assertEqual(percentil(valores, 50), 50)
+        self.assertEqual(percentil(valores, 99), 99)
+        self.assertEqual(percentil([5], 90), 5)
+        self.assertIsNone(percentil([], 50))
+
+    def test_reproducao_local(self):
+        """Testa se a captura reproduzida contra os serviços locais responde sem erros"""
+        ambiente = Ambiente()
+        ambiente.carregar_pedidos(100)
+        plano, _ = preparar(CAPTURA, pedidos=100, velocidade=0)
+
+        resultados, duracao = reproduzir(ambiente, plano, concorrencia=4, velocidade=0)
+        linhas = relatorio(resultados, duracao)
+
+        self.assertEqual(linhas["total"]["requisicoes"], 8)
+        self.assertEqual(linhas["total"]["erros"], 0)
+        self.assertEqual(linhas["deletar_pedido DELETE /pedidos/{id}"]["requisicoes"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,17 @@
+import os
+
+# Cloud Run informa a porta em $PORT
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Processos e threads por instância; as threads de um processo compartilham
+# o cliente do Firestore e os caches dos serviços
+workers = int(os.environ.get("GATEWAY_WORKERS", "1"))
+threads = int(os.environ.get("GATEWAY_THREADS", "8"))
+worker_class = "gthread"
+
+# O tempo de cada requisição é controlado pelo Cloud Run e pelos prazos dos serviços
+timeout = 0
+
+# Sem preload: o cliente gRPC do Firestore não sobrevive ao fork, então cada
+# processo carrega os serviços depois de criado
+preload_app = False
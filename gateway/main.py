@@ -0,0 +1,132 @@
+"""Servidor único opcional que monta as funções HTTP dos serviços atrás de um roteador.
+
+Cada serviço continua implantável como Cloud Function própria; aqui os mesmos
+`main.py` são carregados num só processo, que passa a ter um único app do
+Firebase Admin e uma única cópia dos módulos compartilhados (limitador,
+resiliência, modelo, repositório...), com seus caches e estado. O cliente do
+Firestore vem de `repositorio.cliente_firestore()`, o mesmo para todos os
+serviços, e só é criado no backend firestore.
+
+Cada função fica sob o nome com que é implantada, mantendo os caminhos
+internos (ex.: GET /detalhar-pedido/pedidos/<id>).
+"""
+import importlib.util
+import json
+import os
+import sys
+import firebase_admin
+from firebase_admin import credentials
+from flask import Flask, request
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+# Nome de implantação -> (pasta do serviço, função de entrada)
+SERVICOS = {
+    "salvar-pedido": ("services_salvar-pedido", "salvar_pedido"),
+    "listar-pedidos": ("services_listar-pedidos", "listar_pedidos"),
+    "detalhar-pedido": ("services_detalhar-pedido", "obter_pedido"),
+    "atualizar-status-pedido": ("services_atualizar-status-pedido", "atualizar_status_pedido"),
+    "delete-pedido": ("services_delete-pedido", "deletar_pedido"),
+    "logar-usuario": ("services_logar-usuario", "login_user"),
+    "registrar-usuario": ("services_registrar-usuario", "register_user"),
+    "validar-token": ("services_validar-token", "validate_token"),
+}
+
+# Pasta que contém as pastas dos serviços
+RAIZ = os.environ.get("GATEWAY_RAIZ", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Serviços montados, separados por vírgula (vazio monta todos)
+HABILITADOS = [s.strip() for s in os.environ.get("GATEWAY_SERVICOS", "").split(",") if s.strip()]
+
+METODOS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+
+class CopiasDivergentes(Exception):
+    """Dois serviços trazem versões diferentes de um mesmo módulo compartilhado."""
+
+
+# Inicializa Firebase Admin SDK (os serviços reaproveitam o app já inicializado)
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+
+def modulos_auxiliares(pasta):
+    """Módulos ao lado do main.py do serviço, exceto variantes do main, testes e benchmarks."""
+    return {
+        nome[:-3] for nome in os.listdir(pasta)
+        if nome.endswith(".py") and not nome.startswith(("main", "test_", "bench_"))
+    }
+
+
+def verificar_copias(pastas):
+    """Os serviços compartilham o mesmo sys.modules: um módulo com o mesmo nome
+    em dois serviços precisa ter conteúdo idêntico."""
+    vistos = {}
+    for pasta in pastas:
+        for nome in sorted(modulos_auxiliares(pasta)):
+            with open(os.path.join(pasta, nome + ".py"), "rb") as f:
+                conteudo = f.read()
+            if nome in vistos and vistos[nome][1] != conteudo:
+                raise CopiasDivergentes(f"{nome}.py difere entre {vistos[nome][0]} e {pasta}")
+            vistos.setdefault(nome, (pasta, conteudo))
+
+
+def carregar_servico(pasta, entrada):
+    """Executa o main.py do serviço e retorna a função de entrada."""
+    nome_modulo = os.path.basename(pasta).replace("-", "_")
+    spec = importlib.util.spec_from_file_location(nome_modulo, os.path.join(pasta, "main.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome_modulo] = modulo
+    spec.loader.exec_module(modulo)
+    return getattr(modulo, entrada)
+
+
+def criar_app_servico(nome, handler):
+    """App WSGI que repassa qualquer caminho e método à função, como o Functions Framework."""
+    app = Flask(nome)
+
+    @app.route("/", defaults={"caminho": ""}, methods=METODOS)
+    @app.route("/<path:caminho>", methods=METODOS)
+    def despachar(caminho):
+        return handler(request)
+
+    # /<serviço> sem barra final chega com PATH_INFO vazio; responde como "/" em vez de redirecionar
+    wsgi_app = app.wsgi_app
+
+    def sem_redirecionamento(environ, start_response):
+        environ["PATH_INFO"] = environ.get("PATH_INFO") or "/"
+        return wsgi_app(environ, start_response)
+
+    app.wsgi_app = sem_redirecionamento
+    return app
+
+
+def criar_app(servicos=None):
+    """Monta cada serviço sob /<nome de implantação>; a raiz responde a verificação de saúde."""
+    servicos = servicos or HABILITADOS or list(SERVICOS)
+    desconhecidos = [s for s in servicos if s not in SERVICOS]
+    if desconhecidos:
+        raise ValueError(f"Serviços desconhecidos: {', '.join(desconhecidos)}")
+
+    pastas = [os.path.join(RAIZ, SERVICOS[s][0]) for s in servicos]
+    verificar_copias(pastas)
+    for pasta in pastas:
+        if pasta not in sys.path:
+            sys.path.append(pasta)
+
+    montados = {}
+    for nome, pasta in zip(servicos, pastas):
+        handler = carregar_servico(pasta, SERVICOS[nome][1])
+        montados["/" + nome] = criar_app_servico(nome, handler)
+
+    raiz = Flask(__name__)
+
+    @raiz.route("/")
+    def saude():
+        return json.dumps({"status": "ok", "servicos": servicos}), 200, {"Content-Type": "application/json"}
+
+    raiz.wsgi_app = DispatcherMiddleware(raiz.wsgi_app, montados)
+    return raiz
+
+
+app = criar_app()
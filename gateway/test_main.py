@@ -0,0 +1,80 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest.mock import patch, MagicMock
+from main import SERVICOS, CopiasDivergentes, app, criar_app, verificar_copias
+from repositorio import cliente_firestore
+
+# Cliente do Firestore dos serviços montados (repositorio vem das pastas dos serviços)
+db = cliente_firestore()
+
+class TestGateway(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_saude_lista_servicos(self):
+        """Testa se a raiz responde com todos os serviços montados"""
+        response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(json.loads(response.data)["servicos"]), sorted(SERVICOS))
+
+    def test_cliente_compartilhado(self):
+        """Testa se todos os serviços com Firestore usam o mesmo cliente"""
+        for pasta, _ in SERVICOS.values():
+            modulo = sys.modules[pasta.replace("-", "_")]
+            if hasattr(modulo, "db"):
+                self.assertIs(modulo.db, db)
+
+    def test_preflight_cors(self):
+        """Testa se o OPTIONS chega à função, que responde o preflight"""
+        response = self.client.options("/salvar-pedido")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.headers["Access-Control-Allow-Origin"], "*")
+
+    @patch("services_detalhar_pedido.verificar_autenticacao")
+    @patch.object(db, "collection")
+    def test_caminho_relativo_ao_servico(self, mock_collection, mock_verificar_autenticacao):
+        """Testa se a função recebe o caminho sem o prefixo do serviço"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        mock_doc = MagicMock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {"status": "PENDENTE", "user_id": "user123"}
+        mock_collection.return_value.document.return_value.get.return_value = mock_doc
+
+        response = self.client.get("/detalhar-pedido/pedidos/123")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)["id"], "123")
+        mock_collection.return_value.document.assert_called_with("123")
+
+    @patch("services_validar_token.verificar_autenticacao")
+    def test_servico_sem_firestore(self, mock_verificar_autenticacao):
+        """Testa se os serviços de autenticação também são roteados"""
+        mock_verificar_autenticacao.return_value = (None, json.dumps({"error": "Token inválido"}), 401)
+
+        response = self.client.post("/validar-token/")
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_copias_divergentes(self):
+        """Testa se módulos compartilhados com conteúdo diferente impedem a inicialização"""
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            for pasta, conteudo in ((a, "X = 1\n"), (b, "X = 2\n")):
+                with open(os.path.join(pasta, "limitador.py"), "w") as f:
+                    f.write(conteudo)
+
+            with self.assertRaises(CopiasDivergentes):
+                verificar_copias([a, b])
+
+    def test_servico_desconhecido(self):
+        """Testa se um nome fora da tabela de serviços é recusado"""
+        with self.assertRaises(ValueError):
+            criar_app(["inexistente"])
+
+if __name__ == '__main__':
+    unittest.main()
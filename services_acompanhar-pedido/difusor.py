@@ -0,0 +1,108 @@
+import queue
+import threading
+
+# Eventos guardados por assinante antes de descartar os mais antigos
+TAMANHO_FILA = 100
+
+
+class Assinatura:
+    """Fila de eventos de um assinante (uma conexão SSE ou long-poll)."""
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.fila = queue.Queue(maxsize=TAMANHO_FILA)
+
+    def entregar(self, evento):
+        while True:
+            try:
+                self.fila.put_nowait(evento)
+                return
+            except queue.Full:
+                # Assinante lento: descarta o evento mais antigo
+                try:
+                    self.fila.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def proximo(self, timeout):
+        """Retorna o próximo evento ou None se nada chegar dentro do timeout."""
+        try:
+            return self.fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Difusor:
+    """Mantém um único listener do Firestore por chave (pedido ou usuário) e
+    repassa cada evento a todos os assinantes desta instância.
+
+    `criar_listener(chave, publicar)` deve iniciar a escuta e retornar um objeto
+    com `unsubscribe()`; `publicar(chave, evento)` também pode ser chamado
+    diretamente por quem já conhece a alteração (ex.: atualizar_status_pedido).
+    """
+
+    def __init__(self, criar_listener):
+        self.criar_listener = criar_listener
+        self._assinantes = {}
+        self._listeners = {}
+        self._ultimos = {}
+        self._lock = threading.Lock()
+
+    def assinar(self, chave):
+        assinatura = Assinatura(chave)
+        with self._lock:
+            assinantes = self._assinantes.setdefault(chave, set())
+            iniciar = not assinantes
+            assinantes.add(assinatura)
+            # Quem entra depois do listener já ativo recebe o estado atual
+            for evento in self._ultimos.get(chave, {}).values():
+                assinatura.entregar(evento)
+        if iniciar:
+            try:
+                listener = self.criar_listener(chave, self.publicar)
+            except Exception:
+                # Sem listener a chave não pode ficar com assinantes, senão os
+                # próximos nunca tentariam criá-lo de novo
+                with self._lock:
+                    assinantes.discard(assinatura)
+                    if not assinantes and self._assinantes.get(chave) is assinantes:
+                        del self._assinantes[chave]
+                        self._ultimos.pop(chave, None)
+                raise
+            with self._lock:
+                if chave in self._assinantes and chave not in self._listeners:
+                    self._listeners[chave] = listener
+                    listener = None
+            if listener is not None:
+                listener.unsubscribe()
+        return assinatura
+
+    def cancelar(self, assinatura):
+        listener = None
+        with self._lock:
+            assinantes = self._assinantes.get(assinatura.chave)
+            if assinantes is None:
+                return
+            assinantes.discard(assinatura)
+            if not assinantes:
+                del self._assinantes[assinatura.chave]
+                self._ultimos.pop(assinatura.chave, None)
+                listener = self._listeners.pop(assinatura.chave, None)
+        if listener is not None:
+            listener.unsubscribe()
+
+    def publicar(self, chave, evento):
+        with self._lock:
+            if chave not in self._assinantes:
+                return
+            ultimos = self._ultimos.setdefault(chave, {})
+            if ultimos.get(evento["id"]) == evento:
+                return  # Nada mudou (ex.: snapshot repetido)
+            ultimos[evento["id"]] = evento
+            assinantes = list(self._assinantes[chave])
+        for assinatura in assinantes:
+            assinatura.entregar(evento)
+
+    def total_assinantes(self, chave):
+        with self._lock:
+            return len(self._assinantes.get(chave, ()))
@@ -0,0 +1,183 @@
+import functions_framework
+import json
+import os
+import time
+import firebase_admin
+from firebase_admin import auth, credentials
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from flask import request, Response, stream_with_context
+from captura import capturar
+from difusor import Difusor
+from limitador import LimitadorUsuario
+from perfilador import perfilar
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o Firestore. Serviço só do Firestore (escuta em tempo real (on_snapshot)): falha na
+# carga em vez de ler outro banco que o do resto dos serviços
+if os.environ.get("PEDIDOS_BACKEND", "firestore") != "firestore":
+    raise RuntimeError("Este serviço requer PEDIDOS_BACKEND=firestore")
+db = firestore.Client()
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("acompanhar_pedido", capacidade=20, taxa=1)
+
+# Duração máxima de uma conexão SSE (o cliente reconecta sozinho) e intervalo de heartbeat
+SSE_DURACAO_MAXIMA = float(os.environ.get("SSE_DURACAO_MAXIMA", "300"))
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", "15"))
+
+# Espera máxima do long-poll
+LONGPOLL_ESPERA_MAXIMA = float(os.environ.get("LONGPOLL_ESPERA_MAXIMA", "25"))
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+def evento_do_documento(doc):
+    """Converte um snapshot de pedido no evento enviado aos assinantes."""
+    if not doc.exists:
+        return {"id": doc.id, "removido": True}
+    pedido_data = doc.to_dict()
+    return {
+        "id": doc.id,
+        "status": pedido_data.get("status", "DESCONHECIDO"),
+        "ultima_atualizacao": pedido_data.get("ultima_atualizacao", pedido_data.get("data_criacao", "")),
+    }
+
+
+def criar_listener(chave, publicar):
+    """Inicia o listener do Firestore de um pedido ("pedido:<id>") ou usuário ("usuario:<uid>")."""
+    tipo, valor = chave.split(":", 1)
+
+    if tipo == "pedido":
+        def ao_alterar_pedido(docs, changes, read_time):
+            for doc in docs:
+                publicar(chave, evento_do_documento(doc))
+        return db.collection("pedidos").document(valor).on_snapshot(ao_alterar_pedido)
+
+    def ao_alterar_usuario(docs, changes, read_time):
+        for change in changes:
+            if change.type.name == "REMOVED":
+                publicar(chave, {"id": change.document.id, "removido": True})
+            else:
+                publicar(chave, evento_do_documento(change.document))
+    consulta = db.collection("pedidos").where(filter=FieldFilter("user_id", "==", valor))
+    return consulta.on_snapshot(ao_alterar_usuario)
+
+
+# Um listener por pedido/usuário, compartilhado por todas as conexões da instância
+difusor = Difusor(criar_listener)
+
+
+def formatar_sse(evento):
+    return f"event: status\nid: {evento.get('ultima_atualizacao', '')}\ndata: {json.dumps(evento)}\n\n"
+
+
+def transmitir_sse(assinatura):
+    """Gera o fluxo SSE até a duração máxima, com heartbeats para manter a conexão.
+
+    A assinatura é cancelada no fechamento da resposta (ver acompanhar_pedido),
+    que acontece mesmo se o fluxo nunca for lido.
+    """
+    yield f"retry: {int(SSE_HEARTBEAT * 1000)}\n\n"
+    fim = time.monotonic() + SSE_DURACAO_MAXIMA
+    while True:
+        restante = fim - time.monotonic()
+        if restante <= 0:
+            return
+        evento = assinatura.proximo(min(SSE_HEARTBEAT, restante))
+        yield formatar_sse(evento) if evento else ": ping\n\n"
+
+
+def aguardar_longpoll(assinatura, desde, espera):
+    """Retorna os eventos posteriores a `desde`, aguardando até `espera` segundos pelo primeiro."""
+    fim = time.monotonic() + espera
+    eventos = []
+    try:
+        while True:
+            restante = fim - time.monotonic()
+            evento = assinatura.proximo(max(restante, 0) if not eventos else 0)
+            if evento is None:
+                if eventos or restante <= 0:
+                    return eventos
+                continue
+            if evento.get("removido") or evento.get("ultima_atualizacao", "") > desde:
+                eventos.append(evento)
+    finally:
+        difusor.cancelar(assinatura)
+
+
+@functions_framework.http
+@capturar
+@perfilar
+def acompanhar_pedido(request):
+    """Transmite as mudanças de status de um pedido (ou dos pedidos do usuário) via SSE ou long-poll."""
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization, Last-Event-ID",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    if request.method != "GET":
+        return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+    try:
+        # /pedidos/<id>/eventos acompanha um pedido; /eventos acompanha os pedidos do usuário
+        path_parts = request.path.strip("/").split("/")
+        if len(path_parts) == 3 and path_parts[0] == "pedidos" and path_parts[2] == "eventos":
+            chave = "pedido:" + path_parts[1]
+        elif path_parts == ["eventos"]:
+            chave = "usuario:" + user["uid"]
+        else:
+            return json.dumps({"error": "Caminho inválido"}), 400, cors_headers
+
+        if request.args.get("modo") == "longpoll":
+            desde = request.args.get("desde", request.headers.get("Last-Event-ID", ""))
+            try:
+                espera = min(float(request.args.get("espera", LONGPOLL_ESPERA_MAXIMA)), LONGPOLL_ESPERA_MAXIMA)
+            except ValueError:
+                return json.dumps({"error": "Parâmetro espera inválido"}), 400, cors_headers
+
+            eventos = aguardar_longpoll(difusor.assinar(chave), desde, espera)
+            return json.dumps({"eventos": eventos}), 200, cors_headers
+
+        headers = dict(cors_headers, **{"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        assinatura = difusor.assinar(chave)
+        response = Response(stream_with_context(transmitir_sse(assinatura)),
+                            status=200, mimetype="text/event-stream", headers=headers)
+        response.call_on_close(lambda: difusor.cancelar(assinatura))
+        return response
+
+    except Exception as e:
+        return json.dumps({"error": str(e)}), 500, cors_headers
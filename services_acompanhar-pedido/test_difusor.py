@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+from difusor import Difusor
+
+class TestDifusor(unittest.TestCase):
+
+    def test_um_listener_para_varios_assinantes(self):
+        """Testa se vários assinantes da mesma chave compartilham um único listener"""
+        criar_listener = MagicMock()
+        difusor = Difusor(criar_listener)
+
+        a = difusor.assinar("pedido:1")
+        b = difusor.assinar("pedido:1")
+        difusor.publicar("pedido:1", {"id": "1", "status": "ENVIADO"})
+
+        criar_listener.assert_called_once()
+        self.assertEqual(a.proximo(0.1)["status"], "ENVIADO")
+        self.assertEqual(b.proximo(0.1)["status"], "ENVIADO")
+
+    def test_listener_encerrado_com_ultimo_assinante(self):
+        """Testa se o listener é encerrado quando o último assinante sai"""
+        listener = MagicMock()
+        difusor = Difusor(lambda chave, publicar: listener)
+
+        a = difusor.assinar("pedido:1")
+        b = difusor.assinar("pedido:1")
+        difusor.cancelar(a)
+        listener.unsubscribe.assert_not_called()
+        difusor.cancelar(b)
+        listener.unsubscribe.assert_called_once()
+        self.assertEqual(difusor.total_assinantes("pedido:1"), 0)
+
+    def test_novo_assinante_recebe_estado_atual(self):
+        """Testa se quem assina depois recebe o último estado conhecido"""
+        difusor = Difusor(MagicMock())
+        difusor.assinar("pedido:1")
+        difusor.publicar("pedido:1", {"id": "1", "status": "ENVIADO"})
+
+        tardio = difusor.assinar("pedido:1")
+        self.assertEqual(tardio.proximo(0.1)["status"], "ENVIADO")
+
+    def test_evento_repetido_ignorado(self):
+        """Testa se eventos idênticos não são reenviados"""
+        difusor = Difusor(MagicMock())
+        a = difusor.assinar("pedido:1")
+        difusor.publicar("pedido:1", {"id": "1", "status": "ENVIADO"})
+        difusor.publicar("pedido:1", {"id": "1", "status": "ENVIADO"})
+
+        self.assertIsNotNone(a.proximo(0.1))
+        self.assertIsNone(a.proximo(0.05))
+
+    def test_falha_ao_criar_listener(self):
+        """Testa se uma falha ao criar o listener não deixa a chave sem listener para os próximos"""
+        listener = MagicMock()
+        criar_listener = MagicMock(side_effect=[RuntimeError("cota esgotada"), listener])
+        difusor = Difusor(criar_listener)
+
+        with self.assertRaises(RuntimeError):
+            difusor.assinar("pedido:1")
+        self.assertEqual(difusor.total_assinantes("pedido:1"), 0)
+
+        assinatura = difusor.assinar("pedido:1")
+        self.assertEqual(criar_listener.call_count, 2)
+        difusor.cancelar(assinatura)
+        listener.unsubscribe.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
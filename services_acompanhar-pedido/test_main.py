@@ -0,0 +1,114 @@
+import unittest
+import json
+import threading
+from unittest.mock import patch, MagicMock
+from flask import Flask, request
+import main
+from main import acompanhar_pedido
+from difusor import Difusor
+
+class TestAcompanharPedido(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.client = self.app.test_client()
+        self.listener = MagicMock()
+        self.publicar = {}
+
+        def criar_listener(chave, publicar):
+            self.publicar[chave] = publicar
+            return self.listener
+
+        main.difusor = Difusor(criar_listener)
+
+    def test_acompanhar_pedido_opcoes(self):
+        """Testa se a função responde corretamente a requisições OPTIONS"""
+        with self.app.test_request_context('/pedidos/123/eventos', method="OPTIONS"):
+            response = acompanhar_pedido(request)
+
+        self.assertEqual(response[1], 204)
+
+    @patch("main.verificar_autenticacao")
+    def test_acompanhar_pedido_sem_autenticacao(self, mock_verificar_autenticacao):
+        """Testa se a função retorna erro quando o usuário não está autenticado"""
+        mock_verificar_autenticacao.return_value = (None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401)
+
+        with self.app.test_request_context('/pedidos/123/eventos', method="GET"):
+            response = acompanhar_pedido(request)
+
+        self.assertEqual(response[1], 401)
+
+    @patch("main.verificar_autenticacao")
+    def test_acompanhar_pedido_caminho_invalido(self, mock_verificar_autenticacao):
+        """Testa se a função rejeita caminhos desconhecidos"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/pedidos/123', method="GET"):
+            response = acompanhar_pedido(request)
+
+        self.assertEqual(response[1], 400)
+
+    @patch("main.verificar_autenticacao")
+    def test_acompanhar_pedido_longpoll_recebe_mudanca(self, mock_verificar_autenticacao):
+        """Testa se o long-poll retorna assim que o status muda"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        def publicar_depois():
+            while "pedido:123" not in self.publicar:
+                pass
+            self.publicar["pedido:123"]("pedido:123", {"id": "123", "status": "ENVIADO",
+                                                        "ultima_atualizacao": "2024-01-02T00:00:00Z"})
+
+        threading.Thread(target=publicar_depois).start()
+        with self.app.test_request_context('/pedidos/123/eventos?modo=longpoll&desde=2024-01-01T00:00:00Z&espera=2', method="GET"):
+            response = acompanhar_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        eventos = json.loads(response[0])["eventos"]
+        self.assertEqual(eventos[0]["status"], "ENVIADO")
+        self.listener.unsubscribe.assert_called_once()
+
+    @patch("main.verificar_autenticacao")
+    def test_acompanhar_pedido_longpoll_sem_mudanca(self, mock_verificar_autenticacao):
+        """Testa se o long-poll ignora o estado já conhecido e expira sem eventos"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        main.difusor = Difusor(lambda chave, publicar: publicar(chave, {
+            "id": "123", "status": "PENDENTE", "ultima_atualizacao": "2024-01-01T00:00:00Z"}) or self.listener)
+
+        with self.app.test_request_context('/pedidos/123/eventos?modo=longpoll&desde=2024-01-01T00:00:00Z&espera=0.1', method="GET"):
+            response = acompanhar_pedido(request)
+
+        self.assertEqual(json.loads(response[0])["eventos"], [])
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.SSE_DURACAO_MAXIMA", 0.2)
+    def test_acompanhar_pedido_sse(self, mock_verificar_autenticacao):
+        """Testa se o fluxo SSE envia o estado atual e encerra o listener ao fechar"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        main.difusor = Difusor(lambda chave, publicar: publicar(chave, {
+            "id": "123", "status": "ENVIADO", "ultima_atualizacao": "2024-01-02T00:00:00Z"}) or self.listener)
+
+        with self.app.test_request_context('/eventos', method="GET"):
+            response = acompanhar_pedido(request)
+            corpo = "".join(response.response)
+            response.close()
+
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertIn("event: status", corpo)
+        self.assertIn('"status": "ENVIADO"', corpo)
+        self.listener.unsubscribe.assert_called_once()
+
+    @patch("main.verificar_autenticacao")
+    def test_acompanhar_pedido_sse_fechado_sem_leitura(self, mock_verificar_autenticacao):
+        """Testa se a assinatura é cancelada quando a resposta fecha antes de o fluxo ser lido"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/pedidos/123/eventos', method="GET"):
+            response = acompanhar_pedido(request)
+            response.close()
+
+        self.listener.unsubscribe.assert_called_once()
+        self.assertEqual(main.difusor.total_assinantes("pedido:123"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
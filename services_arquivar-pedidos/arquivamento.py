@@ -0,0 +1,129 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from google.api_core import exceptions as gexc
+from google.cloud.firestore_v1.base_query import FieldFilter
+from arquivo import COLECAO_ARQUIVO, COLECAO_INDICE, FORMATO, compactar, particao
+
+# Idade mínima (dias desde a criação) para um pedido ser arquivado
+IDADE_DIAS = float(os.environ.get("ARQUIVO_IDADE_DIAS", "365"))
+
+# Só pedidos em status terminal saem da coleção quente
+STATUS_TERMINAIS = [s.strip().upper() for s in os.environ.get("ARQUIVO_STATUS_TERMINAIS", "ENTREGUE,CANCELADO").split(",")
+                    if s.strip()]
+
+# Pedidos lidos por página
+TAMANHO_PAGINA = int(os.environ.get("ARQUIVO_TAMANHO_PAGINA", "1000"))
+
+# Pedidos por parte: cada parte é gravada em um lote com 1 + 2 escritas por pedido (limite de 500)
+PEDIDOS_POR_PARTE = min(int(os.environ.get("ARQUIVO_PEDIDOS_POR_PARTE", "200")), 249)
+
+# Tamanho máximo da parte compactada (limite do documento do Firestore é 1 MiB)
+PARTE_MAXIMA_BYTES = int(os.environ.get("ARQUIVO_PARTE_MAXIMA_BYTES", str(900 * 1024)))
+
+# Tempo de trabalho por chamada; o que sobrar é arquivado na próxima execução
+DURACAO_MAXIMA = float(os.environ.get("ARQUIVO_DURACAO_MAXIMA", "240"))
+
+
+def corte(idade_dias=IDADE_DIAS, agora=None):
+    """Data de criação (ISO 8601) abaixo da qual os pedidos são arquivados."""
+    return ((agora or datetime.utcnow()) - timedelta(days=idade_dias)).isoformat() + "Z"
+
+
+def montar_consulta(db, limite_data, status=None):
+    return (
+        db.collection("pedidos")
+        .where(filter=FieldFilter("status", "in", status or STATUS_TERMINAIS))
+        .where(filter=FieldFilter("data_criacao", "<", limite_data))
+        .order_by("data_criacao")
+    )
+
+
+def contar(db, limite_data):
+    """Dry-run: quantidade de pedidos que seriam arquivados."""
+    resultado = montar_consulta(db, limite_data).count().get()
+    return int(resultado[0][0].value)
+
+
+def dividir_em_partes(docs, por_parte=PEDIDOS_POR_PARTE, maximo_bytes=PARTE_MAXIMA_BYTES):
+    """Agrupa os documentos por dia e gera (partição, [docs], dados compactados).
+
+    Uma parte que passe do tamanho máximo depois de compactada é dividida ao meio.
+    """
+    por_dia = {}
+    for doc in docs:
+        por_dia.setdefault(particao(doc.to_dict()), []).append(doc)
+
+    pendentes = [(dia, grupo[i:i + por_parte]) for dia, grupo in sorted(por_dia.items())
+                 for i in range(0, len(grupo), por_parte)]
+    while pendentes:
+        dia, grupo = pendentes.pop(0)
+        dados = compactar({doc.id: doc.to_dict() for doc in grupo})
+        if len(dados) > maximo_bytes and len(grupo) > 1:
+            meio = len(grupo) // 2
+            pendentes[:0] = [(dia, grupo[:meio]), (dia, grupo[meio:])]
+            continue
+        yield dia, grupo, dados
+
+
+class Arquivamento:
+    """Move pedidos antigos e terminados de `pedidos` para partes compactadas por dia.
+
+    Cada parte é gravada no mesmo lote que as entradas do índice e a remoção
+    dos pedidos; a remoção exige que o pedido não tenha mudado desde a
+    leitura, então um pedido alterado no meio do caminho faz o lote inteiro
+    ser descartado e tentado de novo na próxima execução.
+    """
+
+    def __init__(self, db, duracao_maxima=DURACAO_MAXIMA, tamanho_pagina=TAMANHO_PAGINA):
+        self.db = db
+        self.duracao_maxima = duracao_maxima
+        self.tamanho_pagina = tamanho_pagina
+
+    def executar(self, limite_data):
+        """Arquiva páginas até acabar ou esgotar a duração; retorna os contadores."""
+        fim = time.monotonic() + self.duracao_maxima
+        totais = {"arquivados": 0, "partes": 0, "conflitos": 0, "bytes": 0, "concluido": False}
+        consulta = montar_consulta(self.db, limite_data)
+        ultimo = None
+
+        while time.monotonic() < fim:
+            pagina = consulta.start_after(ultimo) if ultimo is not None else consulta
+            docs = list(pagina.limit(self.tamanho_pagina).stream())
+            if not docs:
+                totais["concluido"] = True
+                break
+            for dia, grupo, dados in dividir_em_partes(docs):
+                if self._gravar_parte(dia, grupo, dados):
+                    totais["arquivados"] += len(grupo)
+                    totais["partes"] += 1
+                    totais["bytes"] += len(dados)
+                else:
+                    totais["conflitos"] += len(grupo)
+            # Pedidos arquivados saem da consulta; o cursor só pula os que ficaram (conflitos)
+            ultimo = docs[-1]
+            if len(docs) < self.tamanho_pagina:
+                totais["concluido"] = True
+                break
+        return totais
+
+    def _gravar_parte(self, dia, grupo, dados):
+        parte_id = f"{dia}-{uuid.uuid4().hex[:12]}"
+        batch = self.db.batch()
+        batch.set(self.db.collection(COLECAO_ARQUIVO).document(parte_id), {
+            "particao": dia,
+            "formato": FORMATO,
+            "pedidos": len(grupo),
+            "dados": dados,
+            "criado_em": datetime.utcnow().isoformat() + "Z",
+        })
+        indice = self.db.collection(COLECAO_INDICE)
+        for doc in grupo:
+            batch.set(indice.document(doc.id), {"parte": parte_id, "user_id": (doc.to_dict() or {}).get("user_id")})
+            batch.delete(doc.reference, option=self.db.write_option(last_update_time=doc.update_time))
+        try:
+            batch.commit()
+            return True
+        except gexc.FailedPrecondition:
+            return False
@@ -0,0 +1,95 @@
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+# Partes do arquivo: pedidos de um mesmo dia, compactados juntos (id "<AAAA-MM-DD>-<sufixo>")
+COLECAO_ARQUIVO = "pedidos_arquivo"
+
+# Índice: um documento pequeno por pedido arquivado, apontando para a sua parte
+COLECAO_INDICE = "pedidos_arquivo_indice"
+
+FORMATO = "json+zlib"
+
+# Partes descompactadas mantidas em memória (são imutáveis depois de gravadas)
+PARTES_EM_CACHE = 16
+
+
+def particao(pedido):
+    """Dia (AAAA-MM-DD) de criação do pedido, usado para agrupar as partes."""
+    return (pedido.get("data_criacao") or "0000-00-00")[:10]
+
+
+def compactar(pedidos):
+    """Serializa {id: pedido} em JSON compactado com zlib."""
+    return zlib.compress(json.dumps(pedidos, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def descompactar(dados):
+    return json.loads(zlib.decompress(dados).decode("utf-8"))
+
+
+class CacheArquivo:
+    """LRU pequeno das partes já descompactadas."""
+
+    def __init__(self, tamanho=PARTES_EM_CACHE):
+        self.tamanho = tamanho
+        self._partes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, parte_id):
+        with self._lock:
+            pedidos = self._partes.get(parte_id)
+            if pedidos is not None:
+                self._partes.move_to_end(parte_id)
+            return pedidos
+
+    def guardar(self, parte_id, pedidos):
+        with self._lock:
+            self._partes[parte_id] = pedidos
+            self._partes.move_to_end(parte_id)
+            while len(self._partes) > self.tamanho:
+                self._partes.popitem(last=False)
+
+
+cache = CacheArquivo()
+
+
+def guardar_parte(parte_id, parte):
+    """Descompacta a parte lida e a guarda no cache; None se a parte não existe."""
+    if not parte.exists:
+        return None
+    pedidos = descompactar(parte.to_dict()["dados"])
+    cache.guardar(parte_id, pedidos)
+    return pedidos
+
+
+def buscar_arquivado(db, pedido_id, ler=None):
+    """Procura o pedido no arquivo pelo índice; retorna os dados ou None.
+
+    `ler(ref)` faz a leitura do documento (padrão: ref.get()); o serviço
+    passa uma função com prazo e circuit breaker.
+    """
+    ler = ler or (lambda ref: ref.get())
+    indice = ler(db.collection(COLECAO_INDICE).document(pedido_id))
+    if not indice.exists:
+        return None
+    parte_id = indice.to_dict()["parte"]
+
+    pedidos = cache.obter(parte_id)
+    if pedidos is None:
+        pedidos = guardar_parte(parte_id, ler(db.collection(COLECAO_ARQUIVO).document(parte_id)))
+    return pedidos.get(pedido_id) if pedidos is not None else None
+
+
+async def buscar_arquivado_async(db, pedido_id, ler):
+    """Como `buscar_arquivado`, com `ler(ref)` assíncrono (Firestore AsyncClient)."""
+    indice = await ler(db.collection(COLECAO_INDICE).document(pedido_id))
+    if not indice.exists:
+        return None
+    parte_id = indice.to_dict()["parte"]
+
+    pedidos = cache.obter(parte_id)
+    if pedidos is None:
+        pedidos = guardar_parte(parte_id, await ler(db.collection(COLECAO_ARQUIVO).document(parte_id)))
+    return pedidos.get(pedido_id) if pedidos is not None else None
@@ -0,0 +1,103 @@
+import functions_framework
+import json
+import os
+import firebase_admin
+from firebase_admin import auth, credentials
+from google.cloud import firestore
+from flask import request
+from arquivamento import IDADE_DIAS, Arquivamento, contar, corte
+from captura import capturar
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from resiliencia import resposta_degradada
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o Firestore. Serviço só do Firestore (partições do arquivo compactado): falha na
+# carga em vez de ler outro banco que o do resto dos serviços
+if os.environ.get("PEDIDOS_BACKEND", "firestore") != "firestore":
+    raise RuntimeError("Este serviço requer PEDIDOS_BACKEND=firestore")
+db = firestore.Client()
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("arquivar_pedidos", capacidade=5, taxa=1)
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+@functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
+def arquivar_pedidos(request):
+    """Move pedidos antigos em status terminal para o arquivo compactado (uso operacional).
+
+    POST {"idade_dias": 365, "dry_run": false}; pensado para ser chamado
+    periodicamente (ex.: Cloud Scheduler). Retorna 202 quando ainda restam
+    pedidos para a próxima execução.
+    """
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Apenas administradores (custom claim `admin`)
+    if not user.get("admin"):
+        return json.dumps({"error": "Acesso restrito a administradores"}), 403, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        if request.method != "POST":
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        dados = request.get_json(silent=True) or {}
+        idade_dias = dados.get("idade_dias", IDADE_DIAS)
+        if type(idade_dias) not in (int, float) or idade_dias < 0:
+            return json.dumps({"error": "Parâmetro idade_dias inválido"}), 400, cors_headers
+        limite_data = corte(idade_dias)
+
+        # Dry-run: só a contagem dos pedidos que seriam arquivados
+        if dados.get("dry_run"):
+            return json.dumps({"dry_run": True, "corte": limite_data, "total": contar(db, limite_data)}), 200, cors_headers
+
+        totais = Arquivamento(db).executar(limite_data)
+        totais["corte"] = limite_data
+        return json.dumps(totais), 200 if totais["concluido"] else 202, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,156 @@
+import unittest
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from flask import Flask, request
+from google.api_core import exceptions as gexc
+from arquivamento import Arquivamento, corte, dividir_em_partes
+from arquivo import descompactar
+from limitador import ArmazemMemoria, configurar_armazem
+from main import arquivar_pedidos
+
+class DocFalso:
+    def __init__(self, pedido_id, dados):
+        self.id = pedido_id
+        self.reference = f"pedidos/{pedido_id}"
+        self.update_time = None
+        self._dados = dados
+
+    def to_dict(self):
+        return dict(self._dados)
+
+class ConsultaFalsa:
+    """Devolve os pedidos ainda não arquivados, depois do cursor."""
+
+    def __init__(self, banco, cursor=None, limite=None):
+        self.banco = banco
+        self.cursor = cursor
+        self.limite = limite
+
+    def start_after(self, doc):
+        return ConsultaFalsa(self.banco, doc, self.limite)
+
+    def limit(self, limite):
+        return ConsultaFalsa(self.banco, self.cursor, limite)
+
+    def stream(self):
+        docs = sorted(self.banco.values(), key=lambda d: (d.to_dict()["data_criacao"], d.id))
+        if self.cursor is not None:
+            chave = (self.cursor.to_dict()["data_criacao"], self.cursor.id)
+            docs = [d for d in docs if (d.to_dict()["data_criacao"], d.id) > chave]
+        return iter(docs[:self.limite])
+
+def pedidos(quantidade, dia="2020-01-01"):
+    return {f"p{i}": DocFalso(f"p{i}", {"status": "ENTREGUE", "data_criacao": f"{dia}T00:00:{i:02d}Z", "user_id": "u1"})
+            for i in range(quantidade)}
+
+class TestArquivamento(unittest.TestCase):
+
+    def setUp(self):
+        self.banco = pedidos(5)
+        self.banco.update({f"q{i}": DocFalso(f"q{i}", {"status": "CANCELADO", "data_criacao": f"2020-01-02T00:00:0{i}Z"})
+                           for i in range(2)})
+        self.db = MagicMock()
+        self.gravados = {}
+        self.conflito = False
+
+        def commit():
+            if self.conflito:
+                raise gexc.FailedPrecondition("alterado")
+            batch = self.db.batch.return_value
+            for chamada in batch.set.call_args_list:
+                self.gravados[chamada.args[0]] = chamada.args[1]
+            for chamada in batch.delete.call_args_list:
+                self.banco.pop(chamada.args[0].split("/")[1])
+            batch.reset_mock()
+
+        self.db.batch.return_value.commit.side_effect = commit
+        self.db.collection.side_effect = lambda nome: MagicMock(document=lambda doc_id: f"{nome}/{doc_id}")
+
+    @patch("arquivamento.montar_consulta")
+    def test_arquiva_em_partes_por_dia(self, mock_montar_consulta):
+        """Testa se os pedidos são movidos para uma parte compactada por dia, com índice e remoção"""
+        mock_montar_consulta.return_value = ConsultaFalsa(self.banco)
+
+        totais = Arquivamento(self.db, tamanho_pagina=3).executar("2021-01-01T00:00:00Z")
+
+        self.assertTrue(totais["concluido"])
+        self.assertEqual(totais["arquivados"], 7)
+        self.assertEqual(self.banco, {})
+        partes = {k: v for k, v in self.gravados.items() if k.startswith("pedidos_arquivo/")}
+        self.assertEqual(sorted({p["particao"] for p in partes.values()}), ["2020-01-01", "2020-01-02"])
+
+        indice = self.gravados["pedidos_arquivo_indice/q1"]
+        parte = self.gravados[f"pedidos_arquivo/{indice['parte']}"]
+        self.assertEqual(descompactar(parte["dados"])["q1"]["status"], "CANCELADO")
+
+    @patch("arquivamento.montar_consulta")
+    def test_conflito_mantem_pedidos(self, mock_montar_consulta):
+        """Testa se um lote com pedido alterado depois da leitura não remove nada"""
+        mock_montar_consulta.return_value = ConsultaFalsa(self.banco)
+        self.conflito = True
+
+        totais = Arquivamento(self.db).executar("2021-01-01T00:00:00Z")
+
+        self.assertEqual(totais["arquivados"], 0)
+        self.assertEqual(totais["conflitos"], 7)
+        self.assertEqual(len(self.banco), 7)
+
+    def test_divide_parte_grande(self):
+        """Testa se uma parte acima do tamanho máximo é dividida"""
+        docs = [DocFalso(f"p{i}", {"data_criacao": "2020-01-01", "obs": os.urandom(100).hex()}) for i in range(8)]
+        partes = list(dividir_em_partes(docs, por_parte=8, maximo_bytes=200))
+
+        self.assertGreater(len(partes), 1)
+        self.assertEqual(sum(len(grupo) for _, grupo, _ in partes), 8)
+
+    def test_corte(self):
+        """Testa se o corte é a data atual menos a idade em dias"""
+        self.assertEqual(corte(2, agora=datetime(2024, 1, 3)), "2024-01-01T00:00:00Z")
+
+class TestArquivarPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        configurar_armazem(ArmazemMemoria())
+
+    @patch("main.verificar_autenticacao")
+    def test_exige_administrador(self, mock_verificar_autenticacao):
+        """Testa se usuários sem a claim admin recebem 403"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/', method="POST", json={}):
+            response = arquivar_pedidos(request)
+
+        self.assertEqual(response[1], 403)
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.contar")
+    @patch("main.Arquivamento")
+    def test_dry_run(self, mock_arquivamento, mock_contar, mock_verificar_autenticacao):
+        """Testa se o dry-run só conta os pedidos, sem arquivar"""
+        mock_verificar_autenticacao.return_value = ({"uid": "admin1", "admin": True}, None, 200)
+        mock_contar.return_value = 12
+
+        with self.app.test_request_context('/', method="POST", json={"idade_dias": 30, "dry_run": True}):
+            response = arquivar_pedidos(request)
+
+        self.assertEqual(response[1], 200)
+        self.assertEqual(json.loads(response[0])["total"], 12)
+        mock_arquivamento.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.Arquivamento")
+    def test_restante_retorna_202(self, mock_arquivamento, mock_verificar_autenticacao):
+        """Testa se a resposta é 202 quando ainda restam pedidos a arquivar"""
+        mock_verificar_autenticacao.return_value = ({"uid": "admin1", "admin": True}, None, 200)
+        mock_arquivamento.return_value.executar.return_value = {"arquivados": 1000, "concluido": False}
+
+        with self.app.test_request_context('/', method="POST", json={}):
+            response = arquivar_pedidos(request)
+
+        self.assertEqual(response[1], 202)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import codecs
+import json
+import os
+import re
+
+# Tamanho dos blocos lidos do corpo da requisição
+BLOCO = 64 * 1024
+
+# Maior valor JSON isolado (um item, um campo) aceito na leitura incremental
+ELEMENTO_MAXIMO = int(os.environ.get("CORPO_ELEMENTO_MAXIMO_BYTES", str(256 * 1024)))
+
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+_CONTINUACAO_NUMERO = frozenset("0123456789.eE+-")
+_decodificar = json.JSONDecoder().raw_decode
+
+
+class CorpoInvalido(Exception):
+    """Corpo ausente ou que não é JSON válido (resposta 400)."""
+
+    def __init__(self, mensagem="JSON inválido ou não fornecido"):
+        super().__init__(mensagem)
+
+
+class CorpoMuitoGrande(Exception):
+    """Corpo maior que o limite configurado (resposta 413)."""
+
+    def __init__(self, maximo):
+        super().__init__(f"Corpo da requisição excede o limite de {maximo} bytes")
+        self.maximo = maximo
+
+
+def tamanho_maximo(padrao):
+    """Limite do corpo em bytes: CORPO_MAXIMO_BYTES ou o padrão do serviço."""
+    return int(os.environ.get("CORPO_MAXIMO_BYTES", str(padrao)))
+
+
+class LeitorJSON:
+    """Lê um documento JSON do stream em blocos, sem carregar o corpo inteiro.
+
+    Só uma janela do texto fica em memória; cada valor é decodificado com
+    raw_decode assim que está completo na janela.
+    """
+
+    def __init__(self, stream, maximo, bloco=BLOCO):
+        self.stream = stream
+        self.maximo = maximo
+        self.bloco = bloco
+        self.lidos = 0
+        self.fim = False
+        self.texto = ""
+        self.pos = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def _preencher(self):
+        """Lê o próximo bloco; retorna False no fim do corpo."""
+        if self.fim:
+            return False
+        dados = self.stream.read(self.bloco)
+        self.lidos += len(dados)
+        if self.lidos > self.maximo:
+            raise CorpoMuitoGrande(self.maximo)  # Sem Content-Length (ou com valor incorreto)
+        try:
+            parte = self._utf8.decode(dados, final=not dados)
+        except UnicodeDecodeError:
+            raise CorpoInvalido()
+        if not dados:
+            self.fim = True
+        self.texto = self.texto[self.pos:] + parte
+        self.pos = 0
+        return True
+
+    def _proximo(self):
+        """Pula espaços e retorna o próximo caractere sem consumi-lo ("" no fim)."""
+        while True:
+            self.pos = _ESPACOS.match(self.texto, self.pos).end()
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self._preencher():
+                return ""
+
+    def _esperar(self, caracteres):
+        caractere = self._proximo()
+        if not caractere or caractere not in caracteres:
+            raise CorpoInvalido()
+        self.pos += 1
+        return caractere
+
+    def valor(self):
+        """Decodifica o próximo valor JSON completo."""
+        self._proximo()
+        while True:
+            try:
+                valor, fim = _decodificar(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if len(self.texto) - self.pos > ELEMENTO_MAXIMO:
+                    raise CorpoMuitoGrande(ELEMENTO_MAXIMO)
+                if not self._preencher():
+                    raise CorpoInvalido()
+                continue
+            # Um número no fim da janela pode continuar no próximo bloco ("-0" de "-0.5")
+            if (fim == len(self.texto) or self.texto[fim] in _CONTINUACAO_NUMERO) and self._preencher():
+                continue
+            self.pos = fim
+            return valor
+
+    def lista(self, ao_ler_item=None):
+        """Decodifica uma lista item a item, chamando `ao_ler_item(i, item)` para cada um."""
+        self._esperar("[")
+        itens = []
+        if self._proximo() == "]":
+            self.pos += 1
+            return itens
+        while True:
+            item = self.valor()
+            if ao_ler_item is not None:
+                ao_ler_item(len(itens), item)
+            itens.append(item)
+            if self._esperar(",]") == "]":
+                return itens
+
+    def documento(self, campo_lista=None, ao_ler_item=None):
+        """Decodifica o corpo inteiro; se for um objeto, `campo_lista` é lido com lista()."""
+        if self._proximo() != "{":
+            resultado = self.valor()
+        else:
+            self.pos += 1
+            resultado = {}
+            if self._proximo() == "}":
+                self.pos += 1
+            else:
+                while True:
+                    chave = self.valor()
+                    if type(chave) is not str:
+                        raise CorpoInvalido()
+                    self._esperar(":")
+                    if chave == campo_lista and self._proximo() == "[":
+                        resultado[chave] = self.lista(ao_ler_item)
+                    else:
+                        resultado[chave] = self.valor()
+                    if self._esperar(",}") == "}":
+                        break
+        if self._proximo():
+            raise CorpoInvalido()  # Conteúdo depois do documento
+        return resultado
+
+
+def ler_json(request, maximo, campo_lista=None, ao_ler_item=None):
+    """Lê o corpo JSON da requisição respeitando o limite de `maximo` bytes.
+
+    Corpos com Content-Length acima do limite são recusados antes de qualquer
+    leitura. A lista em `campo_lista` é lida item a item; exceções lançadas por
+    `ao_ler_item` interrompem a leitura e são repassadas ao chamador.
+    """
+    if request.content_length is not None and request.content_length > maximo:
+        raise CorpoMuitoGrande(maximo)
+    if not request.is_json:
+        raise CorpoInvalido()
+    return LeitorJSON(request.stream, maximo).documento(campo_lista, ao_ler_item)
@@ -0,0 +1,187 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from google.api_core import exceptions as gexc
+from eventos import EVENTOS_PEDIDOS, evento_atualizacao
+from repositorio import adicionar_eventos, confirmar
+from resiliencia import ERROS_BACKEND
+from resumo import RESUMO_PEDIDOS, resumos_atualizacao
+
+# Modo write-behind (opt-in): as atualizações são agrupadas e gravadas em lote
+ESCRITA_ADIADA = os.environ.get("ESCRITA_ADIADA", "0") == "1"
+INTERVALO = float(os.environ.get("ESCRITA_ADIADA_INTERVALO_MS", "250")) / 1000.0
+LIMITE_PENDENTES = int(os.environ.get("ESCRITA_ADIADA_LIMITE", "200"))
+
+# Novas tentativas de uma atualização com o backend indisponível (backoff
+# exponencial a partir do intervalo, até ESPERA_MAXIMA segundos); depois dela,
+# e em qualquer outro erro, a atualização é descartada e registrada
+MAX_TENTATIVAS = int(os.environ.get("ESCRITA_ADIADA_MAX_TENTATIVAS", "8"))
+ESPERA_MAXIMA = 60.0
+
+# Ordem de precedência dos status: um status mais avançado não é sobrescrito
+# por um anterior que chegue depois (ex.: ENVIADO após ENTREGUE)
+PRECEDENCIA = os.environ.get("STATUS_PRECEDENCIA", "PENDENTE,PROCESSANDO,ENVIADO,ENTREGUE,CANCELADO")
+
+# Limite de escritas por lote do Firestore (com a outbox e o resumo, cada
+# atualização leva também a escrita do seu evento e do resumo do dono)
+TAMANHO_LOTE = 500 // (1 + EVENTOS_PEDIDOS + RESUMO_PEDIDOS)
+
+logger = logging.getLogger(__name__)
+
+
+class BufferEscrita:
+    """Agrupa atualizações de status por pedido e grava em lotes periódicos."""
+
+    def __init__(self, db, intervalo=INTERVALO, limite=LIMITE_PENDENTES, precedencia=PRECEDENCIA):
+        self.db = db
+        self.intervalo = intervalo
+        self.limite = limite
+        self.ordem = {s.strip().upper(): i for i, s in enumerate(precedencia.split(",")) if s.strip()}
+        self._pendentes = {}
+        # {pedido_id: (tentativas, instante da próxima)} das atualizações devolvidas
+        self._tentativas = {}
+        self._lock = threading.Lock()
+        self._gravando = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _prevalece(self, novo, atual):
+        """Última escrita vence, exceto se regredir na ordem de precedência."""
+        rank_novo = self.ordem.get(str(novo["status"]).upper())
+        rank_atual = self.ordem.get(str(atual["status"]).upper())
+        if rank_novo is None or rank_atual is None:
+            return True
+        return rank_novo >= rank_atual
+
+    def _mesclar(self, pedido_id, atualizacao):
+        atual = self._pendentes.get(pedido_id)
+        if atual is None or self._prevalece(atualizacao, atual):
+            self._pendentes[pedido_id] = atualizacao
+
+    def adicionar(self, pedido_id, atualizacao):
+        with self._lock:
+            self._mesclar(pedido_id, atualizacao)
+            cheio = len(self._pendentes) >= self.limite
+        if cheio:
+            self._acordar.set()
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._pendentes)
+
+    def descarregar(self, todas=False):
+        """Grava em lotes as atualizações pendentes; as devolvidas esperam o backoff, exceto com `todas`."""
+        with self._gravando:
+            with self._lock:
+                agora = time.monotonic()
+                itens = [(pedido_id, atualizacao) for pedido_id, atualizacao in self._pendentes.items()
+                         if todas or self._tentativas.get(pedido_id, (0, 0))[1] <= agora]
+                for pedido_id, _ in itens:
+                    del self._pendentes[pedido_id]
+            for inicio in range(0, len(itens), TAMANHO_LOTE):
+                self._gravar_lote(itens[inicio:inicio + TAMANHO_LOTE])
+
+    def _donos(self, colecao, itens):
+        """{pedido_id: user_id} dos pedidos, para o resumo (o dono de um pedido não muda)."""
+        if not RESUMO_PEDIDOS:
+            return {}
+        docs = self.db.get_all([colecao.document(pedido_id) for pedido_id, _ in itens], field_paths=["user_id"])
+        return {doc.id: (doc.to_dict() or {}).get("user_id") for doc in docs if doc.exists}
+
+    def _escrever(self, colecao, itens, donos):
+        """Grava as atualizações, com os eventos e os resumos, numa única escrita atômica."""
+        resumos = [r for pedido_id, atualizacao in itens
+                   for r in resumos_atualizacao(donos.get(pedido_id), pedido_id, atualizacao)]
+
+        def escrever(lote):
+            for pedido_id, atualizacao in itens:
+                lote.update(colecao.document(pedido_id), atualizacao)
+                adicionar_eventos(self.db, lote, evento_atualizacao(pedido_id, None, atualizacao))
+        confirmar(self.db, escrever, resumos)
+
+    def _gravar_lote(self, itens):
+        colecao = self.db.collection("pedidos")
+        try:
+            donos = self._donos(colecao, itens)
+        except ERROS_BACKEND as e:
+            self._devolver(itens, e)
+            return
+        except Exception as e:
+            self._descartar(itens, e)
+            return
+        try:
+            self._escrever(colecao, itens, donos)
+            self._concluir(itens)
+            return
+        except ERROS_BACKEND as e:
+            self._devolver(itens, e)
+            return
+        except Exception:
+            pass  # Pedido que não existe mais ou recusado: grava individualmente
+
+        for item in itens:
+            pedido_id, atualizacao = item
+            try:
+                if EVENTOS_PEDIDOS or RESUMO_PEDIDOS:
+                    self._escrever(colecao, [item], donos)
+                else:
+                    colecao.document(pedido_id).update(atualizacao)
+                self._concluir([item])
+            except gexc.NotFound:
+                self._concluir([item])
+            except ERROS_BACKEND as e:
+                self._devolver([item], e)
+            except Exception as e:
+                self._descartar([item], e)
+
+    def _concluir(self, itens):
+        with self._lock:
+            for pedido_id, _ in itens:
+                self._tentativas.pop(pedido_id, None)
+
+    def _descartar(self, itens, erro):
+        """Erro permanente (ex.: InvalidArgument, PermissionDenied, documento grande demais)."""
+        self._concluir(itens)
+        for pedido_id, atualizacao in itens:
+            logger.error("Atualização do pedido %s descartada: %r (%s)", pedido_id, atualizacao, erro)
+
+    def _devolver(self, itens, erro):
+        """Reenfileira com backoff, sem sobrescrever atualizações mais novas, até MAX_TENTATIVAS."""
+        descartados = []
+        with self._lock:
+            agora = time.monotonic()
+            for pedido_id, atualizacao in itens:
+                tentativas = self._tentativas.get(pedido_id, (0, 0))[0] + 1
+                if tentativas >= MAX_TENTATIVAS:
+                    self._tentativas.pop(pedido_id, None)
+                    descartados.append((pedido_id, atualizacao))
+                    continue
+                self._tentativas[pedido_id] = (tentativas, agora + min(self.intervalo * 2 ** tentativas, ESPERA_MAXIMA))
+                if pedido_id not in self._pendentes:
+                    self._pendentes[pedido_id] = atualizacao
+        for pedido_id, atualizacao in descartados:
+            logger.error("Atualização do pedido %s descartada após %d tentativas: %r (%s)",
+                         pedido_id, MAX_TENTATIVAS, atualizacao, erro)
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            self.descarregar()
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name="escrita-adiada", daemon=True)
+            self._thread.start()
+            atexit.register(self.encerrar)
+
+    def encerrar(self):
+        """Para a thread de gravação e grava o que estiver pendente."""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.descarregar(todas=True)
@@ -1,18 +1,43 @@
 import functions_framework
 import json
 from datetime import datetime
-from google.cloud import firestore
 import firebase_admin
 from firebase_admin import auth, credentials
 from flask import request
+from busca import CAMPO_TOKENS, tokens_busca
+from captura import capturar
+from corpo import CorpoInvalido, CorpoMuitoGrande, ler_json, tamanho_maximo
+from escrita_adiada import ESCRITA_ADIADA, BufferEscrita
+from eventos import EVENTOS_PEDIDOS, evento_atualizacao
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from repositorio import ConflitoVersao, PedidoNaoEncontrado, cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, resposta_degradada
+from resumo import resumos_atualizacao
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
-# Inicializa o cliente do Firestore
-db = firestore.Client()
+# Inicializa o cliente do Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("atualizar_status_pedido", capacidade=30, taxa=10)
+
+# Tamanho máximo do corpo da requisição (CORPO_MAXIMO_BYTES)
+CORPO_MAXIMO = tamanho_maximo(16 * 1024)
+
+# Campos do pedido que podem ser alterados por este endpoint
+CAMPOS_ATUALIZAVEIS = {"status", "cliente", "email"}
+
+# Buffer write-behind (opt-in via ESCRITA_ADIADA=1; só com o Firestore, no SQLite a escrita já é local)
+buffer_status = None
+if ESCRITA_ADIADA and db is not None:
+    buffer_status = BufferEscrita(db)
+    buffer_status.iniciar()
 
 def verificar_autenticacao():
     """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
@@ -29,6 +54,9 @@ def verificar_autenticacao():
         return None, json.dumps({"error": "Token inválido ou expirado"}), 401
 
 @functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
 def atualizar_status_pedido(request):
     """Atualiza o status de um pedido no Firestore, apenas para usuários autenticados."""
 
@@ -43,11 +71,19 @@ def atualizar_status_pedido(request):
     if request.method == "OPTIONS":
         return "", 204, cors_headers
 
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
     # Verifica se o usuário está autenticado
     user, error_response, status = verificar_autenticacao()
     if not user:
         return error_response, status, cors_headers
 
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
     if request.method not in ["PUT", "PATCH"]:
         return json.dumps({"error": "Método não permitido"}), 405, cors_headers
 
@@ -60,27 +96,73 @@ def atualizar_status_pedido(request):
 
         pedido_id = partes[1]
 
-        # Obtém o corpo da requisição
-        dados = request.get_json(silent=True)
-        if not dados or "status" not in dados:
+        # Obtém o corpo da requisição (recusado antes da leitura se exceder o limite)
+        try:
+            dados = ler_json(request, CORPO_MAXIMO)
+        except CorpoMuitoGrande as e:
+            return json.dumps({"error": str(e)}), 413, cors_headers
+        except CorpoInvalido:
+            dados = None
+        if not isinstance(dados, dict) or not CAMPOS_ATUALIZAVEIS & dados.keys():
             return json.dumps({"error": "Nenhum dado válido enviado"}), 400, cors_headers
-
-        # Busca o pedido no Firestore
-        doc_ref = db.collection("pedidos").document(pedido_id)
-        doc = doc_ref.get()
-
-        if not doc.exists:
+        for campo in ("cliente", "email"):
+            if campo in dados and (not isinstance(dados[campo], str) or not dados[campo]):
+                return json.dumps({"error": f"Campo '{campo}' inválido"}), 400, cors_headers
+
+        atualizacao = {campo: dados[campo] for campo in CAMPOS_ATUALIZAVEIS if campo in dados}
+        atualizacao["ultima_atualizacao"] = datetime.utcnow().isoformat() + "Z"
+
+        # Modo write-behind: agrupa a atualização e confirma o recebimento com 202
+        # (apenas mudanças de status; cliente/email seguem o caminho síncrono)
+        if buffer_status is not None and atualizacao.keys() == {"status", "ultima_atualizacao"}:
+            buffer_status.adicionar(pedido_id, atualizacao)
+            resposta = {
+                "message": "Atualização de status aceita",
+                "id": pedido_id,
+                "status": dados["status"]
+            }
+            return json.dumps(resposta), 202, cors_headers
+
+        # Busca o pedido
+        registro = circuito.chamar(lambda: repositorio.obter(pedido_id, **prazo.opcoes()))
+
+        if registro is None:
             return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
 
-        # Atualiza o status do pedido
-        doc_ref.update({"status": dados["status"], "ultima_atualizacao": datetime.utcnow().isoformat() + "Z"})
+        # Cliente ou email alterados: os tokens de busca são recalculados com os valores finais,
+        # e a escrita só vale se o pedido não mudou desde a leitura
+        versao = None
+        if "cliente" in atualizacao or "email" in atualizacao:
+            atual = registro.dados
+            atualizacao[CAMPO_TOKENS] = tokens_busca(atualizacao.get("cliente", atual.get("cliente")),
+                                                     atualizacao.get("email", atual.get("email")))
+            versao = registro.versao
+
+        # Evento da outbox (se ligada), gravado junto com a atualização; o status_anterior
+        # só é confiável se o pedido não mudou desde a leitura, então a versão também é exigida
+        eventos = evento_atualizacao(pedido_id, registro.dados, atualizacao)
+        if EVENTOS_PEDIDOS:
+            versao = registro.versao
+
+        # Atualiza o pedido (e o resumo do dono, se ligado, na mesma transação)
+        resumos = resumos_atualizacao(registro.dados.get("user_id"), pedido_id, atualizacao)
+        try:
+            circuito.chamar(lambda: repositorio.atualizar(pedido_id, atualizacao, versao=versao, eventos=eventos,
+                                                          resumos=resumos, **prazo.opcoes()))
+        except PedidoNaoEncontrado:
+            return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
+        except ConflitoVersao:
+            return json.dumps({"error": "Pedido alterado por outra requisição, tente novamente"}), 409, cors_headers
 
         resposta = {
-            "message": "Status do pedido atualizado com sucesso",
+            "message": "Status do pedido atualizado com sucesso" if "status" in atualizacao else "Pedido atualizado com sucesso",
             "id": pedido_id,
-            "status": dados["status"]
         }
+        resposta.update({campo: atualizacao[campo] for campo in ("status", "cliente", "email") if campo in atualizacao})
         return json.dumps(resposta), 200, cors_headers
 
     except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
         return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from google.api_core import exceptions as gexc
+import escrita_adiada
+from escrita_adiada import BufferEscrita
+
+class TestBufferEscrita(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock()
+        self.db.collection.return_value.document.side_effect = lambda pedido_id: "ref:" + pedido_id
+        self.buffer = BufferEscrita(self.db, intervalo=0.01, limite=100)
+
+    def test_agrupa_por_pedido(self):
+        """Testa se várias atualizações do mesmo pedido viram uma única escrita"""
+        self.buffer.adicionar("p1", {"status": "PROCESSANDO"})
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.adicionar("p2", {"status": "PENDENTE"})
+        self.assertEqual(self.buffer.pendentes(), 2)
+
+        self.buffer.descarregar()
+
+        batch = self.db.batch.return_value
+        self.assertEqual(batch.update.call_count, 2)
+        batch.update.assert_any_call("ref:p1", {"status": "ENVIADO"})
+        batch.commit.assert_called_once()
+        self.assertEqual(self.buffer.pendentes(), 0)
+
+    def test_precedencia_de_status(self):
+        """Testa se um status anterior não sobrescreve um mais avançado"""
+        self.buffer.adicionar("p1", {"status": "ENTREGUE"})
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.adicionar("p2", {"status": "ENVIADO"})
+        self.buffer.adicionar("p2", {"status": "status_desconhecido"})
+        self.buffer.descarregar()
+
+        batch = self.db.batch.return_value
+        batch.update.assert_any_call("ref:p1", {"status": "ENTREGUE"})
+        batch.update.assert_any_call("ref:p2", {"status": "status_desconhecido"})
+
+    def test_pedido_inexistente_nao_bloqueia_lote(self):
+        """Testa se um pedido removido é descartado e os demais são gravados"""
+        self.db.batch.return_value.commit.side_effect = gexc.NotFound("não existe")
+        colecao = self.db.collection.return_value
+        refs = {"p1": MagicMock(), "p2": MagicMock()}
+        refs["p2"].update.side_effect = gexc.NotFound("não existe")
+        colecao.document.side_effect = lambda pedido_id: refs[pedido_id]
+
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.adicionar("p2", {"status": "ENVIADO"})
+        self.buffer.descarregar()
+
+        refs["p1"].update.assert_called_once_with({"status": "ENVIADO"})
+        self.assertEqual(self.buffer.pendentes(), 0)
+
+    def test_falha_transitoria_reenfileira(self):
+        """Testa se um erro transitório devolve as atualizações para o próximo ciclo"""
+        self.db.batch.return_value.commit.side_effect = gexc.ServiceUnavailable("indisponível")
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.descarregar()
+        self.assertEqual(self.buffer.pendentes(), 1)
+
+    def test_falha_transitoria_com_backoff(self):
+        """Testa se a atualização devolvida espera o backoff e é descartada após o máximo de tentativas"""
+        commit = self.db.batch.return_value.commit
+        commit.side_effect = gexc.ServiceUnavailable("indisponível")
+        self.buffer.intervalo = 1
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+
+        self.buffer.descarregar()
+        self.buffer.descarregar()
+        self.assertEqual(commit.call_count, 1)  # Segunda chamada dentro do backoff
+
+        with self.assertLogs("escrita_adiada", level="ERROR") as logs:
+            for _ in range(escrita_adiada.MAX_TENTATIVAS - 1):
+                self.buffer.descarregar(todas=True)
+        self.assertEqual(commit.call_count, escrita_adiada.MAX_TENTATIVAS)
+        self.assertEqual(self.buffer.pendentes(), 0)
+        self.assertIn("p1", logs.output[0])
+
+    def test_erro_permanente_descartado(self):
+        """Testa se um erro permanente descarta só a atualização recusada, sem nova tentativa"""
+        self.db.batch.return_value.commit.side_effect = gexc.InvalidArgument("documento grande demais")
+        colecao = self.db.collection.return_value
+        refs = {"p1": MagicMock(), "p2": MagicMock()}
+        refs["p2"].update.side_effect = gexc.InvalidArgument("documento grande demais")
+        colecao.document.side_effect = lambda pedido_id: refs[pedido_id]
+
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.adicionar("p2", {"status": "ENVIADO"})
+        with self.assertLogs("escrita_adiada", level="ERROR") as logs:
+            self.buffer.descarregar()
+
+        refs["p1"].update.assert_called_once_with({"status": "ENVIADO"})
+        self.assertEqual(self.buffer.pendentes(), 0)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("p2", logs.output[0])
+
+    def test_encerrar_grava_pendentes(self):
+        """Testa se o encerramento grava o que estiver pendente"""
+        self.buffer.iniciar()
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+        self.buffer.encerrar()
+
+        self.assertEqual(self.buffer.pendentes(), 0)
+        self.db.batch.return_value.update.assert_called_with("ref:p1", {"status": "ENVIADO"})
+
+    def test_evento_no_mesmo_lote(self):
+        """Testa se, com a outbox ligada, cada atualização leva seu evento no mesmo lote"""
+        self.buffer.adicionar("p1", {"status": "ENVIADO"})
+
+        with patch("eventos.EVENTOS_PEDIDOS", True):
+            self.buffer.descarregar()
+
+        batch = self.db.batch.return_value
+        batch.update.assert_called_once_with("ref:p1", {"status": "ENVIADO"})
+        evento = batch.set.call_args[0][1]
+        self.assertEqual((evento["tipo"], evento["pedido_id"], evento["status"]), ("pedido.status_alterado", "p1", "ENVIADO"))
+        batch.commit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 import json
 from unittest.mock import patch, MagicMock
-from flask import Flask, Request
+from flask import Flask, Request, request
+from busca import CAMPO_TOKENS
+from repositorio import RepositorioSQLite
 from main import atualizar_status_pedido
 
 class TestAtualizarStatusPedido(unittest.TestCase):
@@ -97,5 +99,74 @@ class TestAtualizarStatusPedido(unittest.TestCase):
         self.assertEqual(response[1], 500)
         self.assertIn("Erro inesperado", response[0])
 
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    @patch("main.buffer_status")
+    def test_atualizar_status_pedido_escrita_adiada(self, mock_buffer_status, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se no modo write-behind a atualização é agrupada e respondida com 202"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/pedidos/123', method="PATCH", json={"status": "ENVIADO"}):
+            response = atualizar_status_pedido(request)
+
+        self.assertEqual(response[1], 202)
+        pedido_id, atualizacao = mock_buffer_status.adicionar.call_args[0]
+        self.assertEqual(pedido_id, "123")
+        self.assertEqual(atualizacao["status"], "ENVIADO")
+        mock_db_collection.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_atualizar_status_pedido_corpo_muito_grande(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se corpos acima do limite são recusados com 413"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with patch("main.CORPO_MAXIMO", 32):
+            with self.app.test_request_context('/pedidos/123', method="PATCH", json={"status": "ENVIADO", "obs": "x" * 100}):
+                response = atualizar_status_pedido(request)
+
+        self.assertEqual(response[1], 413)
+        mock_db_collection.return_value.document.return_value.update.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    def test_atualizar_cliente_no_sqlite(self, mock_verificar_autenticacao):
+        """Testa se a troca de cliente recalcula os tokens de busca e recusa escrita concorrente com 409"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.gravar("123", {"status": "PENDENTE", "cliente": "Ana", "email": "ana@exemplo.com"})
+        lido = repositorio.obter("123")
+
+        with patch("main.repositorio", repositorio), \
+                self.app.test_request_context('/pedidos/123', method="PATCH", json={"cliente": "Maria Souza"}):
+            response = atualizar_status_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        self.assertIn("souza", repositorio.obter("123").dados[CAMPO_TOKENS])
+
+        # Leitura anterior à primeira escrita: a versão não confere mais
+        with patch.object(repositorio, "obter", return_value=lido), patch("main.repositorio", repositorio), \
+                self.app.test_request_context('/pedidos/123', method="PATCH", json={"cliente": "Bia"}):
+            response = atualizar_status_pedido(request)
+
+        self.assertEqual(response[1], 409)
+
+    @patch("main.verificar_autenticacao")
+    def test_atualizar_status_grava_evento(self, mock_verificar_autenticacao):
+        """Testa se, com a outbox ligada, a mudança de status grava o evento com o status anterior"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.gravar("123", {"status": "PENDENTE", "user_id": "user123", "total": 5.0})
+
+        with patch("main.repositorio", repositorio), patch("main.EVENTOS_PEDIDOS", True), \
+                patch("eventos.EVENTOS_PEDIDOS", True), \
+                self.app.test_request_context('/pedidos/123', method="PATCH", json={"status": "ENVIADO"}):
+            response = atualizar_status_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        (_, evento), = repositorio.eventos()
+        self.assertEqual(evento["tipo"], "pedido.status_alterado")
+        self.assertEqual((evento["status_anterior"], evento["status"]), ("PENDENTE", "ENVIADO"))
+        self.assertEqual(evento["alterados"], ["status"])
+
 if __name__ == '__main__':
     unittest.main()
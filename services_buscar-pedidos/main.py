@@ -0,0 +1,141 @@
+import functions_framework
+import json
+import firebase_admin
+from firebase_admin import auth, credentials
+from flask import request
+from busca import CAMPO_TOKENS, ConsultaBusca
+from captura import capturar
+from limitador import LimitadorUsuario, limitar_concorrencia
+from modelo import Pedido
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, executar_com_hedge, resposta_degradada
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("buscar_pedidos", capacidade=20, taxa=5)
+
+# Resultados por página
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+# Documentos lidos por página de resultados, no máximo, para completar a página
+# depois da conferência dos termos (múltiplo do limite)
+FATOR_LEITURA = 5
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+def buscar(consulta_busca, limite, cursor, prazo):
+    """Lê os pedidos com o token no índice, em ordem de ID, até completar `limite` resultados.
+
+    Retorna (pedidos, cursor da próxima página ou None).
+    """
+    filtros = [(CAMPO_TOKENS, "array_contains", consulta_busca.token)]
+    resultados = []
+    lidos = 0
+    while len(resultados) < limite and lidos < limite * FATOR_LEITURA:
+        registros, proximo = circuito.chamar(
+            executar_com_hedge,
+            lambda p: repositorio.consultar(filtros, limite=limite, cursor=cursor, **p.opcoes()),
+            prazo)
+        for registro in registros:
+            lidos += 1
+            if consulta_busca.corresponde(registro.dados):
+                resultados.append(Pedido.from_dict(registro.id, registro.dados))
+                if len(resultados) == limite:
+                    return resultados, registro.id
+        if proximo is None:
+            return resultados, None
+        cursor = proximo
+    return resultados, cursor
+
+
+@functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
+def buscar_pedidos(request):
+    """Busca pedidos de todos os clientes por prefixo ou trecho do cliente/email usando os
+    tokens indexados; ferramenta da equipe, restrita a administradores.
+
+    GET ?q=<termo>&modo=prefixo|substring&limite=20&cursor=<id>
+    """
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Apenas administradores (custom claim `admin`) podem buscar pedidos de outros usuários
+    if not user.get("admin"):
+        return json.dumps({"error": "Acesso restrito a administradores"}), 403, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        # Apenas permite requisições GET
+        if request.method != "GET":
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        modo = request.args.get("modo", "prefixo")
+        if modo not in ("prefixo", "substring"):
+            return json.dumps({"error": "Parâmetro modo inválido"}), 400, cors_headers
+        try:
+            limite = min(int(request.args.get("limite", LIMITE_PADRAO)), LIMITE_MAXIMO)
+        except ValueError:
+            return json.dumps({"error": "Parâmetro limite inválido"}), 400, cors_headers
+        if limite <= 0:
+            return json.dumps({"error": "Parâmetro limite inválido"}), 400, cors_headers
+
+        consulta_busca = ConsultaBusca(request.args.get("q", ""), modo)
+        if consulta_busca.token is None:
+            return json.dumps({"error": "Termo de busca muito curto"}), 400, cors_headers
+
+        pedidos, cursor = buscar(consulta_busca, limite, request.args.get("cursor"), prazo)
+        resposta = {"pedidos": pedidos, "cursor": cursor}
+        return json.dumps(resposta, default=Pedido.to_json_listagem), 200, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
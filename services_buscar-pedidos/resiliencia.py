@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from google.api_core import exceptions as gexc
+from google.api_core import retry as gretry
+
+# Configuração via variáveis de ambiente (valores padrão pensados para Cloud Functions)
+PRAZO_PADRAO = float(os.environ.get("FIRESTORE_PRAZO_SEGUNDOS", "10"))
+HEDGE_ATRASO = float(os.environ.get("FIRESTORE_HEDGE_ATRASO_MS", "0")) / 1000.0
+CIRCUITO_LIMIAR = int(os.environ.get("CIRCUITO_LIMIAR_FALHAS", "5"))
+CIRCUITO_RESET = float(os.environ.get("CIRCUITO_RESET_SEGUNDOS", "30"))
+
+# Erros que indicam backend degradado (contam para o circuit breaker)
+ERROS_BACKEND = (gexc.ServerError, gexc.RetryError, gexc.TooManyRequests)
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("FIRESTORE_HEDGE_THREADS", "8")))
+
+
+class PrazoEsgotado(Exception):
+    """O orçamento de tempo da requisição acabou antes da resposta do Firestore."""
+
+
+class CircuitoAberto(Exception):
+    """O backend está degradado e as chamadas estão sendo recusadas."""
+
+    def __init__(self, retry_after):
+        super().__init__("Serviço temporariamente indisponível")
+        self.retry_after = retry_after
+
+
+class Prazo:
+    """Orçamento de tempo de uma requisição, repassado a cada chamada ao Firestore."""
+
+    def __init__(self, segundos=None):
+        self.limite = time.monotonic() + (PRAZO_PADRAO if segundos is None else segundos)
+
+    def restante(self):
+        restante = self.limite - time.monotonic()
+        if restante <= 0:
+            raise PrazoEsgotado("Tempo limite da requisição excedido")
+        return restante
+
+    def opcoes(self):
+        """Argumentos `retry`/`timeout` para as chamadas do cliente Firestore."""
+        restante = self.restante()
+        return {"retry": gretry.Retry().with_deadline(restante), "timeout": restante}
+
+
+class CircuitBreaker:
+    """Circuit breaker simples (fechado -> aberto -> meio-aberto)."""
+
+    def __init__(self, limiar=CIRCUITO_LIMIAR, reset=CIRCUITO_RESET):
+        self.limiar = limiar
+        self.reset = reset
+        self.falhas = 0
+        self.aberto_em = None
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def antes(self):
+        with self._lock:
+            if self.aberto_em is None:
+                return
+            decorrido = time.monotonic() - self.aberto_em
+            if decorrido < self.reset or self._teste_em_andamento:
+                raise CircuitoAberto(max(1, int(self.reset - decorrido + 0.999)))
+            # Meio-aberto: deixa passar uma única chamada de teste
+            self._teste_em_andamento = True
+
+    def sucesso(self):
+        with self._lock:
+            self.falhas = 0
+            self.aberto_em = None
+            self._teste_em_andamento = False
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            self._teste_em_andamento = False
+            if self.aberto_em is not None or self.falhas >= self.limiar:
+                self.aberto_em = time.monotonic()
+
+    def chamar(self, fn, *args, **kwargs):
+        self.antes()
+        try:
+            resultado = fn(*args, **kwargs)
+        except (PrazoEsgotado,) + ERROS_BACKEND:
+            self.falha()
+            raise
+        except Exception:
+            # Erros de negócio/cliente não indicam backend degradado
+            self.sucesso()
+            raise
+        self.sucesso()
+        return resultado
+
+
+circuito = CircuitBreaker()
+
+
+def executar_com_hedge(fn, prazo, atraso=None):
+    """Executa `fn(prazo)` e, se não houver resposta após `atraso` segundos,
+    dispara uma segunda cópia e usa a que terminar primeiro.
+
+    Usar apenas para leituras idempotentes.
+    """
+    atraso = HEDGE_ATRASO if atraso is None else atraso
+    if atraso <= 0:
+        return fn(prazo)
+
+    futuros = [_executor.submit(fn, prazo)]
+    feitos, _ = wait(futuros, timeout=min(atraso, prazo.restante()))
+    if not feitos:
+        futuros.append(_executor.submit(fn, prazo))
+
+    pendentes = set(futuros)
+    erro = None
+    while pendentes:
+        feitos, pendentes = wait(pendentes, timeout=max(prazo.limite - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+        if not feitos:
+            raise PrazoEsgotado("Tempo limite da requisição excedido")
+        for futuro in feitos:
+            if futuro.exception() is None:
+                return futuro.result()
+            erro = futuro.exception()
+    raise erro
+
+
+def resposta_degradada(e, cors_headers):
+    """Converte erros de prazo/circuito em respostas HTTP (ou None se não for o caso)."""
+    if isinstance(e, CircuitoAberto):
+        headers = dict(cors_headers, **{"Retry-After": str(e.retry_after)})
+        return json.dumps({"error": "Serviço temporariamente indisponível"}), 503, headers
+    if isinstance(e, (PrazoEsgotado, gexc.DeadlineExceeded)):
+        return json.dumps({"error": "Tempo limite excedido ao acessar o banco de dados"}), 504, cors_headers
+    return None
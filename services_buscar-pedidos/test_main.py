@@ -0,0 +1,148 @@
+import unittest
+import json
+from unittest.mock import patch, MagicMock
+from flask import Flask, request
+from busca import CAMPO_TOKENS, ConsultaBusca, tokens_busca
+from limitador import ArmazemMemoria, configurar_armazem
+from repositorio import Operacao, RepositorioSQLite
+from main import buscar_pedidos
+
+def pedido(pedido_id, cliente, email):
+    return pedido_id, {"status": "PENDENTE", "cliente": cliente, "email": email,
+                       "total": 10.0, CAMPO_TOKENS: tokens_busca(cliente, email)}
+
+class TestBusca(unittest.TestCase):
+
+    def test_tokens_sem_acento(self):
+        """Testa se os tokens são normalizados e incluem prefixos, n-gramas e o email inteiro"""
+        tokens = tokens_busca("João Silva", "Joao@Exemplo.com")
+
+        self.assertIn("jo", tokens)
+        self.assertIn("silva", tokens)
+        self.assertIn("ilv", tokens)
+        self.assertIn("joao@exemplo.com", tokens)
+        self.assertNotIn("j", tokens)
+
+    def test_consulta_por_prefixo(self):
+        """Testa se a busca por prefixo usa a palavra mais longa e confere as demais"""
+        consulta = ConsultaBusca("sil jo")
+
+        self.assertEqual(consulta.token, "sil")
+        self.assertTrue(consulta.corresponde({"cliente": "João Silva"}))
+        self.assertFalse(consulta.corresponde({"cliente": "Maria Silva"}))
+
+    def test_consulta_por_trecho(self):
+        """Testa se a busca por trecho usa um n-grama e confere o trecho completo"""
+        consulta = ConsultaBusca("ilva", "substring")
+
+        self.assertEqual(consulta.token, "ilv")
+        self.assertTrue(consulta.corresponde({"cliente": "João Silva"}))
+        self.assertFalse(consulta.corresponde({"cliente": "Ilvo Souza"}))
+
+    def test_trecho_de_email(self):
+        """Testa se um email incompleto é buscado pelos prefixos das palavras, não pelo email inteiro"""
+        consulta = ConsultaBusca("joao.silva@exe")
+
+        self.assertIsNone(consulta.email)
+        self.assertEqual(consulta.token, "silva")
+        self.assertTrue(consulta.corresponde({"cliente": "João", "email": "joao.silva@exemplo.com"}))
+        self.assertEqual(ConsultaBusca("Joao@Exemplo.com").token, "joao@exemplo.com")
+
+    def test_termo_curto(self):
+        """Testa se termos sem palavra com o tamanho mínimo não geram token"""
+        self.assertIsNone(ConsultaBusca("a").token)
+        self.assertIsNone(ConsultaBusca("ab", "substring").token)
+
+class TestBuscarPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        configurar_armazem(ArmazemMemoria())
+        self.repositorio = RepositorioSQLite(":memory:")
+        self.repositorio.gravar_em_lote(Operacao("gravar", *pedido(*dados)) for dados in (
+            ("p1", "João Silva", "joao@exemplo.com"),
+            ("p2", "Maria Silva", "maria@exemplo.com"),
+            ("p3", "José Silveira", "jose@exemplo.com"),
+            ("p4", "Ana Souza", "ana@exemplo.com"),
+        ))
+
+    def buscar(self, query):
+        with patch("main.repositorio", self.repositorio):
+            with self.app.test_request_context('/', query_string=query):
+                return buscar_pedidos(request)
+
+    @patch("main.verificar_autenticacao")
+    def test_busca_por_prefixo(self, mock_verificar_autenticacao):
+        """Testa se a busca por prefixo retorna os pedidos de todos os termos"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123", "admin": True}, None, 200)
+
+        response = self.buscar({"q": "silv jo"})
+
+        self.assertEqual(response[1], 200)
+        corpo = json.loads(response[0])
+        self.assertEqual([p["id"] for p in corpo["pedidos"]], ["p1", "p3"])
+        self.assertIsNone(corpo["cursor"])
+
+    @patch("main.verificar_autenticacao")
+    def test_busca_por_email(self, mock_verificar_autenticacao):
+        """Testa se um email completo encontra só o pedido com esse email"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123", "admin": True}, None, 200)
+
+        response = self.buscar({"q": "Maria@Exemplo.com"})
+
+        self.assertEqual([p["id"] for p in json.loads(response[0])["pedidos"]], ["p2"])
+
+    @patch("main.verificar_autenticacao")
+    def test_busca_por_trecho_de_email(self, mock_verificar_autenticacao):
+        """Testa se o início de um email encontra o pedido"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123", "admin": True}, None, 200)
+
+        response = self.buscar({"q": "maria@exe"})
+
+        self.assertEqual([p["id"] for p in json.loads(response[0])["pedidos"]], ["p2"])
+
+    @patch("main.verificar_autenticacao")
+    def test_paginacao(self, mock_verificar_autenticacao):
+        """Testa se o cursor continua a busca a partir do último pedido lido"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123", "admin": True}, None, 200)
+
+        primeira = json.loads(self.buscar({"q": "silva", "limite": 1})[0])
+        segunda = json.loads(self.buscar({"q": "silva", "limite": 1, "cursor": primeira["cursor"]})[0])
+
+        self.assertEqual([p["id"] for p in primeira["pedidos"]], ["p1"])
+        self.assertEqual([p["id"] for p in segunda["pedidos"]], ["p2"])
+
+    @patch("main.verificar_autenticacao")
+    def test_termo_muito_curto(self, mock_verificar_autenticacao):
+        """Testa se um termo curto demais retorna 400 sem consultar o repositório"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123", "admin": True}, None, 200)
+        self.repositorio = MagicMock()
+
+        response = self.buscar({"q": "a"})
+
+        self.assertEqual(response[1], 400)
+        self.repositorio.consultar.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    def test_apenas_administradores(self, mock_verificar_autenticacao):
+        """Testa se usuários sem a claim admin recebem 403 sem consultar o repositório"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        self.repositorio = MagicMock()
+
+        response = self.buscar({"q": "silva"})
+
+        self.assertEqual(response[1], 403)
+        self.repositorio.consultar.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    def test_sem_autenticacao(self, mock_verificar_autenticacao):
+        """Testa se requisições sem token recebem 401"""
+        mock_verificar_autenticacao.return_value = (None, json.dumps({"error": "Token ausente"}), 401)
+
+        with self.app.test_request_context('/', query_string={"q": "silva"}):
+            response = buscar_pedidos(request)
+
+        self.assertEqual(response[1], 401)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import functools
+import json
+import time
+from firebase_admin import auth
+from google.api_core import retry_async
+from starlette.responses import Response
+from limitador import concorrencia
+from resiliencia import ERROS_BACKEND, HEDGE_ATRASO, PrazoEsgotado, circuito
+
+
+def opcoes_async(prazo):
+    """Argumentos `retry`/`timeout` para as chamadas do AsyncClient do Firestore."""
+    restante = prazo.restante()
+    return {"retry": retry_async.AsyncRetry().with_deadline(restante), "timeout": restante}
+
+
+async def chamar_com_circuito(fn, *args, **kwargs):
+    """Equivalente assíncrono de `circuito.chamar`, com o mesmo estado do circuito."""
+    circuito.antes()
+    try:
+        resultado = await fn(*args, **kwargs)
+    except (PrazoEsgotado,) + ERROS_BACKEND:
+        circuito.falha()
+        raise
+    except Exception:
+        # Erros de negócio/cliente não indicam backend degradado
+        circuito.sucesso()
+        raise
+    circuito.sucesso()
+    return resultado
+
+
+async def executar_com_hedge_async(fn, prazo, atraso=None):
+    """Aguarda `fn(prazo)` e, se não houver resposta após `atraso` segundos,
+    dispara uma segunda cópia e usa a que terminar primeiro.
+
+    Usar apenas para leituras idempotentes.
+    """
+    atraso = HEDGE_ATRASO if atraso is None else atraso
+    if atraso <= 0:
+        return await fn(prazo)
+
+    tarefas = [asyncio.ensure_future(fn(prazo))]
+    feitas, _ = await asyncio.wait(tarefas, timeout=min(atraso, prazo.restante()))
+    if not feitas:
+        tarefas.append(asyncio.ensure_future(fn(prazo)))
+
+    pendentes = set(tarefas)
+    erro = None
+    try:
+        while pendentes:
+            feitas, pendentes = await asyncio.wait(pendentes, timeout=max(prazo.limite - time.monotonic(), 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+            if not feitas:
+                raise PrazoEsgotado("Tempo limite da requisição excedido")
+            for tarefa in feitas:
+                if tarefa.exception() is None:
+                    return tarefa.result()
+                erro = tarefa.exception()
+        raise erro
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+
+
+async def ler(fn, prazo):
+    """Leitura com prazo, hedging e circuit breaker (`fn(prazo)` retorna um awaitable)."""
+    return await chamar_com_circuito(executar_com_hedge_async, fn, prazo)
+
+
+async def verificar_autenticacao(request):
+    """Valida o token JWT do Firebase; a verificação da assinatura roda no executor."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+    try:
+        decoded_token = await asyncio.get_running_loop().run_in_executor(None, auth.verify_id_token, token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+def http_async(handler):
+    """Decorador dos handlers assíncronos: limite de concorrência da instância e
+    conversão das tuplas (corpo, status, headers) em respostas Starlette."""
+
+    @functools.wraps(handler)
+    async def wrapper(request):
+        if request.method == "OPTIONS":
+            return Response(*await handler(request))
+        if not concorrencia.entrar():
+            headers = {"Access-Control-Allow-Origin": "*", "Retry-After": "1"}
+            return Response(json.dumps({"error": "Servidor sobrecarregado, tente novamente"}), 503, headers)
+        try:
+            return Response(*await handler(request))
+        finally:
+            concorrencia.sair()
+
+    return wrapper
@@ -0,0 +1,51 @@
+"""Eventos de alteração de pedidos para a outbox (coleção eventos_pedidos).
+
+Ligada por EVENTOS_PEDIDOS=1. O evento é gravado na mesma escrita atômica do
+pedido (lote do Firestore ou transação do SQLite, ver repositorio.py) e
+entregue depois aos assinantes pelo serviço despachar-eventos. Um evento só
+existe se a escrita do pedido foi confirmada, e vice-versa.
+"""
+import os
+import uuid
+from datetime import datetime
+
+EVENTOS_PEDIDOS = os.environ.get("EVENTOS_PEDIDOS", "0") == "1"
+
+CRIADO = "pedido.criado"
+ATUALIZADO = "pedido.atualizado"
+STATUS_ALTERADO = "pedido.status_alterado"
+REMOVIDO = "pedido.removido"
+
+# Campos do pedido copiados para o evento; o restante (itens, cliente, email)
+# fica no pedido, para manter os lotes de entrega pequenos
+CAMPOS = ("status", "user_id", "total")
+
+
+def novo_evento(tipo, pedido_id, pedido=None, **extras):
+    evento = {
+        "id": uuid.uuid4().hex,
+        "tipo": tipo,
+        "pedido_id": pedido_id,
+        "ocorrido_em": datetime.utcnow().isoformat() + "Z",
+    }
+    if pedido:
+        evento.update({campo: pedido[campo] for campo in CAMPOS if campo in pedido})
+    evento.update(extras)
+    return evento
+
+
+def eventos_pedido(tipo, pedido_id, pedido=None, **extras):
+    """[evento] para repassar à escrita do pedido, ou [] com a outbox desligada."""
+    if not EVENTOS_PEDIDOS:
+        return []
+    return [novo_evento(tipo, pedido_id, pedido, **extras)]
+
+
+def evento_atualizacao(pedido_id, anterior, atualizacao):
+    """Evento de uma atualização: status_alterado se o status mudou, senão atualizado."""
+    alterados = sorted(c for c in atualizacao if c in ("status", "cliente", "email"))
+    if "status" in atualizacao and atualizacao["status"] != (anterior or {}).get("status"):
+        extras = {"status_anterior": (anterior or {}).get("status")} if anterior is not None else {}
+        return eventos_pedido(STATUS_ALTERADO, pedido_id, dict(anterior or {}, **atualizacao),
+                              alterados=alterados, **extras)
+    return eventos_pedido(ATUALIZADO, pedido_id, dict(anterior or {}, **atualizacao), alterados=alterados)
@@ -0,0 +1,119 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# Limite global de requisições simultâneas por instância (0 desabilita)
+MAX_CONCORRENCIA = int(os.environ.get("MAX_CONCORRENCIA", "80"))
+
+# Quantidade de baldes mantidos em memória antes de descartar os ociosos
+MAX_BALDES = int(os.environ.get("LIMITE_MAX_BALDES", "10000"))
+
+
+class ArmazemMemoria:
+    """Armazém padrão do estado dos token buckets, em memória do processo.
+
+    Qualquer objeto com o método `consumir(chave, capacidade, taxa, custo)`
+    pode substituí-lo (ex.: um armazém compartilhado em Redis ou Firestore).
+    """
+
+    def __init__(self, max_baldes=MAX_BALDES):
+        self.max_baldes = max_baldes
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, chave, capacidade, taxa, custo=1):
+        """Consome `custo` tokens do balde. Retorna (permitido, segundos_para_liberar)."""
+        with self._lock:
+            agora = time.monotonic()
+            tokens, ultimo = self._baldes.get(chave, (capacidade, agora))
+            tokens = min(capacidade, tokens + (agora - ultimo) * taxa)
+
+            if tokens >= custo:
+                self._baldes[chave] = (tokens - custo, agora)
+                permitido, espera = True, 0.0
+            else:
+                self._baldes[chave] = (tokens, agora)
+                permitido, espera = False, (custo - tokens) / taxa
+
+            if len(self._baldes) > self.max_baldes:
+                self._descartar_ociosos(agora, capacidade, taxa)
+            return permitido, espera
+
+    def _descartar_ociosos(self, agora, capacidade, taxa):
+        # Baldes que já teriam reabastecido por completo equivalem a baldes novos
+        cheio_em = capacidade / taxa
+        for chave in [c for c, (_, ultimo) in self._baldes.items() if agora - ultimo >= cheio_em]:
+            del self._baldes[chave]
+
+
+_armazem = ArmazemMemoria()
+
+
+def configurar_armazem(armazem):
+    """Substitui o armazém de estado dos limitadores."""
+    global _armazem
+    _armazem = armazem
+
+
+class LimitadorUsuario:
+    """Token bucket por `uid`, com orçamento próprio para cada endpoint."""
+
+    def __init__(self, endpoint, capacidade, taxa):
+        prefixo = "LIMITE_" + endpoint.upper()
+        self.endpoint = endpoint
+        self.capacidade = float(os.environ.get(prefixo + "_CAPACIDADE", capacidade))
+        self.taxa = float(os.environ.get(prefixo + "_TAXA", taxa))
+
+    def verificar(self, uid, cors_headers):
+        """Retorna uma resposta 429 se o usuário excedeu o limite, ou None."""
+        if self.taxa <= 0:
+            return None
+        permitido, espera = _armazem.consumir(f"{self.endpoint}:{uid}", self.capacidade, self.taxa)
+        if permitido:
+            return None
+        headers = dict(cors_headers, **{"Retry-After": str(max(1, math.ceil(espera)))})
+        return json.dumps({"error": "Limite de requisições excedido"}), 429, headers
+
+
+class LimiteConcorrencia:
+    """Limita as requisições simultâneas da instância, descartando o excesso cedo."""
+
+    def __init__(self, maximo=MAX_CONCORRENCIA):
+        self.maximo = maximo
+        self.em_andamento = 0
+        self._lock = threading.Lock()
+
+    def entrar(self):
+        with self._lock:
+            if self.maximo > 0 and self.em_andamento >= self.maximo:
+                return False
+            self.em_andamento += 1
+            return True
+
+    def sair(self):
+        with self._lock:
+            self.em_andamento -= 1
+
+
+concorrencia = LimiteConcorrencia()
+
+
+def limitar_concorrencia(handler):
+    """Decorador que responde 503 com Retry-After quando a instância está saturada."""
+
+    @functools.wraps(handler)
+    def wrapper(request):
+        if request.method == "OPTIONS":
+            return handler(request)
+        if not concorrencia.entrar():
+            headers = {"Access-Control-Allow-Origin": "*", "Retry-After": "1"}
+            return json.dumps({"error": "Servidor sobrecarregado, tente novamente"}), 503, headers
+        try:
+            return handler(request)
+        finally:
+            concorrencia.sair()
+
+    return wrapper
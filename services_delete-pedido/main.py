@@ -1,17 +1,28 @@
 import functions_framework
 import json
-from google.cloud import firestore
 import firebase_admin
 from firebase_admin import auth, credentials
 from flask import request
+from captura import capturar
+from eventos import REMOVIDO, eventos_pedido
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from remocao import CORS_HEADERS, lapide, pedido_id_da_rota, resposta_removido
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, resposta_degradada
+from resumo import resumos_remocao
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
-# Inicializa o cliente do Firestore
-db = firestore.Client()
+# Inicializa o cliente do Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("deletar_pedido", capacidade=10, taxa=2)
 
 def verificar_autenticacao():
     """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
@@ -28,52 +39,58 @@ def verificar_autenticacao():
         return None, json.dumps({"error": "Token inválido ou expirado"}), 401
 
 @functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
 def deletar_pedido(request):
     """Deleta um pedido no Firestore, apenas para usuários autenticados."""
 
     # Configuração CORS para permitir requisições do frontend
-    cors_headers = {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "OPTIONS, DELETE",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization",
-    }
+    cors_headers = dict(CORS_HEADERS)
 
     # Responder pré-requisição (CORS)
     if request.method == "OPTIONS":
         return "", 204, cors_headers
 
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
     # Verifica se o usuário está autenticado
     user, error_response, status = verificar_autenticacao()
     if not user:
         return error_response, status, cors_headers
 
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
     if request.method != "DELETE":
         return json.dumps({"error": "Método não permitido"}), 405, cors_headers
 
     try:
         # Obtém o ID do pedido da URL
-        path_parts = request.path.strip("/").split("/")
-        if len(path_parts) < 2 or path_parts[0] != "pedidos":
+        pedido_id = pedido_id_da_rota(request.path)
+        if pedido_id is None:
             return json.dumps({"error": "ID do pedido não fornecido corretamente"}), 400, cors_headers
 
-        pedido_id = path_parts[1]
+        # Busca o pedido
+        registro = circuito.chamar(lambda: repositorio.obter(pedido_id, **prazo.opcoes()))
 
-        # Busca o pedido no Firestore
-        doc_ref = db.collection("pedidos").document(pedido_id)
-        doc = doc_ref.get()
-
-        if not doc.exists:
+        if registro is None:
             return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
 
-        # Deleta o pedido
-        doc_ref.delete()
-
-        resposta = {
-            "message": "Pedido deletado com sucesso",
-            "id": pedido_id
-        }
+        # Deleta o pedido e grava a lápide usada pela sincronização incremental
+        # (e o evento da outbox e o resumo do dono, se ligados) na mesma escrita atômica
+        eventos = eventos_pedido(REMOVIDO, pedido_id, registro.dados)
+        resumos = resumos_remocao(registro.dados.get("user_id"), pedido_id)
+        circuito.chamar(lambda: repositorio.remover(pedido_id, lapide(registro.dados), eventos=eventos,
+                                                    resumos=resumos, **prazo.opcoes()))
 
-        return json.dumps(resposta), 200, cors_headers
+        return resposta_removido(pedido_id), 200, cors_headers
 
     except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
         return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,117 @@
+"""Variante assíncrona (ASGI) de `deletar_pedido`, sobre o AsyncClient do Firestore.
+
+A leitura e a escrita atômica (remoção + lápide) não ocupam uma thread
+enquanto aguardam o Firestore; as regras são as do handler síncrono (remocao.py).
+
+Uso local: functions-framework --source=main_aio.py --target=deletar_pedido --asgi
+"""
+import functions_framework.aio
+import json
+import firebase_admin
+from firebase_admin import credentials
+from google.cloud import firestore
+from google.cloud.firestore_v1 import async_transactional
+from assincrono import chamar_com_circuito, http_async, opcoes_async, verificar_autenticacao
+from eventos import REMOVIDO, eventos_pedido
+from limitador import LimitadorUsuario
+from remocao import CORS_HEADERS, lapide, pedido_id_da_rota, resposta_removido
+from repositorio import COLECAO_REMOVIDOS, COLECAO_RESUMOS, adicionar_eventos, aplicar_resumos, usa_firestore
+from resiliencia import Prazo, resposta_degradada
+from resumo import resumos_remocao
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o cliente assíncrono do Firestore (variante só do Firestore:
+# no backend sqlite, implantar o main.py síncrono)
+if not usa_firestore():
+    raise RuntimeError("main_aio.py requer PEDIDOS_BACKEND=firestore; use o main.py")
+db = firestore.AsyncClient()
+
+# Mesmo orçamento por usuário da variante síncrona
+limitador = LimitadorUsuario("deletar_pedido", capacidade=10, taxa=2)
+
+
+async def remover_com_resumo(escrever, resumos):
+    """Aplica `escrever` e regrava os resumos [(user_id, alterar)] numa transação."""
+    refs = {user_id: db.collection(COLECAO_RESUMOS).document(user_id) for user_id, _ in resumos}
+
+    @async_transactional
+    async def executar(transacao):
+        atuais = {doc.id: doc.to_dict() async for doc in db.get_all(list(refs.values()), transaction=transacao)
+                  if doc.exists}
+        escrever(transacao)
+        for user_id, resumo in aplicar_resumos(atuais, resumos).items():
+            transacao.set(refs[user_id], resumo)
+
+    await executar(db.transaction())
+
+
+@functions_framework.aio.http
+@http_async
+async def deletar_pedido(request):
+    """Deleta um pedido no Firestore, apenas para usuários autenticados."""
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = dict(CORS_HEADERS)
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = await verificar_autenticacao(request)
+    if not user:
+        return error_response, status, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    if request.method != "DELETE":
+        return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+    try:
+        # Obtém o ID do pedido da URL
+        pedido_id = pedido_id_da_rota(request.url.path)
+        if pedido_id is None:
+            return json.dumps({"error": "ID do pedido não fornecido corretamente"}), 400, cors_headers
+
+        # Busca o pedido no Firestore
+        doc_ref = db.collection("pedidos").document(pedido_id)
+        doc = await chamar_com_circuito(lambda: doc_ref.get(**opcoes_async(prazo)))
+
+        if not doc.exists:
+            return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
+
+        # Deleta o pedido e grava a lápide usada pela sincronização incremental
+        # (e o evento da outbox e o resumo do dono, se ligados) na mesma escrita atômica
+        dados = doc.to_dict() or {}
+        eventos = eventos_pedido(REMOVIDO, pedido_id, dados)
+        resumos = resumos_remocao(dados.get("user_id"), pedido_id)
+
+        def escrever(lote):
+            lote.delete(doc_ref)
+            lote.set(db.collection(COLECAO_REMOVIDOS).document(pedido_id), lapide(dados))
+            adicionar_eventos(db, lote, eventos)
+
+        if resumos:
+            await chamar_com_circuito(lambda: remover_com_resumo(escrever, resumos))
+        else:
+            batch = db.batch()
+            escrever(batch)
+            await chamar_com_circuito(lambda: batch.commit(**opcoes_async(prazo)))
+
+        return resposta_removido(pedido_id), 200, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,161 @@
+from codec_itens import itens_do_pedido
+
+# Valores padrão dos campos de um pedido, definidos em um único lugar
+PADROES = {
+    "status": "DESCONHECIDO",
+    "total": 0.0,
+    "total_centavos": None,
+    "data_criacao": "",
+    "ultima_atualizacao": "",
+    "cliente": "",
+    "email": "",
+    "user_id": None,
+}
+
+# Campos devolvidos na listagem de pedidos
+CAMPOS_LISTAGEM = ("id", "status", "total", "data_criacao", "cliente", "email", "itens")
+
+# Campos do documento fora do modelo devolvidos com extras=True (detalhe); os
+# demais, como busca_tokens e itens_colunar, são internos e não saem na resposta
+CAMPOS_EXTRAS = ("arquivado",)
+
+STATUS_INICIAL = "PENDENTE"
+
+_novo = object.__new__
+_STATUS, _TOTAL, _DATA_CRIACAO, _ULTIMA_ATUALIZACAO, _CLIENTE, _EMAIL = (
+    PADROES["status"], PADROES["total"], PADROES["data_criacao"], PADROES["ultima_atualizacao"],
+    PADROES["cliente"], PADROES["email"])
+
+
+class ItemPedido:
+    """Linha de um pedido."""
+
+    __slots__ = ("sku", "quantidade", "preco")
+
+    def __init__(self, sku=None, quantidade=0, preco=0.0):
+        self.sku = sku
+        self.quantidade = quantidade
+        self.preco = preco
+
+    @classmethod
+    def from_dict(cls, dados):
+        return cls(dados.get("sku"), dados.get("quantidade", 0), dados.get("preco", 0.0))
+
+    def to_json(self):
+        dados = {"quantidade": self.quantidade, "preco": self.preco}
+        if self.sku is not None:
+            dados["sku"] = self.sku
+        return dados
+
+
+class Pedido:
+    """Pedido armazenado na coleção `pedidos`.
+
+    Os itens ficam como lista de mapas, como no documento, para não custar uma
+    conversão por linha em listagens grandes; `itens_modelo()` devolve os
+    ItemPedido quando necessário.
+    """
+
+    __slots__ = ("id", "status", "total", "total_centavos", "data_criacao", "ultima_atualizacao",
+                 "cliente", "email", "itens", "user_id", "extras")
+
+    def __init__(self, id, status=PADROES["status"], total=PADROES["total"], total_centavos=None,
+                 data_criacao=PADROES["data_criacao"], ultima_atualizacao=PADROES["ultima_atualizacao"],
+                 cliente=PADROES["cliente"], email=PADROES["email"], itens=None, user_id=None, extras=None):
+        self.id = id
+        self.status = status
+        self.total = total
+        self.total_centavos = total_centavos
+        self.data_criacao = data_criacao
+        self.ultima_atualizacao = ultima_atualizacao
+        self.cliente = cliente
+        self.email = email
+        self.itens = [] if itens is None else itens
+        self.user_id = user_id
+        self.extras = extras
+
+    @classmethod
+    def from_dict(cls, pedido_id, dados, extras=False):
+        """Monta o pedido a partir dos dados do documento.
+
+        Com `extras=True`, os campos de CAMPOS_EXTRAS presentes são preservados para a resposta.
+        """
+        # Atribuição direta aos slots, sem passar pelo __init__ (caminho quente da listagem)
+        get = dados.get
+        pedido = _novo(cls)
+        pedido.id = pedido_id
+        pedido.status = get("status", _STATUS)
+        pedido.total = get("total", _TOTAL)
+        pedido.total_centavos = get("total_centavos")
+        pedido.data_criacao = get("data_criacao", _DATA_CRIACAO)
+        pedido.ultima_atualizacao = get("ultima_atualizacao", _ULTIMA_ATUALIZACAO)
+        pedido.cliente = get("cliente", _CLIENTE)
+        pedido.email = get("email", _EMAIL)
+        pedido.itens = itens_do_pedido(dados)
+        pedido.user_id = get("user_id")
+        pedido.extras = None
+        if extras:
+            pedido.extras = {campo: dados[campo] for campo in CAMPOS_EXTRAS if campo in dados}
+        return pedido
+
+    @classmethod
+    def from_snapshot(cls, doc, extras=False):
+        return cls.from_dict(doc.id, doc.to_dict() or {}, extras)
+
+    def itens_modelo(self):
+        return [ItemPedido.from_dict(item) for item in self.itens]
+
+    def to_json(self, campos=None):
+        """Dicionário pronto para json.dumps (todos os campos preenchidos, ou só `campos`)."""
+        if campos is not None:
+            return {campo: getattr(self, campo) for campo in campos}
+        dados = {}
+        for campo in _CAMPOS_DADOS:
+            valor = getattr(self, campo)
+            if valor is not None:
+                dados[campo] = valor
+        if self.extras:
+            dados.update(self.extras)
+        return dados
+
+    def to_json_listagem(self):
+        """Campos de CAMPOS_LISTAGEM; usado como `default=` do json.dumps, o dicionário
+        de cada pedido só existe enquanto ele é serializado (listagens pequenas, como a
+        busca; a listagem de pedidos usa `dados_listagem`)."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "data_criacao": self.data_criacao,
+            "cliente": self.cliente,
+            "email": self.email,
+            "itens": self.itens,
+        }
+
+    def to_documento(self):
+        """Dados gravados no Firestore (o ID é o nome do documento, mas também é gravado)."""
+        dados = self.to_json()
+        dados["itens"] = list(self.itens)
+        return dados
+
+
+_CAMPOS_DADOS = Pedido.__slots__[:-1]
+
+
+def dados_listagem(pedido_id, dados):
+    """Campos de CAMPOS_LISTAGEM direto dos dados do documento, com os padrões do modelo.
+
+    Caminho quente da listagem: um dicionário por documento, serializado de uma
+    vez, sem instanciar o Pedido (o `default=` do json.dumps chama Python para
+    cada pedido e deixa a listagem mais lenta que o laço de dicionários).
+    """
+    get = dados.get
+    return {
+        "id": pedido_id,
+        "status": get("status", _STATUS),
+        "total": get("total", _TOTAL),
+        "data_criacao": get("data_criacao", _DATA_CRIACAO),
+        "cliente": get("cliente", _CLIENTE),
+        "email": get("email", _EMAIL),
+        "itens": itens_do_pedido(dados),
+    }
@@ -0,0 +1,32 @@
+"""Regras da remoção de pedidos, comuns ao handler síncrono (main.py) e ao assíncrono (main_aio.py)."""
+import json
+from datetime import datetime
+from modelo import Pedido
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS, DELETE",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+}
+
+def pedido_id_da_rota(path):
+    """ID de /pedidos/<id>, ou None."""
+    path_parts = path.strip("/").split("/")
+    if len(path_parts) < 2 or path_parts[0] != "pedidos":
+        return None
+    return path_parts[1]
+
+
+def lapide(dados):
+    """Lápide lida pela sincronização incremental."""
+    return {
+        "user_id": Pedido.from_dict(None, dados).user_id,
+        "ultima_atualizacao": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def resposta_removido(pedido_id):
+    return json.dumps({
+        "message": "Pedido deletado com sucesso",
+        "id": pedido_id
+    })
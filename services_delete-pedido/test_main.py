@@ -1,7 +1,9 @@
 import unittest
 import json
 from unittest.mock import patch, MagicMock
-from flask import Flask, Request
+from flask import Flask, Request, request
+from repositorio import RepositorioSQLite
+from resumo import criar
 from main import deletar_pedido
 
 class TestDeletarPedido(unittest.TestCase):
@@ -33,8 +35,9 @@ class TestDeletarPedido(unittest.TestCase):
         self.assertIn("Método não permitido", response[0])
 
     @patch("main.verificar_autenticacao")
+    @patch("main.db.batch")
     @patch("main.db.collection")
-    def test_deletar_pedido_sucesso(self, mock_db_collection, mock_verificar_autenticacao):
+    def test_deletar_pedido_sucesso(self, mock_db_collection, mock_db_batch, mock_verificar_autenticacao):
         """Testa se a função deleta o pedido com sucesso"""
         mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
 
@@ -86,5 +89,66 @@ class TestDeletarPedido(unittest.TestCase):
         self.assertEqual(response[1], 500)
         self.assertIn("Erro inesperado", response[0])
 
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.batch")
+    @patch("main.db.collection")
+    def test_deletar_pedido_grava_lapide(self, mock_db_collection, mock_db_batch, mock_verificar_autenticacao):
+        """Testa se a exclusão grava a lápide na mesma escrita em lote"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        mock_doc = MagicMock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {"user_id": "user123", "status": "PENDENTE"}
+        mock_doc_ref = MagicMock()
+        mock_doc_ref.get.return_value = mock_doc
+        mock_db_collection.return_value.document.return_value = mock_doc_ref
+        mock_batch = mock_db_batch.return_value
+
+        with self.app.test_request_context('/pedidos/123', method="DELETE"):
+            response = deletar_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        mock_db_collection.assert_any_call("pedidos_removidos")
+        mock_batch.delete.assert_called_once_with(mock_doc_ref)
+        lapide = mock_batch.set.call_args[0][1]
+        self.assertEqual(lapide["user_id"], "user123")
+        self.assertTrue(lapide["ultima_atualizacao"].endswith("Z"))
+        mock_batch.commit.assert_called_once()
+
+    @patch("main.verificar_autenticacao")
+    def test_deletar_pedido_grava_evento(self, mock_verificar_autenticacao):
+        """Testa se, com a outbox ligada, o evento de remoção é gravado junto com a lápide"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.gravar("123", {"status": "CANCELADO", "user_id": "user123", "total": 5.0})
+
+        with patch("main.repositorio", repositorio), patch("eventos.EVENTOS_PEDIDOS", True), \
+                self.app.test_request_context('/pedidos/123', method="DELETE"):
+            response = deletar_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        self.assertIsNone(repositorio.obter("123"))
+        (_, evento), = repositorio.eventos()
+        self.assertEqual((evento["tipo"], evento["pedido_id"], evento["status"]), ("pedido.removido", "123", "CANCELADO"))
+
+    @patch("main.verificar_autenticacao")
+    def test_deletar_pedido_atualiza_resumo(self, mock_verificar_autenticacao):
+        """Testa se, com o resumo ligado, o pedido removido sai do resumo do dono na mesma transação"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        for pedido_id in ("123", "456"):
+            dados = {"status": "PENDENTE", "user_id": "dono", "total": 5.0, "data_criacao": "2024-01-01"}
+            repositorio.gravar(pedido_id, dados)
+            repositorio.alterar_resumo("dono", lambda atual, i=pedido_id, d=dados: criar(atual, i, d))
+
+        with patch("main.repositorio", repositorio), patch("resumo.RESUMO_PEDIDOS", True), \
+                self.app.test_request_context('/pedidos/123', method="DELETE"):
+            response = deletar_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        resumo = repositorio.obter_resumo("dono")
+        self.assertEqual(resumo["quantidade"], 1)
+        self.assertEqual([p["id"] for p in resumo["pedidos"]], ["456"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import asyncio
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from starlette.requests import Request
+from limitador import ArmazemMemoria, configurar_armazem
+from main_aio import deletar_pedido
+
+def requisicao(path, method="DELETE"):
+    return Request({"type": "http", "method": method, "path": path, "query_string": b"", "headers": []})
+
+class TestDeletarPedidoAsync(unittest.TestCase):
+
+    def setUp(self):
+        configurar_armazem(ArmazemMemoria())
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    @patch("main_aio.db")
+    def test_deletar_pedido(self, mock_db, mock_verificar_autenticacao):
+        """Testa se a remoção assíncrona apaga o pedido e grava a lápide no mesmo lote"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        doc = MagicMock(exists=True)
+        doc.to_dict.return_value = {"status": "PENDENTE", "user_id": "user123"}
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(return_value=doc)
+        batch = mock_db.batch.return_value
+        batch.commit = AsyncMock()
+
+        response = asyncio.run(deletar_pedido(requisicao("/pedidos/123")))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body)["id"], "123")
+        batch.delete.assert_called_once()
+        self.assertEqual(batch.set.call_args.args[1]["user_id"], "user123")
+        batch.commit.assert_awaited_once()
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    @patch("main_aio.db")
+    def test_pedido_nao_encontrado(self, mock_db, mock_verificar_autenticacao):
+        """Testa se a remoção assíncrona retorna 404 para pedido inexistente"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(return_value=MagicMock(exists=False))
+
+        response = asyncio.run(deletar_pedido(requisicao("/pedidos/123")))
+
+        self.assertEqual(response.status_code, 404)
+        mock_db.batch.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
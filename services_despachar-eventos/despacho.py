@@ -0,0 +1,186 @@
+"""Entrega dos eventos da outbox de pedidos (eventos_pedidos) aos assinantes.
+
+Cada assinante (assinantes_eventos: url, tipos, segredo, ativo) tem o cursor
+do último evento que recebeu. Uma execução lê a outbox em páginas a partir do
+menor cursor e entrega a cada assinante, em lotes de até EVENTOS_POR_ENTREGA,
+os eventos posteriores ao seu cursor (filtrados por `tipos`, se houver). Os
+assinantes são atendidos em paralelo num pool de EVENTOS_CONEXOES threads,
+sobre o mesmo número de conexões HTTP reaproveitadas entre as execuções; os
+lotes de um mesmo assinante saem em ordem, um de cada vez.
+
+A entrega é "pelo menos uma vez": o cursor avança depois de cada lote
+confirmado (2xx), então uma falha no meio repete só o lote em andamento. O
+cabeçalho X-Eventos-Lote identifica o lote (o mesmo nas repetições) e cada
+evento tem um "id" único, para o assinante descartar duplicatas. Erros de
+rede, 408, 429 e 5xx são tentados de novo com espera exponencial (ou o
+Retry-After); outros 4xx, ou as tentativas esgotadas, param o assinante até a
+próxima execução sem atrasar os demais. Ao final, os eventos já entregues a
+todos os assinantes ativos saem da outbox.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# Conexões HTTP simultâneas (e assinantes atendidos em paralelo)
+CONEXOES = int(os.environ.get("EVENTOS_CONEXOES", "8"))
+
+# Eventos por requisição ao assinante
+EVENTOS_POR_ENTREGA = int(os.environ.get("EVENTOS_POR_ENTREGA", "100"))
+
+# Eventos lidos da outbox por página
+TAMANHO_PAGINA = int(os.environ.get("EVENTOS_TAMANHO_PAGINA", "500"))
+
+# Tentativas por lote e espera entre elas (exponencial, com jitter, até o máximo)
+TENTATIVAS = int(os.environ.get("EVENTOS_TENTATIVAS", "5"))
+ESPERA_BASE = float(os.environ.get("EVENTOS_ESPERA_BASE_MS", "200")) / 1000.0
+ESPERA_MAXIMA = float(os.environ.get("EVENTOS_ESPERA_MAXIMA_MS", "10000")) / 1000.0
+
+# Timeout de cada requisição ao assinante, em segundos
+TIMEOUT = float(os.environ.get("EVENTOS_TIMEOUT", "10"))
+
+# Tempo de trabalho por chamada; o que sobrar é entregue na próxima execução
+DURACAO_MAXIMA = float(os.environ.get("EVENTOS_DURACAO_MAXIMA", "240"))
+
+CABECALHO_LOTE = "X-Eventos-Lote"
+CABECALHO_ASSINATURA = "X-Eventos-Assinatura"
+
+# Respostas que valem nova tentativa
+STATUS_TRANSITORIOS = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+
+class FalhaEntrega(Exception):
+    """O assinante recusou o lote ou não respondeu depois de todas as tentativas."""
+
+
+def assinatura(segredo, corpo):
+    """HMAC-SHA256 do corpo com o segredo do assinante, no cabeçalho X-Eventos-Assinatura."""
+    return "sha256=" + hmac.new(segredo.encode(), corpo, hashlib.sha256).hexdigest()
+
+
+def id_lote(eventos):
+    return hashlib.sha256(",".join(e["id"] for e in eventos).encode()).hexdigest()[:32]
+
+
+class Despachante:
+    """Esvazia a outbox para os assinantes cadastrados no repositório de pedidos."""
+
+    def __init__(self, repositorio, conexoes=CONEXOES, por_entrega=EVENTOS_POR_ENTREGA,
+                 tamanho_pagina=TAMANHO_PAGINA, tentativas=TENTATIVAS, espera_base=ESPERA_BASE,
+                 espera_maxima=ESPERA_MAXIMA, timeout=TIMEOUT, duracao_maxima=DURACAO_MAXIMA):
+        self.repositorio = repositorio
+        self.conexoes = conexoes
+        self.por_entrega = por_entrega
+        self.tamanho_pagina = tamanho_pagina
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.timeout = timeout
+        self.duracao_maxima = duracao_maxima
+        # pool_block: com todas as conexões em uso, a próxima requisição espera uma livre
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes, pool_block=True)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+    def _espera(self, tentativa, resposta):
+        retry_after = resposta.headers.get("Retry-After") if resposta is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.espera_maxima)
+        return min(self.espera_maxima, self.espera_base * 2 ** tentativa) * random.uniform(0.5, 1.0)
+
+    def entregar(self, assinante, eventos):
+        """Envia um lote ao assinante; retorna o número de tentativas ou levanta FalhaEntrega."""
+        corpo = json.dumps({"eventos": eventos}).encode()
+        cabecalhos = {"Content-Type": "application/json", CABECALHO_LOTE: id_lote(eventos)}
+        if assinante.get("segredo"):
+            cabecalhos[CABECALHO_ASSINATURA] = assinatura(assinante["segredo"], corpo)
+
+        erro = None
+        for tentativa in range(self.tentativas):
+            resposta = None
+            try:
+                resposta = self.sessao.post(assinante["url"], data=corpo, headers=cabecalhos, timeout=self.timeout)
+            except requests.RequestException as e:
+                erro = f"{type(e).__name__}: {e}"
+            else:
+                if 200 <= resposta.status_code < 300:
+                    return tentativa + 1
+                erro = f"HTTP {resposta.status_code}"
+                if resposta.status_code not in STATUS_TRANSITORIOS:
+                    break
+            if tentativa + 1 < self.tentativas:
+                time.sleep(self._espera(tentativa, resposta))
+        raise FalhaEntrega(erro)
+
+    def _atender(self, assinante, cursor, pagina):
+        """Entrega ao assinante os eventos da página depois do seu cursor.
+
+        Retorna (cursor final, eventos entregues, lotes, erro ou None).
+        """
+        chave = self.repositorio.chave_evento
+        novos = [(c, e) for c, e in pagina if cursor is None or chave(c) > chave(cursor)]
+        tipos = assinante.get("tipos")
+        entregar = [(c, e) for c, e in novos if not tipos or e.get("tipo") in tipos]
+
+        entregues, lotes = 0, 0
+        for inicio in range(0, len(entregar), self.por_entrega):
+            lote = entregar[inicio:inicio + self.por_entrega]
+            try:
+                self.entregar(assinante, [e for _, e in lote])
+            except FalhaEntrega as e:
+                return cursor, entregues, lotes, str(e)
+            cursor = lote[-1][0]
+            entregues += len(lote)
+            lotes += 1
+            self.repositorio.gravar_assinante(assinante["id"], {"cursor": cursor})
+
+        # Eventos de outros tipos também ficam para trás
+        if novos and novos[-1][0] != cursor:
+            cursor = novos[-1][0]
+            self.repositorio.gravar_assinante(assinante["id"], {"cursor": cursor})
+        return cursor, entregues, lotes, None
+
+    def _menor(self, cursores):
+        if any(c is None for c in cursores):
+            return None
+        return min(cursores, key=self.repositorio.chave_evento)
+
+    def executar(self):
+        """Entrega páginas até esvaziar a outbox ou esgotar a duração; retorna os contadores."""
+        fim = time.monotonic() + self.duracao_maxima
+        assinantes = [a for a in self.repositorio.assinantes() if a.get("ativo", True) and a.get("url")]
+        cursores = {a["id"]: a.get("cursor") for a in assinantes}
+        totais = {"assinantes": len(assinantes), "lidos": 0, "entregues": 0, "lotes": 0,
+                  "falhas": {}, "removidos": 0, "concluido": not assinantes}
+
+        em_dia = list(assinantes)
+        with ThreadPoolExecutor(max_workers=self.conexoes) as executor:
+            while em_dia and time.monotonic() < fim:
+                pagina = self.repositorio.eventos(self._menor([cursores[a["id"]] for a in em_dia]),
+                                                  self.tamanho_pagina)
+                totais["lidos"] += len(pagina)
+                resultados = list(executor.map(
+                    lambda a: self._atender(a, cursores[a["id"]], pagina), em_dia))
+                for assinante, (cursor, entregues, lotes, erro) in zip(em_dia, resultados):
+                    cursores[assinante["id"]] = cursor
+                    totais["entregues"] += entregues
+                    totais["lotes"] += lotes
+                    if erro is not None:
+                        totais["falhas"][assinante["id"]] = erro
+                # Um assinante com falha fica para a próxima execução
+                em_dia = [a for a in em_dia if a["id"] not in totais["falhas"]]
+                if len(pagina) < self.tamanho_pagina:
+                    totais["concluido"] = not totais["falhas"]
+                    break
+
+        # Remove o que todos os assinantes ativos já receberam
+        menor = self._menor(list(cursores.values())) if cursores else None
+        if menor is not None:
+            totais["removidos"] = self.repositorio.remover_eventos(menor)
+        return totais
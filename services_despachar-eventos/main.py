@@ -0,0 +1,132 @@
+import functions_framework
+import json
+from urllib.parse import urlparse
+import firebase_admin
+from firebase_admin import auth, credentials
+from flask import request
+from captura import capturar
+from despacho import Despachante
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import resposta_degradada
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o Firestore e o repositório de pedidos (PEDIDOS_BACKEND), onde ficam a outbox e os assinantes
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Despachante criado uma vez por instância: as conexões com os assinantes são reaproveitadas
+despachante = Despachante(repositorio)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("despachar_eventos", capacidade=5, taxa=1)
+
+# Campos aceitos no cadastro de um assinante
+CAMPOS_ASSINANTE = {"url", "tipos", "segredo", "ativo"}
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+def validar_assinante(dados):
+    """Mensagem de erro do cadastro, ou None se válido."""
+    if not isinstance(dados, dict) or not dados or dados.keys() - CAMPOS_ASSINANTE:
+        return f"Campos aceitos: {', '.join(sorted(CAMPOS_ASSINANTE))}"
+    if "url" in dados:
+        url = urlparse(dados["url"]) if isinstance(dados["url"], str) else None
+        if url is None or url.scheme not in ("http", "https") or not url.netloc:
+            return "Campo 'url' inválido"
+    if "tipos" in dados and (not isinstance(dados["tipos"], list)
+                             or not all(isinstance(t, str) for t in dados["tipos"])):
+        return "Campo 'tipos' deve ser uma lista de tipos de evento"
+    if "segredo" in dados and not isinstance(dados["segredo"], str):
+        return "Campo 'segredo' inválido"
+    if "ativo" in dados and not isinstance(dados["ativo"], bool):
+        return "Campo 'ativo' inválido"
+    return None
+
+
+@functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
+def despachar_eventos(request):
+    """Entrega os eventos da outbox de pedidos aos assinantes (uso operacional).
+
+    POST / esvazia a outbox (pensado para o Cloud Scheduler; 202 quando ainda
+    restam eventos ou algum assinante falhou). GET /assinantes lista os
+    assinantes e PUT /assinantes/<id> cadastra ou altera um
+    ({"url", "tipos", "segredo", "ativo"}).
+    """
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, PUT, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Apenas administradores (custom claim `admin`)
+    if not user.get("admin"):
+        return json.dumps({"error": "Acesso restrito a administradores"}), 403, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        partes = [p for p in request.path.split("/") if p]
+
+        if partes[:1] == ["assinantes"]:
+            if request.method == "GET" and len(partes) == 1:
+                # O segredo não sai na listagem
+                assinantes = [{k: v for k, v in a.items() if k != "segredo"} for a in repositorio.assinantes()]
+                return json.dumps({"assinantes": assinantes}), 200, cors_headers
+            if request.method == "PUT" and len(partes) == 2:
+                dados = request.get_json(silent=True)
+                erro = validar_assinante(dados)
+                if erro:
+                    return json.dumps({"error": erro}), 400, cors_headers
+                if "url" not in dados and not any(a["id"] == partes[1] for a in repositorio.assinantes()):
+                    return json.dumps({"error": "Campo 'url' obrigatório no cadastro"}), 400, cors_headers
+                repositorio.gravar_assinante(partes[1], dados)
+                return json.dumps({"message": "Assinante gravado", "id": partes[1]}), 200, cors_headers
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        if request.method != "POST" or partes:
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        totais = despachante.executar()
+        return json.dumps(totais), 200 if totais["concluido"] else 202, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,210 @@
+import unittest
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from flask import Flask, request
+from despacho import CABECALHO_ASSINATURA, CABECALHO_LOTE, Despachante
+from limitador import ArmazemMemoria, configurar_armazem
+from repositorio import RepositorioSQLite
+from main import despachar_eventos
+
+class AssinanteLocal:
+    """Servidor HTTP local no lugar do webhook: guarda os lotes recebidos e
+    responde com os status programados (depois deles, 200)."""
+
+    def __init__(self, respostas=(), atraso=0.0):
+        self.respostas = list(respostas)
+        self.atraso = atraso
+        self.lotes = []
+        self.requisicoes = 0
+        self.intervalos = []
+        self._lock = threading.Lock()
+        assinante = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers["Content-Length"]))
+                inicio = time.monotonic()
+                with assinante._lock:
+                    assinante.requisicoes += 1
+                    status = assinante.respostas.pop(0) if assinante.respostas else 200
+                time.sleep(assinante.atraso)
+                with assinante._lock:
+                    if status == 200:
+                        assinante.lotes.append((dict(self.headers), corpo))
+                    assinante.intervalos.append((inicio, time.monotonic()))
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/eventos"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def eventos(self):
+        return [e for _, corpo in self.lotes for e in json.loads(corpo)["eventos"]]
+
+def evento(i, tipo="pedido.status_alterado"):
+    return {"id": f"e{i:03d}", "tipo": tipo, "pedido_id": f"p{i}", "status": "ENVIADO"}
+
+class TestDespachante(unittest.TestCase):
+
+    def setUp(self):
+        self.repositorio = RepositorioSQLite(":memory:")
+
+    def assinante(self, assinante_id, **kwargs):
+        local = AssinanteLocal(kwargs.pop("respostas", ()), kwargs.pop("atraso", 0.0))
+        self.addCleanup(local.fechar)
+        self.repositorio.gravar_assinante(assinante_id, dict(kwargs, url=local.url))
+        return local
+
+    def gravar_pedidos(self, quantidade, tipo="pedido.status_alterado"):
+        for i in range(quantidade):
+            self.repositorio.gravar(f"p{i}", {"status": "ENVIADO"}, eventos=[evento(i, tipo)])
+
+    def despachante(self, **kwargs):
+        return Despachante(self.repositorio, **dict({"espera_base": 0.001, "espera_maxima": 0.01}, **kwargs))
+
+    def cursor(self, assinante_id):
+        return next(a for a in self.repositorio.assinantes() if a["id"] == assinante_id).get("cursor")
+
+    def test_lotes_em_ordem_por_assinante(self):
+        """Testa se cada assinante recebe os eventos em ordem, em lotes, só dos tipos pedidos"""
+        erp = self.assinante("erp", segredo="s3gredo")
+        notificacoes = self.assinante("notificacoes", tipos=["pedido.criado"])
+        self.gravar_pedidos(25)
+        self.repositorio.gravar("p99", {"status": "PENDENTE"}, eventos=[evento(99, "pedido.criado")])
+
+        totais = self.despachante(por_entrega=10, tamanho_pagina=8).executar()
+
+        self.assertEqual([e["id"] for e in erp.eventos()], [f"e{i:03d}" for i in list(range(25)) + [99]])
+        self.assertTrue(all(len(json.loads(corpo)["eventos"]) <= 8 for _, corpo in erp.lotes))
+        self.assertEqual([e["id"] for e in notificacoes.eventos()], ["e099"])
+        cabecalhos, corpo = erp.lotes[0]
+        esperado = "sha256=" + hmac.new(b"s3gredo", corpo, hashlib.sha256).hexdigest()
+        self.assertEqual(cabecalhos[CABECALHO_ASSINATURA], esperado)
+        self.assertIn(CABECALHO_LOTE, cabecalhos)
+        self.assertTrue(totais["concluido"])
+        self.assertEqual(totais["entregues"], 27)
+        # Entregue a todos: a outbox fica vazia
+        self.assertEqual(totais["removidos"], 26)
+        self.assertEqual(self.repositorio.eventos(), [])
+
+    def test_falha_transitoria_tenta_de_novo(self):
+        """Testa se 503 e 429 são tentados de novo com espera e o lote é entregue uma vez"""
+        erp = self.assinante("erp", respostas=[503, 429])
+        self.gravar_pedidos(3)
+
+        totais = self.despachante().executar()
+
+        self.assertEqual(erp.requisicoes, 3)
+        self.assertEqual(len(erp.lotes), 1)
+        self.assertEqual(totais["falhas"], {})
+        self.assertEqual(self.repositorio.chave_evento(self.cursor("erp")), 3)
+
+    def test_assinante_com_erro_nao_atrasa_os_demais(self):
+        """Testa se um assinante recusando o lote mantém o cursor e os eventos, sem bloquear os outros"""
+        quebrado = self.assinante("quebrado", respostas=[400])
+        erp = self.assinante("erp")
+        self.gravar_pedidos(5)
+
+        totais = self.despachante(tentativas=3).executar()
+
+        self.assertEqual(quebrado.requisicoes, 1)  # 400 não é tentado de novo
+        self.assertEqual(len(erp.eventos()), 5)
+        self.assertEqual(totais["falhas"], {"quebrado": "HTTP 400"})
+        self.assertFalse(totais["concluido"])
+        self.assertIsNone(self.cursor("quebrado"))
+        self.assertEqual(totais["removidos"], 0)
+
+        # Na próxima execução o assinante recebe os eventos e só então eles saem da outbox
+        totais = self.despachante().executar()
+        self.assertEqual(len(quebrado.eventos()), 5)
+        self.assertEqual(len(erp.eventos()), 5)
+        self.assertEqual(totais["removidos"], 5)
+
+    def test_tentativas_esgotadas_entrega_parcial(self):
+        """Testa se, esgotadas as tentativas, o cursor fica no último lote confirmado"""
+        erp = self.assinante("erp", respostas=[200, 500, 500])
+        self.gravar_pedidos(4)
+
+        totais = self.despachante(por_entrega=2, tentativas=2).executar()
+
+        self.assertEqual(len(erp.eventos()), 2)
+        self.assertEqual(totais["falhas"], {"erp": "HTTP 500"})
+        self.assertEqual(self.repositorio.chave_evento(self.cursor("erp")), 2)
+        self.assertEqual(totais["removidos"], 2)
+
+    def test_conexoes_limitadas(self):
+        """Testa se o número de requisições simultâneas não passa do pool de conexões"""
+        locais = [self.assinante(f"a{i}", atraso=0.05) for i in range(6)]
+        self.gravar_pedidos(2)
+
+        totais = self.despachante(conexoes=2).executar()
+
+        self.assertEqual(totais["entregues"], 12)
+        self.assertTrue(all(len(local.eventos()) == 2 for local in locais))
+        intervalos = [i for local in locais for i in local.intervalos]
+        simultaneas = max(sum(1 for inicio, fim in intervalos if inicio <= instante < fim)
+                          for instante, _ in intervalos)
+        self.assertLessEqual(simultaneas, 2)
+
+class TestDespacharEventos(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        configurar_armazem(ArmazemMemoria())
+        self.repositorio = RepositorioSQLite(":memory:")
+        patcher = patch("main.repositorio", self.repositorio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def chamar(self, metodo, caminho, usuario, corpo=None):
+        with patch("main.verificar_autenticacao", return_value=(usuario, None, 200)), \
+                self.app.test_request_context(caminho, method=metodo, json=corpo):
+            return despachar_eventos(request)
+
+    def test_somente_administradores(self):
+        """Testa se usuários sem a claim admin recebem 403"""
+        resposta = self.chamar("POST", "/", {"uid": "u1"})
+
+        self.assertEqual(resposta[1], 403)
+
+    def test_cadastro_de_assinante(self):
+        """Testa se o cadastro valida a URL e a listagem não expõe o segredo"""
+        admin = {"uid": "admin", "admin": True}
+
+        invalido = self.chamar("PUT", "/assinantes/erp", admin, {"url": "ftp://erp"})
+        gravado = self.chamar("PUT", "/assinantes/erp", admin, {"url": "https://erp.exemplo.com/eventos",
+                                                               "segredo": "s", "tipos": ["pedido.criado"]})
+        listagem = self.chamar("GET", "/assinantes", admin)
+
+        self.assertEqual(invalido[1], 400)
+        self.assertEqual(gravado[1], 200)
+        assinante, = json.loads(listagem[0])["assinantes"]
+        self.assertEqual(assinante["id"], "erp")
+        self.assertNotIn("segredo", assinante)
+
+    def test_despacho(self):
+        """Testa se o POST executa o despachante e devolve os contadores"""
+        totais = {"concluido": False, "entregues": 500}
+        with patch("main.despachante") as despachante:
+            despachante.executar.return_value = totais
+            resposta = self.chamar("POST", "/", {"uid": "admin", "admin": True})
+
+        self.assertEqual(resposta[1], 202)
+        self.assertEqual(json.loads(resposta[0]), totais)
+
+if __name__ == '__main__':
+    unittest.main()
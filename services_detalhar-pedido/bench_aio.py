@@ -0,0 +1,152 @@
+"""Benchmark do detalhe de pedidos: handler síncrono (threads) x assíncrono (asyncio).
+
+Simula o Firestore com uma latência fixa por chamada (time.sleep no cliente
+síncrono, asyncio.sleep no AsyncClient) e mede requisições por segundo numa
+instância: o síncrono limitado pelas threads do servidor, o assíncrono por um
+único event loop com a concorrência da instância. Mede o detalhe simples e o
+detalhe em lote (get_all numa chamada x uma leitura por pedido em paralelo).
+
+Uso: python bench_aio.py [requisicoes] [latencia_ms] [threads] [concorrencia]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from flask import Flask, request
+from starlette.requests import Request
+import main
+import main_aio
+from repositorio import RepositorioFirestore
+
+REQUISICOES = 2000
+LATENCIA_MS = 20
+THREADS = 8
+CONCORRENCIA = 80
+LOTE = 10
+
+DADOS = {"status": "PENDENTE", "total": 10.5, "cliente": "Cliente", "email": "cliente@email.com",
+         "itens": [{"sku": "SKU-1", "quantidade": 1, "preco": 10.5}]}
+
+
+class Snapshot:
+    def __init__(self, id):
+        self.id = id
+        self.exists = True
+        self.update_time = None
+
+    def to_dict(self):
+        return dict(DADOS)
+
+
+class ClienteSincrono:
+    """Substituto do firestore.Client: cada chamada bloqueia a thread pela latência."""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+
+    def collection(self, nome):
+        return self
+
+    def document(self, doc_id):
+        cliente = self
+
+        class Ref:
+            id = doc_id
+
+            def get(self, **opcoes):
+                time.sleep(cliente.latencia)
+                return Snapshot(doc_id)
+
+        return Ref()
+
+    def get_all(self, refs, **opcoes):
+        time.sleep(self.latencia)
+        return [Snapshot(ref.id) for ref in refs]
+
+
+class ClienteAssincrono:
+    """Substituto do firestore.AsyncClient: cada chamada cede o event loop pela latência."""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+
+    def collection(self, nome):
+        return self
+
+    def document(self, doc_id):
+        cliente = self
+
+        class Ref:
+            async def get(self, **opcoes):
+                await asyncio.sleep(cliente.latencia)
+                return Snapshot(doc_id)
+
+        return Ref()
+
+
+def caminho(i, lote):
+    if lote:
+        return "/pedidos", "ids=" + ",".join(f"p{i}-{j}" for j in range(LOTE))
+    return f"/pedidos/p{i}", ""
+
+
+def medir_sincrono(requisicoes, latencia, threads, lote):
+    app = Flask(__name__)
+
+    def uma(i):
+        path, query = caminho(i, lote)
+        with app.test_request_context(path, query_string=query):
+            resposta = main.obter_pedido(request)
+        assert resposta[1] == 200, resposta
+
+    cliente = ClienteSincrono(latencia)
+    with patch.object(main, "db", cliente), patch.object(main, "repositorio", RepositorioFirestore(cliente)), \
+            patch.object(main, "verificar_autenticacao", lambda: ({"uid": "bench"}, None, 200)):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(uma, range(requisicoes)))
+        return requisicoes / (time.perf_counter() - inicio)
+
+
+def medir_assincrono(requisicoes, latencia, concorrencia, lote):
+    async def autenticar(request):
+        return {"uid": "bench"}, None, 200
+
+    async def todas():
+        semaforo = asyncio.Semaphore(concorrencia)
+
+        async def uma(i):
+            path, query = caminho(i, lote)
+            escopo = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []}
+            async with semaforo:
+                resposta = await main_aio.obter_pedido(Request(escopo))
+            assert resposta.status_code == 200, resposta.body
+
+        await asyncio.gather(*(uma(i) for i in range(requisicoes)))
+
+    with patch.object(main_aio, "db", ClienteAssincrono(latencia)), \
+            patch.object(main_aio, "verificar_autenticacao", autenticar):
+        inicio = time.perf_counter()
+        asyncio.run(todas())
+        return requisicoes / (time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    requisicoes, latencia_ms, threads, concorrencia = argumentos + [REQUISICOES, LATENCIA_MS, THREADS, CONCORRENCIA][len(argumentos):]
+    latencia = latencia_ms / 1000.0
+
+    # Sem limite por usuário: todas as requisições vêm do mesmo uid
+    main.limitador.taxa = main_aio.limitador.taxa = 0
+
+    print(f"{requisicoes} requisições, latência do Firestore {latencia_ms} ms, lote de {LOTE} pedidos")
+    print(f"{'':>28} {'simples (req/s)':>16} {'lote (req/s)':>13}")
+    for nome, medir, paralelismo in (
+        (f"síncrono, {threads} threads", medir_sincrono, threads),
+        (f"síncrono, {concorrencia} threads", medir_sincrono, concorrencia),
+        (f"assíncrono, {concorrencia} em curso", medir_assincrono, concorrencia),
+    ):
+        simples = medir(requisicoes, latencia, paralelismo, lote=False)
+        em_lote = medir(requisicoes, latencia, paralelismo, lote=True)
+        print(f"{nome:>28} {simples:>16.0f} {em_lote:>13.0f}")
@@ -0,0 +1,52 @@
+"""Regras do detalhe de pedidos, comuns ao handler síncrono (main.py) e ao assíncrono (main_aio.py).
+
+As duas variantes só diferem na forma de ler o Firestore; rota, validação e
+montagem da resposta ficam aqui.
+"""
+import json
+import os
+from modelo import Pedido
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS, GET",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+}
+
+# Pedidos por requisição no detalhe em lote (GET /pedidos?ids=a,b,c)
+LOTE_MAXIMO = int(os.environ.get("DETALHE_LOTE_MAXIMO", "50"))
+
+
+class RotaInvalida(Exception):
+    """Caminho ou parâmetros que não identificam os pedidos pedidos."""
+
+
+def rota(path, args):
+    """Retorna (pedido_id, None) para /pedidos/<id> ou (None, ids) para /pedidos?ids=..."""
+    path_parts = path.strip("/").split("/")
+    if path_parts[0] == "pedidos" and len(path_parts) == 1 and args.get("ids"):
+        ids = list(dict.fromkeys(i.strip() for i in args["ids"].split(",") if i.strip()))
+        if not ids or len(ids) > LOTE_MAXIMO:
+            raise RotaInvalida(f"Informe de 1 a {LOTE_MAXIMO} IDs de pedido")
+        return None, ids
+    if len(path_parts) < 2 or path_parts[0] != "pedidos":
+        raise RotaInvalida("ID do pedido não fornecido corretamente")
+    return path_parts[1], None
+
+
+def marcar_arquivado(dados):
+    """Pedidos antigos podem ter sido movidos para o arquivo compactado."""
+    return None if dados is None else dict(dados, arquivado=True)
+
+
+def detalhe(pedido_id, dados):
+    # Campos desconhecidos do documento são preservados na resposta
+    return Pedido.from_dict(pedido_id, dados, extras=True).to_json()
+
+
+def resposta_lote(ids, encontrados):
+    """Corpo do detalhe em lote, na ordem pedida; `encontrados` é {id: dados ou None}."""
+    return json.dumps({
+        "pedidos": [detalhe(i, encontrados[i]) for i in ids if encontrados[i] is not None],
+        "nao_encontrados": [i for i in ids if encontrados[i] is None],
+    })
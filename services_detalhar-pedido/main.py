@@ -1,17 +1,27 @@
 import functions_framework
 import json
-from google.cloud import firestore
 import firebase_admin
 from firebase_admin import auth, credentials
 from flask import request
+from arquivo import buscar_arquivado
+from captura import capturar
+from detalhe import CORS_HEADERS, RotaInvalida, detalhe, marcar_arquivado, resposta_lote, rota
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, executar_com_hedge, resposta_degradada
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
-# Inicializa o cliente do Firestore
-db = firestore.Client()
+# Inicializa o cliente do Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("obter_pedido", capacidade=60, taxa=20)
 
 def verificar_autenticacao():
     """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
@@ -27,49 +37,80 @@ def verificar_autenticacao():
     except Exception as e:
         return None, json.dumps({"error": "Token inválido ou expirado"}), 401
 
+def ler(prazo):
+    """Leitura de um documento com prazo, hedging e circuit breaker."""
+    return lambda ref: circuito.chamar(executar_com_hedge, lambda p: ref.get(**p.opcoes()), prazo)
+
+
+def ler_arquivado(pedido_id, prazo):
+    """Pedido no arquivo compactado (só existe no Firestore), marcado com `arquivado`."""
+    if db is None:
+        return None
+    return marcar_arquivado(buscar_arquivado(db, pedido_id, ler(prazo)))
+
+
+def ler_lote(pedido_ids, prazo):
+    """Lê os pedidos numa única chamada; os ausentes são procurados no arquivo."""
+    registros = circuito.chamar(executar_com_hedge, lambda p: repositorio.obter_varios(pedido_ids, **p.opcoes()), prazo)
+    return {pedido_id: registro.dados if registro else ler_arquivado(pedido_id, prazo)
+            for pedido_id, registro in registros.items()}
+
+
 @functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
 def obter_pedido(request):
-    """Obtém detalhes de um pedido no Firestore, apenas para usuários autenticados."""
+    """Obtém detalhes de um pedido (ou de vários, com ?ids=) no Firestore, apenas para usuários autenticados."""
 
     # Configuração CORS para permitir requisições do frontend
-    cors_headers = {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "OPTIONS, GET",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization",
-    }
+    cors_headers = dict(CORS_HEADERS)
 
     # Responder pré-requisição (CORS)
     if request.method == "OPTIONS":
         return "", 204, cors_headers
 
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
     # Verifica se o usuário está autenticado
     user, error_response, status = verificar_autenticacao()
     if not user:
         return error_response, status, cors_headers
 
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
     # Verifica o método da requisição
     if request.method != "GET":
         return json.dumps({"error": "Método não permitido"}), 405, cors_headers
 
     try:
-        # Obtém o ID do pedido da URL
-        path_parts = request.path.strip("/").split("/")
-        if len(path_parts) < 2 or path_parts[0] != "pedidos":
-            return json.dumps({"error": "ID do pedido não fornecido corretamente"}), 400, cors_headers
-
-        pedido_id = path_parts[1]
+        # Obtém o ID do pedido (ou os IDs do lote) da URL
+        try:
+            pedido_id, ids = rota(request.path, request.args)
+        except RotaInvalida as e:
+            return json.dumps({"error": str(e)}), 400, cors_headers
 
-        # Busca o pedido no Firestore
-        doc_ref = db.collection("pedidos").document(pedido_id)
-        doc = doc_ref.get()
+        if ids is not None:
+            return resposta_lote(ids, ler_lote(ids, prazo)), 200, cors_headers
 
-        if not doc.exists:
-            return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
+        # Busca o pedido no Firestore (com prazo, hedging e circuit breaker)
+        registro = circuito.chamar(executar_com_hedge, lambda p: repositorio.obter(pedido_id, **p.opcoes()), prazo)
 
-        pedido = doc.to_dict()
-        pedido["id"] = pedido_id  # Garante que o ID esteja na resposta
+        if registro is not None:
+            dados = registro.dados
+        else:
+            dados = ler_arquivado(pedido_id, prazo)
+            if dados is None:
+                return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
 
-        return json.dumps(pedido), 200, cors_headers
+        return json.dumps(detalhe(pedido_id, dados)), 200, cors_headers
 
     except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
         return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,101 @@
+"""Variante assíncrona (ASGI) de `obter_pedido`, sobre o AsyncClient do Firestore.
+
+Cada leitura em andamento deixa de ocupar uma thread, e o detalhe em lote
+dispara as leituras dos pedidos em paralelo. Rota, validação e resposta são
+as mesmas do handler síncrono (detalhe.py).
+
+Uso local: functions-framework --source=main_aio.py --target=obter_pedido --asgi
+"""
+import asyncio
+import functions_framework.aio
+import json
+import firebase_admin
+from firebase_admin import credentials
+from google.cloud import firestore
+from arquivo import buscar_arquivado_async
+from assincrono import http_async, ler, opcoes_async, verificar_autenticacao
+from detalhe import CORS_HEADERS, RotaInvalida, detalhe, marcar_arquivado, resposta_lote, rota
+from limitador import LimitadorUsuario
+from repositorio import usa_firestore
+from resiliencia import Prazo, resposta_degradada
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o cliente assíncrono do Firestore (variante só do Firestore:
+# no backend sqlite, implantar o main.py síncrono)
+if not usa_firestore():
+    raise RuntimeError("main_aio.py requer PEDIDOS_BACKEND=firestore; use o main.py")
+db = firestore.AsyncClient()
+
+# Mesmo orçamento por usuário da variante síncrona
+limitador = LimitadorUsuario("obter_pedido", capacidade=60, taxa=20)
+
+
+def leitor(prazo):
+    """`ler(ref)` assíncrono com prazo, hedging e circuit breaker."""
+    return lambda ref: ler(lambda p: ref.get(**opcoes_async(p)), prazo)
+
+
+async def ler_pedido(pedido_id, prazo):
+    """Dados do pedido, do arquivo (marcado com `arquivado`) ou None."""
+    doc = await leitor(prazo)(db.collection("pedidos").document(pedido_id))
+    if doc.exists:
+        return doc.to_dict() or {}
+    return marcar_arquivado(await buscar_arquivado_async(db, pedido_id, leitor(prazo)))
+
+
+@functions_framework.aio.http
+@http_async
+async def obter_pedido(request):
+    """Obtém detalhes de um pedido (ou de vários, com ?ids=) no Firestore, apenas para usuários autenticados."""
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = dict(CORS_HEADERS)
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = await verificar_autenticacao(request)
+    if not user:
+        return error_response, status, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    # Verifica o método da requisição
+    if request.method != "GET":
+        return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+    try:
+        # Obtém o ID do pedido (ou os IDs do lote) da URL
+        try:
+            pedido_id, ids = rota(request.url.path, request.query_params)
+        except RotaInvalida as e:
+            return json.dumps({"error": str(e)}), 400, cors_headers
+
+        if ids is not None:
+            # Uma leitura por pedido, todas em paralelo
+            dados = await asyncio.gather(*(ler_pedido(i, prazo) for i in ids))
+            return resposta_lote(ids, dict(zip(ids, dados))), 200, cors_headers
+
+        dados = await ler_pedido(pedido_id, prazo)
+        if dados is None:
+            return json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers
+
+        return json.dumps(detalhe(pedido_id, dados)), 200, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
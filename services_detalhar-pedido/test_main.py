@@ -1,7 +1,10 @@
 import unittest
 import json
 from unittest.mock import patch, MagicMock
-from flask import Flask, Request
+from flask import Flask, Request, request
+from arquivo import CacheArquivo, compactar
+from repositorio import RepositorioSQLite
+from resiliencia import CircuitoAberto
 from main import obter_pedido
 
 class TestObterPedido(unittest.TestCase):
@@ -99,5 +102,70 @@ class TestObterPedido(unittest.TestCase):
         self.assertEqual(response[1], 500)
         self.assertIn("Erro inesperado", response[0])
 
+    @patch("main.verificar_autenticacao")
+    @patch("main.circuito.antes")
+    @patch("main.db.collection")
+    def test_obter_pedido_backend_degradado(self, mock_db_collection, mock_antes, mock_verificar_autenticacao):
+        """Testa se a função falha rápido com 503 quando o circuito está aberto"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        mock_antes.side_effect = CircuitoAberto(30)
+
+        with self.app.test_request_context('/pedidos/123', method="GET"):
+            response = obter_pedido(request)
+
+        self.assertEqual(response[1], 503)
+        self.assertEqual(response[2]["Retry-After"], "30")
+        mock_db_collection.return_value.document.return_value.get.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_obter_pedido_arquivado(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se um pedido ausente da coleção quente é buscado no arquivo pelo índice"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        documentos = {
+            "pedidos/123": None,
+            "pedidos_arquivo_indice/123": {"parte": "2020-01-01-abc"},
+            "pedidos_arquivo/2020-01-01-abc": {"dados": compactar({"123": {"status": "ENTREGUE", "total": 5.0}})},
+        }
+
+        def documento(colecao):
+            def ref(doc_id):
+                snapshot = MagicMock()
+                dados = documentos.get(f"{colecao}/{doc_id}")
+                snapshot.exists = dados is not None
+                snapshot.to_dict.return_value = dados
+                return MagicMock(get=MagicMock(return_value=snapshot))
+            return MagicMock(document=ref)
+
+        mock_db_collection.side_effect = documento
+
+        with patch("arquivo.cache", CacheArquivo()):
+            with self.app.test_request_context('/pedidos/123', method="GET"):
+                response = obter_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        pedido = json.loads(response[0])
+        self.assertEqual(pedido["status"], "ENTREGUE")
+        self.assertEqual(pedido["id"], "123")
+        self.assertTrue(pedido["arquivado"])
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.db", None)
+    def test_obter_pedidos_em_lote(self, mock_verificar_autenticacao):
+        """Testa se o detalhe em lote lê os pedidos numa única chamada e informa os não encontrados"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.gravar("a", {"status": "PENDENTE"})
+        repositorio.gravar("b", {"status": "ENVIADO"})
+
+        with patch("main.repositorio", repositorio):
+            with self.app.test_request_context('/pedidos', method="GET", query_string={"ids": "a,b,x"}):
+                response = obter_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        corpo = json.loads(response[0])
+        self.assertEqual([(p["id"], p["status"]) for p in corpo["pedidos"]], [("a", "PENDENTE"), ("b", "ENVIADO")])
+        self.assertEqual(corpo["nao_encontrados"], ["x"])
+
 if __name__ == '__main__':
     unittest.main()
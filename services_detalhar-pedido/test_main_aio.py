@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from starlette.requests import Request
+from limitador import ArmazemMemoria, configurar_armazem
+from main_aio import obter_pedido
+
+def requisicao(path, method="GET", query=""):
+    return Request({"type": "http", "method": method, "path": path, "query_string": query.encode(), "headers": []})
+
+def snapshot(dados):
+    doc = MagicMock()
+    doc.exists = dados is not None
+    doc.to_dict.return_value = dados
+    return doc
+
+class TestObterPedidoAsync(unittest.TestCase):
+
+    def setUp(self):
+        configurar_armazem(ArmazemMemoria())
+
+    def chamar(self, *args, **kwargs):
+        return asyncio.run(obter_pedido(requisicao(*args, **kwargs)))
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    def test_sem_autenticacao(self, mock_verificar_autenticacao):
+        """Testa se a variante assíncrona retorna 401 sem usuário autenticado"""
+        mock_verificar_autenticacao.return_value = (None, json.dumps({"error": "Token inválido ou expirado"}), 401)
+
+        response = self.chamar("/pedidos/123")
+
+        self.assertEqual(response.status_code, 401)
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    @patch("main_aio.db")
+    def test_obter_pedido(self, mock_db, mock_verificar_autenticacao):
+        """Testa se o detalhe assíncrono responde igual ao síncrono"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        mock_db.collection.return_value.document.return_value.get = AsyncMock(
+            return_value=snapshot({"status": "PENDENTE", "total": 10.0}))
+
+        response = self.chamar("/pedidos/123")
+
+        self.assertEqual(response.status_code, 200)
+        corpo = json.loads(response.body)
+        self.assertEqual(corpo["id"], "123")
+        self.assertEqual(corpo["status"], "PENDENTE")
+        self.assertEqual(response.headers["Access-Control-Allow-Origin"], "*")
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    @patch("main_aio.db")
+    def test_lote_em_paralelo(self, mock_db, mock_verificar_autenticacao):
+        """Testa se o detalhe em lote lê os pedidos em paralelo e informa os não encontrados"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        em_andamento = []
+        maximo = []
+
+        def documento(pedido_id):
+            async def get(**opcoes):
+                em_andamento.append(pedido_id)
+                maximo.append(len(em_andamento))
+                await asyncio.sleep(0.01)
+                em_andamento.remove(pedido_id)
+                return snapshot(None if pedido_id == "x" else {"status": "PENDENTE"})
+            return MagicMock(get=get)
+
+        mock_db.collection.return_value.document.side_effect = documento
+
+        response = self.chamar("/pedidos", query="ids=a,b,c,x")
+
+        corpo = json.loads(response.body)
+        self.assertEqual([p["id"] for p in corpo["pedidos"]], ["a", "b", "c"])
+        self.assertEqual(corpo["nao_encontrados"], ["x"])
+        self.assertEqual(max(maximo), 4)
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    def test_lote_grande_demais(self, mock_verificar_autenticacao):
+        """Testa se um lote acima do máximo retorna 400"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        response = self.chamar("/pedidos", query="ids=" + ",".join(f"p{i}" for i in range(51)))
+
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import time
+from google.api_core import exceptions as gexc
+from resiliencia import Prazo, PrazoEsgotado, CircuitBreaker, CircuitoAberto, executar_com_hedge
+
+class TestPrazo(unittest.TestCase):
+
+    def test_prazo_restante(self):
+        """Testa se o prazo informa o tempo restante e gera opções para o Firestore"""
+        prazo = Prazo(5)
+        self.assertGreater(prazo.restante(), 4)
+        self.assertIn("timeout", prazo.opcoes())
+        self.assertIn("retry", prazo.opcoes())
+
+    def test_prazo_esgotado(self):
+        """Testa se o prazo esgotado gera PrazoEsgotado"""
+        prazo = Prazo(0)
+        with self.assertRaises(PrazoEsgotado):
+            prazo.restante()
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def falhar(self):
+        raise gexc.ServiceUnavailable("indisponível")
+
+    def test_circuito_abre_apos_limiar(self):
+        """Testa se o circuito abre após o limiar de falhas e falha rápido"""
+        circuito = CircuitBreaker(limiar=2, reset=30)
+        for _ in range(2):
+            with self.assertRaises(gexc.ServiceUnavailable):
+                circuito.chamar(self.falhar)
+
+        with self.assertRaises(CircuitoAberto) as ctx:
+            circuito.chamar(lambda: "ok")
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+    def test_circuito_meio_aberto_fecha_com_sucesso(self):
+        """Testa se o circuito deixa passar uma chamada de teste após o reset"""
+        circuito = CircuitBreaker(limiar=1, reset=0.01)
+        with self.assertRaises(gexc.ServiceUnavailable):
+            circuito.chamar(self.falhar)
+        time.sleep(0.02)
+
+        self.assertEqual(circuito.chamar(lambda: "ok"), "ok")
+        self.assertIsNone(circuito.aberto_em)
+
+    def test_erro_de_negocio_nao_abre_circuito(self):
+        """Testa se erros que não são do backend não contam como falha"""
+        circuito = CircuitBreaker(limiar=1, reset=30)
+        with self.assertRaises(ValueError):
+            circuito.chamar(lambda: (_ for _ in ()).throw(ValueError("x")))
+        self.assertEqual(circuito.chamar(lambda: "ok"), "ok")
+
+class TestHedge(unittest.TestCase):
+
+    def test_hedge_usa_resposta_mais_rapida(self):
+        """Testa se a segunda requisição é usada quando a primeira demora"""
+        chamadas = []
+
+        def leitura(prazo):
+            chamadas.append(1)
+            if len(chamadas) == 1:
+                time.sleep(0.5)
+                return "lenta"
+            return "rapida"
+
+        inicio = time.monotonic()
+        resultado = executar_com_hedge(leitura, Prazo(2), atraso=0.05)
+        self.assertEqual(resultado, "rapida")
+        self.assertLess(time.monotonic() - inicio, 0.4)
+
+    def test_hedge_desabilitado(self):
+        """Testa se sem atraso configurado a leitura é feita uma única vez"""
+        chamadas = []
+        resultado = executar_com_hedge(lambda p: chamadas.append(1) or "ok", Prazo(2), atraso=0)
+        self.assertEqual(resultado, "ok")
+        self.assertEqual(len(chamadas), 1)
+
+    def test_hedge_respeita_prazo(self):
+        """Testa se o hedge desiste quando o prazo da requisição acaba"""
+        with self.assertRaises(PrazoEsgotado):
+            executar_com_hedge(lambda p: time.sleep(0.5), Prazo(0.1), atraso=0.02)
+
+if __name__ == '__main__':
+    unittest.main()
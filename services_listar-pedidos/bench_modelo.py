@@ -0,0 +1,127 @@
+"""Benchmark da listagem de pedidos: laço de dicionários x modelo Pedido x listagem atual.
+
+Compara o laço antigo de `listar_pedidos` (um dicionário novo com sete .get()
+por documento, serializado de uma vez), o modelo com __slots__ (um Pedido por
+documento, convertido para dicionário só durante o json.dumps, com default=) e
+a listagem atual (listagem.py: `dados_listagem` por documento e json.dumps sem
+verificação de ciclos). Mede tempo (melhor de várias repetições), pico de
+memória alocada e bytes por documento mantidos até a serialização.
+
+Uso: python bench_modelo.py [quantidade]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from codec_itens import itens_do_pedido
+from modelo import Pedido, dados_listagem
+
+QUANTIDADE = 100_000
+REPETICOES = 5
+
+
+class Snapshot:
+    """Substituto mínimo do DocumentSnapshot (id + to_dict)."""
+
+    __slots__ = ("id", "_dados")
+
+    def __init__(self, id, dados):
+        self.id = id
+        self._dados = dados
+
+    def to_dict(self):
+        return self._dados
+
+
+def documentos(quantidade):
+    return [
+        Snapshot(f"pedido-{i}", {
+            "status": "PENDENTE",
+            "total": 10.5,
+            "total_centavos": 1050,
+            "data_criacao": "2024-01-01T00:00:00Z",
+            "ultima_atualizacao": "2024-01-01T00:00:00Z",
+            "cliente": f"Cliente {i}",
+            "email": f"cliente{i}@email.com",
+            "itens": [{"sku": "SKU-1", "quantidade": 1, "preco": 10.5}],
+            "user_id": "uid",
+        })
+        for i in range(quantidade)
+    ]
+
+
+def converter_dicionarios(docs):
+    pedidos = []
+    for doc in docs:
+        pedido_data = doc.to_dict()
+        pedidos.append({
+            "id": doc.id,
+            "status": pedido_data.get("status", "DESCONHECIDO"),
+            "total": pedido_data.get("total", 0.0),
+            "data_criacao": pedido_data.get("data_criacao", ""),
+            "cliente": pedido_data.get("cliente", ""),
+            "email": pedido_data.get("email", ""),
+            "itens": itens_do_pedido(pedido_data),
+        })
+    return pedidos
+
+
+def converter_modelo(docs):
+    return [Pedido.from_snapshot(doc) for doc in docs]
+
+
+def serializar_dicionarios(pedidos):
+    return json.dumps(pedidos)
+
+
+def serializar_modelo(pedidos):
+    return json.dumps(pedidos, default=Pedido.to_json_listagem)
+
+
+def converter_listagem(docs):
+    return [dados_listagem(doc.id, doc.to_dict()) for doc in docs]
+
+
+def serializar_listagem(pedidos):
+    return json.dumps(pedidos, check_circular=False)
+
+
+def medir(docs, converter, serializar):
+    """Retorna (ms conversão, ms serialização, bytes por documento, pico MiB, resposta)."""
+    conversao = serializacao = float("inf")
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        pedidos = converter(docs)
+        meio = time.perf_counter()
+        resposta = serializar(pedidos)
+        fim = time.perf_counter()
+        conversao, serializacao = min(conversao, meio - inicio), min(serializacao, fim - meio)
+        del pedidos
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    pedidos = converter(docs)
+    retidos = tracemalloc.get_traced_memory()[0] - base
+    serializar(pedidos)
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return conversao * 1e3, serializacao * 1e3, retidos / len(docs), pico / 2**20, resposta
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else QUANTIDADE
+    docs = documentos(quantidade)
+
+    resultados = {
+        "dicionarios": medir(docs, converter_dicionarios, serializar_dicionarios),
+        "modelo": medir(docs, converter_modelo, serializar_modelo),
+        "listagem": medir(docs, converter_listagem, serializar_listagem),
+    }
+    assert len({r[4] for r in resultados.values()}) == 1, "Respostas diferentes"
+
+    print(f"{quantidade} pedidos")
+    print(f"{'':>12} {'conversão (ms)':>15} {'json (ms)':>10} {'total (ms)':>11} {'bytes/doc':>10} {'pico (MiB)':>11}")
+    for nome, (conversao, serializacao, por_doc, pico, _) in resultados.items():
+        print(f"{nome:>12} {conversao:>15.1f} {serializacao:>10.1f} {conversao + serializacao:>11.1f} "
+              f"{por_doc:>10.0f} {pico:>11.1f}")
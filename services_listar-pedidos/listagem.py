@@ -0,0 +1,18 @@
+"""Regras da listagem de pedidos, comuns ao handler síncrono (main.py) e ao assíncrono (main_aio.py)."""
+import json
+from modelo import dados_listagem
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+}
+
+
+def resposta_listagem(lidos):
+    """Serializa os pares (id, dados) lidos numa única chamada ao encoder em C.
+
+    Os dicionários vêm de dados do Firestore, sem referências circulares, então a
+    verificação de ciclos do json.dumps é desligada.
+    """
+    return json.dumps([dados_listagem(pedido_id, dados) for pedido_id, dados in lidos], check_circular=False)
@@ -2,16 +2,26 @@ import functions_framework
 import json
 import firebase_admin
 from firebase_admin import auth, credentials
-from google.cloud import firestore
 from flask import request
+from captura import capturar
+from limitador import LimitadorUsuario, limitar_concorrencia
+from listagem import CORS_HEADERS, resposta_listagem
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, executar_com_hedge, resposta_degradada
+from resumo import RESUMO_PEDIDOS, visao
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
-# Inicializa o Firestore
-db = firestore.Client()
+# Inicializa o Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("listar_pedidos", capacidade=10, taxa=2)
 
 def verificar_autenticacao():
     """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
@@ -30,48 +40,57 @@ def verificar_autenticacao():
 
 
 @functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
 def listar_pedidos(request):
-    """Lista todos os pedidos cadastrados no Firestore, apenas para usuários autenticados."""
+    """Lista todos os pedidos cadastrados no Firestore, apenas para usuários autenticados.
+
+    GET /resumo devolve o resumo dos pedidos do próprio usuário (quantidade e os
+    mais recentes), lido de um único documento (RESUMO_PEDIDOS=1).
+    """
 
     # Configuração CORS para permitir requisições do frontend
-    cors_headers = {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization",
-    }
+    cors_headers = dict(CORS_HEADERS)
 
     # Responder pré-requisição (CORS)
     if request.method == "OPTIONS":
         return "", 204, cors_headers
 
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
     # Verifica se o usuário está autenticado
     user, error_response, status = verificar_autenticacao()
     if not user:
         return error_response, status, cors_headers
 
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
     try:
         # Apenas permite requisições GET
         if request.method != "GET":
             return json.dumps({"error": "Método não permitido"}), 405, cors_headers
 
-        # Buscar pedidos no Firestore
-        pedidos_ref = db.collection("pedidos").stream()
-        pedidos = []
-
-        for doc in pedidos_ref:
-            pedido_data = doc.to_dict()
-            pedidos.append({
-                "id": doc.id,
-                "status": pedido_data.get("status", "DESCONHECIDO"),
-                "total": pedido_data.get("total", 0.0),
-                "data_criacao": pedido_data.get("data_criacao", ""),
-                "cliente": pedido_data.get("cliente", ""),
-                "email": pedido_data.get("email", ""),
-                "itens": pedido_data.get("itens", []),
-            })
+        # Resumo do usuário autenticado: um documento, mantido pelas escritas dos pedidos
+        if request.path.rstrip("/") == "/resumo":
+            if not RESUMO_PEDIDOS:
+                return json.dumps({"error": "Resumo de pedidos não habilitado"}), 404, cors_headers
+            resumo = circuito.chamar(executar_com_hedge,
+                                     lambda p: repositorio.obter_resumo(user["uid"], **p.opcoes()), prazo)
+            return json.dumps(visao(user["uid"], resumo)), 200, cors_headers
+
+        # Buscar pedidos no Firestore (com prazo, hedging e circuit breaker)
+        registros, _ = circuito.chamar(executar_com_hedge, lambda p: repositorio.consultar(**p.opcoes()), prazo)
 
         # Retorna os pedidos para o usuário autenticado
-        return json.dumps(pedidos), 200, cors_headers
+        return resposta_listagem((r.id, r.dados) for r in registros), 200, cors_headers
 
     except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
         return json.dumps({"error": str(e)}), 500, cors_headers
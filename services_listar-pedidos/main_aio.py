@@ -0,0 +1,91 @@
+"""Variante assíncrona (ASGI) de `listar_pedidos`, sobre o AsyncClient do Firestore.
+
+A leitura da coleção não ocupa uma thread enquanto aguarda o Firestore; a
+resposta é montada pelas mesmas regras do handler síncrono (listagem.py).
+
+Uso local: functions-framework --source=main_aio.py --target=listar_pedidos --asgi
+"""
+import functions_framework.aio
+import json
+import firebase_admin
+from firebase_admin import credentials
+from google.cloud import firestore
+from assincrono import http_async, ler, opcoes_async, verificar_autenticacao
+from limitador import LimitadorUsuario
+from listagem import CORS_HEADERS, resposta_listagem
+from repositorio import COLECAO_RESUMOS, usa_firestore
+from resiliencia import Prazo, resposta_degradada
+from resumo import RESUMO_PEDIDOS, visao
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o cliente assíncrono do Firestore (variante só do Firestore:
+# no backend sqlite, implantar o main.py síncrono)
+if not usa_firestore():
+    raise RuntimeError("main_aio.py requer PEDIDOS_BACKEND=firestore; use o main.py")
+db = firestore.AsyncClient()
+
+# Mesmo orçamento por usuário da variante síncrona
+limitador = LimitadorUsuario("listar_pedidos", capacidade=10, taxa=2)
+
+
+@functions_framework.aio.http
+@http_async
+async def listar_pedidos(request):
+    """Lista todos os pedidos cadastrados no Firestore, apenas para usuários autenticados."""
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = dict(CORS_HEADERS)
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = await verificar_autenticacao(request)
+    if not user:
+        return error_response, status, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        # Apenas permite requisições GET
+        if request.method != "GET":
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        # Resumo do usuário autenticado: um documento, mantido pelas escritas dos pedidos
+        if request.url.path.rstrip("/") == "/resumo":
+            if not RESUMO_PEDIDOS:
+                return json.dumps({"error": "Resumo de pedidos não habilitado"}), 404, cors_headers
+
+            async def ler_resumo(p):
+                doc = await db.collection(COLECAO_RESUMOS).document(user["uid"]).get(**opcoes_async(p))
+                return doc.to_dict() if doc.exists else None
+
+            return json.dumps(visao(user["uid"], await ler(ler_resumo, prazo))), 200, cors_headers
+
+        # Buscar pedidos no Firestore (com prazo, hedging e circuit breaker)
+        colecao = db.collection("pedidos")
+
+        async def ler_colecao(p):
+            return [(doc.id, doc.to_dict() or {}) async for doc in colecao.stream(**opcoes_async(p))]
+
+        pedidos_ref = await ler(ler_colecao, prazo)
+
+        # Retorna os pedidos para o usuário autenticado
+        return resposta_listagem(pedidos_ref), 200, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,83 @@
+import unittest
+import json
+from unittest.mock import MagicMock
+from limitador import ArmazemMemoria, LimitadorUsuario, LimiteConcorrencia, configurar_armazem, limitar_concorrencia
+import limitador
+
+class TestArmazemMemoria(unittest.TestCase):
+
+    def test_consumir_ate_esvaziar(self):
+        """Testa se o balde permite até a capacidade e depois informa a espera"""
+        armazem = ArmazemMemoria()
+        for _ in range(3):
+            self.assertTrue(armazem.consumir("uid", 3, 1)[0])
+
+        permitido, espera = armazem.consumir("uid", 3, 1)
+        self.assertFalse(permitido)
+        self.assertGreater(espera, 0)
+
+    def test_descarta_baldes_ociosos(self):
+        """Testa se baldes já reabastecidos são descartados ao atingir o limite"""
+        armazem = ArmazemMemoria(max_baldes=2)
+        armazem.consumir("a", 1, 1000)
+        armazem.consumir("b", 1, 1000)
+        armazem._baldes = {c: (t, u - 1) for c, (t, u) in armazem._baldes.items()}
+        armazem.consumir("c", 1, 1000)
+        self.assertNotIn("a", armazem._baldes)
+
+class TestLimitadorUsuario(unittest.TestCase):
+
+    def setUp(self):
+        configurar_armazem(ArmazemMemoria())
+
+    def test_limite_por_uid_e_endpoint(self):
+        """Testa se cada uid e cada endpoint têm orçamentos separados"""
+        listar = LimitadorUsuario("listar_teste", capacidade=1, taxa=0.1)
+        salvar = LimitadorUsuario("salvar_teste", capacidade=1, taxa=0.1)
+
+        self.assertIsNone(listar.verificar("u1", {}))
+        resposta = listar.verificar("u1", {})
+        self.assertEqual(resposta[1], 429)
+        self.assertEqual(resposta[2]["Retry-After"], "10")
+
+        self.assertIsNone(listar.verificar("u2", {}))
+        self.assertIsNone(salvar.verificar("u1", {}))
+
+    def test_armazem_plugavel(self):
+        """Testa se o limitador usa o armazém configurado"""
+        armazem = MagicMock()
+        armazem.consumir.return_value = (False, 2.5)
+        configurar_armazem(armazem)
+
+        resposta = LimitadorUsuario("listar_teste", capacidade=5, taxa=1).verificar("u1", {})
+        self.assertEqual(resposta[1], 429)
+        self.assertEqual(resposta[2]["Retry-After"], "3")
+        armazem.consumir.assert_called_once_with("listar_teste:u1", 5.0, 1.0)
+
+class TestLimiteConcorrencia(unittest.TestCase):
+
+    def test_descarta_excesso(self):
+        """Testa se o decorador responde 503 quando a instância está saturada"""
+        original = limitador.concorrencia
+        limitador.concorrencia = LimiteConcorrencia(maximo=1)
+        try:
+            requisicao = MagicMock(method="GET")
+            handler = limitar_concorrencia(lambda r: limitar_concorrencia(lambda r2: ("ok", 200, {}))(r))
+            resposta = handler(requisicao)
+        finally:
+            limitador.concorrencia = original
+
+        self.assertEqual(resposta[1], 503)
+        self.assertEqual(resposta[2]["Retry-After"], "1")
+        self.assertEqual(json.loads(resposta[0])["error"], "Servidor sobrecarregado, tente novamente")
+
+    def test_libera_vaga_apos_resposta(self):
+        """Testa se a vaga é liberada mesmo quando o handler falha"""
+        concorrencia = LimiteConcorrencia(maximo=1)
+        self.assertTrue(concorrencia.entrar())
+        self.assertFalse(concorrencia.entrar())
+        concorrencia.sair()
+        self.assertTrue(concorrencia.entrar())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 import json
 from unittest.mock import patch, MagicMock
-from flask import Flask, Request
+from flask import Flask, Request, request
+from limitador import ArmazemMemoria, configurar_armazem
+from repositorio import RepositorioSQLite
+from resumo import criar
 from main import listar_pedidos
 
 class TestListarPedidos(unittest.TestCase):
@@ -103,5 +106,67 @@ class TestListarPedidos(unittest.TestCase):
         self.assertEqual(response[1], 500)
         self.assertIn("Erro inesperado", response[0])
 
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_listar_pedidos_limite_por_usuario(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se a função responde 429 com Retry-After quando o usuário excede o limite"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user_limite"}, None, 200)
+        mock_db_collection.return_value.stream.return_value = []
+        configurar_armazem(ArmazemMemoria())
+
+        respostas = []
+        for _ in range(11):
+            with self.app.test_request_context('/pedidos', method="GET"):
+                respostas.append(listar_pedidos(request))
+
+        self.assertEqual(respostas[0][1], 200)
+        self.assertEqual(respostas[-1][1], 429)
+        self.assertIn("Retry-After", respostas[-1][2])
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_listar_pedidos_itens_colunares(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se pedidos com itens em formato colunar são devolvidos como lista de itens"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user_colunar"}, None, 200)
+
+        mock_doc = MagicMock()
+        mock_doc.id = "pedido_1"
+        mock_doc.to_dict.return_value = {
+            "status": "PENDENTE",
+            "itens_colunar": {"v": 1, "campos": ["sku", "quantidade"],
+                              "colunas": {"sku": ["A", "B"], "quantidade": [2, 1]}},
+        }
+        mock_db_collection.return_value.stream.return_value = [mock_doc]
+
+        with self.app.test_request_context('/pedidos', method="GET"):
+            response = listar_pedidos(request)
+
+        pedidos = json.loads(response[0])
+        self.assertEqual(pedidos[0]["itens"], [{"sku": "A", "quantidade": 2}, {"sku": "B", "quantidade": 1}])
+
+    @patch("main.verificar_autenticacao")
+    def test_resumo_do_usuario(self, mock_verificar_autenticacao):
+        """Testa se GET /resumo devolve o resumo do próprio usuário sem consultar a coleção"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        configurar_armazem(ArmazemMemoria())
+        repositorio = RepositorioSQLite(":memory:")
+        repositorio.alterar_resumo("user123", lambda atual: criar(atual, "p1", {"status": "ENVIADO", "total": 20.0,
+                                                                              "data_criacao": "2024-01-01"}))
+
+        with patch("main.repositorio", repositorio), patch("main.RESUMO_PEDIDOS", True), \
+                patch.object(repositorio, "consultar") as consultar:
+            with self.app.test_request_context('/resumo', method="GET"):
+                response = listar_pedidos(request)
+            with self.app.test_request_context('/resumo', method="GET"):
+                mock_verificar_autenticacao.return_value = ({"uid": "outro"}, None, 200)
+                vazio = listar_pedidos(request)
+
+        self.assertEqual(response[1], 200)
+        resumo = json.loads(response[0])
+        self.assertEqual((resumo["user_id"], resumo["quantidade"]), ("user123", 1))
+        self.assertEqual(resumo["pedidos"], [{"id": "p1", "status": "ENVIADO", "total": 20.0, "data_criacao": "2024-01-01"}])
+        self.assertEqual(json.loads(vazio[0])["pedidos"], [])
+        consultar.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
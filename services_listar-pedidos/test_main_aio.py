@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from starlette.requests import Request
+from limitador import ArmazemMemoria, configurar_armazem
+from main_aio import listar_pedidos
+
+def requisicao(method="GET"):
+    return Request({"type": "http", "method": method, "path": "/pedidos", "query_string": b"", "headers": []})
+
+class TestListarPedidosAsync(unittest.TestCase):
+
+    def setUp(self):
+        configurar_armazem(ArmazemMemoria())
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    @patch("main_aio.db")
+    def test_listar_pedidos(self, mock_db, mock_verificar_autenticacao):
+        """Testa se a listagem assíncrona percorre o stream e responde igual à síncrona"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        async def stream(**opcoes):
+            for i in range(2):
+                doc = MagicMock(id=f"p{i}")
+                doc.to_dict.return_value = {"status": "PENDENTE", "total": 10.0, "cliente": f"Cliente {i}"}
+                yield doc
+
+        mock_db.collection.return_value.stream = stream
+
+        response = asyncio.run(listar_pedidos(requisicao()))
+
+        self.assertEqual(response.status_code, 200)
+        pedidos = json.loads(response.body)
+        self.assertEqual([p["id"] for p in pedidos], ["p0", "p1"])
+        self.assertEqual(pedidos[1]["cliente"], "Cliente 1")
+
+    @patch("main_aio.verificar_autenticacao", new_callable=AsyncMock)
+    def test_metodo_nao_permitido(self, mock_verificar_autenticacao):
+        """Testa se a variante assíncrona recusa métodos diferentes de GET"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        response = asyncio.run(listar_pedidos(requisicao("POST")))
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_preflight(self):
+        """Testa se o OPTIONS responde 204 com os cabeçalhos CORS"""
+        response = asyncio.run(listar_pedidos(requisicao("OPTIONS")))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.headers["Access-Control-Allow-Methods"], "GET, OPTIONS")
+
+if __name__ == '__main__':
+    unittest.main()
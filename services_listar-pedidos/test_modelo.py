@@ -0,0 +1,80 @@
+import unittest
+import json
+from unittest.mock import MagicMock
+from codec_itens import preparar_gravacao
+from listagem import resposta_listagem
+from modelo import CAMPOS_LISTAGEM, ItemPedido, Pedido, dados_listagem
+
+class TestPedido(unittest.TestCase):
+
+    def snapshot(self, pedido_id, dados):
+        doc = MagicMock()
+        doc.id = pedido_id
+        doc.to_dict.return_value = dados
+        return doc
+
+    def test_from_snapshot_aplica_padroes(self):
+        """Testa se campos ausentes recebem os valores padrão do modelo"""
+        pedido = Pedido.from_snapshot(self.snapshot("p1", {}))
+
+        self.assertEqual(pedido.to_json_listagem(), {
+            "id": "p1", "status": "DESCONHECIDO", "total": 0.0, "data_criacao": "",
+            "cliente": "", "email": "", "itens": [],
+        })
+
+    def test_listagem_igual_a_to_json_com_campos(self):
+        """Testa se a conversão da listagem devolve exatamente os campos de CAMPOS_LISTAGEM"""
+        pedido = Pedido.from_dict("p1", {"status": "PENDENTE", "total": 5.0, "user_id": "uid"})
+        self.assertEqual(pedido.to_json_listagem(), pedido.to_json(CAMPOS_LISTAGEM))
+
+    def test_serializa_com_default(self):
+        """Testa se uma lista de pedidos é serializada com default=to_json_listagem"""
+        pedidos = [Pedido.from_dict("p1", {"status": "ENVIADO", "itens": [{"quantidade": 1, "preco": 2.0}]})]
+        resultado = json.loads(json.dumps(pedidos, default=Pedido.to_json_listagem))
+        self.assertEqual(resultado[0]["status"], "ENVIADO")
+        self.assertEqual(resultado[0]["itens"], [{"quantidade": 1, "preco": 2.0}])
+
+    def test_itens_colunares(self):
+        """Testa se itens gravados em formato colunar são lidos como lista de mapas"""
+        itens = [{"sku": "A", "quantidade": 2, "preco": 1.5}]
+        documento = preparar_gravacao({"status": "PENDENTE", "itens": itens}, formato="colunar")
+        pedido = Pedido.from_dict("p1", documento)
+        self.assertEqual(pedido.itens, itens)
+        self.assertEqual(pedido.itens_modelo()[0].to_json(), itens[0])
+
+    def test_listagem_sem_modelo(self):
+        """Testa se a listagem direta dos dados responde igual ao Pedido serializado com default="""
+        lidos = [("p1", {"status": "ENVIADO", "total": 5.0, "user_id": "uid", "busca_tokens": ["jo"]}),
+                 ("p2", preparar_gravacao({"itens": [{"sku": "A", "quantidade": 1, "preco": 1.5}]}, formato="colunar"))]
+
+        self.assertEqual([dados_listagem(i, d) for i, d in lidos], [Pedido.from_dict(i, d).to_json_listagem() for i, d in lidos])
+        self.assertEqual(resposta_listagem(lidos),
+                         json.dumps([Pedido.from_dict(i, d) for i, d in lidos], default=Pedido.to_json_listagem))
+
+    def test_to_json_preserva_extras(self):
+        """Testa se só os campos extras permitidos são mantidos com extras=True e nulos são omitidos"""
+        documento = {"status": "ENVIADO", "arquivado": True, "busca_tokens": ["jo", "joa"], "interno": 1}
+        dados = Pedido.from_snapshot(self.snapshot("p1", documento), extras=True).to_json()
+
+        self.assertTrue(dados["arquivado"])
+        self.assertEqual(dados["id"], "p1")
+        self.assertNotIn("user_id", dados)
+        self.assertNotIn("busca_tokens", dados)
+        self.assertNotIn("interno", dados)
+        self.assertNotIn("arquivado", Pedido.from_dict("p1", {"arquivado": True}).to_json())
+
+    def test_to_documento(self):
+        """Testa se o documento gravado contém os campos preenchidos do pedido"""
+        documento = Pedido("p1", status="PENDENTE", total=1.0, total_centavos=100,
+                           itens=[{"quantidade": 1, "preco": 1.0}], user_id="uid").to_documento()
+        self.assertEqual(documento["total_centavos"], 100)
+        self.assertEqual(documento["user_id"], "uid")
+        self.assertNotIn("extras", documento)
+
+    def test_slots_sem_dict(self):
+        """Testa se o modelo não cria __dict__ por instância"""
+        self.assertFalse(hasattr(Pedido("p1"), "__dict__"))
+        self.assertFalse(hasattr(ItemPedido(), "__dict__"))
+
+if __name__ == '__main__':
+    unittest.main()
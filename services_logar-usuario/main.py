@@ -3,6 +3,8 @@ import json
 import firebase_admin
 from firebase_admin import auth, credentials
 from flask import request
+from captura import capturar
+from perfilador import perfilar
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
@@ -10,6 +12,8 @@ if not firebase_admin._apps:
     firebase_admin.initialize_app(cred)
 
 @functions_framework.http
+@capturar
+@perfilar
 def login_user(request):
     """Faz login do usuário e retorna um Token JWT."""
 
@@ -0,0 +1,39 @@
+"""Benchmark do formato colunar de itens: tamanho do documento e custo de decodificação.
+
+O documento é codificado com os mesmos helpers do cliente Firestore, então o
+tamanho em bytes e o tempo de decodificação refletem o que `to_dict()` faz.
+
+Uso: python bench_codec_itens.py
+"""
+import timeit
+from google.cloud.firestore_v1 import _helpers
+from google.cloud.firestore_v1.types import document
+from codec_itens import itens_do_pedido, preparar_gravacao
+
+TAMANHOS = [1, 10, 100, 1000, 10000]
+
+
+def pedido(tamanho):
+    itens = [{"sku": f"SKU-{i:06d}", "quantidade": i % 7 + 1, "preco": (i % 500) + 0.99} for i in range(tamanho)]
+    return {"id": "p", "status": "PENDENTE", "total": 1.0, "cliente": "Cliente", "email": "c@email.com",
+            "itens": itens}
+
+
+def medir(funcao):
+    numero, _ = timeit.Timer(funcao).autorange()
+    return min(timeit.repeat(funcao, number=numero, repeat=3)) / numero
+
+
+if __name__ == "__main__":
+    print(f"{'linhas':>7} {'bytes linhas':>13} {'bytes colunar':>14} {'decod. linhas (us)':>19} {'decod. colunar (us)':>20}")
+    for tamanho in TAMANHOS:
+        linhas = pedido(tamanho)
+        colunar = preparar_gravacao(linhas, formato="colunar")
+        pb_linhas = document.Document(fields=_helpers.encode_dict(linhas))
+        pb_colunar = document.Document(fields=_helpers.encode_dict(colunar))
+
+        tempo_linhas = medir(lambda: itens_do_pedido(_helpers.decode_dict(pb_linhas.fields, None)))
+        tempo_colunar = medir(lambda: itens_do_pedido(_helpers.decode_dict(pb_colunar.fields, None)))
+        print(f"{tamanho:>7} {document.Document.pb(pb_linhas).ByteSize():>13} "
+              f"{document.Document.pb(pb_colunar).ByteSize():>14} "
+              f"{tempo_linhas * 1e6:>19.1f} {tempo_colunar * 1e6:>20.1f}")
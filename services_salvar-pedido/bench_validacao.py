@@ -0,0 +1,32 @@
+"""Benchmark da validação e do cálculo de total do salvar_pedido.
+
+Uso: python bench_validacao.py
+"""
+import timeit
+from validacao import calcular_total
+
+TAMANHOS = [1, 10, 100, 1000, 10000, 100000]
+
+
+def total_original(pedido):
+    # Cálculo anterior: laço em Python com aritmética de ponto flutuante
+    return sum(item["quantidade"] * item["preco"] for item in pedido["itens"])
+
+
+def carrinho(tamanho):
+    itens = [{"sku": f"SKU-{i}", "quantidade": i % 7 + 1, "preco": (i % 500) + 0.99} for i in range(tamanho)]
+    return {"cliente": "Cliente", "email": "cliente@email.com", "itens": itens}
+
+
+def medir(funcao, pedido):
+    repeticoes = max(1, 200000 // len(pedido["itens"]))
+    return min(timeit.repeat(lambda: funcao(pedido), number=repeticoes, repeat=5)) / repeticoes
+
+
+if __name__ == "__main__":
+    print(f"{'linhas':>8} {'original (us)':>15} {'validacao (us)':>15} {'us/linha':>10}")
+    for tamanho in TAMANHOS:
+        pedido = carrinho(tamanho)
+        original = medir(total_original, pedido) * 1e6
+        novo = medir(calcular_total, pedido) * 1e6
+        print(f"{tamanho:>8} {original:>15.1f} {novo:>15.1f} {novo / tamanho:>10.3f}")
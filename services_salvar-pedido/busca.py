@@ -0,0 +1,75 @@
+import re
+import unicodedata
+
+# Campo do pedido com os tokens de busca (consultado com array_contains)
+CAMPO_TOKENS = "busca_tokens"
+
+# Prefixos de cada palavra, do tamanho mínimo ao máximo
+PREFIXO_MINIMO = 2
+PREFIXO_MAXIMO = 15
+
+# Tamanho dos n-gramas usados na busca por trecho (substring)
+NGRAMA = 3
+
+_PALAVRA = re.compile(r"[a-z0-9]+")
+
+# Email completo (usuario@dominio.tld), o único indexado inteiro; um trecho de
+# email ("joao.silva@exe") é buscado pelos prefixos das suas palavras
+_EMAIL_COMPLETO = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z0-9]{2,}$")
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos ("João" -> "joao")."""
+    decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def palavras(texto):
+    return _PALAVRA.findall(normalizar(texto))
+
+
+def tokens_busca(cliente, email):
+    """Tokens gravados no pedido: prefixos e n-gramas de cada palavra de cliente e email,
+    mais o email normalizado inteiro."""
+    tokens = set()
+    for palavra in palavras(cliente) + palavras(email):
+        tokens.update(palavra[:i] for i in range(PREFIXO_MINIMO, min(len(palavra), PREFIXO_MAXIMO) + 1))
+        tokens.update(palavra[i:i + NGRAMA] for i in range(len(palavra) - NGRAMA + 1))
+    if email:
+        tokens.add(normalizar(email).strip())
+    return sorted(tokens)
+
+
+class ConsultaBusca:
+    """Termo de busca já decomposto: o token usado no índice e a verificação completa.
+
+    O índice só aceita um valor em array_contains, então a consulta usa o
+    token mais seletivo e os demais termos são conferidos nos documentos lidos.
+    """
+
+    def __init__(self, termo, modo="prefixo"):
+        self.modo = modo
+        self.palavras = [p for p in palavras(termo) if len(p) >= PREFIXO_MINIMO]
+        email = normalizar(termo).strip()
+        self.email = email if _EMAIL_COMPLETO.match(email) else None
+        self.token = self._escolher_token()
+
+    def _escolher_token(self):
+        if self.email and self.modo == "prefixo":
+            return self.email
+        if not self.palavras:
+            return None
+        maior = max(self.palavras, key=len)
+        if self.modo == "substring":
+            return maior[:NGRAMA] if len(maior) >= NGRAMA else None
+        return maior[:PREFIXO_MAXIMO]
+
+    def corresponde(self, dados):
+        """Confere todos os termos contra o cliente e o email do pedido."""
+        alvo = palavras(dados.get("cliente")) + palavras(dados.get("email"))
+        if self.email and self.modo == "prefixo":
+            return normalizar(dados.get("email")).strip() == self.email
+        if self.modo == "substring":
+            texto = " ".join(alvo)
+            return all(p in texto for p in self.palavras)
+        return all(any(a.startswith(p) for a in alvo) for p in self.palavras)
@@ -0,0 +1,369 @@
+"""Carga em massa de pedidos (NDJSON ou CSV) no Firestore, com gravação paralela.
+
+Cada pedido passa pela mesma validação e pelo mesmo cálculo de total do
+`salvar_pedido` e é gravado no formato de itens configurado (ITENS_FORMATO).
+O progresso fica em um arquivo de checkpoint; rodar o mesmo comando de novo
+retoma a carga do último bloco confirmado. Se alguma escrita for recusada,
+o checkpoint para antes dela e o comando sai com código 1: rodar de novo
+regrava a partir dali. Com FIRESTORE_EMULATOR_HOST definido, a carga vai
+para o emulador local.
+
+Formatos:
+  NDJSON  um pedido por linha: {"id", "cliente", "email", "itens", "user_id", "status", "data_criacao"}
+  CSV     um item por linha, com as linhas de um mesmo pedido em sequência:
+          pedido_id,cliente,email,user_id,status,data_criacao,sku,quantidade,preco
+
+Uso: python carregar_pedidos.py pedidos.ndjson [--workers 4] [--lote 500] [--dry-run]
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from busca import CAMPO_TOKENS, tokens_busca
+from codec_itens import preparar_gravacao
+from modelo import STATUS_INICIAL, Pedido
+from validacao import ErroValidacao, calcular_total
+
+# Colunas de pedido no CSV (as demais colunas conhecidas descrevem o item)
+COLUNAS_PEDIDO = ("cliente", "email", "user_id", "status", "data_criacao")
+
+# Intervalo entre as linhas de progresso
+INTERVALO_PROGRESSO = 5.0
+
+
+class ErroCarga(Exception):
+    """Arquivo, checkpoint ou gravação impedem a carga de continuar."""
+
+
+def linhas_com_posicao(arquivo, inicio):
+    """Gera (linha decodificada, posição em bytes depois dela) a partir de `inicio`."""
+    arquivo.seek(inicio)
+    posicao = inicio
+    for linha in iter(arquivo.readline, b""):
+        posicao += len(linha)
+        yield linha.decode("utf-8"), posicao
+
+
+def registros_ndjson(arquivo, inicio):
+    """Gera (fim, registro ou ErroValidacao) para cada linha não vazia."""
+    for linha, posicao in linhas_com_posicao(arquivo, inicio):
+        if not linha.strip():
+            continue
+        try:
+            yield posicao, json.loads(linha)
+        except ValueError:
+            yield posicao, ErroValidacao("JSON inválido")
+
+
+def _item_csv(linha):
+    item = {"quantidade": int(linha["quantidade"]), "preco": float(linha["preco"])}
+    if linha.get("sku"):
+        item["sku"] = linha["sku"]
+    return item
+
+
+def registros_csv(arquivo, inicio):
+    """Agrupa as linhas consecutivas de um mesmo `pedido_id` em um registro."""
+    cabecalho, fim_cabecalho = next(linhas_com_posicao(arquivo, 0), ("", 0))
+    campos = next(csv.reader([cabecalho]), [])
+    if "pedido_id" not in campos:
+        raise ErroCarga("CSV sem a coluna pedido_id")
+
+    posicoes = []
+    linhas = linhas_com_posicao(arquivo, max(inicio, fim_cabecalho))
+
+    def texto():
+        for linha, posicao in linhas:
+            posicoes.append(posicao)
+            yield linha
+
+    atual, fim_atual = None, None
+    for linha in csv.DictReader(texto(), fieldnames=campos):
+        posicao = posicoes[-1]
+        if atual is not None and linha["pedido_id"] != atual["id"]:
+            yield fim_atual, atual
+            atual = None
+        if atual is None:
+            atual = {"id": linha["pedido_id"], "itens": []}
+            atual.update({c: linha[c] for c in COLUNAS_PEDIDO if linha.get(c)})
+        if not isinstance(atual["itens"], ErroValidacao):
+            try:
+                atual["itens"].append(_item_csv(linha))
+            except (KeyError, TypeError, ValueError):
+                atual["itens"] = ErroValidacao(f"Item {len(atual['itens'])}: quantidade ou preço inválido")
+        fim_atual = posicao
+    if atual is not None:
+        yield fim_atual, atual
+
+
+def montar_documento(registro, pedido_id, user_id_padrao=None, agora=None):
+    """Documento gravado, calculado exatamente como no salvar_pedido.
+
+    `data_criacao` mantém a data histórica do registro; `ultima_atualizacao` é o
+    instante da carga (`agora`), para que os clientes da sincronização
+    incremental recebam o pedido mesmo com a marca d'água posterior à criação.
+    """
+    if isinstance(registro, ErroValidacao):
+        raise registro
+    if isinstance(registro, dict) and isinstance(registro.get("itens"), ErroValidacao):
+        raise registro["itens"]
+    total_centavos = calcular_total(registro)
+    agora = agora or datetime.utcnow().isoformat() + "Z"
+    data_criacao = registro.get("data_criacao") or agora
+    pedido = Pedido(
+        str(registro.get("id") or pedido_id),
+        status=registro.get("status") or STATUS_INICIAL,
+        total=total_centavos / 100,
+        total_centavos=total_centavos,
+        data_criacao=data_criacao,
+        ultima_atualizacao=agora,
+        cliente=registro["cliente"],
+        email=registro["email"],
+        itens=registro["itens"],
+        user_id=registro.get("user_id") or user_id_padrao,
+    )
+    documento = pedido.to_documento()
+    documento[CAMPO_TOKENS] = tokens_busca(documento["cliente"], documento["email"])
+    return preparar_gravacao(documento)
+
+
+class Checkpoint:
+    """Progresso da carga em um arquivo JSON, trocado de forma atômica."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def carregar(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def salvar(self, estado):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+        os.replace(temporario, self.caminho)
+
+
+class Carregador:
+    """Lê o arquivo em blocos e distribui os blocos entre workers, cada um com seu BulkWriter.
+
+    O checkpoint só avança até o último bloco contíguo já confirmado, então
+    uma carga interrompida nunca pula pedidos (no máximo regrava alguns,
+    com os mesmos IDs).
+    """
+
+    def __init__(self, db, arquivo, formato=None, workers=4, lote=500, checkpoint=None, user_id=None,
+                 ops_por_segundo=500, dry_run=False, saida=sys.stderr, intervalo=INTERVALO_PROGRESSO):
+        self.db = db
+        self.arquivo = arquivo
+        self.formato = formato or ("csv" if arquivo.lower().endswith(".csv") else "ndjson")
+        self.workers = workers
+        self.lote = lote
+        self.checkpoint = Checkpoint(checkpoint or arquivo + ".checkpoint.json")
+        self.user_id = user_id
+        self.ops_por_segundo = ops_por_segundo
+        self.dry_run = dry_run
+        self.saida = saida
+        self.intervalo = intervalo
+        self._fila = queue.Queue(maxsize=workers * 2)
+        self._lock = threading.Lock()
+        self._concluidos = {}
+        self._proximo = 0
+        self._retido = False
+        self._erro = None
+
+    def _estado_inicial(self):
+        estado = self.checkpoint.carregar()
+        if estado is None:
+            return {"arquivo": os.path.abspath(self.arquivo), "posicao": 0, "registros": 0,
+                    "gravados": 0, "rejeitados": 0, "falhas": 0, "concluido": False}
+        if estado["arquivo"] != os.path.abspath(self.arquivo):
+            raise ErroCarga(f"O checkpoint {self.checkpoint.caminho} pertence a outro arquivo")
+        return estado
+
+    def _blocos(self, arquivo, estado):
+        """Gera blocos (seq, fim, registros, rejeitados, [(id, documento)])."""
+        prefixo = os.path.basename(self.arquivo)
+        ler = registros_csv if self.formato == "csv" else registros_ndjson
+        numero = estado["registros"]
+        agora = datetime.utcnow().isoformat() + "Z"
+        seq, documentos, registros, rejeitados, fim = 0, [], 0, 0, estado["posicao"]
+        for fim, registro in ler(arquivo, estado["posicao"]):
+            numero += 1
+            registros += 1
+            # ID estável por posição no arquivo: retomar a carga não duplica pedidos
+            pedido_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{prefixo}:{numero}"))
+            try:
+                documento = montar_documento(registro, pedido_id, self.user_id, agora)
+                documentos.append((documento["id"], documento))
+            except (ErroValidacao, KeyError, TypeError, AttributeError) as e:
+                rejeitados += 1
+                self._avisar(f"registro {numero} rejeitado: {e}")
+            if registros >= self.lote:
+                yield seq, fim, registros, rejeitados, documentos
+                seq, documentos, registros, rejeitados = seq + 1, [], 0, 0
+        if registros:
+            yield seq, fim, registros, rejeitados, documentos
+
+    def _worker(self):
+        bulk = None
+        # Resultado de cada escrita ({caminho: gravado?}), preenchido pelos callbacks
+        # do BulkWriter em outras threads e lido por bloco depois do flush
+        resultados = {}
+        lock = threading.Lock()
+        if not self.dry_run:
+            bulk = self.db.bulk_writer(BulkWriterOptions(initial_ops_per_second=self.ops_por_segundo,
+                                                         max_ops_per_second=self.ops_por_segundo))
+
+            def sucesso(referencia, resultado, bulk_writer):
+                with lock:
+                    resultados[referencia.path] = True
+
+            def erro(falha, bulk_writer):
+                if falha.attempts < 5:
+                    return True
+                with lock:
+                    resultados[falha.operation.reference.path] = False
+                return False
+
+            bulk.on_write_result(sucesso)
+            bulk.on_write_error(erro)
+
+        colecao = self.db.collection("pedidos")
+        while True:
+            bloco = self._fila.get()
+            if bloco is None:
+                break
+            seq, fim, registros, rejeitados, documentos = bloco
+            if self._erro is not None:
+                continue  # Esvazia a fila sem gravar depois de um erro
+            try:
+                if bulk is None:
+                    gravados = len(documentos)
+                else:
+                    referencias = [colecao.document(pedido_id) for pedido_id, _ in documentos]
+                    for referencia, (_, documento) in zip(referencias, documentos):
+                        bulk.set(referencia, documento)
+                    bulk.flush()
+                    with lock:
+                        gravados = sum(bool(resultados.pop(r.path, False)) for r in referencias)
+                self._concluir(seq, fim, registros, rejeitados, gravados, len(documentos) - gravados)
+            except Exception as e:
+                self._erro = e
+        if bulk is not None:
+            bulk.close()
+
+    def _concluir(self, seq, fim, registros, rejeitados, gravados, falhas):
+        """Registra o bloco e avança o checkpoint pelos blocos contíguos já concluídos.
+
+        O checkpoint para antes do primeiro bloco com escritas recusadas: a
+        próxima execução regrava a partir dele (com os mesmos IDs).
+        """
+        with self._lock:
+            self._concluidos[seq] = (fim, registros, rejeitados, gravados, falhas)
+            avancou = False
+            while self._proximo in self._concluidos:
+                fim, registros, rejeitados, gravados, falhas = self._concluidos.pop(self._proximo)
+                if falhas and not self._retido:
+                    if avancou and not self.dry_run:
+                        self.checkpoint.salvar(self._estado)
+                    self._retido = True
+                    self._avisar(f"{falhas} pedidos não gravados; o checkpoint fica na posição "
+                                 f"{self._estado['posicao']} para a próxima execução")
+                self._estado["posicao"] = fim
+                self._estado["registros"] += registros
+                self._estado["rejeitados"] += rejeitados
+                self._estado["gravados"] += gravados
+                self._estado["falhas"] += falhas
+                self._proximo += 1
+                avancou = True
+            if avancou and not self.dry_run and not self._retido:
+                self.checkpoint.salvar(self._estado)
+            if time.monotonic() - self._ultimo_progresso >= self.intervalo:
+                self._progresso()
+
+    def _progresso(self):
+        self._ultimo_progresso = time.monotonic()
+        decorrido = max(self._ultimo_progresso - self._inicio, 1e-9)
+        lidos = self._estado["registros"] - self._registros_iniciais
+        self._avisar(f"{self._estado['registros']} registros, {self._estado['gravados']} gravados, "
+                     f"{self._estado['rejeitados']} rejeitados, {self._estado['falhas']} falhas "
+                     f"({lidos / decorrido:.0f} registros/s)")
+
+    def _avisar(self, mensagem):
+        if self.saida is not None:
+            print(mensagem, file=self.saida, flush=True)
+
+    def executar(self):
+        """Executa (ou retoma) a carga e retorna o estado final com a taxa em registros/s."""
+        self._estado = self._estado_inicial()
+        if self._estado["concluido"]:
+            return self._estado
+        self._registros_iniciais = self._estado["registros"]
+        self._inicio = self._ultimo_progresso = time.monotonic()
+
+        threads = [threading.Thread(target=self._worker, name=f"carga-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            with open(self.arquivo, "rb") as arquivo:
+                for bloco in self._blocos(arquivo, self._estado):
+                    if self._erro is not None:
+                        break
+                    self._fila.put(bloco)
+        finally:
+            for _ in threads:
+                self._fila.put(None)
+            for thread in threads:
+                thread.join()
+
+        if self._erro is not None:
+            raise ErroCarga(f"Carga interrompida: {self._erro}") from self._erro
+
+        # Com escritas recusadas a carga não termina: o checkpoint ficou antes delas
+        self._estado["concluido"] = not self._retido
+        if not self.dry_run and not self._retido:
+            self.checkpoint.salvar(self._estado)
+        decorrido = max(time.monotonic() - self._inicio, 1e-9)
+        resultado = dict(self._estado)
+        resultado["segundos"] = round(decorrido, 3)
+        resultado["registros_por_segundo"] = round((self._estado["registros"] - self._registros_iniciais) / decorrido, 1)
+        return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("arquivo", help="arquivo NDJSON ou CSV")
+    parser.add_argument("--formato", choices=["ndjson", "csv"], help="padrão: pela extensão do arquivo")
+    parser.add_argument("--workers", type=int, default=4, help="workers de gravação (um BulkWriter cada)")
+    parser.add_argument("--lote", type=int, default=500, help="registros por bloco/checkpoint")
+    parser.add_argument("--checkpoint", help="arquivo de checkpoint (padrão: <arquivo>.checkpoint.json)")
+    parser.add_argument("--user-id", help="user_id dos pedidos que não informam um")
+    parser.add_argument("--ops-por-segundo", type=int, default=500, help="limite de escritas/s por worker")
+    parser.add_argument("--dry-run", action="store_true", help="apenas valida e calcula, sem gravar")
+    args = parser.parse_args()
+
+    from google.cloud import firestore
+
+    carregador = Carregador(firestore.Client(), args.arquivo, formato=args.formato, workers=args.workers,
+                            lote=args.lote, checkpoint=args.checkpoint, user_id=args.user_id,
+                            ops_por_segundo=args.ops_por_segundo, dry_run=args.dry_run)
+    try:
+        resultado = carregador.executar()
+    except ErroCarga as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(resultado))
+    # Pedidos não gravados: rodar de novo o mesmo comando retoma a partir deles
+    sys.exit(1 if resultado["falhas"] else 0)
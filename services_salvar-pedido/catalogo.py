@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from google.cloud.firestore_v1.base_query import FieldFilter
+from validacao import ErroValidacao
+
+# Preços resolvidos no servidor a partir do catálogo (opt-in)
+CATALOGO_PRECOS = os.environ.get("CATALOGO_PRECOS", "0") == "1"
+INTERVALO = float(os.environ.get("CATALOGO_INTERVALO_SEGUNDOS", "60"))
+
+# Intervalo entre cargas completas, que descartam os produtos apagados do catálogo
+RECARGA = float(os.environ.get("CATALOGO_RECARGA_SEGUNDOS", "3600"))
+
+# Documentos da coleção: id = SKU, campos `preco`, `atualizado_em` (ISO 8601) e `ativo`.
+# Produtos retirados de venda devem ser marcados com `ativo: false` (e novo
+# `atualizado_em`); um documento apagado só some da cópia na próxima carga completa.
+COLECAO = "produtos"
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoProdutos:
+    """Cópia em memória dos preços do catálogo, atualizada de forma incremental.
+
+    `versao` é o maior `atualizado_em` já aplicado; cada atualização busca os
+    produtos alterados a partir dele, inclusive, para não perder os gravados
+    com o mesmo carimbo depois da leitura anterior. Os já aplicados com esse
+    carimbo (`_na_versao`) são ignorados se não mudaram.
+    """
+
+    def __init__(self, db, intervalo=INTERVALO, recarga=RECARGA):
+        self.db = db
+        self.intervalo = intervalo
+        self.recarga = recarga
+        self.precos = {}
+        self.versao = ""
+        self._na_versao = {}
+        self._carregado_em = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _aplicar(self, docs, precos):
+        for doc in docs:
+            dados = doc.to_dict() or {}
+            atualizado_em = dados.get("atualizado_em", "")
+            if atualizado_em == self.versao and self._na_versao.get(doc.id) == dados:
+                continue
+            if dados.get("ativo", True) and "preco" in dados:
+                precos[doc.id] = dados["preco"]
+            else:
+                precos.pop(doc.id, None)
+            if atualizado_em > self.versao:
+                self.versao, self._na_versao = atualizado_em, {}
+            if atualizado_em == self.versao:
+                self._na_versao[doc.id] = dados
+
+    def atualizar(self):
+        """Aplica os produtos alterados desde a última versão; a primeira carga e, a
+        cada `recarga` segundos, as seguintes leem o catálogo inteiro."""
+        if self._carregado_em is None or time.monotonic() - self._carregado_em >= self.recarga:
+            self._recarregar()
+            return
+        consulta = self.db.collection(COLECAO).where(filter=FieldFilter("atualizado_em", ">=", self.versao))
+        docs = list(consulta.order_by("atualizado_em").stream())
+        with self._lock:
+            self._aplicar(docs, self.precos)
+
+    def _recarregar(self):
+        """Troca a cópia pela do catálogo inteiro, sem os produtos apagados desde a última carga."""
+        docs = list(self.db.collection(COLECAO).order_by("atualizado_em").stream())
+        precos = {}
+        with self._lock:
+            self.versao, self._na_versao = "", {}
+            self._aplicar(docs, precos)
+            self.precos = precos
+            self._carregado_em = time.monotonic()
+
+    def resolver(self, skus):
+        """Retorna {sku: preço} usando a cópia em memória; os SKUs ausentes são buscados
+        de uma só vez com get_all e passam a fazer parte da cópia."""
+        precos = self.precos
+        encontrados = {sku: precos[sku] for sku in skus if sku in precos}
+        faltando = [sku for sku in skus if sku not in encontrados]
+        if faltando:
+            colecao = self.db.collection(COLECAO)
+            docs = [doc for doc in self.db.get_all([colecao.document(sku) for sku in faltando],
+                                                     field_paths=["preco", "ativo"]) if doc.exists]
+            with self._lock:
+                for doc in docs:
+                    dados = doc.to_dict() or {}
+                    if dados.get("ativo", True) and "preco" in dados:
+                        self.precos[doc.id] = dados["preco"]
+                        encontrados[doc.id] = dados["preco"]
+        return encontrados
+
+    def aplicar_precos(self, itens):
+        """Substitui o `preco` de cada item pelo preço do catálogo do seu `sku`."""
+        skus = {item["sku"] for item in itens if type(item) is dict and type(item.get("sku")) is str}
+        precos = self.resolver(skus)
+
+        for i, item in enumerate(itens):
+            if type(item) is not dict:
+                continue  # Formato inválido é reportado pela validação
+            sku = item.get("sku")
+            if sku is None:
+                raise ErroValidacao(f"Item {i}: campo 'sku' faltando")
+            if type(sku) is not str:
+                raise ErroValidacao(f"Item {i}: campo 'sku' inválido")
+            if sku not in precos:
+                raise ErroValidacao(f"Item {i}: produto '{sku}' não encontrado")
+            item["preco"] = precos[sku]
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.atualizar()
+            except Exception:
+                pass  # Mantém a cópia atual; tenta de novo no próximo ciclo
+
+    def iniciar(self):
+        """Faz a carga inicial e inicia a atualização periódica em segundo plano.
+
+        Uma falha na carga inicial (erro transitório, prazo, índice ausente)
+        não impede o serviço de subir: fica registrada, a thread tenta a carga
+        completa de novo a cada intervalo e, até lá, `resolver` busca os preços
+        com get_all.
+        """
+        if self._thread is None:
+            try:
+                self.atualizar()
+            except Exception:
+                logger.exception("Falha na carga inicial do catálogo de produtos; nova tentativa em %ss",
+                                 self.intervalo)
+            self._thread = threading.Thread(target=self._executar, name="catalogo-produtos", daemon=True)
+            self._thread.start()
+
+    def encerrar(self):
+        self._parar.set()
@@ -0,0 +1,93 @@
+import os
+from collections.abc import Sequence
+
+# Formato de gravação dos itens: "linhas" (lista de mapas, padrão) ou "colunar"
+ITENS_FORMATO = os.environ.get("ITENS_FORMATO", "linhas")
+
+# Campo usado no documento quando os itens estão em formato colunar
+CAMPO_COLUNAR = "itens_colunar"
+VERSAO = 1
+
+
+def codificar_itens(itens):
+    """Codifica a lista de itens como arrays paralelos (um por campo).
+
+    Retorna None quando os itens não têm todos os mesmos campos; nesse caso
+    o pedido continua no formato de linhas.
+    """
+    if not itens or type(itens[0]) is not dict:
+        return None
+    campos = list(itens[0])
+    chaves = set(campos)
+    for item in itens:
+        if type(item) is not dict or item.keys() != chaves:
+            return None
+        if list in map(type, item.values()):
+            return None  # O Firestore não aceita arrays dentro de arrays
+    return {
+        "v": VERSAO,
+        "campos": campos,
+        "colunas": {campo: [item[campo] for item in itens] for campo in campos},
+    }
+
+
+class ItensColunares(Sequence):
+    """Visão somente leitura dos itens colunares; cada item só vira dict quando acessado."""
+
+    __slots__ = ("campos", "colunas")
+
+    def __init__(self, codificado):
+        self.campos = codificado["campos"]
+        self.colunas = [codificado["colunas"][campo] for campo in self.campos]
+
+    def __len__(self):
+        return len(self.colunas[0]) if self.colunas else 0
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        return {campo: coluna[indice] for campo, coluna in zip(self.campos, self.colunas)}
+
+    def __iter__(self):
+        campos = self.campos
+        return (dict(zip(campos, linha)) for linha in zip(*self.colunas))
+
+    def coluna(self, campo):
+        """Acesso direto a uma coluna (ex.: somar quantidades sem montar os itens)."""
+        return self.colunas[self.campos.index(campo)]
+
+    def para_lista(self):
+        return list(self)
+
+
+def itens_do_pedido(pedido_data, preguicoso=False):
+    """Retorna os itens de um documento de pedido em qualquer formato.
+
+    Com `preguicoso=True`, itens colunares são devolvidos como ItensColunares.
+    """
+    codificado = pedido_data.get(CAMPO_COLUNAR)
+    if codificado is None:
+        return pedido_data.get("itens", [])
+    itens = ItensColunares(codificado)
+    return itens if preguicoso else itens.para_lista()
+
+
+def preparar_gravacao(pedido_salvo, formato=None):
+    """Troca `itens` por `itens_colunar` no documento a gravar, se o formato colunar estiver ativo."""
+    if (formato or ITENS_FORMATO) != "colunar":
+        return pedido_salvo
+    codificado = codificar_itens(pedido_salvo.get("itens"))
+    if codificado is None:
+        return pedido_salvo
+    documento = dict(pedido_salvo)
+    del documento["itens"]
+    documento[CAMPO_COLUNAR] = codificado
+    return documento
+
+
+def normalizar_documento(pedido_data):
+    """Converte o documento lido para o formato de resposta (sempre com `itens`)."""
+    if CAMPO_COLUNAR in pedido_data:
+        pedido_data["itens"] = itens_do_pedido(pedido_data)
+        del pedido_data[CAMPO_COLUNAR]
+    return pedido_data
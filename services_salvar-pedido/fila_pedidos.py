@@ -0,0 +1,168 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from eventos import CRIADO, EVENTOS_PEDIDOS, eventos_pedido
+from repositorio import adicionar_eventos, confirmar
+from resiliencia import ERROS_BACKEND
+from resumo import RESUMO_PEDIDOS, resumos_criacao
+
+# Modo de aceite assíncrono (opt-in): o pedido vai para uma fila local durável
+# e é gravado no Firestore em segundo plano
+ACEITE_ASSINCRONO = os.environ.get("ACEITE_ASSINCRONO", "0") == "1"
+FILA_ARQUIVO = os.environ.get("FILA_PEDIDOS_ARQUIVO", "/tmp/fila_pedidos.sqlite3")
+INTERVALO = float(os.environ.get("FILA_PEDIDOS_INTERVALO_MS", "200")) / 1000.0
+MAX_TENTATIVAS = int(os.environ.get("FILA_PEDIDOS_MAX_TENTATIVAS", "8"))
+RETENCAO = float(os.environ.get("FILA_PEDIDOS_RETENCAO_HORAS", "24")) * 3600
+
+# Limite de escritas por lote do Firestore (com a outbox e o resumo, cada
+# pedido leva também a escrita do seu evento e do resumo do dono)
+TAMANHO_LOTE = 500 // (1 + EVENTOS_PEDIDOS + RESUMO_PEDIDOS)
+
+NA_FILA = "NA_FILA"
+GRAVADO = "GRAVADO"
+FALHOU = "FALHOU"
+
+
+class FilaPedidos:
+    """Fila durável de pedidos aceitos, persistida em SQLite."""
+
+    def __init__(self, arquivo=FILA_ARQUIVO):
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=FULL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS fila ("
+            " id TEXT PRIMARY KEY, dados TEXT NOT NULL, estado TEXT NOT NULL,"
+            " tentativas INTEGER NOT NULL DEFAULT 0, proxima_tentativa REAL NOT NULL,"
+            " atualizado_em REAL NOT NULL, erro TEXT)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS fila_estado ON fila (estado, proxima_tentativa)")
+
+    def enfileirar(self, pedido):
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT INTO fila (id, dados, estado, proxima_tentativa, atualizado_em) VALUES (?, ?, ?, ?, ?)",
+                (pedido["id"], json.dumps(pedido), NA_FILA, agora, agora),
+            )
+
+    def estado(self, pedido_id):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT estado, tentativas, erro FROM fila WHERE id = ?", (pedido_id,)
+            ).fetchone()
+        if linha is None:
+            return None
+        return {"id": pedido_id, "estado": linha[0], "tentativas": linha[1], "erro": linha[2]}
+
+    def proximos(self, limite=TAMANHO_LOTE):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id, dados, tentativas FROM fila WHERE estado = ? AND proxima_tentativa <= ?"
+                " ORDER BY proxima_tentativa LIMIT ?",
+                (NA_FILA, time.time(), limite),
+            ).fetchall()
+        return [(pedido_id, json.loads(dados), tentativas) for pedido_id, dados, tentativas in linhas]
+
+    def marcar_gravados(self, ids):
+        agora = time.time()
+        with self._lock:
+            self._conexao.executemany(
+                "UPDATE fila SET estado = ?, atualizado_em = ?, erro = NULL WHERE id = ?",
+                [(GRAVADO, agora, pedido_id) for pedido_id in ids],
+            )
+
+    def marcar_falha(self, itens, erro):
+        """Agenda nova tentativa com backoff exponencial ou desiste após MAX_TENTATIVAS."""
+        agora = time.time()
+        with self._lock:
+            for pedido_id, tentativas in itens:
+                tentativas += 1
+                estado = FALHOU if tentativas >= MAX_TENTATIVAS else NA_FILA
+                self._conexao.execute(
+                    "UPDATE fila SET estado = ?, tentativas = ?, proxima_tentativa = ?, atualizado_em = ?, erro = ?"
+                    " WHERE id = ?",
+                    (estado, tentativas, agora + min(2 ** tentativas, 300), agora, erro, pedido_id),
+                )
+
+    def expurgar(self, retencao=RETENCAO):
+        with self._lock:
+            self._conexao.execute(
+                "DELETE FROM fila WHERE estado = ? AND atualizado_em < ?", (GRAVADO, time.time() - retencao)
+            )
+
+    def total(self, estado=NA_FILA):
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM fila WHERE estado = ?", (estado,)).fetchone()[0]
+
+
+class Gravador:
+    """Esvazia a fila para o Firestore em lotes, com novas tentativas."""
+
+    def __init__(self, db, fila, intervalo=INTERVALO):
+        self.db = db
+        self.fila = fila
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = None
+
+    def gravar_lote(self):
+        """Grava um lote de pedidos pendentes. Retorna quantos foram processados."""
+        itens = self.fila.proximos()
+        if itens:
+            self._confirmar(itens)
+        return len(itens)
+
+    def _confirmar(self, itens):
+        """Grava os itens num lote; se o lote for recusado, grava cada metade à parte.
+
+        Assim só o pedido que falha sozinho (ex.: documento acima de 1 MiB)
+        consome tentativas, e os demais do lote são gravados. Com o backend
+        indisponível a divisão não ajuda: todos reagendam de uma vez.
+        """
+        colecao = self.db.collection("pedidos")
+
+        def escrever(lote):
+            for pedido_id, pedido, _ in itens:
+                lote.set(colecao.document(pedido_id), pedido)
+                adicionar_eventos(self.db, lote, eventos_pedido(CRIADO, pedido_id, pedido))
+        resumos = [r for pedido_id, pedido, _ in itens for r in resumos_criacao(pedido_id, pedido)]
+        try:
+            confirmar(self.db, escrever, resumos)
+        except Exception as e:
+            if len(itens) > 1 and not isinstance(e, ERROS_BACKEND):
+                meio = len(itens) // 2
+                self._confirmar(itens[:meio])
+                self._confirmar(itens[meio:])
+                return
+            self.fila.marcar_falha([(pedido_id, tentativas) for pedido_id, _, tentativas in itens], str(e))
+            return
+        self.fila.marcar_gravados([pedido_id for pedido_id, _, _ in itens])
+
+    def _executar(self):
+        ultimo_expurgo = 0
+        while not self._parar.is_set():
+            # Esvazia enquanto houver lotes cheios; depois espera o próximo ciclo
+            while self.gravar_lote() >= TAMANHO_LOTE:
+                pass
+            if time.monotonic() - ultimo_expurgo > 3600:
+                self.fila.expurgar()
+                ultimo_expurgo = time.monotonic()
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name="gravador-pedidos", daemon=True)
+            self._thread.start()
+            atexit.register(self.encerrar)
+
+    def encerrar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        # Última tentativa; o que sobrar continua na fila e é gravado no próximo início
+        self.gravar_lote()
@@ -4,16 +4,49 @@ from datetime import datetime
 import uuid
 import firebase_admin
 from firebase_admin import auth, credentials
-from google.cloud import firestore
 from flask import request
+from busca import CAMPO_TOKENS, tokens_busca
+from captura import capturar
+from catalogo import CATALOGO_PRECOS, CatalogoProdutos
+from codec_itens import preparar_gravacao
+from corpo import CorpoInvalido, CorpoMuitoGrande, ler_json, tamanho_maximo
+from eventos import CRIADO, eventos_pedido
+from fila_pedidos import ACEITE_ASSINCRONO, GRAVADO, FilaPedidos, Gravador
+from limitador import LimitadorUsuario, limitar_concorrencia
+from modelo import STATUS_INICIAL, Pedido
+from perfilador import perfilar
+from resumo import resumos_criacao
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, resposta_degradada
+from validacao import ErroValidacao, calcular_total, validar_item
 
 # Inicializa Firebase Admin SDK (se ainda não estiver inicializado)
 if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
-# Inicializa o Firestore
-db = firestore.Client()
+# Inicializa o Firestore e o repositório de pedidos (PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("salvar_pedido", capacidade=20, taxa=5)
+
+# Tamanho máximo do corpo da requisição (CORPO_MAXIMO_BYTES)
+CORPO_MAXIMO = tamanho_maximo(8 * 1024 * 1024)
+
+# Catálogo de preços em memória (opt-in via CATALOGO_PRECOS=1; lido do Firestore)
+catalogo = None
+if CATALOGO_PRECOS and db is not None:
+    catalogo = CatalogoProdutos(db)
+    catalogo.iniciar()
+
+# Aceite assíncrono (opt-in via ACEITE_ASSINCRONO=1): fila local durável + gravador em segundo plano
+# (só com o Firestore; no SQLite a gravação já é local)
+fila = None
+if ACEITE_ASSINCRONO and db is not None:
+    fila = FilaPedidos()
+    Gravador(db, fila).iniciar()
 
 def verificar_autenticacao():
     """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
@@ -29,14 +62,29 @@ def verificar_autenticacao():
     except Exception as e:
         return None, json.dumps({"error": "Token inválido ou expirado"}), 401
 
+def consultar_aceite(pedido_id, prazo):
+    """Informa se um pedido aceito de forma assíncrona já foi gravado no Firestore."""
+    situacao = fila.estado(pedido_id)
+    if situacao is not None:
+        return situacao
+
+    # Aceito por outra instância (ou já expurgado da fila local)
+    registro = circuito.chamar(lambda: repositorio.obter(pedido_id, campos=["id"], **prazo.opcoes()))
+    if registro is not None:
+        return {"id": pedido_id, "estado": GRAVADO}
+    return None
+
 @functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
 def salvar_pedido(request):
     """Salva um pedido no Firestore apenas para usuários autenticados."""
 
     # Headers de CORS
     cors_headers = {
         "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS" if fila is not None else "POST, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, Authorization",
     }
 
@@ -44,43 +92,88 @@ def salvar_pedido(request):
     if request.method == "OPTIONS":
         return ("", 204, cors_headers)
 
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
     # 🔒 Verifica se o usuário está autenticado
     user, error_response, status = verificar_autenticacao()
     if not user:
         return error_response, status, cors_headers
 
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
     try:
+        # No modo assíncrono, GET /pedidos/<id> consulta se o pedido já foi gravado
+        path_parts = request.path.strip("/").split("/")
+        if fila is not None and request.method == "GET" and len(path_parts) == 2 and path_parts[0] == "pedidos":
+            situacao = consultar_aceite(path_parts[1], prazo)
+            if situacao is None:
+                return (json.dumps({"error": "Pedido não encontrado"}), 404, cors_headers)
+            return (json.dumps(situacao), 200, cors_headers)
+
         # Verifica se o método é POST
         if request.method != "POST":
             return (json.dumps({"error": "Método não permitido"}), 405, cors_headers)
         
-        # Decodifica o JSON recebido
-        pedido = request.get_json(silent=True)
-        if pedido is None:
-            return (json.dumps({"error": "JSON inválido ou não fornecido"}), 400, cors_headers)
-
-        # Valida os campos obrigatórios
-        if "cliente" not in pedido or "email" not in pedido or "itens" not in pedido:
-            return (json.dumps({"error": "Campos obrigatórios faltando"}), 400, cors_headers)
-
-        # Calcula o total do pedido
-        total = sum(item["quantidade"] * item["preco"] for item in pedido["itens"])
+        # Lê o JSON recebido em blocos; cada item é validado assim que é lido
+        try:
+            pedido = ler_json(request, CORPO_MAXIMO, campo_lista="itens",
+                              ao_ler_item=lambda i, item: validar_item(i, item, com_preco=catalogo is None))
+
+            # Com o catálogo ativo, o preço de cada item vem do servidor (pelo SKU)
+            if catalogo is not None and isinstance(pedido, dict) and isinstance(pedido.get("itens"), list):
+                catalogo.aplicar_precos(pedido["itens"])
+
+            # Valida o pedido e calcula o total em centavos (aritmética inteira exata)
+            total_centavos = calcular_total(pedido)
+        except CorpoMuitoGrande as e:
+            return (json.dumps({"error": str(e)}), 413, cors_headers)
+        except (CorpoInvalido, ErroValidacao) as e:
+            return (json.dumps({"error": str(e)}), 400, cors_headers)
+        total = total_centavos / 100
 
         # Cria o objeto a ser salvo
-        pedido_salvo = {
-            "id": str(uuid.uuid4()),
-            "status": "PENDENTE",
-            "total": total,
-            "data_criacao": datetime.utcnow().isoformat() + "Z",
-            "cliente": pedido["cliente"],
-            "email": pedido["email"],
-            "itens": pedido["itens"],
-            "user_id": user["uid"],  # 🔥 Associa o pedido ao usuário autenticado
-        }
-
-        # Salva o pedido no Firestore
-        doc_ref = db.collection("pedidos").document(pedido_salvo["id"])
-        doc_ref.set(pedido_salvo)
+        agora = datetime.utcnow().isoformat() + "Z"
+        pedido_salvo = Pedido(
+            str(uuid.uuid4()),
+            status=STATUS_INICIAL,
+            total=total,
+            total_centavos=total_centavos,
+            data_criacao=agora,
+            ultima_atualizacao=agora,  # Marca d'água usada pela sincronização incremental
+            cliente=pedido["cliente"],
+            email=pedido["email"],
+            itens=pedido["itens"],
+            user_id=user["uid"],  # 🔥 Associa o pedido ao usuário autenticado
+        ).to_documento()
+
+        # Tokens de busca por cliente/email (prefixos e n-gramas)
+        pedido_salvo[CAMPO_TOKENS] = tokens_busca(pedido_salvo["cliente"], pedido_salvo["email"])
+
+        # Documento no formato de gravação configurado (itens em linhas ou colunar)
+        documento = preparar_gravacao(pedido_salvo)
+
+        # Modo assíncrono: grava na fila local durável e confirma o aceite com 202
+        if fila is not None:
+            fila.enfileirar(documento)
+            response = json.dumps({
+                "message": "Pedido aceito para processamento",
+                "id": pedido_salvo["id"],
+                "status": pedido_salvo["status"],
+                "total": pedido_salvo["total"],
+                "data_criacao": pedido_salvo["data_criacao"]
+            })
+            return (response, 202, cors_headers)
+
+        # Salva o pedido (com o evento de criação na outbox e o resumo do usuário,
+        # se ligados, na mesma escrita)
+        eventos = eventos_pedido(CRIADO, pedido_salvo["id"], pedido_salvo)
+        resumos = resumos_criacao(pedido_salvo["id"], pedido_salvo)
+        circuito.chamar(lambda: repositorio.gravar(pedido_salvo["id"], documento, eventos=eventos, resumos=resumos,
+                                                   **prazo.opcoes()))
 
         # Retorna sucesso
         response = json.dumps({
@@ -94,4 +187,7 @@ def salvar_pedido(request):
         return (response, 200, cors_headers)
 
     except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
         return (json.dumps({"error": str(e)}), 500, cors_headers)
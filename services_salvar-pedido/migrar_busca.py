@@ -0,0 +1,50 @@
+"""Grava os tokens de busca (busca_tokens) nos pedidos existentes.
+
+Uso: python migrar_busca.py [--todos] [--dry-run] [--pagina 300]
+"""
+import argparse
+from google.cloud import firestore
+from busca import CAMPO_TOKENS, tokens_busca
+
+
+def migrar(db, todos=False, dry_run=False, pagina=300):
+    """Percorre a coleção em páginas (cursor pelo ID) e grava os tokens em lote.
+
+    Sem `todos`, só os pedidos ainda sem tokens ou com tokens desatualizados são regravados.
+    """
+    totais = {"lidos": 0, "atualizados": 0, "ignorados": 0}
+    ultimo = None
+    while True:
+        consulta = db.collection("pedidos").order_by("__name__").limit(pagina)
+        if ultimo is not None:
+            consulta = consulta.start_after(ultimo)
+        docs = list(consulta.stream())
+        if not docs:
+            return totais
+
+        batch = db.batch()
+        atualizados = 0
+        for doc in docs:
+            totais["lidos"] += 1
+            dados = doc.to_dict()
+            tokens = tokens_busca(dados.get("cliente"), dados.get("email"))
+            if not todos and dados.get(CAMPO_TOKENS) == tokens:
+                totais["ignorados"] += 1
+                continue
+            batch.update(doc.reference, {CAMPO_TOKENS: tokens})
+            atualizados += 1
+
+        if atualizados and not dry_run:
+            batch.commit()
+        totais["atualizados"] += atualizados
+        ultimo = docs[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--todos", action="store_true", help="regrava os tokens mesmo quando já estão atualizados")
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta, sem gravar")
+    parser.add_argument("--pagina", type=int, default=300, help="pedidos por página/lote (máx. 500)")
+    args = parser.parse_args()
+
+    print(migrar(firestore.Client(), todos=args.todos, dry_run=args.dry_run, pagina=min(args.pagina, 500)))
@@ -0,0 +1,40 @@
+"""Grava `ultima_atualizacao` nos pedidos anteriores à sincronização incremental.
+
+O sincronizar-pedidos lê os pedidos só pela ultima_atualizacao. Os pedidos sem
+ela recebem o instante da migração (não a data de criação), para chegarem a
+todos os clientes na próxima sincronização, qualquer que seja a marca d'água
+deles. Rodar antes de implantar o sincronizar-pedidos; rodar de novo não
+altera os pedidos já marcados.
+
+Uso: python migrar_carimbos.py [--dry-run] [--pagina 500]
+"""
+import argparse
+from datetime import datetime
+from repositorio import Operacao, TAMANHO_LOTE, cliente_firestore, criar_repositorio
+
+
+def migrar(repositorio, dry_run=False, pagina=TAMANHO_LOTE):
+    """Percorre a coleção em páginas (cursor pelo ID) e marca em lote os pedidos sem carimbo."""
+    agora = datetime.utcnow().isoformat() + "Z"
+    totais = {"lidos": 0, "atualizados": 0}
+    cursor = None
+    while True:
+        registros, cursor = repositorio.consultar(limite=pagina, cursor=cursor)
+        operacoes = [Operacao("atualizar", registro.id, {"ultima_atualizacao": agora})
+                     for registro in registros if not registro.dados.get("ultima_atualizacao")]
+        if operacoes and not dry_run:
+            repositorio.gravar_em_lote(operacoes)
+        totais["lidos"] += len(registros)
+        totais["atualizados"] += len(operacoes)
+        if cursor is None:
+            return totais
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta, sem gravar")
+    parser.add_argument("--pagina", type=int, default=TAMANHO_LOTE, help="pedidos por página/lote (máx. 500)")
+    args = parser.parse_args()
+
+    db = cliente_firestore()
+    print(migrar(criar_repositorio(db), dry_run=args.dry_run, pagina=min(args.pagina, TAMANHO_LOTE)))
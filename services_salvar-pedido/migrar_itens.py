@@ -0,0 +1,54 @@
+"""Migra os pedidos existentes entre os formatos de itens (linhas <-> colunar).
+
+Uso: python migrar_itens.py [--reverter] [--dry-run] [--pagina 300]
+"""
+import argparse
+from google.cloud import firestore
+from codec_itens import CAMPO_COLUNAR, codificar_itens, itens_do_pedido
+
+
+def migrar(db, reverter=False, dry_run=False, pagina=300):
+    """Percorre a coleção em páginas (cursor pelo ID) e converte cada pedido em lote."""
+    totais = {"lidos": 0, "convertidos": 0, "ignorados": 0}
+    ultimo = None
+    while True:
+        consulta = db.collection("pedidos").order_by("__name__").limit(pagina)
+        if ultimo is not None:
+            consulta = consulta.start_after(ultimo)
+        docs = list(consulta.stream())
+        if not docs:
+            return totais
+
+        batch = db.batch()
+        convertidos = 0
+        for doc in docs:
+            totais["lidos"] += 1
+            dados = doc.to_dict()
+            if reverter:
+                if CAMPO_COLUNAR not in dados:
+                    totais["ignorados"] += 1
+                    continue
+                alteracao = {"itens": itens_do_pedido(dados), CAMPO_COLUNAR: firestore.DELETE_FIELD}
+            else:
+                codificado = codificar_itens(dados.get("itens")) if CAMPO_COLUNAR not in dados else None
+                if codificado is None:
+                    totais["ignorados"] += 1
+                    continue
+                alteracao = {CAMPO_COLUNAR: codificado, "itens": firestore.DELETE_FIELD}
+            batch.update(doc.reference, alteracao)
+            convertidos += 1
+
+        if convertidos and not dry_run:
+            batch.commit()
+        totais["convertidos"] += convertidos
+        ultimo = docs[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reverter", action="store_true", help="volta do formato colunar para linhas")
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta, sem gravar")
+    parser.add_argument("--pagina", type=int, default=300, help="pedidos por página/lote (máx. 500)")
+    args = parser.parse_args()
+
+    print(migrar(firestore.Client(), reverter=args.reverter, dry_run=args.dry_run, pagina=min(args.pagina, 500)))
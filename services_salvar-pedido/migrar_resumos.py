@@ -0,0 +1,66 @@
+"""Monta o resumo de pedidos (resumo.py) de cada usuário a partir dos pedidos existentes.
+
+Rodar depois de ligar RESUMO_PEDIDOS=1 nos serviços. A coleção é percorrida
+uma vez (cursor pelo ID); cada resumo é regravado numa transação, mantendo os
+pedidos criados pelos serviços depois do início da varredura. Rodar de novo
+é seguro e corrige resumos que tenham divergido (ex.: transições em massa).
+
+Uso: python migrar_resumos.py [--dry-run] [--pagina 500]
+"""
+import argparse
+import heapq
+from datetime import datetime
+from repositorio import cliente_firestore, criar_repositorio
+from resumo import FOLGA, LIMITE, entrada, montar
+
+
+def calcular(repositorio, pagina=500):
+    """{user_id: resumo} de todos os pedidos da coleção."""
+    quantidades, recentes = {}, {}
+    cursor = None
+    while True:
+        registros, cursor = repositorio.consultar(limite=pagina, cursor=cursor)
+        for registro in registros:
+            user_id = registro.dados.get("user_id")
+            if not user_id:
+                continue
+            quantidades[user_id] = quantidades.get(user_id, 0) + 1
+            # Heap mínimo com os mais recentes do usuário, limitado ao limite + folga
+            chave = (registro.dados.get("data_criacao") or "", registro.id)
+            heap = recentes.setdefault(user_id, [])
+            item = (chave, entrada(registro.id, registro.dados))
+            if len(heap) < LIMITE + FOLGA:
+                heapq.heappush(heap, item)
+            elif chave > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        if cursor is None:
+            break
+    return {user_id: montar([e for _, e in recentes[user_id]], quantidade) for user_id, quantidade in quantidades.items()}
+
+
+def mesclar(atual, calculado, inicio):
+    """Resumo calculado, mais os pedidos que os serviços incluíram no resumo depois de `inicio`."""
+    if atual is None:
+        return calculado
+    vistos = {p["id"] for p in calculado["pedidos"]}
+    novos = [p for p in atual["pedidos"] if p["id"] not in vistos and (p.get("data_criacao") or "") >= inicio]
+    return montar(calculado["pedidos"] + novos, calculado["quantidade"] + len(novos))
+
+
+def migrar(repositorio, dry_run=False, pagina=500):
+    inicio = datetime.utcnow().isoformat() + "Z"
+    resumos = calcular(repositorio, pagina)
+    if not dry_run:
+        for user_id, calculado in resumos.items():
+            repositorio.alterar_resumo(user_id, lambda atual, calculado=calculado: mesclar(atual, calculado, inicio))
+    return {"usuarios": len(resumos), "pedidos": sum(r["quantidade"] for r in resumos.values())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta, sem gravar")
+    parser.add_argument("--pagina", type=int, default=500, help="pedidos lidos por página")
+    args = parser.parse_args()
+
+    db = cliente_firestore()
+    print(migrar(criar_repositorio(db), dry_run=args.dry_run, pagina=args.pagina))
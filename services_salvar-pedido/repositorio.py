@@ -0,0 +1,628 @@
+import abc
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+from google.api_core import exceptions as gexc
+from google.cloud import firestore
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, transactional
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+# Backend dos pedidos: "firestore" (padrão) ou "sqlite" (embarcado, para
+# ambientes locais/on-prem e testes)
+BACKEND = os.environ.get("PEDIDOS_BACKEND", "firestore")
+SQLITE_ARQUIVO = os.environ.get("PEDIDOS_SQLITE_ARQUIVO", "pedidos.sqlite3")
+
+COLECAO = "pedidos"
+COLECAO_REMOVIDOS = "pedidos_removidos"
+
+# Outbox dos eventos de alteração (eventos.py) e assinantes que os recebem
+# (despachar-eventos), cada um com o cursor do último evento entregue
+COLECAO_EVENTOS = "eventos_pedidos"
+COLECAO_ASSINANTES = "assinantes_eventos"
+
+# Resumo dos pedidos por usuário (resumo.py), mantido junto com as escritas
+COLECAO_RESUMOS = "resumos_pedidos"
+
+# Limite de escritas por lote do Firestore
+TAMANHO_LOTE = 500
+
+# Campos com coluna própria (e índice) na tabela do SQLite
+COLUNAS_INDEXADAS = ("status", "user_id", "data_criacao")
+
+# Um pedido lido: ID, dados e versão (update_time no Firestore, contador no SQLite),
+# usada como pré-condição em `atualizar`
+Registro = namedtuple("Registro", "id dados versao")
+
+# Uma escrita de `gravar_em_lote`: tipo "gravar", "atualizar" ou "remover"
+Operacao = namedtuple("Operacao", "tipo id dados", defaults=(None,))
+
+
+class PedidoNaoEncontrado(Exception):
+    """O pedido a atualizar não existe."""
+
+
+class PedidoJaExiste(Exception):
+    """`criar` encontrou um pedido com o mesmo ID."""
+
+
+class ConflitoVersao(Exception):
+    """O pedido foi alterado depois da leitura (pré-condição de versão falhou)."""
+
+
+class RepositorioPedidos(abc.ABC):
+    """Operações sobre a coleção de pedidos, independentes do backend.
+
+    `**opcoes` (retry/timeout do Prazo) são repassadas às chamadas do Firestore
+    e ignoradas pelo SQLite.
+    """
+
+    @abc.abstractmethod
+    def obter(self, pedido_id, campos=None, **opcoes):
+        """Registro do pedido, ou None."""
+
+    @abc.abstractmethod
+    def obter_varios(self, ids, **opcoes):
+        """{id: Registro ou None} para os IDs pedidos, numa única leitura."""
+
+    @abc.abstractmethod
+    def consultar(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        """Pedidos que atendem aos filtros [(campo, op, valor)], ordenados por `ordem` e ID.
+
+        Retorna (registros, cursor da próxima página ou None). Sem `ordem`, o
+        cursor é o ID do último pedido lido; com `ordem`, é opaco.
+        """
+
+    @abc.abstractmethod
+    def consultar_removidos(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        """Como `consultar`, sobre as lápides dos pedidos removidos."""
+
+    @abc.abstractmethod
+    def criar(self, pedido_id, dados, **opcoes):
+        """Grava um pedido novo; PedidoJaExiste se o ID estiver em uso."""
+
+    @abc.abstractmethod
+    def gravar(self, pedido_id, dados, eventos=(), resumos=(), **opcoes):
+        """Grava o pedido inteiro, criando ou substituindo.
+
+        Os `eventos` vão para a outbox na mesma escrita atômica, e os
+        `resumos` [(user_id, alterar)] trocam o resumo de cada usuário por
+        `alterar(resumo atual ou None)` (None mantém), na mesma transação
+        (também em `atualizar` e `remover`).
+        """
+
+    @abc.abstractmethod
+    def atualizar(self, pedido_id, alteracoes, versao=None, eventos=(), resumos=(), **opcoes):
+        """Altera campos do pedido; com `versao`, só se ele não mudou desde a leitura."""
+
+    @abc.abstractmethod
+    def remover(self, pedido_id, lapide, eventos=(), resumos=(), **opcoes):
+        """Remove o pedido e grava a lápide da sincronização incremental, atomicamente."""
+
+    @abc.abstractmethod
+    def gravar_em_lote(self, operacoes, **opcoes):
+        """Aplica as Operacoes em lote (transação única no SQLite, lotes de 500 no Firestore)."""
+
+    @abc.abstractmethod
+    def eventos(self, cursor=None, limite=TAMANHO_LOTE, **opcoes):
+        """[(cursor, evento)] da outbox na ordem de gravação, depois de `cursor` (opaco)."""
+
+    @abc.abstractmethod
+    def remover_eventos(self, ate, **opcoes):
+        """Remove da outbox os eventos até o cursor `ate`, inclusive; retorna quantos."""
+
+    @staticmethod
+    @abc.abstractmethod
+    def chave_evento(cursor):
+        """Chave ordenável de um cursor de `eventos`."""
+
+    @abc.abstractmethod
+    def assinantes(self, **opcoes):
+        """Assinantes dos eventos cadastrados, cada um um dict com o "id"."""
+
+    @abc.abstractmethod
+    def obter_resumo(self, user_id, **opcoes):
+        """Resumo dos pedidos do usuário, ou None."""
+
+    @abc.abstractmethod
+    def alterar_resumo(self, user_id, alterar, **opcoes):
+        """Troca o resumo do usuário por `alterar(resumo atual ou None)`, numa transação (migração)."""
+
+    @abc.abstractmethod
+    def gravar_assinante(self, assinante_id, dados, **opcoes):
+        """Cria o assinante ou mescla `dados` nos campos existentes."""
+
+
+def _cursor(registro, ordem):
+    if ordem is None:
+        return registro.id
+    return json.dumps([registro.dados.get(ordem), registro.id])
+
+
+def _ler_cursor(cursor, ordem):
+    if ordem is None:
+        return None, cursor
+    valor, pedido_id = json.loads(cursor)
+    return valor, pedido_id
+
+
+# Instante de gravação (hora do servidor) nos cursores da outbox do Firestore
+_FORMATO_INSTANTE = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def adicionar_eventos(db, batch, eventos):
+    """Inclui os eventos da outbox num lote do Firestore (também usado pelos
+    caminhos que gravam direto no lote: fila de aceite, write-behind, ASGI)."""
+    for evento in eventos:
+        batch.set(db.collection(COLECAO_EVENTOS).document(evento["id"]),
+                  dict(evento, registrado_em=SERVER_TIMESTAMP))
+
+
+def aplicar_resumos(atuais, resumos):
+    """{user_id: novo resumo} das alterações [(user_id, alterar)] sobre {user_id: resumo atual ou None}."""
+    novos = {}
+    for user_id, alterar in resumos:
+        novo = alterar(novos.get(user_id, atuais.get(user_id)))
+        if novo is not None:
+            novos[user_id] = novo
+    return novos
+
+
+def confirmar(db, escrever, resumos=(), **opcoes):
+    """Aplica as escritas de `escrever(lote)` num lote do Firestore.
+
+    Com `resumos`, usa uma transação: os resumos dos usuários são lidos,
+    alterados e regravados junto com as escritas (a transação segue as
+    próprias tentativas do Firestore; `opcoes` só valem para o lote).
+    """
+    if not resumos:
+        batch = db.batch()
+        escrever(batch)
+        batch.commit(**opcoes)
+        return
+
+    refs = {user_id: db.collection(COLECAO_RESUMOS).document(user_id) for user_id, _ in resumos}
+
+    @transactional
+    def executar(transacao):
+        atuais = {doc.id: doc.to_dict() for doc in db.get_all(list(refs.values()), transaction=transacao) if doc.exists}
+        escrever(transacao)
+        for user_id, resumo in aplicar_resumos(atuais, resumos).items():
+            transacao.set(refs[user_id], resumo)
+
+    executar(db.transaction())
+
+
+class RepositorioFirestore(RepositorioPedidos):
+
+    def __init__(self, db, colecao=COLECAO):
+        self.db = db
+        self.colecao = colecao
+
+    def _ref(self, pedido_id):
+        return self.db.collection(self.colecao).document(pedido_id)
+
+    @staticmethod
+    def _registro(doc):
+        return Registro(doc.id, doc.to_dict() or {}, doc.update_time) if doc.exists else None
+
+    def obter(self, pedido_id, campos=None, **opcoes):
+        if campos is not None:
+            opcoes["field_paths"] = list(campos)
+        doc = self._ref(pedido_id).get(**opcoes)
+        if not doc.exists:
+            return None
+        return Registro(pedido_id, doc.to_dict() or {}, doc.update_time)
+
+    def obter_varios(self, ids, **opcoes):
+        encontrados = dict.fromkeys(ids)
+        for doc in self.db.get_all([self._ref(i) for i in ids], **opcoes):
+            encontrados[doc.id] = self._registro(doc)
+        return encontrados
+
+    def consultar(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        consulta = self.db.collection(self.colecao)
+        for campo, op, valor in filtros:
+            consulta = consulta.where(filter=FieldFilter(campo, op, valor))
+        if ordem is not None or limite is not None or cursor is not None:
+            if ordem is not None:
+                consulta = consulta.order_by(ordem)
+            consulta = consulta.order_by("__name__")
+        if cursor is not None:
+            valor, pedido_id = _ler_cursor(cursor, ordem)
+            consulta = consulta.start_after({"__name__": pedido_id} if ordem is None else {ordem: valor, "__name__": pedido_id})
+        if limite is not None:
+            consulta = consulta.limit(limite)
+        registros = [self._registro(doc) for doc in consulta.stream(**opcoes)]
+        proximo = _cursor(registros[-1], ordem) if limite is not None and len(registros) == limite else None
+        return registros, proximo
+
+    def consultar_removidos(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        return RepositorioFirestore(self.db, COLECAO_REMOVIDOS).consultar(filtros, ordem, limite, cursor, **opcoes)
+
+    def criar(self, pedido_id, dados, **opcoes):
+        try:
+            self._ref(pedido_id).create(dados, **opcoes)
+        except gexc.Conflict:
+            raise PedidoJaExiste(pedido_id)
+
+    def gravar(self, pedido_id, dados, eventos=(), resumos=(), **opcoes):
+        if not eventos and not resumos:
+            self._ref(pedido_id).set(dados, **opcoes)
+            return
+
+        def escrever(lote):
+            lote.set(self._ref(pedido_id), dados)
+            adicionar_eventos(self.db, lote, eventos)
+        confirmar(self.db, escrever, resumos, **opcoes)
+
+    def atualizar(self, pedido_id, alteracoes, versao=None, eventos=(), resumos=(), **opcoes):
+        opcao = self.db.write_option(last_update_time=versao) if versao is not None else None
+
+        def escrever(lote):
+            lote.update(self._ref(pedido_id), alteracoes, option=opcao)
+            adicionar_eventos(self.db, lote, eventos)
+        try:
+            if not eventos and not resumos:
+                if opcao is not None:
+                    opcoes["option"] = opcao
+                self._ref(pedido_id).update(alteracoes, **opcoes)
+                return
+            confirmar(self.db, escrever, resumos, **opcoes)
+        except gexc.NotFound:
+            raise PedidoNaoEncontrado(pedido_id)
+        except gexc.FailedPrecondition:
+            raise ConflitoVersao(pedido_id)
+
+    def remover(self, pedido_id, lapide, eventos=(), resumos=(), **opcoes):
+        def escrever(lote):
+            lote.delete(self._ref(pedido_id))
+            lote.set(self.db.collection(COLECAO_REMOVIDOS).document(pedido_id), lapide)
+            adicionar_eventos(self.db, lote, eventos)
+        confirmar(self.db, escrever, resumos, **opcoes)
+
+    def gravar_em_lote(self, operacoes, **opcoes):
+        operacoes = list(operacoes)
+        for inicio in range(0, len(operacoes), TAMANHO_LOTE):
+            batch = self.db.batch()
+            for op in operacoes[inicio:inicio + TAMANHO_LOTE]:
+                if op.tipo == "gravar":
+                    batch.set(self._ref(op.id), op.dados)
+                elif op.tipo == "atualizar":
+                    batch.update(self._ref(op.id), op.dados)
+                elif op.tipo == "remover":
+                    batch.delete(self._ref(op.id))
+                else:
+                    raise ValueError(f"Operação desconhecida: {op.tipo}")
+            batch.commit(**opcoes)
+
+    def _consulta_eventos(self):
+        return self.db.collection(COLECAO_EVENTOS).order_by("registrado_em").order_by("__name__")
+
+    @staticmethod
+    def _posicao(cursor):
+        instante, evento_id = json.loads(cursor)
+        return {"registrado_em": datetime.strptime(instante, _FORMATO_INSTANTE).replace(tzinfo=timezone.utc),
+                "__name__": evento_id}
+
+    def eventos(self, cursor=None, limite=TAMANHO_LOTE, **opcoes):
+        consulta = self._consulta_eventos()
+        if cursor is not None:
+            consulta = consulta.start_after(self._posicao(cursor))
+        lidos = []
+        for doc in consulta.limit(limite).stream(**opcoes):
+            evento = doc.to_dict() or {}
+            instante = evento.pop("registrado_em").astimezone(timezone.utc).strftime(_FORMATO_INSTANTE)
+            lidos.append((json.dumps([instante, doc.id]), evento))
+        return lidos
+
+    def remover_eventos(self, ate, **opcoes):
+        consulta = self._consulta_eventos().end_at(self._posicao(ate)).limit(TAMANHO_LOTE)
+        removidos = 0
+        while True:
+            refs = [doc.reference for doc in consulta.stream(**opcoes)]
+            if not refs:
+                return removidos
+            batch = self.db.batch()
+            for ref in refs:
+                batch.delete(ref)
+            batch.commit(**opcoes)
+            removidos += len(refs)
+
+    @staticmethod
+    def chave_evento(cursor):
+        return tuple(json.loads(cursor))
+
+    def assinantes(self, **opcoes):
+        return [dict(doc.to_dict() or {}, id=doc.id)
+                for doc in self.db.collection(COLECAO_ASSINANTES).stream(**opcoes)]
+
+    def gravar_assinante(self, assinante_id, dados, **opcoes):
+        self.db.collection(COLECAO_ASSINANTES).document(assinante_id).set(dados, merge=True, **opcoes)
+
+    def obter_resumo(self, user_id, **opcoes):
+        doc = self.db.collection(COLECAO_RESUMOS).document(user_id).get(**opcoes)
+        return doc.to_dict() if doc.exists else None
+
+    def alterar_resumo(self, user_id, alterar, **opcoes):
+        confirmar(self.db, lambda lote: None, [(user_id, alterar)])
+
+
+# Operadores dos filtros aceitos pelo SQLite (array_contains é tratado à parte)
+_OPERADORES = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+# Nomes de campo aceitos nos caminhos JSON das consultas
+_CAMPO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class RepositorioSQLite(RepositorioPedidos):
+    """Pedidos num arquivo SQLite: o documento em JSON, com status, user_id e
+    data_criacao em colunas indexadas para os filtros e a ordenação mais comuns."""
+
+    def __init__(self, arquivo=SQLITE_ARQUIVO):
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS pedidos ("
+            " id TEXT PRIMARY KEY, status TEXT, user_id TEXT, data_criacao TEXT,"
+            " versao INTEGER NOT NULL DEFAULT 1, dados TEXT NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS pedidos_status ON pedidos (status, data_criacao, id)")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS pedidos_user_id ON pedidos (user_id, data_criacao, id)")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS pedidos_data_criacao ON pedidos (data_criacao, id)")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS pedidos_removidos (id TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+        )
+        # Ordem da sincronização incremental (mesma expressão gerada por `_expressao`)
+        for tabela in ("pedidos", "pedidos_removidos"):
+            self._conexao.execute(
+                f"CREATE INDEX IF NOT EXISTS {tabela}_ultima_atualizacao"
+                f" ON {tabela} (json_extract(dados, '$.ultima_atualizacao'), id)"
+            )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS eventos_pedidos ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, dados TEXT NOT NULL)"
+        )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS assinantes_eventos (id TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+        )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS resumos_pedidos (user_id TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def _linha(pedido_id, dados):
+        return (pedido_id,) + tuple(dados.get(c) for c in COLUNAS_INDEXADAS) + (json.dumps(dados),)
+
+    @staticmethod
+    def _registro(linha):
+        pedido_id, versao, dados = linha
+        return Registro(pedido_id, json.loads(dados), versao)
+
+    @staticmethod
+    def _expressao(campo, colunas=COLUNAS_INDEXADAS):
+        if campo in colunas:
+            return campo
+        if not _CAMPO.match(campo):
+            raise ValueError(f"Campo inválido: {campo}")
+        return f"json_extract(dados, '$.{campo}')"
+
+    def _ler(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def _transacao(self, escrever):
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = escrever(self._conexao)
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            self._conexao.execute("COMMIT")
+            return resultado
+
+    def obter(self, pedido_id, campos=None, **opcoes):
+        linhas = self._ler("SELECT id, versao, dados FROM pedidos WHERE id = ?", (pedido_id,))
+        return self._registro(linhas[0]) if linhas else None
+
+    def obter_varios(self, ids, **opcoes):
+        encontrados = dict.fromkeys(ids)
+        ids = list(encontrados)
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            parte = ids[inicio:inicio + TAMANHO_LOTE]
+            marcadores = ",".join("?" * len(parte))
+            for linha in self._ler(f"SELECT id, versao, dados FROM pedidos WHERE id IN ({marcadores})", parte):
+                encontrados[linha[0]] = self._registro(linha)
+        return encontrados
+
+    def consultar(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        return self._consultar("SELECT id, versao, dados FROM pedidos", COLUNAS_INDEXADAS,
+                               filtros, ordem, limite, cursor)
+
+    def consultar_removidos(self, filtros=(), ordem=None, limite=None, cursor=None, **opcoes):
+        # A lápide não tem versão nem colunas além do ID e do JSON
+        return self._consultar("SELECT id, 0, dados FROM pedidos_removidos", (), filtros, ordem, limite, cursor)
+
+    def _consultar(self, sql, colunas, filtros, ordem, limite, cursor):
+        condicoes, parametros = [], []
+        for campo, op, valor in filtros:
+            if op == "array_contains":
+                if not _CAMPO.match(campo):
+                    raise ValueError(f"Campo inválido: {campo}")
+                condicoes.append(f"EXISTS (SELECT 1 FROM json_each(dados, '$.{campo}') WHERE value = ?)")
+            elif op in _OPERADORES:
+                condicoes.append(f"{self._expressao(campo, colunas)} {_OPERADORES[op]} ?")
+            else:
+                raise ValueError(f"Operador não suportado: {op}")
+            parametros.append(valor)
+
+        if cursor is not None:
+            valor, pedido_id = _ler_cursor(cursor, ordem)
+            if ordem is None:
+                condicoes.append("id > ?")
+                parametros.append(pedido_id)
+            else:
+                condicoes.append(f"({self._expressao(ordem, colunas)}, id) > (?, ?)")
+                parametros.extend([valor, pedido_id])
+
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY " + (f"{self._expressao(ordem, colunas)}, id" if ordem is not None else "id")
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+
+        registros = [self._registro(linha) for linha in self._ler(sql, parametros)]
+        proximo = _cursor(registros[-1], ordem) if limite is not None and len(registros) == limite else None
+        return registros, proximo
+
+    def criar(self, pedido_id, dados, **opcoes):
+        try:
+            self._transacao(lambda c: c.execute(
+                "INSERT INTO pedidos (id, status, user_id, data_criacao, dados) VALUES (?, ?, ?, ?, ?)",
+                self._linha(pedido_id, dados)))
+        except sqlite3.IntegrityError:
+            raise PedidoJaExiste(pedido_id)
+
+    def gravar(self, pedido_id, dados, eventos=(), resumos=(), **opcoes):
+        def escrever(conexao):
+            self._gravar(conexao, pedido_id, dados)
+            self._gravar_eventos(conexao, eventos)
+            self._gravar_resumos(conexao, resumos)
+        self._transacao(escrever)
+
+    @staticmethod
+    def _gravar_eventos(conexao, eventos):
+        conexao.executemany("INSERT INTO eventos_pedidos (id, dados) VALUES (?, ?)",
+                            [(evento["id"], json.dumps(evento)) for evento in eventos])
+
+    @staticmethod
+    def _gravar_resumos(conexao, resumos):
+        atuais = {}
+        for user_id in {user_id for user_id, _ in resumos}:
+            linha = conexao.execute("SELECT dados FROM resumos_pedidos WHERE user_id = ?", (user_id,)).fetchone()
+            if linha is not None:
+                atuais[user_id] = json.loads(linha[0])
+        conexao.executemany("INSERT OR REPLACE INTO resumos_pedidos (user_id, dados) VALUES (?, ?)",
+                            [(u, json.dumps(r)) for u, r in aplicar_resumos(atuais, resumos).items()])
+
+    def _gravar(self, conexao, pedido_id, dados):
+        conexao.execute(
+            "INSERT INTO pedidos (id, status, user_id, data_criacao, dados) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET status = excluded.status, user_id = excluded.user_id,"
+            " data_criacao = excluded.data_criacao, dados = excluded.dados, versao = versao + 1",
+            self._linha(pedido_id, dados))
+
+    def atualizar(self, pedido_id, alteracoes, versao=None, eventos=(), resumos=(), **opcoes):
+        def escrever(conexao):
+            self._atualizar(conexao, pedido_id, alteracoes, versao)
+            self._gravar_eventos(conexao, eventos)
+            self._gravar_resumos(conexao, resumos)
+        self._transacao(escrever)
+
+    def _atualizar(self, conexao, pedido_id, alteracoes, versao=None):
+        linha = conexao.execute("SELECT versao, dados FROM pedidos WHERE id = ?", (pedido_id,)).fetchone()
+        if linha is None:
+            raise PedidoNaoEncontrado(pedido_id)
+        if versao is not None and linha[0] != versao:
+            raise ConflitoVersao(pedido_id)
+        dados = dict(json.loads(linha[1]), **alteracoes)
+        conexao.execute(
+            "UPDATE pedidos SET status = ?, user_id = ?, data_criacao = ?, dados = ?, versao = versao + 1 WHERE id = ?",
+            self._linha(pedido_id, dados)[1:] + (pedido_id,))
+
+    def remover(self, pedido_id, lapide, eventos=(), resumos=(), **opcoes):
+        def escrever(conexao):
+            conexao.execute("DELETE FROM pedidos WHERE id = ?", (pedido_id,))
+            conexao.execute("INSERT OR REPLACE INTO pedidos_removidos (id, dados) VALUES (?, ?)",
+                            (pedido_id, json.dumps(lapide)))
+            self._gravar_eventos(conexao, eventos)
+            self._gravar_resumos(conexao, resumos)
+        self._transacao(escrever)
+
+    def gravar_em_lote(self, operacoes, **opcoes):
+        def escrever(conexao):
+            for op in operacoes:
+                if op.tipo == "gravar":
+                    self._gravar(conexao, op.id, op.dados)
+                elif op.tipo == "atualizar":
+                    self._atualizar(conexao, op.id, op.dados)
+                elif op.tipo == "remover":
+                    conexao.execute("DELETE FROM pedidos WHERE id = ?", (op.id,))
+                else:
+                    raise ValueError(f"Operação desconhecida: {op.tipo}")
+        self._transacao(escrever)
+
+    def eventos(self, cursor=None, limite=TAMANHO_LOTE, **opcoes):
+        linhas = self._ler("SELECT seq, dados FROM eventos_pedidos WHERE seq > ? ORDER BY seq LIMIT ?",
+                           (int(cursor or 0), limite))
+        return [(str(seq), json.loads(dados)) for seq, dados in linhas]
+
+    def remover_eventos(self, ate, **opcoes):
+        return self._transacao(lambda c: c.execute("DELETE FROM eventos_pedidos WHERE seq <= ?", (int(ate),)).rowcount)
+
+    @staticmethod
+    def chave_evento(cursor):
+        return int(cursor)
+
+    def assinantes(self, **opcoes):
+        return [dict(json.loads(dados), id=assinante_id)
+                for assinante_id, dados in self._ler("SELECT id, dados FROM assinantes_eventos ORDER BY id")]
+
+    def gravar_assinante(self, assinante_id, dados, **opcoes):
+        def escrever(conexao):
+            linha = conexao.execute("SELECT dados FROM assinantes_eventos WHERE id = ?", (assinante_id,)).fetchone()
+            atual = json.loads(linha[0]) if linha else {}
+            conexao.execute("INSERT OR REPLACE INTO assinantes_eventos (id, dados) VALUES (?, ?)",
+                            (assinante_id, json.dumps(dict(atual, **dados))))
+        self._transacao(escrever)
+
+    def obter_resumo(self, user_id, **opcoes):
+        linhas = self._ler("SELECT dados FROM resumos_pedidos WHERE user_id = ?", (user_id,))
+        return json.loads(linhas[0][0]) if linhas else None
+
+    def alterar_resumo(self, user_id, alterar, **opcoes):
+        self._transacao(lambda c: self._gravar_resumos(c, [(user_id, alterar)]))
+
+
+# Um repositório SQLite por arquivo e processo (uma conexão compartilhada entre as threads)
+_sqlite = {}
+_sqlite_lock = threading.Lock()
+
+
+# Um cliente do Firestore por processo, compartilhado pelos serviços montados juntos (gateway)
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def usa_firestore(backend=None):
+    return (backend or BACKEND) == "firestore"
+
+
+def cliente_firestore(backend=None):
+    """Cliente do Firestore do processo, criado na primeira chamada; None nos outros backends."""
+    global _cliente
+    if not usa_firestore(backend):
+        return None
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = firestore.Client()
+        return _cliente
+
+
+def criar_repositorio(db=None, backend=None):
+    """Repositório do backend configurado em PEDIDOS_BACKEND."""
+    backend = backend or BACKEND
+    if backend == "firestore":
+        return RepositorioFirestore(db)
+    if backend == "sqlite":
+        with _sqlite_lock:
+            if SQLITE_ARQUIVO not in _sqlite:
+                _sqlite[SQLITE_ARQUIVO] = RepositorioSQLite(SQLITE_ARQUIVO)
+            return _sqlite[SQLITE_ARQUIVO]
+    raise ValueError(f"Backend de pedidos desconhecido: {backend}")
@@ -0,0 +1,96 @@
+"""Resumo dos pedidos de cada usuário (coleção resumos_pedidos, um documento por user_id).
+
+Ligado por RESUMO_PEDIDOS=1. O resumo guarda a quantidade de pedidos do
+usuário e os mais recentes (id, status, total e data_criacao, do mais novo
+para o mais antigo), para a tela "meus pedidos" sair da leitura de um único
+documento (GET /resumo do listar-pedidos). salvar, atualizar-status e delete
+repassam ao repositório a alteração do resumo, aplicada na mesma transação
+da escrita do pedido (ver repositorio.py). Resumos de pedidos anteriores à
+ativação são montados com migrar_resumos.py.
+
+Além dos RESUMO_PEDIDOS_LIMITE pedidos servidos, o resumo guarda uma folga,
+para que remoções recentes não encurtem a lista; uma atualização só altera
+pedidos que já estão nela. As transições em massa (transicionar-pedidos)
+alteram o resumo pedido a pedido, como o atualizar-status.
+"""
+import os
+from datetime import datetime
+
+RESUMO_PEDIDOS = os.environ.get("RESUMO_PEDIDOS", "0") == "1"
+
+# Pedidos servidos no resumo e folga guardada além deles
+LIMITE = int(os.environ.get("RESUMO_PEDIDOS_LIMITE", "50"))
+FOLGA = int(os.environ.get("RESUMO_PEDIDOS_FOLGA", "10"))
+
+# Campos de cada pedido no resumo, além do id
+CAMPOS = ("status", "total", "data_criacao")
+
+
+def entrada(pedido_id, pedido):
+    return dict({"id": pedido_id}, **{campo: pedido.get(campo) for campo in CAMPOS})
+
+
+def montar(pedidos, quantidade):
+    """Resumo com as entradas ordenadas da mais recente para a mais antiga, até o limite + folga."""
+    pedidos = sorted(pedidos, key=lambda p: (p.get("data_criacao") or "", p["id"]), reverse=True)
+    return {
+        "quantidade": max(0, quantidade),
+        "pedidos": pedidos[:LIMITE + FOLGA],
+        "atualizado_em": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def criar(resumo, pedido_id, pedido):
+    resumo = resumo or {"quantidade": 0, "pedidos": []}
+    outros = [p for p in resumo["pedidos"] if p["id"] != pedido_id]
+    novo = len(outros) == len(resumo["pedidos"])
+    return montar(outros + [entrada(pedido_id, pedido)], resumo["quantidade"] + (1 if novo else 0))
+
+
+def atualizar(resumo, pedido_id, alteracoes):
+    """Resumo com a entrada do pedido alterada, ou None se ele não está no resumo."""
+    if resumo is None or not any(p["id"] == pedido_id for p in resumo["pedidos"]):
+        return None
+    campos = {campo: alteracoes[campo] for campo in CAMPOS if campo in alteracoes}
+    if not campos:
+        return None
+    pedidos = [dict(p, **campos) if p["id"] == pedido_id else p for p in resumo["pedidos"]]
+    return montar(pedidos, resumo["quantidade"])
+
+
+def remover(resumo, pedido_id):
+    if resumo is None:
+        return None
+    return montar([p for p in resumo["pedidos"] if p["id"] != pedido_id], resumo["quantidade"] - 1)
+
+
+def visao(user_id, resumo):
+    """Resumo como servido pelo endpoint (sem a folga)."""
+    resumo = resumo or {"quantidade": 0, "pedidos": []}
+    return {
+        "user_id": user_id,
+        "quantidade": resumo["quantidade"],
+        "pedidos": resumo["pedidos"][:LIMITE],
+        "atualizado_em": resumo.get("atualizado_em"),
+    }
+
+
+# Alterações para repassar às escritas do repositório: [(user_id, função do resumo atual
+# para o novo, ou None para mantê-lo)], vazias com o resumo desligado
+
+def resumos_criacao(pedido_id, pedido):
+    if not RESUMO_PEDIDOS or not pedido.get("user_id"):
+        return []
+    return [(pedido["user_id"], lambda resumo: criar(resumo, pedido_id, pedido))]
+
+
+def resumos_atualizacao(user_id, pedido_id, alteracoes):
+    if not RESUMO_PEDIDOS or not user_id:
+        return []
+    return [(user_id, lambda resumo: atualizar(resumo, pedido_id, alteracoes))]
+
+
+def resumos_remocao(user_id, pedido_id):
+    if not RESUMO_PEDIDOS or not user_id:
+        return []
+    return [(user_id, lambda resumo: remover(resumo, pedido_id))]
@@ -0,0 +1,102 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from flask import Flask, request
+import captura
+from captura import capturar, rota_anonima
+from corpo import ler_json
+
+def salvar(request):
+    pedido = ler_json(request, 1024 * 1024, campo_lista="itens")
+    return json.dumps({"itens": len(pedido["itens"])}), 200, {}
+
+class TestCaptura(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        self.arquivo = os.path.join(self.pasta.name, "captura.jsonl")
+        for nome, valor in (("HABILITADA", True), ("AMOSTRAGEM", 1.0), ("DESTINO", self.arquivo)):
+            patcher = patch.object(captura, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def registros(self):
+        with open(self.arquivo) as f:
+            return [json.loads(linha) for linha in f]
+
+    def test_desligada_nao_envolve_handler(self):
+        """Testa se, com a captura desligada, o decorador devolve o próprio handler"""
+        with patch.object(captura, "HABILITADA", False):
+            self.assertIs(capturar(salvar), salvar)
+
+    def test_rota_anonima(self):
+        """Testa se só o primeiro segmento do caminho é mantido"""
+        self.assertEqual(rota_anonima("/pedidos/abc-123"), "/pedidos/{id}")
+        self.assertEqual(rota_anonima("/pedidos"), "/pedidos")
+        self.assertEqual(rota_anonima("/"), "/")
+
+    def test_forma_do_corpo_sem_dados(self):
+        """Testa se o corpo vira tamanho, campos e itens, sem nome, email ou preços"""
+        corpo = {"cliente": "Maria Silva", "email": "maria@exemplo.com",
+                 "itens": [{"sku": "A", "quantidade": 1, "preco": 10.0}] * 3}
+
+        with self.app.test_request_context("/pedidos", method="POST", json=corpo):
+            resposta = capturar(salvar)(request)
+
+        self.assertEqual(json.loads(resposta[0]), {"itens": 3})
+        registro, = self.registros()
+        self.assertEqual(registro["servico"], "salvar")
+        self.assertEqual(registro["status"], 200)
+        self.assertEqual(registro["corpo"]["bytes"], len(json.dumps(corpo)))
+        self.assertEqual(registro["corpo"]["campos"]["itens"], {"itens": 3})
+        self.assertNotIn("Maria", json.dumps(registro))
+        self.assertNotIn("exemplo.com", json.dumps(registro))
+
+    def test_forma_da_consulta(self):
+        """Testa se a query guarda a quantidade de valores, exceto nos campos de valor livre"""
+        def detalhar(request):
+            return "[]", 200, {}
+
+        with self.app.test_request_context("/pedidos", query_string={"ids": "a,b,c", "limite": "50", "q": "silva"}):
+            capturar(detalhar)(request)
+
+        consulta = self.registros()[0]["consulta"]
+        self.assertEqual(consulta["ids"], {"partes": 3, "tamanho": 5})
+        self.assertEqual(consulta["limite"], "50")
+        self.assertEqual(consulta["q"], {"partes": 1, "tamanho": 5})
+
+    def test_campos_sensiveis(self):
+        """Testa se de senhas e tokens só o tipo é registrado"""
+        with self.app.test_request_context("/", method="POST", json={"email": "a@b.c", "password": "segredo123"}):
+            capturar(lambda request: (json.dumps(request.get_json()), 200, {}))(request)
+
+        self.assertEqual(self.registros()[0]["corpo"]["campos"]["password"], {"tipo": "str"})
+
+    def test_corpo_acima_do_limite(self):
+        """Testa se um corpo maior que o limite registra só o tamanho, sem atrapalhar a leitura"""
+        corpo = {"cliente": "A", "email": "a@b.c", "itens": [{"quantidade": 1}] * 100}
+
+        with patch.object(captura, "CORPO_MAXIMO", 64), \
+                self.app.test_request_context("/", method="POST", json=corpo):
+            resposta = capturar(salvar)(request)
+
+        self.assertEqual(json.loads(resposta[0]), {"itens": 100})
+        self.assertNotIn("campos", self.registros()[0]["corpo"])
+
+    def test_destino_log(self):
+        """Testa se, no destino log, o registro sai como linha JSON no stdout"""
+        with patch.object(captura, "DESTINO", "log"), patch("sys.stdout", io.StringIO()) as saida, \
+                self.app.test_request_context("/pedidos/123", method="DELETE"):
+            capturar(lambda request: ("", 200, {}))(request)
+
+        linha = json.loads(saida.getvalue())
+        self.assertEqual(linha["captura"]["rota"], "/pedidos/{id}")
+        self.assertEqual(linha["captura"]["metodo"], "DELETE")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from unittest.mock import MagicMock
+from carregar_pedidos import Carregador, ErroCarga, montar_documento, registros_csv
+
+class RefFalsa:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.path = caminho
+
+class BulkFalso:
+    """BulkWriter em memória: grava no dicionário do FirestoreFalso a cada flush."""
+
+    def __init__(self, banco):
+        self.banco = banco
+        self.pendentes = []
+
+    def on_write_result(self, callback):
+        self.sucesso = callback
+
+    def on_write_error(self, callback):
+        self.erro = callback
+
+    def set(self, referencia, documento):
+        self.pendentes.append((referencia, documento))
+
+    def flush(self):
+        pendentes, self.pendentes = self.pendentes, []
+        for referencia, documento in pendentes:
+            if self.banco.falhar_em is not None and self.banco.falhar_em in referencia.caminho:
+                raise RuntimeError("falha simulada")
+            if referencia.caminho in self.banco.recusados:
+                # Escrita que esgotou as tentativas do BulkWriter
+                self.erro(MagicMock(attempts=5, operation=MagicMock(reference=referencia)), self)
+                continue
+            with self.banco.lock:
+                self.banco.documentos[referencia.caminho] = documento
+            self.sucesso(referencia, None, self)
+
+    def close(self):
+        self.flush()
+
+class ColecaoFalsa:
+    def __init__(self, nome):
+        self.nome = nome
+
+    def document(self, doc_id):
+        return RefFalsa(f"{self.nome}/{doc_id}")
+
+class FirestoreFalso:
+    """Substituto local do cliente Firestore para a carga."""
+
+    def __init__(self):
+        self.documentos = {}
+        self.lock = threading.Lock()
+        self.falhar_em = None
+        self.recusados = set()
+
+    def collection(self, nome):
+        return ColecaoFalsa(nome)
+
+    def bulk_writer(self, options=None):
+        return BulkFalso(self)
+
+def pedido(i, **extra):
+    dados = {"cliente": f"Cliente {i}", "email": f"c{i}@email.com",
+             "itens": [{"sku": "A", "quantidade": 2, "preco": 0.1}, {"sku": "B", "quantidade": 1, "preco": 0.2}]}
+    dados.update(extra)
+    return dados
+
+class TestCarregarPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db = FirestoreFalso()
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def arquivo(self, nome, conteudo):
+        caminho = os.path.join(self.diretorio.name, nome)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        return caminho
+
+    def ndjson(self, registros):
+        return self.arquivo("pedidos.ndjson", "".join(json.dumps(r) + "\n" for r in registros))
+
+    def test_total_igual_ao_salvar_pedido(self):
+        """Testa se o total é calculado em centavos exatos, como no salvar_pedido"""
+        documento = montar_documento(pedido(1), "p1", user_id_padrao="uid")
+        self.assertEqual(documento["total_centavos"], 40)
+        self.assertEqual(documento["total"], 0.4)
+        self.assertEqual(documento["status"], "PENDENTE")
+        self.assertEqual(documento["user_id"], "uid")
+
+    def test_carimbo_da_carga(self):
+        """Testa se o pedido histórico mantém a data de criação e recebe o carimbo da carga"""
+        registro = dict(pedido(1), data_criacao="2020-01-01T00:00:00Z", ultima_atualizacao="2020-01-02T00:00:00Z")
+        documento = montar_documento(registro, "p1", agora="2024-06-01T00:00:00Z")
+
+        self.assertEqual(documento["data_criacao"], "2020-01-01T00:00:00Z")
+        self.assertEqual(documento["ultima_atualizacao"], "2024-06-01T00:00:00Z")
+
+    def test_carga_ndjson_paralela(self):
+        """Testa se todos os pedidos válidos são gravados e os inválidos contados como rejeitados"""
+        registros = [pedido(i) for i in range(25)] + [{"cliente": "sem itens"}]
+        caminho = self.ndjson(registros)
+
+        resultado = Carregador(self.db, caminho, workers=3, lote=4, saida=None).executar()
+
+        self.assertEqual(resultado["registros"], 26)
+        self.assertEqual(resultado["gravados"], 25)
+        self.assertEqual(resultado["rejeitados"], 1)
+        self.assertEqual(len(self.db.documentos), 25)
+        self.assertIn("registros_por_segundo", resultado)
+        self.assertEqual(resultado["posicao"], os.path.getsize(caminho))
+
+    def test_retoma_do_checkpoint_sem_duplicar(self):
+        """Testa se uma carga interrompida é retomada do checkpoint e gera os mesmos IDs"""
+        caminho = self.ndjson([pedido(i) for i in range(10)])
+        self.db.falhar_em = "/"  # Primeira execução falha ao gravar
+        with self.assertRaises(ErroCarga):
+            Carregador(self.db, caminho, workers=1, lote=3, saida=None).executar()
+
+        self.db.falhar_em = None
+        resultado = Carregador(self.db, caminho, workers=2, lote=3, saida=None).executar()
+        self.assertEqual(resultado["registros"], 10)
+        self.assertEqual(len(self.db.documentos), 10)
+
+        # Uma nova execução com o checkpoint concluído não grava de novo
+        self.db.documentos.clear()
+        Carregador(self.db, caminho, saida=None).executar()
+        self.assertEqual(self.db.documentos, {})
+
+    def test_escrita_recusada_retem_checkpoint(self):
+        """Testa se um bloco com escrita recusada segura o checkpoint e é regravado na próxima execução"""
+        caminho = self.ndjson([pedido(i) for i in range(9)])
+        # Quinto registro (segundo bloco), pelo ID estável da posição no arquivo
+        self.db.recusados = {f"pedidos/{uuid.uuid5(uuid.NAMESPACE_URL, 'pedidos.ndjson:5')}"}
+
+        resultado = Carregador(self.db, caminho, workers=1, lote=3, saida=None).executar()
+
+        self.assertEqual(resultado["falhas"], 1)
+        self.assertEqual(resultado["gravados"], 8)
+        self.assertFalse(resultado["concluido"])
+        with open(caminho + ".checkpoint.json") as f:
+            self.assertEqual(json.load(f)["registros"], 3)
+
+        self.db.recusados = set()
+        resultado = Carregador(self.db, caminho, workers=1, lote=3, saida=None).executar()
+        self.assertTrue(resultado["concluido"])
+        self.assertEqual(len(self.db.documentos), 9)
+
+    def test_checkpoint_parcial(self):
+        """Testa se a retomada começa no primeiro bloco não confirmado"""
+        caminho = self.ndjson([pedido(i) for i in range(6)])
+        Carregador(self.db, caminho, workers=1, lote=6, saida=None, dry_run=True).executar()
+        self.assertFalse(os.path.exists(caminho + ".checkpoint.json"))
+
+        primeira_linha = len(json.dumps(pedido(0))) + 1
+        with open(caminho + ".checkpoint.json", "w") as f:
+            json.dump({"arquivo": os.path.abspath(caminho), "posicao": primeira_linha, "registros": 1,
+                       "gravados": 1, "rejeitados": 0, "falhas": 0, "concluido": False}, f)
+
+        resultado = Carregador(self.db, caminho, workers=2, lote=2, saida=None).executar()
+        self.assertEqual(resultado["gravados"], 6)
+        self.assertEqual(len(self.db.documentos), 5)
+
+    def test_csv_agrupa_itens_por_pedido(self):
+        """Testa se as linhas do CSV de um mesmo pedido viram um único pedido com todos os itens"""
+        conteudo = ("pedido_id,cliente,email,user_id,status,data_criacao,sku,quantidade,preco\n"
+                    "a1,Ana,ana@email.com,u1,ENVIADO,2024-01-01T00:00:00Z,A,2,1.50\n"
+                    "a1,Ana,ana@email.com,u1,ENVIADO,2024-01-01T00:00:00Z,B,1,0.25\n"
+                    "b2,Bruno,b@email.com,u2,,,C,3,x\n"
+                    "c3,Caio,c@email.com,u3,,,D,1,2\n")
+        caminho = self.arquivo("pedidos.csv", conteudo)
+
+        resultado = Carregador(self.db, caminho, workers=2, lote=1, saida=None).executar()
+
+        self.assertEqual((resultado["registros"], resultado["gravados"], resultado["rejeitados"]), (3, 2, 1))
+        documento = self.db.documentos["pedidos/a1"]
+        self.assertEqual(documento["total_centavos"], 325)
+        self.assertEqual(documento["status"], "ENVIADO")
+        self.assertEqual(len(documento["itens"]), 2)
+
+    def test_csv_posicoes_por_pedido(self):
+        """Testa se a posição de cada pedido do CSV é o fim da sua última linha"""
+        conteudo = "pedido_id,quantidade,preco\na,1,1\na,1,1\nb,1,1\n"
+        registros = list(registros_csv(io.BytesIO(conteudo.encode()), 0))
+        self.assertEqual([fim for fim, _ in registros], [len(conteudo) - 6, len(conteudo)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import time
+from unittest.mock import MagicMock
+from google.api_core import exceptions as gexc
+from catalogo import CatalogoProdutos
+from validacao import ErroValidacao
+
+def produto(sku, preco, atualizado_em="2024-01-01T00:00:00Z", ativo=True, existe=True):
+    doc = MagicMock()
+    doc.id = sku
+    doc.exists = existe
+    doc.to_dict.return_value = {"preco": preco, "atualizado_em": atualizado_em, "ativo": ativo}
+    return doc
+
+class TestCatalogoProdutos(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock()
+        self.colecao = self.db.collection.return_value
+        self.colecao.order_by.return_value.stream.return_value = [
+            produto("A", 10.0, "2024-01-01T00:00:00Z"),
+            produto("B", 5.5, "2024-01-02T00:00:00Z"),
+        ]
+        self.catalogo = CatalogoProdutos(self.db)
+        self.catalogo.atualizar()
+
+    def test_carga_inicial_e_versao(self):
+        """Testa se a carga inicial preenche os preços e a versão"""
+        self.assertEqual(self.catalogo.precos, {"A": 10.0, "B": 5.5})
+        self.assertEqual(self.catalogo.versao, "2024-01-02T00:00:00Z")
+
+    def test_atualizacao_incremental(self):
+        """Testa se a atualização busca só os produtos alterados depois da versão"""
+        consulta = self.colecao.where.return_value
+        consulta.order_by.return_value.stream.return_value = [
+            produto("A", 12.0, "2024-01-03T00:00:00Z"),
+            produto("B", 5.5, "2024-01-03T00:00:00Z", ativo=False),
+        ]
+        self.catalogo.atualizar()
+
+        filtro = self.colecao.where.call_args.kwargs["filter"]
+        self.assertEqual((filtro.op_string, filtro.value), (">=", "2024-01-02T00:00:00Z"))
+        self.assertEqual(self.catalogo.precos, {"A": 12.0})
+        self.assertEqual(self.catalogo.versao, "2024-01-03T00:00:00Z")
+
+    def test_mesmo_carimbo_da_versao(self):
+        """Testa se um produto gravado com o carimbo da versão depois da leitura anterior é aplicado"""
+        consulta = self.colecao.where.return_value
+        consulta.order_by.return_value.stream.return_value = [
+            produto("B", 5.5, "2024-01-02T00:00:00Z"),
+            produto("C", 7.0, "2024-01-02T00:00:00Z"),
+        ]
+        self.catalogo.atualizar()
+
+        self.assertEqual(self.catalogo.precos, {"A": 10.0, "B": 5.5, "C": 7.0})
+        self.assertEqual(set(self.catalogo._na_versao), {"B", "C"})
+
+    def test_recarga_descarta_apagados(self):
+        """Testa se a carga completa periódica remove da cópia os produtos apagados do catálogo"""
+        self.catalogo.recarga = 0
+        self.colecao.order_by.return_value.stream.return_value = [produto("A", 10.0, "2024-01-01T00:00:00Z")]
+        self.catalogo.atualizar()
+
+        self.assertEqual(self.catalogo.precos, {"A": 10.0})
+        self.assertEqual(self.catalogo.versao, "2024-01-01T00:00:00Z")
+        self.colecao.where.assert_not_called()
+
+    def test_aplicar_precos_sem_leituras(self):
+        """Testa se os preços em cache são aplicados sem ir ao Firestore"""
+        itens = [{"sku": "A", "quantidade": 2, "preco": 0.01}, {"sku": "B", "quantidade": 1}]
+        self.catalogo.aplicar_precos(itens)
+
+        self.assertEqual([item["preco"] for item in itens], [10.0, 5.5])
+        self.db.get_all.assert_not_called()
+
+    def test_sku_ausente_em_lote(self):
+        """Testa se SKUs fora do cache são buscados em uma única chamada get_all"""
+        self.db.get_all.return_value = [produto("C", 3.0), produto("D", 0, existe=False)]
+        itens = [{"sku": "C", "quantidade": 1}, {"sku": "A", "quantidade": 1}]
+        self.catalogo.aplicar_precos(itens)
+
+        self.db.get_all.assert_called_once()
+        self.assertEqual(len(self.db.get_all.call_args[0][0]), 1)
+        self.assertEqual(itens[0]["preco"], 3.0)
+        self.assertIn("C", self.catalogo.precos)
+
+    def test_sku_desconhecido(self):
+        """Testa se um SKU inexistente gera erro de validação"""
+        self.db.get_all.return_value = []
+        with self.assertRaises(ErroValidacao):
+            self.catalogo.aplicar_precos([{"sku": "X", "quantidade": 1}])
+        with self.assertRaises(ErroValidacao):
+            self.catalogo.aplicar_precos([{"quantidade": 1}])
+
+    def test_carga_inicial_com_falha(self):
+        """Testa se uma falha na carga inicial não impede o início: usa get_all e a thread tenta de novo"""
+        self.colecao.order_by.return_value.stream.side_effect = [gexc.DeadlineExceeded("prazo"),
+                                                                  [produto("A", 12.0)]]
+        self.db.get_all.return_value = [produto("A", 11.0)]
+        catalogo = CatalogoProdutos(self.db, intervalo=0.01)
+
+        with self.assertLogs("catalogo", level="ERROR"):
+            catalogo.iniciar()
+        try:
+            itens = [{"sku": "A", "quantidade": 1}]
+            catalogo.aplicar_precos(itens)
+            self.assertIn(itens[0]["preco"], (11.0, 12.0))
+
+            for _ in range(100):
+                if catalogo._carregado_em is not None:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(catalogo.precos, {"A": 12.0})
+        finally:
+            catalogo.encerrar()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import MagicMock
+from google.cloud import firestore
+from codec_itens import CAMPO_COLUNAR, ItensColunares, codificar_itens, itens_do_pedido, normalizar_documento, preparar_gravacao
+from migrar_itens import migrar
+
+ITENS = [{"sku": "A", "quantidade": 2, "preco": 10.0}, {"sku": "B", "quantidade": 1, "preco": 5.5}]
+
+class TestCodecItens(unittest.TestCase):
+
+    def test_ida_e_volta(self):
+        """Testa se codificar e decodificar preserva os itens"""
+        documento = preparar_gravacao({"id": "p1", "itens": ITENS}, formato="colunar")
+
+        self.assertNotIn("itens", documento)
+        self.assertEqual(documento[CAMPO_COLUNAR]["colunas"]["quantidade"], [2, 1])
+        self.assertEqual(itens_do_pedido(documento), ITENS)
+        self.assertEqual(normalizar_documento(dict(documento))["itens"], ITENS)
+
+    def test_formato_linhas_inalterado(self):
+        """Testa se no formato padrão o documento é gravado como antes"""
+        documento = {"id": "p1", "itens": ITENS}
+        self.assertIs(preparar_gravacao(documento, formato="linhas"), documento)
+        self.assertEqual(itens_do_pedido(documento), ITENS)
+
+    def test_itens_heterogeneos_nao_codificados(self):
+        """Testa se itens com campos diferentes ou arrays continuam em linhas"""
+        self.assertIsNone(codificar_itens([{"a": 1}, {"b": 2}]))
+        self.assertIsNone(codificar_itens([{"a": [1, 2]}]))
+        self.assertIsNone(codificar_itens([]))
+
+    def test_decodificacao_preguicosa(self):
+        """Testa se a visão colunar monta apenas os itens acessados"""
+        itens = itens_do_pedido(preparar_gravacao({"itens": ITENS}, formato="colunar"), preguicoso=True)
+
+        self.assertIsInstance(itens, ItensColunares)
+        self.assertEqual(len(itens), 2)
+        self.assertEqual(itens[1]["sku"], "B")
+        self.assertEqual(itens[-1:], [ITENS[1]])
+        self.assertEqual(sum(itens.coluna("quantidade")), 3)
+
+class TestMigrarItens(unittest.TestCase):
+
+    def test_migracao_em_paginas(self):
+        """Testa se a migração converte em lote e segue o cursor até o fim"""
+        doc_linhas = MagicMock()
+        doc_linhas.to_dict.return_value = {"itens": ITENS}
+        doc_vazio = MagicMock()
+        doc_vazio.to_dict.return_value = {"itens": []}
+
+        db = MagicMock()
+        consulta = db.collection.return_value.order_by.return_value.limit.return_value
+        consulta.stream.return_value = [doc_linhas, doc_vazio]
+        consulta.start_after.return_value.stream.return_value = []
+
+        totais = migrar(db, pagina=2)
+
+        self.assertEqual(totais, {"lidos": 2, "convertidos": 1, "ignorados": 1})
+        alteracao = db.batch.return_value.update.call_args[0][1]
+        self.assertIs(alteracao["itens"], firestore.DELETE_FIELD)
+        db.batch.return_value.commit.assert_called_once()
+
+    def test_migracao_dry_run(self):
+        """Testa se o dry-run apenas conta"""
+        doc = MagicMock()
+        doc.to_dict.return_value = {"itens": ITENS}
+        db = MagicMock()
+        consulta = db.collection.return_value.order_by.return_value.limit.return_value
+        consulta.stream.return_value = [doc]
+        consulta.start_after.return_value.stream.return_value = []
+
+        self.assertEqual(migrar(db, dry_run=True)["convertidos"], 1)
+        db.batch.return_value.commit.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
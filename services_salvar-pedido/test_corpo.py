@@ -0,0 +1,90 @@
+import unittest
+import io
+import json
+from flask import Flask, request
+from corpo import CorpoInvalido, CorpoMuitoGrande, LeitorJSON, ler_json
+from validacao import ErroValidacao, validar_item
+
+class LeitorContado(io.BytesIO):
+    """Stream que registra quantos bytes já foram lidos."""
+
+    def read(self, tamanho=-1):
+        dados = super().read(tamanho)
+        self.lidos = getattr(self, "lidos", 0) + len(dados)
+        return dados
+
+class TestLeitorJSON(unittest.TestCase):
+
+    def ler(self, texto, bloco=4, **kwargs):
+        return LeitorJSON(io.BytesIO(texto.encode("utf-8")), 10**6, bloco=bloco).documento(**kwargs)
+
+    def test_equivale_a_json_loads(self):
+        """Testa se a leitura em blocos pequenos produz o mesmo resultado que json.loads"""
+        documentos = [
+            {"cliente": "João", "email": "j@email.com", "itens": [{"quantidade": 12345, "preco": 1.5e2}] * 5},
+            {"itens": []},
+            {},
+            [1, 2, 3],
+            None,
+            {"aninhado": {"itens": [1, {"a": "ç"}]}, "numero": -0.125},
+        ]
+        for documento in documentos:
+            texto = json.dumps(documento, ensure_ascii=False, indent=1)
+            for bloco in (1, 3, 64):
+                self.assertEqual(self.ler(texto, bloco=bloco, campo_lista="itens"), documento)
+
+    def test_numero_dividido_entre_blocos(self):
+        """Testa se um número cortado no fim de um bloco é lido por inteiro"""
+        self.assertEqual(self.ler('{"total": 1234567890}', bloco=15), {"total": 1234567890})
+
+    def test_itens_chamam_callback_em_ordem(self):
+        """Testa se cada item da lista é entregue ao callback com o seu índice"""
+        vistos = []
+        self.ler('{"itens": [{"a": 1}, {"a": 2}]}', campo_lista="itens",
+                 ao_ler_item=lambda i, item: vistos.append((i, item)))
+        self.assertEqual(vistos, [(0, {"a": 1}), (1, {"a": 2})])
+
+    def test_json_invalido(self):
+        """Testa se JSON malformado, truncado ou com lixo no fim gera CorpoInvalido"""
+        for texto in ['{"itens": [1, 2', '{"a" 1}', '{"a": 1} x', '', '{1: 2}', '{"itens": [1 2]}']:
+            with self.assertRaises(CorpoInvalido, msg=texto):
+                self.ler(texto, campo_lista="itens")
+
+    def test_para_no_primeiro_item_invalido(self):
+        """Testa se a leitura é interrompida no primeiro item inválido, sem ler o resto do corpo"""
+        itens = [{"quantidade": 1, "preco": 1.0}, {"quantidade": 0, "preco": 1.0}]
+        itens += [{"quantidade": 1, "preco": 1.0}] * 10000
+        stream = LeitorContado(json.dumps({"itens": itens}).encode())
+
+        with self.assertRaises(ErroValidacao) as ctx:
+            LeitorJSON(stream, 10**7, bloco=1024).documento("itens", validar_item)
+
+        self.assertIn("Item 1: quantidade deve ser positiva", str(ctx.exception))
+        self.assertLess(stream.lidos, 4096)
+
+    def test_limite_sem_content_length(self):
+        """Testa se o limite é aplicado durante a leitura quando o tamanho não é informado"""
+        corpo = json.dumps({"itens": [{"quantidade": 1}] * 1000}).encode()
+        with self.assertRaises(CorpoMuitoGrande):
+            LeitorJSON(io.BytesIO(corpo), 1000).documento("itens")
+
+class TestLerJson(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_recusa_pelo_content_length(self):
+        """Testa se o corpo é recusado pelo Content-Length antes de qualquer leitura"""
+        with self.app.test_request_context('/pedidos', method="POST", json={"itens": [1] * 100}):
+            request.stream.read = None  # Falharia se o corpo fosse lido
+            with self.assertRaises(CorpoMuitoGrande):
+                ler_json(request, 10)
+
+    def test_exige_content_type_json(self):
+        """Testa se corpos sem Content-Type JSON são recusados"""
+        with self.app.test_request_context('/pedidos', method="POST", data='{"a": 1}'):
+            with self.assertRaises(CorpoInvalido):
+                ler_json(request, 1000)
+
+if __name__ == '__main__':
+    unittest.main()
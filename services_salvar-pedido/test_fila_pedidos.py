@@ -0,0 +1,103 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import MagicMock
+from google.api_core import exceptions as gexc
+from fila_pedidos import FilaPedidos, Gravador, NA_FILA, GRAVADO, FALHOU
+import fila_pedidos
+
+class TestFilaPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.diretorio.name, "fila.sqlite3")
+        self.fila = FilaPedidos(self.arquivo)
+        self.db = MagicMock()
+        self.gravador = Gravador(self.db, self.fila)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_fila_duravel(self):
+        """Testa se os pedidos enfileirados sobrevivem a uma nova conexão"""
+        self.fila.enfileirar({"id": "p1", "total": 10.0})
+
+        reaberta = FilaPedidos(self.arquivo)
+        self.assertEqual(reaberta.estado("p1")["estado"], NA_FILA)
+        self.assertEqual(reaberta.proximos()[0][1], {"id": "p1", "total": 10.0})
+
+    def test_gravador_grava_em_lote(self):
+        """Testa se o gravador envia os pedidos em um único lote e marca como gravados"""
+        for i in range(3):
+            self.fila.enfileirar({"id": f"p{i}"})
+
+        self.assertEqual(self.gravador.gravar_lote(), 3)
+
+        batch = self.db.batch.return_value
+        self.assertEqual(batch.set.call_count, 3)
+        batch.commit.assert_called_once()
+        self.assertEqual(self.fila.estado("p0")["estado"], GRAVADO)
+        self.assertEqual(self.fila.total(), 0)
+
+    def test_gravador_agenda_nova_tentativa(self):
+        """Testa se uma falha agenda nova tentativa com backoff"""
+        self.db.batch.return_value.commit.side_effect = Exception("indisponível")
+        self.fila.enfileirar({"id": "p1"})
+
+        self.gravador.gravar_lote()
+
+        estado = self.fila.estado("p1")
+        self.assertEqual(estado["estado"], NA_FILA)
+        self.assertEqual(estado["tentativas"], 1)
+        self.assertEqual(self.fila.proximos(), [])
+
+    def test_gravador_isola_pedido_recusado(self):
+        """Testa se um lote recusado é dividido e só o pedido que falha sozinho consome tentativa"""
+        lotes = []
+
+        def novo_lote():
+            lote = MagicMock()
+            lotes.append(lote)
+            def commit(**kwargs):
+                gravados = [c.args[1]["id"] for c in lote.set.call_args_list]
+                if "p2" in gravados:
+                    raise gexc.InvalidArgument("documento grande demais")
+            lote.commit.side_effect = commit
+            return lote
+        self.db.batch.side_effect = novo_lote
+        for i in range(5):
+            self.fila.enfileirar({"id": f"p{i}"})
+
+        self.assertEqual(self.gravador.gravar_lote(), 5)
+
+        self.assertEqual([self.fila.estado(f"p{i}")["estado"] for i in range(5)],
+                         [GRAVADO, GRAVADO, NA_FILA, GRAVADO, GRAVADO])
+        self.assertEqual(self.fila.estado("p2")["tentativas"], 1)
+        self.assertEqual(self.fila.estado("p0")["tentativas"], 0)
+
+    def test_gravador_backend_indisponivel_nao_divide(self):
+        """Testa se, com o backend indisponível, o lote inteiro é reagendado sem divisão"""
+        self.db.batch.return_value.commit.side_effect = gexc.ServiceUnavailable("indisponível")
+        for i in range(4):
+            self.fila.enfileirar({"id": f"p{i}"})
+
+        self.gravador.gravar_lote()
+
+        self.db.batch.return_value.commit.assert_called_once()
+        self.assertEqual({self.fila.estado(f"p{i}")["tentativas"] for i in range(4)}, {1})
+
+    def test_gravador_desiste_apos_limite(self):
+        """Testa se o pedido é marcado como FALHOU após o máximo de tentativas"""
+        self.fila.enfileirar({"id": "p1"})
+        self.fila.marcar_falha([("p1", fila_pedidos.MAX_TENTATIVAS - 1)], "erro")
+        self.assertEqual(self.fila.estado("p1")["estado"], FALHOU)
+
+    def test_expurgar_gravados(self):
+        """Testa se pedidos já gravados são removidos após a retenção"""
+        self.fila.enfileirar({"id": "p1"})
+        self.fila.marcar_gravados(["p1"])
+        self.fila.expurgar(retencao=-1)
+        self.assertIsNone(self.fila.estado("p1"))
+
+if __name__ == '__main__':
+    unittest.main()
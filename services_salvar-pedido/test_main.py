@@ -1,7 +1,9 @@
 import unittest
 import json
 from unittest.mock import patch, MagicMock
-from flask import Flask, Request
+from flask import Flask, Request, request
+from fila_pedidos import FilaPedidos
+from repositorio import RepositorioSQLite
 from main import salvar_pedido
 
 class TestSalvarPedido(unittest.TestCase):
@@ -105,5 +107,89 @@ class TestSalvarPedido(unittest.TestCase):
         self.assertEqual(response[1], 500)
         self.assertIn("Erro inesperado", response[0])
 
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_salvar_pedido_aceite_assincrono(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se no modo assíncrono o pedido vai para a fila e é respondido com 202"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        fila = FilaPedidos(":memory:")
+
+        pedido_exemplo = {
+            "cliente": "João",
+            "email": "joao@email.com",
+            "itens": [{"quantidade": 2, "preco": 10.0}]
+        }
+
+        with patch("main.fila", fila):
+            with self.app.test_request_context('/pedidos', method="POST", json=pedido_exemplo):
+                response = salvar_pedido(request)
+            pedido_id = json.loads(response[0])["id"]
+
+            with self.app.test_request_context(f'/pedidos/{pedido_id}', method="GET"):
+                consulta = salvar_pedido(request)
+
+        self.assertEqual(response[1], 202)
+        self.assertEqual(json.loads(response[0])["total"], 20.0)
+        mock_db_collection.return_value.document.return_value.set.assert_not_called()
+        self.assertEqual(consulta[1], 200)
+        self.assertEqual(json.loads(consulta[0])["estado"], "NA_FILA")
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.db.collection")
+    def test_salvar_pedido_corpo_muito_grande(self, mock_db_collection, mock_verificar_autenticacao):
+        """Testa se corpos acima do limite são recusados com 413 antes de serem lidos"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        pedido_exemplo = {"cliente": "João", "email": "joao@email.com", "itens": [{"quantidade": 1, "preco": 1.0}] * 100}
+        with patch("main.CORPO_MAXIMO", 512):
+            with self.app.test_request_context('/pedidos', method="POST", json=pedido_exemplo):
+                response = salvar_pedido(request)
+
+        self.assertEqual(response[1], 413)
+        self.assertIn("512 bytes", json.loads(response[0])["error"])
+        mock_db_collection.return_value.document.return_value.set.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    def test_salvar_pedido_item_invalido_na_leitura(self, mock_verificar_autenticacao):
+        """Testa se um item inválido é reportado com o seu índice durante a leitura do corpo"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        pedido_exemplo = {"cliente": "João", "email": "joao@email.com",
+                          "itens": [{"quantidade": 1, "preco": 1.0}, {"quantidade": 1, "preco": -1.0}]}
+        with self.app.test_request_context('/pedidos', method="POST", json=pedido_exemplo):
+            response = salvar_pedido(request)
+
+        self.assertEqual(response[1], 400)
+        self.assertEqual(json.loads(response[0])["error"], "Item 1: preço inválido")
+
+    @patch("main.verificar_autenticacao")
+    def test_salvar_pedido_preco_enorme(self, mock_verificar_autenticacao):
+        """Testa se um preço inteiro enorme é recusado com 400 em vez de estourar na conversão"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        pedido_exemplo = {"cliente": "João", "email": "joao@email.com", "itens": [{"quantidade": 1, "preco": 10**400}]}
+        with self.app.test_request_context('/pedidos', method="POST", json=pedido_exemplo):
+            response = salvar_pedido(request)
+
+        self.assertEqual(response[1], 400)
+        self.assertEqual(json.loads(response[0])["error"], "Item 0: preço inválido")
+
+    @patch("main.verificar_autenticacao")
+    def test_salvar_pedido_grava_evento(self, mock_verificar_autenticacao):
+        """Testa se, com a outbox ligada, o evento de criação é gravado junto com o pedido"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        repositorio = RepositorioSQLite(":memory:")
+        pedido_exemplo = {"cliente": "João", "email": "joao@email.com", "itens": [{"quantidade": 2, "preco": 10.0}]}
+
+        with patch("main.repositorio", repositorio), patch("eventos.EVENTOS_PEDIDOS", True), \
+                self.app.test_request_context('/pedidos', method="POST", json=pedido_exemplo):
+            response = salvar_pedido(request)
+
+        self.assertEqual(response[1], 200)
+        (_, evento), = repositorio.eventos()
+        self.assertEqual(evento["tipo"], "pedido.criado")
+        self.assertEqual(evento["pedido_id"], json.loads(response[0])["id"])
+        self.assertEqual((evento["status"], evento["total"], evento["user_id"]), ("PENDENTE", 20.0, "user123"))
+
 if __name__ == '__main__':
     unittest.main()
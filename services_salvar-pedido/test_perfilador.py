@@ -0,0 +1,105 @@
+import unittest
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+from unittest.mock import patch
+from flask import Flask, request
+import perfilador
+from perfilador import CABECALHO, CABECALHO_ID, assinar, assinatura_valida, perfilar
+
+SEGREDO = "segredo-de-teste"
+
+def montar_pedidos(request):
+    pedidos = [{"id": f"p{i}", "itens": list(range(20))} for i in range(2000)]
+    return json.dumps({"quantidade": len(pedidos)}), 200, {"Access-Control-Allow-Origin": "*"}
+
+class TestAssinatura(unittest.TestCase):
+
+    def test_assinatura_valida(self):
+        """Testa se a assinatura vale só para o mesmo método, caminho e segredo, dentro da janela"""
+        valor = assinar("GET", "/pedidos/1", SEGREDO, agora=1000)
+
+        self.assertTrue(assinatura_valida(valor, "GET", "/pedidos/1", SEGREDO, agora=1100))
+        self.assertFalse(assinatura_valida(valor, "GET", "/pedidos/2", SEGREDO, agora=1100))
+        self.assertFalse(assinatura_valida(valor, "DELETE", "/pedidos/1", SEGREDO, agora=1100))
+        self.assertFalse(assinatura_valida(valor, "GET", "/pedidos/1", "outro", agora=1100))
+        self.assertFalse(assinatura_valida(valor, "GET", "/pedidos/1", SEGREDO, agora=1000 + 301))
+        self.assertFalse(assinatura_valida("lixo", "GET", "/pedidos/1", SEGREDO))
+
+class TestPerfilar(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.destino = tempfile.TemporaryDirectory()
+        self.addCleanup(self.destino.cleanup)
+        for nome, valor in (("HABILITADO", True), ("SEGREDO", SEGREDO), ("AMOSTRAGEM", 0.0),
+                            ("DESTINO", self.destino.name), ("FORMATO", "pstats")):
+            patcher = patch.object(perfilador, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def chamar(self, handler, headers=None):
+        with self.app.test_request_context("/pedidos", headers=headers or {}):
+            return handler(request)
+
+    def test_desligado_nao_envolve_handler(self):
+        """Testa se, com o perfil desligado, o decorador devolve o próprio handler"""
+        with patch.object(perfilador, "HABILITADO", False):
+            self.assertIs(perfilar(montar_pedidos), montar_pedidos)
+
+    def test_cabecalho_assinado_grava_perfil(self):
+        """Testa se o cabeçalho assinado gera o pstats e o resumo com as alocações"""
+        handler = perfilar(montar_pedidos)
+
+        resposta = self.chamar(handler, {CABECALHO: assinar("GET", "/pedidos")})
+
+        self.assertEqual(resposta[1], 200)
+        perfil_id = resposta[2][CABECALHO_ID]
+        arquivos = sorted(os.listdir(self.destino.name))
+        self.assertEqual(len(arquivos), 2)
+        with open(os.path.join(self.destino.name, arquivos[0])) as f:
+            resumo = json.load(f)
+        self.assertEqual(resumo["perfil_id"], perfil_id)
+        self.assertEqual(resumo["motivo"], "cabecalho")
+        self.assertTrue(any("test_perfilador.py" in a["local"] for a in resumo["alocacoes"]))
+        estatisticas = pstats.Stats(resumo["arquivo_cpu"])
+        self.assertTrue(any(nome == "montar_pedidos" for _, _, nome in estatisticas.stats))
+
+    def test_sem_perfil(self):
+        """Testa se requisições sem cabeçalho ou com assinatura inválida seguem sem perfil"""
+        handler = perfilar(montar_pedidos)
+
+        sem_cabecalho = self.chamar(handler)
+        expirada = self.chamar(handler, {CABECALHO: assinar("GET", "/pedidos", agora=time.time() - 3600)})
+
+        self.assertNotIn(CABECALHO_ID, sem_cabecalho[2])
+        self.assertNotIn(CABECALHO_ID, expirada[2])
+        self.assertEqual(os.listdir(self.destino.name), [])
+
+    def test_amostragem_no_log_colapsado(self):
+        """Testa se a amostragem emite no log as pilhas colapsadas e as alocações"""
+        with patch.object(perfilador, "AMOSTRAGEM", 1.0), patch.object(perfilador, "DESTINO", "log"), \
+                patch.object(perfilador, "FORMATO", "colapsado"), patch("sys.stdout", io.StringIO()) as saida:
+            resposta = self.chamar(perfilar(montar_pedidos))
+
+        registro = json.loads(saida.getvalue())
+        self.assertEqual(registro["perfil_id"], resposta[2][CABECALHO_ID])
+        self.assertEqual(registro["motivo"], "amostragem")
+        self.assertTrue(any("test_perfilador.py:montar_pedidos" in linha for linha in registro["pilhas"]))
+        self.assertTrue(registro["alocacoes"])
+
+    def test_um_perfil_por_vez(self):
+        """Testa se, com outro perfil em andamento, a requisição segue sem perfil"""
+        handler = perfilar(montar_pedidos)
+
+        with perfilador._em_andamento:
+            resposta = self.chamar(handler, {CABECALHO: assinar("GET", "/pedidos")})
+
+        self.assertEqual(resposta[1], 200)
+        self.assertNotIn(CABECALHO_ID, resposta[2])
+
+if __name__ == '__main__':
+    unittest.main()
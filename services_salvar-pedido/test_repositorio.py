@@ -0,0 +1,205 @@
+import unittest
+import json
+from unittest.mock import MagicMock
+from google.api_core import exceptions as gexc
+from migrar_carimbos import migrar as migrar_carimbos
+from repositorio import (ConflitoVersao, Operacao, PedidoJaExiste, PedidoNaoEncontrado, RepositorioFirestore,
+                         RepositorioPedidos, RepositorioSQLite, cliente_firestore, criar_repositorio)
+
+def pedido(status, user_id, data_criacao, **extra):
+    return dict({"status": status, "user_id": user_id, "data_criacao": data_criacao, "total": 10.0}, **extra)
+
+class TestRepositorioSQLite(unittest.TestCase):
+
+    def setUp(self):
+        self.repositorio = RepositorioSQLite(":memory:")
+        self.repositorio.gravar_em_lote([
+            Operacao("gravar", "p1", pedido("PENDENTE", "u1", "2024-01-01", tags=["a", "b"])),
+            Operacao("gravar", "p2", pedido("ENVIADO", "u1", "2024-01-02", tags=["b"])),
+            Operacao("gravar", "p3", pedido("PENDENTE", "u2", "2024-01-03", tags=[])),
+        ])
+
+    def test_gravar_e_obter(self):
+        """Testa se o pedido gravado é lido com os mesmos dados e versão 1"""
+        registro = self.repositorio.obter("p1")
+
+        self.assertEqual(registro.id, "p1")
+        self.assertEqual(registro.dados["tags"], ["a", "b"])
+        self.assertEqual(registro.versao, 1)
+        self.assertIsNone(self.repositorio.obter("nao-existe"))
+
+    def test_obter_varios(self):
+        """Testa se a leitura em lote devolve None para os IDs ausentes"""
+        encontrados = self.repositorio.obter_varios(["p2", "p9", "p1"])
+
+        self.assertEqual(list(encontrados), ["p2", "p9", "p1"])
+        self.assertIsNone(encontrados["p9"])
+        self.assertEqual(encontrados["p2"].dados["status"], "ENVIADO")
+
+    def test_consultar_com_filtros(self):
+        """Testa filtros em coluna indexada, em campo do JSON e em array"""
+        por_status, _ = self.repositorio.consultar([("status", "==", "PENDENTE")])
+        por_total, _ = self.repositorio.consultar([("total", ">=", 10.0), ("user_id", "==", "u1")])
+        por_tag, _ = self.repositorio.consultar([("tags", "array_contains", "b")])
+
+        self.assertEqual([r.id for r in por_status], ["p1", "p3"])
+        self.assertEqual([r.id for r in por_total], ["p1", "p2"])
+        self.assertEqual([r.id for r in por_tag], ["p1", "p2"])
+
+    def test_consultar_paginado(self):
+        """Testa se o cursor continua a consulta ordenada de onde a página anterior parou"""
+        primeira, cursor = self.repositorio.consultar(ordem="data_criacao", limite=2)
+        segunda, fim = self.repositorio.consultar(ordem="data_criacao", limite=2, cursor=cursor)
+
+        self.assertEqual([r.id for r in primeira], ["p1", "p2"])
+        self.assertEqual([r.id for r in segunda], ["p3"])
+        self.assertIsNone(fim)
+
+    def test_campo_invalido(self):
+        """Testa se nomes de campo fora do padrão são recusados em vez de irem ao SQL"""
+        with self.assertRaises(ValueError):
+            self.repositorio.consultar([("total') OR 1=1 --", "==", 1)])
+
+    def test_criar_duplicado(self):
+        """Testa se criar com um ID em uso levanta PedidoJaExiste"""
+        with self.assertRaises(PedidoJaExiste):
+            self.repositorio.criar("p1", pedido("PENDENTE", "u1", "2024-01-01"))
+
+    def test_atualizar_com_versao(self):
+        """Testa se a atualização com versão antiga levanta ConflitoVersao"""
+        versao = self.repositorio.obter("p1").versao
+        self.repositorio.atualizar("p1", {"status": "ENVIADO"}, versao=versao)
+
+        with self.assertRaises(ConflitoVersao):
+            self.repositorio.atualizar("p1", {"status": "ENTREGUE"}, versao=versao)
+        with self.assertRaises(PedidoNaoEncontrado):
+            self.repositorio.atualizar("p9", {"status": "ENVIADO"})
+
+        registro = self.repositorio.obter("p1")
+        self.assertEqual(registro.dados["status"], "ENVIADO")
+        self.assertEqual(registro.versao, versao + 1)
+        enviados, _ = self.repositorio.consultar([("status", "==", "ENVIADO")])
+        self.assertEqual([r.id for r in enviados], ["p1", "p2"])
+
+    def test_remover_grava_lapide(self):
+        """Testa se remover apaga o pedido e grava a lápide na mesma transação"""
+        self.repositorio.remover("p1", {"removido_em": "2024-02-01"})
+
+        self.assertIsNone(self.repositorio.obter("p1"))
+        lapide = self.repositorio._ler("SELECT dados FROM pedidos_removidos WHERE id = 'p1'")
+        self.assertEqual(json.loads(lapide[0][0]), {"removido_em": "2024-02-01"})
+
+    def test_eventos_na_mesma_transacao(self):
+        """Testa se os eventos entram na outbox com a escrita e somem com ela se a escrita falhar"""
+        self.repositorio.gravar("p4", pedido("PENDENTE", "u1", "2024-01-04"), eventos=[{"id": "e1", "tipo": "criado"}])
+        self.repositorio.remover("p4", {"id": "p4"}, eventos=[{"id": "e2", "tipo": "removido"}])
+        with self.assertRaises(ConflitoVersao):
+            self.repositorio.atualizar("p1", {"status": "ENVIADO"}, versao=99, eventos=[{"id": "e3", "tipo": "x"}])
+        with self.assertRaises(PedidoNaoEncontrado):
+            self.repositorio.atualizar("p4", {"status": "ENVIADO"}, eventos=[{"id": "e4", "tipo": "x"}])
+
+        lidos = self.repositorio.eventos()
+        self.assertEqual([e["id"] for _, e in lidos], ["e1", "e2"])
+        self.assertEqual(self.repositorio.obter("p1").dados["status"], "PENDENTE")
+
+    def test_outbox_paginada_e_limpeza(self):
+        """Testa a leitura da outbox depois de um cursor e a remoção até ele"""
+        for i in range(5):
+            self.repositorio.atualizar("p1", {"status": f"S{i}"}, eventos=[{"id": f"e{i}"}])
+
+        primeira = self.repositorio.eventos(limite=2)
+        segunda = self.repositorio.eventos(primeira[-1][0], limite=10)
+        removidos = self.repositorio.remover_eventos(segunda[0][0])
+
+        self.assertEqual([e["id"] for _, e in primeira + segunda], [f"e{i}" for i in range(5)])
+        self.assertEqual(removidos, 3)
+        self.assertEqual([e["id"] for _, e in self.repositorio.eventos()], ["e3", "e4"])
+
+    def test_assinantes(self):
+        """Testa se o cadastro do assinante é mesclado com os campos já gravados"""
+        self.repositorio.gravar_assinante("erp", {"url": "https://erp/eventos", "tipos": ["pedido.criado"]})
+        self.repositorio.gravar_assinante("erp", {"cursor": "7"})
+
+        self.assertEqual(self.repositorio.assinantes(),
+                         [{"id": "erp", "url": "https://erp/eventos", "tipos": ["pedido.criado"], "cursor": "7"}])
+
+    def test_migrar_carimbos(self):
+        """Testa se só os pedidos sem ultima_atualizacao recebem o carimbo da migração"""
+        self.repositorio.atualizar("p2", {"ultima_atualizacao": "2024-01-05T00:00:00Z"})
+
+        totais = migrar_carimbos(self.repositorio, pagina=2)
+
+        self.assertEqual(totais, {"lidos": 3, "atualizados": 2})
+        carimbos = {r.id: r.dados["ultima_atualizacao"] for r in self.repositorio.consultar()[0]}
+        self.assertEqual(carimbos["p2"], "2024-01-05T00:00:00Z")
+        self.assertEqual(carimbos["p1"], carimbos["p3"])
+        self.assertGreater(carimbos["p1"], "2024-01-05")
+        self.assertEqual(migrar_carimbos(self.repositorio)["atualizados"], 0)
+
+    def test_lote_desfeito_em_erro(self):
+        """Testa se uma operação inválida desfaz o lote inteiro"""
+        with self.assertRaises(PedidoNaoEncontrado):
+            self.repositorio.gravar_em_lote([
+                Operacao("remover", "p1"),
+                Operacao("atualizar", "p9", {"status": "ENVIADO"}),
+            ])
+
+        self.assertIsNotNone(self.repositorio.obter("p1"))
+
+class TestRepositorioFirestore(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock()
+        self.repositorio = RepositorioFirestore(self.db)
+        self.ref = self.db.collection.return_value.document.return_value
+
+    def test_atualizar_com_versao(self):
+        """Testa se a versão vira pré-condição last_update_time e o conflito é traduzido"""
+        self.ref.update.side_effect = gexc.FailedPrecondition("alterado")
+
+        with self.assertRaises(ConflitoVersao):
+            self.repositorio.atualizar("p1", {"status": "ENVIADO"}, versao="t1")
+
+        self.db.write_option.assert_called_once_with(last_update_time="t1")
+
+    def test_eventos_no_mesmo_lote(self):
+        """Testa se, com eventos, a atualização e a outbox vão num único lote com a pré-condição"""
+        batch = self.db.batch.return_value
+        batch.commit.side_effect = gexc.FailedPrecondition("alterado")
+
+        with self.assertRaises(ConflitoVersao):
+            self.repositorio.atualizar("p1", {"status": "ENVIADO"}, versao="t1", eventos=[{"id": "e1"}])
+
+        batch.update.assert_called_once_with(self.ref, {"status": "ENVIADO"}, option=self.db.write_option.return_value)
+        self.assertEqual(batch.set.call_args[0][1]["id"], "e1")
+        self.assertIn("registrado_em", batch.set.call_args[0][1])
+        self.ref.update.assert_not_called()
+
+    def test_criar_duplicado(self):
+        """Testa se o Conflict do Firestore vira PedidoJaExiste"""
+        self.ref.create.side_effect = gexc.Conflict("existe")
+
+        with self.assertRaises(PedidoJaExiste):
+            self.repositorio.criar("p1", {})
+
+    def test_backend_desconhecido(self):
+        """Testa se um backend não suportado é recusado"""
+        with self.assertRaises(ValueError):
+            criar_repositorio(backend="postgres")
+
+    def test_backend_incompleto(self):
+        """Testa se um backend sem todas as operações é recusado na criação"""
+        class SoLeitura(RepositorioPedidos):
+            def obter(self, pedido_id, campos=None, **opcoes):
+                return None
+
+        with self.assertRaises(TypeError):
+            SoLeitura()
+
+    def test_cliente_compartilhado(self):
+        """Testa se o cliente do Firestore é único no processo e não é criado em outro backend"""
+        self.assertIs(cliente_firestore(), cliente_firestore())
+        self.assertIsNone(cliente_firestore(backend="sqlite"))
+
+if __name__ == '__main__':
+    unittest.main()
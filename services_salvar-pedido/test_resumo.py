@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import resumo
+from migrar_resumos import migrar
+from repositorio import ConflitoVersao, RepositorioFirestore, RepositorioSQLite
+from resumo import criar, atualizar, remover, resumos_atualizacao, resumos_criacao, resumos_remocao, visao
+
+def pedido(data_criacao, status="PENDENTE", user_id="u1", total=10.0):
+    return {"status": status, "user_id": user_id, "total": total, "data_criacao": data_criacao}
+
+class TestResumo(unittest.TestCase):
+
+    def test_criar_ordena_e_limita(self):
+        """Testa se o resumo fica do mais novo para o mais antigo, com o limite mais a folga"""
+        atual = None
+        with patch.object(resumo, "LIMITE", 3), patch.object(resumo, "FOLGA", 1):
+            for i in (2, 0, 4, 1, 3):
+                atual = criar(atual, f"p{i}", pedido(f"2024-01-0{i + 1}"))
+            servido = visao("u1", atual)
+
+        self.assertEqual(atual["quantidade"], 5)
+        self.assertEqual([p["id"] for p in atual["pedidos"]], ["p4", "p3", "p2", "p1"])
+        self.assertEqual([p["id"] for p in servido["pedidos"]], ["p4", "p3", "p2"])
+        self.assertEqual(atual["pedidos"][0], {"id": "p4", "status": "PENDENTE", "total": 10.0, "data_criacao": "2024-01-05"})
+
+    def test_atualizar_e_remover(self):
+        """Testa se a atualização só mexe em pedidos do resumo e a remoção desconta a quantidade"""
+        atual = criar(criar(None, "p1", pedido("2024-01-01")), "p2", pedido("2024-01-02"))
+
+        enviado = atualizar(atual, "p1", {"status": "ENVIADO", "cliente": "Ana"})
+        removido = remover(enviado, "p2")
+
+        self.assertEqual(enviado["pedidos"][1]["status"], "ENVIADO")
+        self.assertNotIn("cliente", enviado["pedidos"][1])
+        self.assertIsNone(atualizar(atual, "fora-do-resumo", {"status": "ENVIADO"}))
+        self.assertIsNone(atualizar(None, "p1", {"status": "ENVIADO"}))
+        self.assertEqual(removido["quantidade"], 1)
+        self.assertEqual([p["id"] for p in removido["pedidos"]], ["p1"])
+
+    def test_desligado(self):
+        """Testa se, com o resumo desligado, nenhuma alteração é repassada ao repositório"""
+        with patch.object(resumo, "RESUMO_PEDIDOS", False):
+            self.assertEqual(resumos_criacao("p1", pedido("2024-01-01")), [])
+            self.assertEqual(resumos_remocao("u1", "p1"), [])
+
+class TestResumoNoRepositorio(unittest.TestCase):
+
+    def setUp(self):
+        self.repositorio = RepositorioSQLite(":memory:")
+        patcher = patch.object(resumo, "RESUMO_PEDIDOS", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transacao_sqlite(self):
+        """Testa se o resumo acompanha as escritas e não muda quando a escrita do pedido falha"""
+        for i in range(3):
+            dados = pedido(f"2024-01-0{i + 1}")
+            self.repositorio.gravar(f"p{i}", dados, resumos=resumos_criacao(f"p{i}", dados))
+        versao = self.repositorio.obter("p0").versao
+        self.repositorio.atualizar("p0", {"status": "ENVIADO"}, versao=versao,
+                                   resumos=resumos_atualizacao("u1", "p0", {"status": "ENVIADO"}))
+        with self.assertRaises(ConflitoVersao):
+            self.repositorio.atualizar("p1", {"status": "CANCELADO"}, versao=99,
+                                       resumos=resumos_atualizacao("u1", "p1", {"status": "CANCELADO"}))
+        self.repositorio.remover("p2", {"id": "p2"}, resumos=resumos_remocao("u1", "p2"))
+
+        atual = self.repositorio.obter_resumo("u1")
+        self.assertEqual(atual["quantidade"], 2)
+        self.assertEqual([(p["id"], p["status"]) for p in atual["pedidos"]], [("p1", "PENDENTE"), ("p0", "ENVIADO")])
+        self.assertIsNone(self.repositorio.obter_resumo("u2"))
+
+    def test_transacao_firestore(self):
+        """Testa se, com resumo, o pedido e o resumo lido na transação são gravados juntos"""
+        db = MagicMock()
+        doc = MagicMock(id="u1", exists=True)
+        doc.to_dict.return_value = criar(None, "p0", pedido("2024-01-01"))
+        db.get_all.return_value = [doc]
+        dados = pedido("2024-01-02")
+
+        RepositorioFirestore(db).gravar("p1", dados, resumos=resumos_criacao("p1", dados))
+
+        transacao = db.transaction.return_value
+        self.assertEqual(db.get_all.call_args.kwargs["transaction"], transacao)
+        gravado = transacao.set.call_args_list[-1][0][1]
+        self.assertEqual(gravado["quantidade"], 2)
+        self.assertEqual([p["id"] for p in gravado["pedidos"]], ["p1", "p0"])
+        db.batch.assert_not_called()
+
+    def test_migracao(self):
+        """Testa se a migração monta os resumos e mantém pedidos criados durante a varredura"""
+        for i in range(4):
+            self.repositorio.gravar(f"p{i}", pedido(f"2024-01-0{i + 1}", user_id="u1" if i % 2 else "u2"))
+        # Pedido incluído no resumo por um serviço depois do início da varredura, fora dela
+        novo = pedido("2999-01-01", user_id="u1")
+        self.repositorio.alterar_resumo("u1", lambda atual: criar(atual, "novo", novo))
+
+        totais = migrar(self.repositorio, pagina=2)
+
+        self.assertEqual(totais, {"usuarios": 2, "pedidos": 4})
+        u1 = self.repositorio.obter_resumo("u1")
+        self.assertEqual([p["id"] for p in u1["pedidos"]], ["novo", "p3", "p1"])
+        self.assertEqual(u1["quantidade"], 3)
+        self.assertEqual(self.repositorio.obter_resumo("u2")["quantidade"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
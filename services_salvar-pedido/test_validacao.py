@@ -0,0 +1,57 @@
+import unittest
+from validacao import (PRECO_MAXIMO, QUANTIDADE_MAXIMA, ErroValidacao, calcular_total, precos_em_centavos,
+                       validar_item, validar_itens)
+
+class TestValidacao(unittest.TestCase):
+
+    def test_total_em_centavos_exato(self):
+        """Testa se o total é calculado sem erros de ponto flutuante"""
+        pedido = {"cliente": "João", "email": "joao@email.com",
+                  "itens": [{"quantidade": 3, "preco": 0.1}, {"quantidade": 1, "preco": 0.2}]}
+        self.assertEqual(calcular_total(pedido), 50)
+
+    def test_centavos_arredondamento(self):
+        """Testa a conversão de preços para centavos"""
+        self.assertEqual(precos_em_centavos([10, 19.99, 0.29, 1234567.89, 0.004]), [1000, 1999, 29, 123456789, 0])
+
+    def test_campos_obrigatorios(self):
+        """Testa se faltar um campo do pedido gera erro de validação"""
+        with self.assertRaises(ErroValidacao) as ctx:
+            calcular_total({"cliente": "João", "itens": []})
+        self.assertEqual(str(ctx.exception), "Campos obrigatórios faltando")
+
+    def test_item_sem_preco(self):
+        """Testa se item sem preço gera erro de validação em vez de KeyError"""
+        with self.assertRaises(ErroValidacao) as ctx:
+            validar_itens([{"quantidade": 1, "preco": 1.0}, {"quantidade": 1}])
+        self.assertIn("Item 1", str(ctx.exception))
+
+    def test_tipos_invalidos(self):
+        """Testa se tipos inválidos são rejeitados"""
+        for item in ({"quantidade": "2", "preco": 1.0}, {"quantidade": True, "preco": 1.0},
+                     {"quantidade": 1, "preco": "1.0"}, {"quantidade": 0, "preco": 1.0},
+                     {"quantidade": 1, "preco": -1.0}, {"quantidade": 1, "preco": float("nan")}, "item"):
+            with self.assertRaises(ErroValidacao):
+                validar_itens([item])
+
+    def test_limites_de_valor(self):
+        """Testa se preços e quantidades fora dos limites são rejeitados sem estourar na conversão"""
+        for item in ({"quantidade": 1, "preco": 10**400}, {"quantidade": 1, "preco": float("inf")},
+                     {"quantidade": 1, "preco": PRECO_MAXIMO + 1}, {"quantidade": QUANTIDADE_MAXIMA + 1, "preco": 1.0}):
+            with self.assertRaises(ErroValidacao):
+                validar_itens([{"quantidade": 1, "preco": 1.0}, item])
+            with self.assertRaises(ErroValidacao):
+                validar_item(1, item)
+        with self.assertRaises(ErroValidacao) as ctx:
+            precos_em_centavos([1.0, 10**400])
+        self.assertEqual(str(ctx.exception), "Item 1: preço inválido")
+        self.assertEqual(validar_itens([{"quantidade": QUANTIDADE_MAXIMA, "preco": PRECO_MAXIMO}]),
+                         ([QUANTIDADE_MAXIMA], [PRECO_MAXIMO * 100]))
+
+    def test_carrinho_grande(self):
+        """Testa o total de um carrinho com muitas linhas"""
+        itens = [{"quantidade": 2, "preco": 0.35}] * 100000
+        self.assertEqual(calcular_total({"cliente": "c", "email": "e", "itens": itens}), 7000000)
+
+if __name__ == '__main__':
+    unittest.main()
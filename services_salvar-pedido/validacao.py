@@ -0,0 +1,133 @@
+import operator
+
+# Esquemas dos dados recebidos: campo -> (tipos aceitos, obrigatório)
+ESQUEMA_PEDIDO = {
+    "cliente": ((str,), True),
+    "email": ((str,), True),
+    "itens": ((list,), True),
+}
+
+ESQUEMA_ITEM = {
+    "quantidade": ((int,), True),
+    "preco": ((int, float), True),
+}
+
+# Limites de valor por item: mantêm a conversão para centavos e o total em faixa segura
+QUANTIDADE_MAXIMA = 100_000
+PRECO_MAXIMO = 10_000_000
+
+class ErroValidacao(Exception):
+    """Dados do pedido inválidos (resposta 400)."""
+
+
+def compilar_esquema(esquema):
+    """Pré-processa o esquema uma única vez: um itemgetter e o conjunto de tipos por campo."""
+    return tuple((campo, operator.itemgetter(campo), frozenset(tipos), obrigatorio)
+                 for campo, (tipos, obrigatorio) in esquema.items())
+
+
+_ESQUEMA_ITEM = compilar_esquema(ESQUEMA_ITEM)
+
+# Com o catálogo ativo o preço vem do servidor, então o item pode chegar sem ele
+_ESQUEMA_ITEM_SEM_PRECO = compilar_esquema({c: r for c, r in ESQUEMA_ITEM.items() if c != "preco"})
+
+
+def extrair_colunas(itens, esquema=_ESQUEMA_ITEM):
+    """Valida os itens e devolve uma coluna por campo do esquema.
+
+    Cada verificação percorre a lista inteira com map() (laço em C); o item
+    culpado só é procurado quando alguma verificação falha.
+    """
+    colunas = []
+    for campo, extrair, tipos, obrigatorio in esquema:
+        try:
+            coluna = list(map(extrair, itens))
+        except TypeError:
+            i = next(i for i, item in enumerate(itens) if type(item) is not dict)
+            raise ErroValidacao(f"Item {i}: formato inválido")
+        except KeyError:
+            if obrigatorio:
+                i = next(i for i, item in enumerate(itens) if campo not in item)
+                raise ErroValidacao(f"Item {i}: campo '{campo}' faltando")
+            coluna = [item.get(campo) for item in itens]
+            tipos = tipos | {type(None)}
+        if not set(map(type, coluna)) <= tipos:
+            i = next(i for i, v in enumerate(coluna) if type(v) not in tipos)
+            raise ErroValidacao(f"Item {i}: campo '{campo}' inválido")
+        colunas.append(coluna)
+    return colunas
+
+
+def validar_item(i, item, com_preco=True):
+    """Valida um único item; usado durante a leitura incremental do corpo."""
+    if type(item) is not dict:
+        raise ErroValidacao(f"Item {i}: formato inválido")
+    for campo, _, tipos, obrigatorio in (_ESQUEMA_ITEM if com_preco else _ESQUEMA_ITEM_SEM_PRECO):
+        if campo not in item:
+            if obrigatorio:
+                raise ErroValidacao(f"Item {i}: campo '{campo}' faltando")
+        elif type(item[campo]) not in tipos:
+            raise ErroValidacao(f"Item {i}: campo '{campo}' inválido")
+    if item["quantidade"] <= 0:
+        raise ErroValidacao(f"Item {i}: quantidade deve ser positiva")
+    if item["quantidade"] > QUANTIDADE_MAXIMA:
+        raise ErroValidacao(f"Item {i}: quantidade acima do máximo ({QUANTIDADE_MAXIMA})")
+    if com_preco and not 0 <= item["preco"] <= PRECO_MAXIMO:
+        raise ErroValidacao(f"Item {i}: preço inválido")
+
+
+def validar_pedido(pedido):
+    """Valida os campos do pedido. Lança ErroValidacao com a mensagem para o cliente."""
+    if type(pedido) is not dict:
+        raise ErroValidacao("JSON inválido ou não fornecido")
+    for campo, (tipos, obrigatorio) in ESQUEMA_PEDIDO.items():
+        if campo not in pedido:
+            if obrigatorio:
+                raise ErroValidacao("Campos obrigatórios faltando")
+        elif type(pedido[campo]) not in tipos:
+            raise ErroValidacao(f"Campo '{campo}' inválido")
+
+
+def precos_em_centavos(precos):
+    """Converte a coluna de preços para centavos inteiros em passadas vetorizadas.
+
+    Frações de centavo são arredondadas para o centavo mais próximo.
+    """
+    try:
+        return list(map(round, map((100.0).__mul__, precos)))
+    except (OverflowError, ValueError):
+        # Comparação sem conversão para float: inteiros enormes não estouram de novo aqui
+        i = next(i for i, p in enumerate(precos) if not 0 <= p <= PRECO_MAXIMO)
+        raise ErroValidacao(f"Item {i}: preço inválido")
+
+
+def validar_itens(itens):
+    """Valida os itens e retorna as colunas (quantidades, preços em centavos)."""
+    quantidades, precos = extrair_colunas(itens)
+    if not quantidades:
+        return quantidades, precos
+
+    # Regras de valor verificadas sobre a coluna inteira; só procura o item culpado se falhar
+    if min(quantidades) <= 0:
+        i = next(i for i, q in enumerate(quantidades) if q <= 0)
+        raise ErroValidacao(f"Item {i}: quantidade deve ser positiva")
+    if max(quantidades) > QUANTIDADE_MAXIMA:
+        i = next(i for i, q in enumerate(quantidades) if q > QUANTIDADE_MAXIMA)
+        raise ErroValidacao(f"Item {i}: quantidade acima do máximo ({QUANTIDADE_MAXIMA})")
+    if min(precos) < 0 or max(precos) > PRECO_MAXIMO:
+        i = next(i for i, p in enumerate(precos) if not 0 <= p <= PRECO_MAXIMO)
+        raise ErroValidacao(f"Item {i}: preço inválido")
+
+    return quantidades, precos_em_centavos(precos)
+
+
+def total_centavos(quantidades, precos):
+    """Soma quantidade x preço em inteiros; map/sum percorre as colunas em C, sem floats."""
+    return sum(map(operator.mul, quantidades, precos))
+
+
+def calcular_total(pedido):
+    """Valida o pedido completo e retorna o total em centavos."""
+    validar_pedido(pedido)
+    quantidades, precos = validar_itens(pedido["itens"])
+    return total_centavos(quantidades, precos)
@@ -0,0 +1,156 @@
+"""Captura anonimizada do tráfego das funções HTTP, para reprodução em testes de desempenho.
+
+Desligada por padrão (CAPTURA_HABILITADA=1 liga). Cada requisição capturada
+vira um registro com a forma da requisição, sem dados do usuário: instante de
+chegada, função, método, rota com os IDs trocados por {id}, tamanho do corpo,
+quantidade de itens e, de cada campo do corpo e da query, só o número de
+valores e o tamanho (de senhas e tokens, só o tipo). Os valores são mantidos
+apenas nos campos de CAPTURA_VALORES (enums e números, como status e limite).
+Também ficam o status e a duração da resposta. A reprodução fica em
+benchmarks/reproduzir.py.
+
+O corpo não é lido antes do handler: o stream da requisição é envolvido e a
+cópia (até CAPTURA_CORPO_MAXIMO bytes) é feita conforme o handler lê.
+"""
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+HABILITADA = os.environ.get("CAPTURA_HABILITADA", "0") == "1"
+AMOSTRAGEM = float(os.environ.get("CAPTURA_AMOSTRAGEM", "1"))
+
+# Arquivo JSONL dos registros, ou "log" para emiti-los no log estruturado (stdout)
+DESTINO = os.environ.get("CAPTURA_DESTINO", "log")
+
+# Maior corpo analisado (campos e itens); acima disso só o tamanho é registrado
+CORPO_MAXIMO = int(os.environ.get("CAPTURA_CORPO_MAXIMO", str(1024 * 1024)))
+
+# Campos da query e do corpo cujos valores não identificam ninguém e são mantidos
+VALORES = frozenset(v.strip() for v in os.environ.get("CAPTURA_VALORES", "status,limite,modo").split(",") if v.strip())
+
+# Campos dos quais nem o tamanho é registrado
+SENSIVEIS = frozenset(("senha", "password", "token", "idToken", "refreshToken"))
+
+_arquivo_lock = threading.Lock()
+
+
+class CorpoCopiado:
+    """Envolve o stream da requisição e guarda uma cópia do que o handler lê, até o limite."""
+
+    def __init__(self, stream, limite=None):
+        self.stream = stream
+        self.limite = CORPO_MAXIMO if limite is None else limite
+        self.lidos = 0
+        self.partes = []
+        self.completo = True
+
+    def read(self, *args):
+        dados = self.stream.read(*args)
+        self._copiar(dados)
+        return dados
+
+    def readline(self, *args):
+        dados = self.stream.readline(*args)
+        self._copiar(dados)
+        return dados
+
+    def _copiar(self, dados):
+        self.lidos += len(dados)
+        if self.completo and self.lidos <= self.limite:
+            self.partes.append(dados)
+        else:
+            self.completo = False
+            self.partes = []
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+
+def rota_anonima(caminho):
+    """Mantém o primeiro segmento do caminho (o recurso) e troca os demais por {id}."""
+    partes = [p for p in caminho.split("/") if p]
+    return "/" + "/".join(partes[:1] + ["{id}"] * len(partes[1:]))
+
+
+def _valor_ou_forma(nome, valor):
+    if nome in SENSIVEIS:
+        return {"tipo": type(valor).__name__}
+    if nome in VALORES and isinstance(valor, (str, int, float, bool)):
+        return valor
+    if isinstance(valor, str):
+        return {"partes": len(valor.split(",")), "tamanho": len(valor)}
+    if isinstance(valor, list):
+        return {"itens": len(valor)}
+    return {"tipo": type(valor).__name__}
+
+
+def forma_consulta(args):
+    return {nome: _valor_ou_forma(nome, args.get(nome)) for nome in sorted(args.keys())}
+
+
+def forma_corpo(tamanho, copia):
+    """Tamanho do corpo e, se ele foi lido inteiro e é um objeto JSON, a forma de cada campo."""
+    forma = {"bytes": tamanho}
+    if copia is None or not copia.completo or not copia.partes:
+        return forma
+    try:
+        documento = json.loads(b"".join(copia.partes))
+    except ValueError:
+        return forma
+    if isinstance(documento, dict):
+        forma["campos"] = {nome: _valor_ou_forma(nome, valor) for nome, valor in sorted(documento.items())}
+    return forma
+
+
+def registrar(registro):
+    linha = json.dumps(registro if DESTINO != "log" else
+                       {"severity": "INFO", "message": "Captura de requisição", "captura": registro})
+    if DESTINO == "log":
+        print(linha, flush=True)
+        return
+    with _arquivo_lock, open(DESTINO, "a") as f:
+        f.write(linha + "\n")
+
+
+def capturar(handler):
+    """Decorador que registra a forma de cada requisição (amostrada) tratada pelo handler."""
+    if not HABILITADA:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(request):
+        if request.method == "OPTIONS" or (AMOSTRAGEM < 1 and random.random() >= AMOSTRAGEM):
+            return handler(request)
+
+        chegada = time.time()
+        copia = None
+        if request.content_length or request.headers.get("Transfer-Encoding"):
+            copia = CorpoCopiado(request.stream)
+            request.stream = copia
+        inicio = time.perf_counter()
+        status = 500
+        try:
+            resposta = handler(request)
+            status = resposta[1] if isinstance(resposta, tuple) else getattr(resposta, "status_code", None)
+            return resposta
+        finally:
+            duracao = time.perf_counter() - inicio
+            try:
+                registrar({
+                    "t": round(chegada, 6),
+                    "servico": handler.__name__,
+                    "metodo": request.method,
+                    "rota": rota_anonima(request.path),
+                    "consulta": forma_consulta(request.args),
+                    "corpo": forma_corpo(request.content_length or (copia.lidos if copia else 0), copia),
+                    "status": status,
+                    "duracao_ms": round(duracao * 1000, 3),
+                })
+            except Exception as e:
+                # A captura nunca derruba a requisição
+                print(json.dumps({"severity": "WARNING", "message": f"Falha ao registrar captura: {e}"}), flush=True)
+
+    return wrapper
@@ -0,0 +1,165 @@
+import functions_framework
+import json
+import firebase_admin
+from firebase_admin import auth, credentials
+from flask import request
+from captura import capturar
+from limitador import LimitadorUsuario, limitar_concorrencia
+from modelo import CAMPOS_LISTAGEM, Pedido
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio
+from resiliencia import Prazo, circuito, executar_com_hedge, resposta_degradada
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o repositório de pedidos (Firestore ou SQLite, por PEDIDOS_BACKEND)
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("sincronizar_pedidos", capacidade=30, taxa=5)
+
+# Tamanho padrão e máximo de cada página de alterações
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 2000
+
+# Carimbo da alteração, gravado por todas as escritas de pedidos e lápides. Pedidos
+# anteriores à sincronização recebem o carimbo com migrar_carimbos.py (salvar-pedido)
+CAMPO_CARIMBO = "ultima_atualizacao"
+
+# Campos de cada pedido alterado: os da listagem mais o carimbo da alteração
+CAMPOS_SINCRONIZACAO = CAMPOS_LISTAGEM + (CAMPO_CARIMBO,)
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+def posicao(desde):
+    """(filtros, cursor) das consultas a partir da marca d'água do cliente.
+
+    A marca d'água é o par [carimbo, id] (JSON) do último item entregue, e as
+    consultas continuam depois dele na ordem (carimbo, id): itens com o mesmo
+    carimbo que ficaram fora da página anterior não se perdem. Uma marca só com
+    o carimbo (clientes de versões anteriores) reenvia os itens desse carimbo.
+    ValueError se a marca for inválida.
+    """
+    if not desde:
+        return (), None
+    if not desde.startswith("["):
+        return [(CAMPO_CARIMBO, ">=", desde)], None
+    carimbo, pedido_id = json.loads(desde)
+    if not isinstance(carimbo, str) or not isinstance(pedido_id, str):
+        raise ValueError(f"Marca d'água inválida: {desde}")
+    return (), json.dumps([carimbo, pedido_id])
+
+
+def buscar_alteracoes(consultar, filtros, cursor, limite, prazo):
+    """Consulta indexada por intervalo: registros depois da marca d'água, na ordem (carimbo, id)."""
+    registros, _ = circuito.chamar(
+        executar_com_hedge,
+        lambda p: consultar(filtros, ordem=CAMPO_CARIMBO, limite=limite + 1, cursor=cursor, **p.opcoes()),
+        prazo,
+    )
+    return registros
+
+
+@functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
+def sincronizar_pedidos(request):
+    """Retorna os pedidos alterados e removidos desde a marca d'água informada pelo cliente."""
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Orçamento de tempo da requisição, repassado às chamadas ao Firestore
+    prazo = Prazo()
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        # Apenas permite requisições GET
+        if request.method != "GET":
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        # Marca d'água da resposta anterior; vazia = sincronização completa
+        desde = request.args.get("desde", "")
+        try:
+            filtros, cursor = posicao(desde)
+        except (ValueError, TypeError):
+            return json.dumps({"error": "Parâmetro desde inválido"}), 400, cors_headers
+        try:
+            limite = min(int(request.args.get("limite", LIMITE_PADRAO)), LIMITE_MAXIMO)
+        except ValueError:
+            return json.dumps({"error": "Parâmetro limite inválido"}), 400, cors_headers
+        if limite <= 0:
+            return json.dumps({"error": "Parâmetro limite inválido"}), 400, cors_headers
+
+        # Pedidos alterados e lápides de pedidos removidos
+        alteracoes = {}
+        for registro in buscar_alteracoes(repositorio.consultar, filtros, cursor, limite, prazo):
+            alteracoes[registro.id] = (registro.dados[CAMPO_CARIMBO], registro.id, registro.dados)
+        for registro in buscar_alteracoes(repositorio.consultar_removidos, filtros, cursor, limite, prazo):
+            carimbo = registro.dados[CAMPO_CARIMBO]
+            if registro.id not in alteracoes or alteracoes[registro.id][0] < carimbo:
+                alteracoes[registro.id] = (carimbo, registro.id, None)
+
+        # Ordena por (carimbo, id) e corta na página; a nova marca d'água é o último item entregue
+        ordenadas = sorted(alteracoes.values(), key=lambda a: (a[0], a[1]))
+        pagina = ordenadas[:limite]
+
+        pedidos = []
+        removidos = []
+        for carimbo, pedido_id, pedido_data in pagina:
+            if pedido_data is None:
+                removidos.append(pedido_id)
+                continue
+            pedido = Pedido.from_dict(pedido_id, pedido_data)
+            pedido.ultima_atualizacao = carimbo
+            pedidos.append(pedido.to_json(CAMPOS_SINCRONIZACAO))
+
+        resposta = {
+            "pedidos": pedidos,
+            "removidos": removidos,
+            "watermark": json.dumps(list(pagina[-1][:2])) if pagina else desde,
+            "mais": len(ordenadas) > limite,
+        }
+        return json.dumps(resposta), 200, cors_headers
+
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
@@ -0,0 +1,224 @@
+"""Perfil sob demanda de requisições: CPU (cProfile ou pilhas colapsadas) e alocações (tracemalloc).
+
+Desligado por padrão (PERFIL_HABILITADO=1 liga). Ligado, uma requisição é
+perfilada quando traz o cabeçalho X-Perfil assinado com PERFIL_SEGREDO ou cai
+na amostragem (PERFIL_AMOSTRAGEM, fração das requisições). Desligado, o
+decorador devolve o próprio handler e as requisições não pagam nada; ligado, as
+não perfiladas pagam a leitura de um cabeçalho e um sorteio.
+
+Uma requisição perfilada por vez no processo (o tracemalloc é global); as que
+chegam enquanto isso seguem sem perfil. O perfil de CPU cobre a thread da
+requisição (não as threads de hedging).
+
+Gerar o cabeçalho: PERFIL_SEGREDO=... python perfilador.py GET /pedidos/123
+"""
+import cProfile
+import collections
+import functools
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+HABILITADO = os.environ.get("PERFIL_HABILITADO", "0") == "1"
+SEGREDO = os.environ.get("PERFIL_SEGREDO", "")
+AMOSTRAGEM = float(os.environ.get("PERFIL_AMOSTRAGEM", "0"))
+
+# Diretório dos arquivos de perfil, ou "log" para emitir o resumo no log estruturado (stdout)
+DESTINO = os.environ.get("PERFIL_DESTINO", "/tmp/perfis")
+
+# "pstats" (cProfile; abre com pstats/snakeviz) ou "colapsado" (pilhas no formato do flamegraph.pl)
+FORMATO = os.environ.get("PERFIL_FORMATO", "pstats")
+
+TOP_ALOCACOES = int(os.environ.get("PERFIL_TOP_ALOCACOES", "20"))
+
+# Linhas do perfil de CPU no registro de log (limite de tamanho das entradas do Cloud Logging)
+LINHAS_LOG = 200
+
+# Validade da assinatura do cabeçalho, em segundos
+JANELA_ASSINATURA = 300
+
+CABECALHO = "X-Perfil"
+CABECALHO_ID = "X-Perfil-Id"
+
+_em_andamento = threading.Lock()
+
+
+def assinar(metodo, caminho, segredo=None, agora=None):
+    """Valor do cabeçalho X-Perfil: "<timestamp>.<HMAC-SHA256 de timestamp:método:caminho>"."""
+    momento = str(int(time.time() if agora is None else agora))
+    mensagem = f"{momento}:{metodo.upper()}:{caminho}".encode()
+    return momento + "." + hmac.new((segredo or SEGREDO).encode(), mensagem, hashlib.sha256).hexdigest()
+
+
+def assinatura_valida(valor, metodo, caminho, segredo=None, agora=None):
+    segredo = segredo or SEGREDO
+    momento, _, _ = valor.partition(".")
+    if not segredo or not momento.isdigit():
+        return False
+    agora = time.time() if agora is None else agora
+    if abs(agora - int(momento)) > JANELA_ASSINATURA:
+        return False
+    return hmac.compare_digest(valor, assinar(metodo, caminho, segredo, int(momento)))
+
+
+def motivo_perfil(request):
+    """"cabecalho", "amostragem" ou None se a requisição não deve ser perfilada."""
+    valor = request.headers.get(CABECALHO)
+    if valor:
+        return "cabecalho" if assinatura_valida(valor, request.method, request.path) else None
+    if AMOSTRAGEM > 0 and random.random() < AMOSTRAGEM:
+        return "amostragem"
+    return None
+
+
+class PilhasColapsadas:
+    """Perfil determinístico por pilha completa (sys.setprofile), no formato colapsado:
+    uma linha "quadro;quadro;... microssegundos" por pilha."""
+
+    def __init__(self):
+        self.tempos = collections.Counter()
+        self._pilha = []
+        self._ultimo = 0
+
+    def _evento(self, frame, evento, arg):
+        agora = time.perf_counter_ns()
+        if self._pilha:
+            self.tempos[self._pilha[-1]] += agora - self._ultimo
+        if evento == "call":
+            codigo = frame.f_code
+            self._empilhar(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+        elif evento == "c_call":
+            self._empilhar(getattr(arg, "__qualname__", None) or getattr(arg, "__name__", "?"))
+        elif self._pilha:
+            self._pilha.pop()
+        self._ultimo = time.perf_counter_ns()
+
+    def _empilhar(self, nome):
+        self._pilha.append(self._pilha[-1] + ";" + nome if self._pilha else nome)
+
+    def enable(self):
+        self._ultimo = time.perf_counter_ns()
+        sys.setprofile(self._evento)
+
+    def disable(self):
+        sys.setprofile(None)
+
+    def linhas(self, limite=None):
+        pilhas = self.tempos.most_common(limite)
+        return [f"{pilha} {nanos // 1000}" for pilha, nanos in pilhas if nanos >= 1000]
+
+
+def _alocacoes(snapshot):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    return [
+        {"local": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "kib": round(stat.size / 1024, 1), "blocos": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ALOCACOES]
+    ]
+
+
+def _texto_pstats(perfil, limite):
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(limite)
+    return saida.getvalue()
+
+
+def _registrar(perfil, registro):
+    if DESTINO == "log":
+        if isinstance(perfil, PilhasColapsadas):
+            registro["pilhas"] = perfil.linhas(LINHAS_LOG)
+        else:
+            registro["cpu"] = _texto_pstats(perfil, LINHAS_LOG)
+        print(json.dumps(dict({"severity": "INFO", "message": "Perfil de requisição"}, **registro)), flush=True)
+        return
+
+    os.makedirs(DESTINO, exist_ok=True)
+    base = os.path.join(DESTINO, f"{time.strftime('%Y%m%dT%H%M%S')}-{registro['servico']}-{registro['perfil_id']}")
+    if isinstance(perfil, PilhasColapsadas):
+        registro["arquivo_cpu"] = base + ".colapsado"
+        with open(registro["arquivo_cpu"], "w") as f:
+            f.write("\n".join(perfil.linhas()) + "\n")
+    else:
+        registro["arquivo_cpu"] = base + ".pstats"
+        perfil.dump_stats(registro["arquivo_cpu"])
+    with open(base + ".json", "w") as f:
+        json.dump(registro, f, indent=2)
+
+
+def _executar_perfilado(handler, request, motivo):
+    perfil_id = uuid.uuid4().hex[:12]
+    perfil = PilhasColapsadas() if FORMATO == "colapsado" else cProfile.Profile()
+
+    # Se o tracemalloc já estava ligado por outro motivo, não é desligado no fim
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    inicio = time.perf_counter()
+    perfil.enable()
+    try:
+        resposta = handler(request)
+    finally:
+        perfil.disable()
+        duracao = time.perf_counter() - inicio
+        snapshot = tracemalloc.take_snapshot()
+        pico = tracemalloc.get_traced_memory()[1]
+        if not ja_rastreando:
+            tracemalloc.stop()
+        try:
+            _registrar(perfil, {
+                "perfil_id": perfil_id,
+                "servico": handler.__name__,
+                "metodo": request.method,
+                "caminho": request.path,
+                "motivo": motivo,
+                "duracao_ms": round(duracao * 1000, 3),
+                "pico_memoria_kib": round(pico / 1024, 1),
+                "alocacoes": _alocacoes(snapshot),
+            })
+        except Exception as e:
+            # O perfil nunca derruba a requisição
+            print(json.dumps({"severity": "WARNING", "message": f"Falha ao gravar perfil {perfil_id}: {e}"}),
+                  flush=True)
+
+    # Identifica o perfil na resposta (tuplas corpo, status, headers)
+    if isinstance(resposta, tuple) and len(resposta) == 3 and isinstance(resposta[2], dict):
+        resposta = (resposta[0], resposta[1], dict(resposta[2], **{CABECALHO_ID: perfil_id}))
+    return resposta
+
+
+def perfilar(handler):
+    """Decorador que executa a requisição sob perfil quando o cabeçalho assinado ou a amostragem pedem."""
+    if not HABILITADO:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(request):
+        motivo = motivo_perfil(request)
+        if motivo is None or not _em_andamento.acquire(blocking=False):
+            return handler(request)
+        try:
+            return _executar_perfilado(handler, request, motivo)
+        finally:
+            _em_andamento.release()
+
+    return wrapper
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or not SEGREDO:
+        sys.exit("Uso: PERFIL_SEGREDO=... python perfilador.py MÉTODO CAMINHO")
+    print(f"{CABECALHO}: {assinar(sys.argv[1], sys.argv[2])}")
@@ -0,0 +1,110 @@
+import unittest
+import json
+from urllib.parse import urlencode
+from unittest.mock import patch
+from flask import Flask, request
+from repositorio import RepositorioSQLite
+from main import sincronizar_pedidos
+
+class TestSincronizarPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.client = self.app.test_client()
+        self.repositorio = RepositorioSQLite(":memory:")
+        patcher = patch("main.repositorio", self.repositorio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sincronizar(self, consulta):
+        with self.app.test_request_context('/pedidos/alteracoes' + consulta, method="GET"):
+            response = sincronizar_pedidos(request)
+        return response[1], json.loads(response[0])
+
+    def test_sincronizar_pedidos_opcoes(self):
+        """Testa se a função responde corretamente a requisições OPTIONS"""
+        with self.app.test_request_context('/pedidos/alteracoes', method="OPTIONS"):
+            response = sincronizar_pedidos(request)
+
+        self.assertEqual(response[1], 204)
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_sem_autenticacao(self, mock_verificar_autenticacao):
+        """Testa se a função retorna erro quando o usuário não está autenticado"""
+        mock_verificar_autenticacao.return_value = (None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401)
+
+        with self.app.test_request_context('/pedidos/alteracoes', method="GET"):
+            response = sincronizar_pedidos(request)
+
+        self.assertEqual(response[1], 401)
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_limite_invalido(self, mock_verificar_autenticacao):
+        """Testa se a função rejeita um limite inválido"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/pedidos/alteracoes?limite=abc', method="GET"):
+            response = sincronizar_pedidos(request)
+
+        self.assertEqual(response[1], 400)
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_alteracoes_e_lapides(self, mock_verificar_autenticacao):
+        """Testa se a função retorna alterados e removidos em ordem, depois da marca d'água"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        self.repositorio.gravar("p0", {"status": "PENDENTE", "ultima_atualizacao": "2023-12-31T00:00:00Z"})
+        self.repositorio.gravar("p1", {"status": "PENDENTE", "ultima_atualizacao": "2024-01-02T00:00:00Z"})
+        self.repositorio.gravar("p2", {"status": "ENVIADO", "ultima_atualizacao": "2024-01-03T00:00:00Z"})
+        self.repositorio.remover("p3", {"user_id": "user123", "ultima_atualizacao": "2024-01-04T00:00:00Z"})
+
+        status, corpo = self.sincronizar('?desde=2024-01-01T00:00:00Z')
+
+        self.assertEqual(status, 200)
+        self.assertEqual([p["id"] for p in corpo["pedidos"]], ["p1", "p2"])
+        self.assertEqual(corpo["removidos"], ["p3"])
+        self.assertEqual(json.loads(corpo["watermark"]), ["2024-01-04T00:00:00Z", "p3"])
+        self.assertFalse(corpo["mais"])
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_paginacao(self, mock_verificar_autenticacao):
+        """Testa se a marca d'água aponta para o último item da página quando há mais alterações"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        for i in range(1, 4):
+            self.repositorio.gravar(f"p{i}", {"ultima_atualizacao": f"2024-01-0{i}T00:00:00Z"})
+
+        _, corpo = self.sincronizar('?limite=2')
+
+        self.assertEqual(len(corpo["pedidos"]), 2)
+        self.assertEqual(json.loads(corpo["watermark"]), ["2024-01-02T00:00:00Z", "p2"])
+        self.assertTrue(corpo["mais"])
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_mesmo_carimbo(self, mock_verificar_autenticacao):
+        """Testa se alterações com o mesmo carimbo cortadas entre páginas chegam todas, uma vez"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+        # Transição em massa: um carimbo para a página inteira, e uma remoção no mesmo instante
+        for i in range(5):
+            self.repositorio.gravar(f"p{i}", {"status": "ENVIADO", "ultima_atualizacao": "2024-01-02T00:00:00Z"})
+        self.repositorio.remover("p9", {"ultima_atualizacao": "2024-01-02T00:00:00Z"})
+
+        recebidos, desde, mais = [], "", True
+        while mais:
+            _, corpo = self.sincronizar('?limite=2&' + urlencode({"desde": desde}))
+            recebidos += [p["id"] for p in corpo["pedidos"]] + corpo["removidos"]
+            desde, mais = corpo["watermark"], corpo["mais"]
+
+        self.assertEqual(recebidos, ["p0", "p1", "p2", "p3", "p4", "p9"])
+        _, corpo = self.sincronizar('?' + urlencode({"desde": desde}))
+        self.assertEqual((corpo["pedidos"], corpo["removidos"], corpo["watermark"]), ([], [], desde))
+
+    @patch("main.verificar_autenticacao")
+    def test_sincronizar_pedidos_marca_invalida(self, mock_verificar_autenticacao):
+        """Testa se uma marca d'água composta malformada é rejeitada"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        for desde in ('[', '["2024-01-01T00:00:00Z"]', '[1, 2]'):
+            status, _ = self.sincronizar('?' + urlencode({"desde": desde}))
+            self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import functions_framework
+import json
+import uuid
+import firebase_admin
+from firebase_admin import auth, credentials
+from flask import request
+from captura import capturar
+from limitador import LimitadorUsuario, limitar_concorrencia
+from perfilador import perfilar
+from repositorio import cliente_firestore, criar_repositorio, usa_firestore
+from resiliencia import resposta_degradada
+from transicao import (CONCLUIDA, STATUS_VALIDOS, FiltroInvalido, TransicaoEmExecucao, TransicaoEmLote,
+                       contar, normalizar_filtro)
+
+# Inicializa Firebase Admin SDK
+if not firebase_admin._apps:
+    cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred)
+
+# Inicializa o Firestore e o repositório de pedidos. Os checkpoints e a contagem
+# do dry-run ficam no Firestore: o serviço não roda em outro backend
+if not usa_firestore():
+    raise RuntimeError("Este serviço requer PEDIDOS_BACKEND=firestore")
+db = cliente_firestore()
+repositorio = criar_repositorio(db)
+
+# Orçamento de requisições por usuário para este endpoint
+limitador = LimitadorUsuario("transicionar_pedidos", capacidade=10, taxa=1)
+
+def verificar_autenticacao():
+    """Valida o token JWT do Firebase enviado no cabeçalho Authorization."""
+    auth_header = request.headers.get("Authorization")
+
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None, json.dumps({"error": "Token de autenticação ausente ou inválido"}), 401
+
+    token = auth_header.split("Bearer ")[1]
+
+    try:
+        decoded_token = auth.verify_id_token(token)
+        return decoded_token, None, 200  # Usuário autenticado com sucesso
+    except Exception as e:
+        return None, json.dumps({"error": "Token inválido ou expirado"}), 401
+
+
+def resumo(estado):
+    """Campos do checkpoint devolvidos ao cliente."""
+    return {campo: estado.get(campo) for campo in
+            ("id", "filtro", "status_destino", "estado", "processados", "atualizados", "conflitos", "falhas",
+             "criado_em", "atualizado_em")}
+
+
+@functions_framework.http
+@capturar
+@perfilar
+@limitar_concorrencia
+def transicionar_pedidos(request):
+    """Altera em lote o status dos pedidos que atendem a um filtro (uso operacional).
+
+    POST /transicoes            {"filtro": {...}, "status_destino": "...", "dry_run": false}
+    POST /transicoes/<id>       retoma uma transição a partir do checkpoint
+    GET  /transicoes/<id>       consulta o progresso
+    """
+
+    # Configuração CORS para permitir requisições do frontend
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+    # Responder pré-requisição (CORS)
+    if request.method == "OPTIONS":
+        return "", 204, cors_headers
+
+    # Verifica se o usuário está autenticado
+    user, error_response, status = verificar_autenticacao()
+    if not user:
+        return error_response, status, cors_headers
+
+    # Apenas administradores (custom claim `admin`) podem alterar pedidos de outros usuários
+    if not user.get("admin"):
+        return json.dumps({"error": "Acesso restrito a administradores"}), 403, cors_headers
+
+    # Limite de requisições por usuário (token bucket por uid)
+    limitado = limitador.verificar(user["uid"], cors_headers)
+    if limitado:
+        return limitado
+
+    try:
+        if request.method not in ["GET", "POST"]:
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        path_parts = request.path.strip("/").split("/")
+        if not path_parts or path_parts[0] != "transicoes" or len(path_parts) > 2:
+            return json.dumps({"error": "Caminho inválido"}), 404, cors_headers
+
+        # Consulta ou retomada de uma transição existente
+        if len(path_parts) == 2:
+            transicao = TransicaoEmLote(db, repositorio, path_parts[1])
+            if request.method == "GET":
+                estado = transicao.carregar()
+            else:
+                estado = transicao.reservar()
+            if estado is None:
+                return json.dumps({"error": "Transição não encontrada"}), 404, cors_headers
+            if request.method == "POST" and estado["estado"] != CONCLUIDA:
+                estado = transicao.executar(estado)
+            return json.dumps(resumo(estado)), 200 if estado["estado"] == CONCLUIDA else 202, cors_headers
+
+        if request.method != "POST":
+            return json.dumps({"error": "Método não permitido"}), 405, cors_headers
+
+        dados = request.get_json(silent=True)
+        if not isinstance(dados, dict):
+            return json.dumps({"error": "JSON inválido ou não fornecido"}), 400, cors_headers
+
+        status_destino = str(dados.get("status_destino", "")).upper()
+        if status_destino not in STATUS_VALIDOS:
+            return json.dumps({"error": "Status de destino inválido"}), 400, cors_headers
+        try:
+            filtro = normalizar_filtro(dados.get("filtro"))
+        except FiltroInvalido as e:
+            return json.dumps({"error": str(e)}), 400, cors_headers
+
+        # Dry-run: só a contagem dos pedidos afetados, sem checkpoint nem escritas
+        if dados.get("dry_run"):
+            resposta = {"dry_run": True, "filtro": filtro, "status_destino": status_destino,
+                        "total": contar(db, filtro)}
+            return json.dumps(resposta), 200, cors_headers
+
+        transicao = TransicaoEmLote(db, repositorio, str(uuid.uuid4()))
+        estado = transicao.executar(transicao.criar(filtro, status_destino, user["uid"]))
+
+        # 202: a duração da chamada acabou; retomar com POST /transicoes/<id>
+        return json.dumps(resumo(estado)), 200 if estado["estado"] == CONCLUIDA else 202, cors_headers
+
+    except TransicaoEmExecucao as e:
+        return json.dumps({"error": str(e)}), 409, cors_headers
+    except Exception as e:
+        degradada = resposta_degradada(e, cors_headers)
+        if degradada:
+            return degradada
+        return json.dumps({"error": str(e)}), 500, cors_headers
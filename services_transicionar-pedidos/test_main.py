@@ -0,0 +1,246 @@
+import unittest
+import json
+import time
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from flask import Flask, request
+from limitador import ArmazemMemoria, configurar_armazem
+from main import transicionar_pedidos
+from repositorio import Operacao, RepositorioSQLite
+from resumo import resumos_criacao
+from transicao import (CONCLUIDA, EM_ANDAMENTO, TENTATIVAS, FiltroInvalido, Ritmo, TransicaoEmLote,
+                       normalizar_filtro)
+
+class BulkFalso:
+    """BulkWriter que aplica as escritas ao repositório no flush; IDs em `conflitos` violam a precondição."""
+
+    def __init__(self, repositorio):
+        self.repositorio = repositorio
+        self.conflitos = set()
+        self.pendentes = []
+
+    def on_write_result(self, callback):
+        self.sucesso = callback
+
+    def on_write_error(self, callback):
+        self.erro = callback
+
+    def update(self, referencia, atualizacao, option=None):
+        self.pendentes.append((referencia.id, atualizacao))
+
+    def flush(self):
+        for pedido_id, atualizacao in self.pendentes:
+            if pedido_id in self.conflitos:
+                self.erro(MagicMock(code=9, attempts=0), self)
+            else:
+                self.repositorio.atualizar(pedido_id, atualizacao)
+                self.sucesso(pedido_id, None, self)
+        self.pendentes = []
+
+    def close(self):
+        self.flush()
+
+def pedidos(quantidade, status="PENDENTE", user_id="u1"):
+    return [Operacao("gravar", f"p{i}", {"status": status, "user_id": user_id, "total": 10.0,
+                                         "data_criacao": f"2024-01-0{i + 1}T00:00:00Z"})
+            for i in range(quantidade)]
+
+class TestTransicaoEmLote(unittest.TestCase):
+
+    def setUp(self):
+        self.repositorio = RepositorioSQLite(":memory:")
+        self.bulk = BulkFalso(self.repositorio)
+        colecoes = {"pedidos": MagicMock(), "transicoes_pedidos": MagicMock()}
+        colecoes["pedidos"].document.side_effect = lambda pedido_id: MagicMock(id=pedido_id)
+        self.db = MagicMock()
+        self.db.collection.side_effect = colecoes.get
+        self.db.bulk_writer.return_value = self.bulk
+        self.checkpoint = colecoes["transicoes_pedidos"].document.return_value
+
+    def estado(self, cursor=None):
+        return {"filtro": {"status": "PENDENTE"}, "status_destino": "CANCELADO", "estado": EM_ANDAMENTO,
+                "cursor": cursor, "processados": 0, "atualizados": 0, "conflitos": 0, "falhas": 0,
+                "reservado_ate": "2099-01-01T00:00:00Z"}
+
+    def cancelados(self):
+        registros, _ = self.repositorio.consultar([("status", "==", "CANCELADO")])
+        return sorted(registro.id for registro in registros)
+
+    def test_processa_todas_as_paginas(self):
+        """Testa se todas as páginas são gravadas pelo BulkWriter e cada uma gera um checkpoint"""
+        self.repositorio.gravar_em_lote(pedidos(5))
+
+        estado = TransicaoEmLote(self.db, self.repositorio, "t1", tamanho_pagina=2).executar(self.estado())
+
+        self.assertEqual(estado["estado"], CONCLUIDA)
+        self.assertEqual(estado["processados"], 5)
+        self.assertEqual(estado["atualizados"], 5)
+        self.assertEqual(self.cancelados(), ["p0", "p1", "p2", "p3", "p4"])
+        self.db.bulk_writer.assert_called_once()
+        # 3 páginas + checkpoint final
+        self.assertEqual(self.checkpoint.update.call_count, 4)
+
+    def test_retoma_do_cursor(self):
+        """Testa se a execução retomada continua depois do último cursor salvo (também o do Firestore)"""
+        self.repositorio.gravar_em_lote(pedidos(4))
+        cursor = {"data_criacao": "2024-01-02T00:00:00Z", "__name__": "p1"}
+
+        estado = TransicaoEmLote(self.db, self.repositorio, "t1", tamanho_pagina=10).executar(self.estado(cursor))
+
+        self.assertEqual(self.cancelados(), ["p2", "p3"])
+        self.assertEqual(estado["estado"], CONCLUIDA)
+
+    def test_duracao_esgotada_mantem_em_andamento(self):
+        """Testa se a transição fica em andamento quando a duração da chamada acaba"""
+        self.repositorio.gravar_em_lote(pedidos(4))
+
+        estado = TransicaoEmLote(self.db, self.repositorio, "t1", duracao_maxima=0).executar(self.estado())
+
+        self.assertEqual(estado["estado"], EM_ANDAMENTO)
+        self.assertEqual(self.cancelados(), [])
+
+    def test_conflito_de_precondicao(self):
+        """Testa se pedidos alterados depois da leitura são contados como conflito, sem nova tentativa"""
+        self.repositorio.gravar_em_lote(pedidos(3))
+        self.bulk.conflitos = {"p1"}
+
+        estado = TransicaoEmLote(self.db, self.repositorio, "t1").executar(self.estado())
+
+        self.assertEqual(estado["atualizados"], 2)
+        self.assertEqual(estado["conflitos"], 1)
+
+    def test_ritmo(self):
+        """Testa se o ritmo espaça as chamadas pelo limite de escritas por segundo"""
+        ritmo = Ritmo(100)
+        inicio = time.monotonic()
+        for _ in range(6):
+            ritmo.aguardar()
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.05)
+
+    @patch("transicao.RESUMO_PEDIDOS", True)
+    def test_conflito_de_versao(self):
+        """Testa se, gravando por transação (resumo ligado), pedidos alterados depois da leitura
+        são contados como conflito, sem nova tentativa"""
+        self.repositorio.gravar_em_lote(pedidos(3))
+        atualizar = self.repositorio.atualizar
+
+        def alterado_antes(pedido_id, *args, **kwargs):
+            if pedido_id == "p1":
+                atualizar("p1", {"total": 20.0})
+            return atualizar(pedido_id, *args, **kwargs)
+
+        with patch.object(self.repositorio, "atualizar", side_effect=alterado_antes) as mock_atualizar:
+            estado = TransicaoEmLote(self.db, self.repositorio, "t1").executar(self.estado())
+
+        self.assertEqual(estado["atualizados"], 2)
+        self.assertEqual(estado["conflitos"], 1)
+        self.assertEqual(mock_atualizar.call_count, 3)
+        self.assertEqual(self.cancelados(), ["p0", "p2"])
+
+    @patch("transicao.RESUMO_PEDIDOS", True)
+    @patch("transicao.ESPERA_TENTATIVA", 0)
+    def test_falha_repetida(self):
+        """Testa se, gravando por transação, erros transitórios são repetidos e contados como falha
+        ao esgotar as tentativas"""
+        self.repositorio.gravar_em_lote(pedidos(1))
+
+        with patch.object(self.repositorio, "atualizar", side_effect=RuntimeError("indisponível")) as mock_atualizar:
+            estado = TransicaoEmLote(self.db, self.repositorio, "t1").executar(self.estado())
+
+        self.assertEqual(estado["falhas"], 1)
+        self.assertEqual(mock_atualizar.call_count, TENTATIVAS)
+
+    @patch("eventos.EVENTOS_PEDIDOS", True)
+    @patch("resumo.RESUMO_PEDIDOS", True)
+    @patch("transicao.EVENTOS_PEDIDOS", True)
+    def test_eventos_e_resumo(self):
+        """Testa se cada pedido transicionado gera o evento da outbox, altera o resumo do dono
+        e recebe o próprio carimbo de atualização"""
+        for operacao in pedidos(3):
+            self.repositorio.gravar(operacao.id, operacao.dados, resumos=resumos_criacao(operacao.id, operacao.dados))
+
+        TransicaoEmLote(self.db, self.repositorio, "t1").executar(self.estado())
+
+        self.db.bulk_writer.assert_not_called()
+        eventos = [evento for _, evento in self.repositorio.eventos()]
+        self.assertEqual(sorted(e["pedido_id"] for e in eventos), ["p0", "p1", "p2"])
+        self.assertEqual({(e["tipo"], e["status_anterior"], e["status"]) for e in eventos},
+                         {("pedido.status_alterado", "PENDENTE", "CANCELADO")})
+        resumo = self.repositorio.obter_resumo("u1")
+        self.assertEqual({p["status"] for p in resumo["pedidos"]}, {"CANCELADO"})
+        carimbos = [r.dados["ultima_atualizacao"] for r in self.repositorio.consultar()[0]]
+        self.assertEqual(len(set(carimbos)), 3)
+
+    def test_normalizar_filtro(self):
+        """Testa se idade_minima_horas vira um corte fixo em criado_antes e campos desconhecidos são recusados"""
+        filtro = normalizar_filtro({"status": "PENDENTE", "idade_minima_horas": 48}, agora=datetime(2024, 1, 3))
+        self.assertEqual(filtro, {"status": "PENDENTE", "criado_antes": "2024-01-01T00:00:00Z"})
+
+        with self.assertRaises(FiltroInvalido):
+            normalizar_filtro({"total": "10"})
+
+class TestTransicionarPedidos(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        configurar_armazem(ArmazemMemoria())
+
+    @patch("main.verificar_autenticacao")
+    def test_exige_administrador(self, mock_verificar_autenticacao):
+        """Testa se usuários sem a claim admin recebem 403"""
+        mock_verificar_autenticacao.return_value = ({"uid": "user123"}, None, 200)
+
+        with self.app.test_request_context('/transicoes', method="POST", json={}):
+            response = transicionar_pedidos(request)
+
+        self.assertEqual(response[1], 403)
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.contar")
+    @patch("main.TransicaoEmLote")
+    def test_dry_run(self, mock_transicao, mock_contar, mock_verificar_autenticacao):
+        """Testa se o dry-run retorna apenas a contagem, sem criar checkpoint nem gravar"""
+        mock_verificar_autenticacao.return_value = ({"uid": "admin1", "admin": True}, None, 200)
+        mock_contar.return_value = 42
+
+        corpo = {"filtro": {"status": "PENDENTE", "idade_minima_horas": 48}, "status_destino": "cancelado",
+                 "dry_run": True}
+        with self.app.test_request_context('/transicoes', method="POST", json=corpo):
+            response = transicionar_pedidos(request)
+
+        self.assertEqual(response[1], 200)
+        resposta = json.loads(response[0])
+        self.assertEqual(resposta["total"], 42)
+        self.assertEqual(resposta["status_destino"], "CANCELADO")
+        self.assertIn("criado_antes", resposta["filtro"])
+        mock_transicao.assert_not_called()
+
+    @patch("main.verificar_autenticacao")
+    def test_status_destino_invalido(self, mock_verificar_autenticacao):
+        """Testa se um status de destino desconhecido retorna 400"""
+        mock_verificar_autenticacao.return_value = ({"uid": "admin1", "admin": True}, None, 200)
+
+        corpo = {"filtro": {"status": "PENDENTE"}, "status_destino": "PERDIDO"}
+        with self.app.test_request_context('/transicoes', method="POST", json=corpo):
+            response = transicionar_pedidos(request)
+
+        self.assertEqual(response[1], 400)
+
+    @patch("main.verificar_autenticacao")
+    @patch("main.TransicaoEmLote")
+    def test_retomada_em_andamento(self, mock_transicao, mock_verificar_autenticacao):
+        """Testa se a retomada executa a partir do checkpoint e retorna 202 enquanto não concluir"""
+        mock_verificar_autenticacao.return_value = ({"uid": "admin1", "admin": True}, None, 200)
+        estado = {"id": "t1", "estado": EM_ANDAMENTO, "processados": 500}
+        mock_transicao.return_value.reservar.return_value = estado
+        mock_transicao.return_value.executar.return_value = estado
+
+        with self.app.test_request_context('/transicoes/t1', method="POST"):
+            response = transicionar_pedidos(request)
+
+        self.assertEqual(response[1], 202)
+        mock_transicao.return_value.executar.assert_called_once_with(estado)
+        self.assertEqual(json.loads(response[0])["processados"], 500)
+
+if __name__ == '__main__':
+    unittest.main()
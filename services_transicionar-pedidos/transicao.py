@@ -0,0 +1,326 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from google.api_core import exceptions as gexc
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from eventos import EVENTOS_PEDIDOS, evento_atualizacao
+from repositorio import COLECAO, ConflitoVersao, PedidoNaoEncontrado
+from resumo import RESUMO_PEDIDOS, resumos_atualizacao
+
+# Status aceitos como destino de uma transição
+STATUS_VALIDOS = [s.strip().upper() for s in
+                  os.environ.get("STATUS_VALIDOS", "PENDENTE,PROCESSANDO,ENVIADO,ENTREGUE,CANCELADO").split(",")
+                  if s.strip()]
+
+# Pedidos lidos por página (cada página termina com um checkpoint)
+TAMANHO_PAGINA = int(os.environ.get("TRANSICAO_TAMANHO_PAGINA", "500"))
+
+# Pedidos gravados por segundo (rampa de subida do BulkWriter até o máximo) e tentativas por pedido
+OPS_INICIAL = int(os.environ.get("TRANSICAO_OPS_INICIAL", "100"))
+OPS_MAXIMO = int(os.environ.get("TRANSICAO_OPS_MAXIMO", "500"))
+TENTATIVAS = int(os.environ.get("TRANSICAO_TENTATIVAS", "5"))
+ESPERA_TENTATIVA = 0.2
+
+# Transações simultâneas quando cada pedido leva evento da outbox ou resumo
+PARALELISMO = int(os.environ.get("TRANSICAO_PARALELISMO", "8"))
+
+# Tempo de trabalho por chamada; o restante fica para a próxima (retomada pelo checkpoint)
+DURACAO_MAXIMA = float(os.environ.get("TRANSICAO_DURACAO_MAXIMA", "240"))
+
+COLECAO_CHECKPOINTS = "transicoes_pedidos"
+
+EM_ANDAMENTO = "EM_ANDAMENTO"
+CONCLUIDA = "CONCLUIDA"
+
+# Código gRPC de precondição violada: o pedido mudou depois de lido
+FAILED_PRECONDITION = 9
+
+# Campos aceitos no filtro
+CAMPOS_FILTRO = {"status", "user_id", "criado_antes", "criado_depois", "idade_minima_horas"}
+
+
+class FiltroInvalido(Exception):
+    """Filtro ou status de destino inválido (resposta 400)."""
+
+
+class TransicaoEmExecucao(Exception):
+    """Outra chamada está processando a mesma transição (resposta 409)."""
+
+    def __init__(self):
+        super().__init__("Transição já em execução")
+
+
+def agora_iso():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def normalizar_filtro(filtro, agora=None):
+    """Valida o filtro e converte `idade_minima_horas` em `criado_antes`.
+
+    A conversão é feita uma única vez, na criação da transição, para que as
+    retomadas usem exatamente o mesmo corte.
+    """
+    if not isinstance(filtro, dict) or not filtro:
+        raise FiltroInvalido("Filtro não informado")
+    desconhecidos = set(filtro) - CAMPOS_FILTRO
+    if desconhecidos:
+        raise FiltroInvalido(f"Campos de filtro não suportados: {', '.join(sorted(desconhecidos))}")
+
+    normalizado = {campo: valor for campo, valor in filtro.items() if campo != "idade_minima_horas"}
+    for campo, valor in normalizado.items():
+        if not isinstance(valor, str) or not valor:
+            raise FiltroInvalido(f"Campo de filtro '{campo}' inválido")
+
+    if "idade_minima_horas" in filtro:
+        horas = filtro["idade_minima_horas"]
+        if type(horas) not in (int, float) or horas < 0:
+            raise FiltroInvalido("Campo de filtro 'idade_minima_horas' inválido")
+        corte = (agora or datetime.utcnow()) - timedelta(hours=horas)
+        corte = corte.isoformat() + "Z"
+        normalizado["criado_antes"] = min(corte, normalizado.get("criado_antes", corte))
+    return normalizado
+
+
+def filtros_consulta(filtro):
+    """Filtro normalizado em [(campo, op, valor)] do repositório; a paginação
+    ordena por (data de criação, ID). No Firestore, requer índice composto com
+    os campos de igualdade."""
+    filtros = [(campo, "==", filtro[campo]) for campo in ("status", "user_id") if campo in filtro]
+    if "criado_antes" in filtro:
+        filtros.append(("data_criacao", "<", filtro["criado_antes"]))
+    if "criado_depois" in filtro:
+        filtros.append(("data_criacao", ">", filtro["criado_depois"]))
+    return filtros
+
+
+def contar(db, filtro):
+    """Dry-run: quantidade de pedidos que seriam alterados (agregação, sem ler os documentos)."""
+    consulta = db.collection(COLECAO)
+    for campo, op, valor in filtros_consulta(filtro):
+        consulta = consulta.where(filter=FieldFilter(campo, op, valor))
+    resultado = consulta.count().get()
+    return int(resultado[0][0].value)
+
+
+def cursor_repositorio(cursor):
+    """Cursor do checkpoint no formato do repositório; os checkpoints anteriores
+    a ele guardam o do Firestore ({"data_criacao", "__name__"})."""
+    if isinstance(cursor, dict):
+        return json.dumps([cursor.get("data_criacao"), cursor["__name__"]])
+    return cursor
+
+
+class Contadores:
+    """Resultados das escritas, atualizados pelos callbacks do BulkWriter ou
+    pelas transações (em outras threads)."""
+
+    def __init__(self):
+        self.totais = Counter()
+        self._lock = threading.Lock()
+
+    def registrar(self, resultado):
+        with self._lock:
+            self.totais[resultado] += 1
+
+    def sucesso(self, referencia, resultado, bulk_writer):
+        self.registrar("atualizados")
+
+    def erro(self, falha, bulk_writer):
+        """Precondição violada não é repetida (o pedido mudou); os demais erros têm novas tentativas."""
+        if falha.code != FAILED_PRECONDITION and falha.attempts < TENTATIVAS:
+            return True
+        self.registrar("conflitos" if falha.code == FAILED_PRECONDITION else "falhas")
+        return False
+
+
+class Ritmo:
+    """Espaça as chamadas de várias threads em no máximo `por_segundo` por segundo."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._proxima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        with self._lock:
+            vez = max(self._proxima, time.monotonic())
+            self._proxima = vez + self.intervalo
+        espera = vez - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+
+class TransicaoEmLote:
+    """Aplica `status_destino` a todos os pedidos do filtro, página por página.
+
+    Sem outbox nem resumo ligados, os pedidos vão pelo BulkWriter, com
+    throttling (OPS_INICIAL a OPS_MAXIMO escritas/s). Com eles, cada pedido é
+    gravado pelo repositório numa transação com o evento e o resumo do dono,
+    como no atualizar-status, a no máximo OPS_MAXIMO pedidos/s. Nos dois
+    casos a escrita só vale se o pedido não mudou desde a leitura.
+
+    O progresso (cursor e contadores) fica em `transicoes_pedidos/<id>` no
+    Firestore e é gravado ao fim de cada página, depois de todas as escritas
+    dela; uma chamada interrompida é retomada a partir do último cursor.
+    """
+
+    def __init__(self, db, repositorio, transicao_id, duracao_maxima=DURACAO_MAXIMA, tamanho_pagina=TAMANHO_PAGINA):
+        self.db = db
+        self.repositorio = repositorio
+        self.id = transicao_id
+        self.ref = db.collection(COLECAO_CHECKPOINTS).document(transicao_id)
+        self.duracao_maxima = duracao_maxima
+        self.tamanho_pagina = tamanho_pagina
+
+    def criar(self, filtro, status_destino, user_id):
+        estado = {
+            "id": self.id,
+            "filtro": filtro,
+            "status_destino": status_destino,
+            "estado": EM_ANDAMENTO,
+            "cursor": None,
+            "processados": 0,
+            "atualizados": 0,
+            "conflitos": 0,
+            "falhas": 0,
+            "criado_por": user_id,
+            "criado_em": agora_iso(),
+            "atualizado_em": agora_iso(),
+            "reservado_ate": self._fim_reserva(),
+        }
+        self.ref.create(estado)
+        return estado
+
+    def _fim_reserva(self):
+        # Margem sobre a duração da chamada para a gravação do último checkpoint
+        return (datetime.utcnow() + timedelta(seconds=self.duracao_maxima + 60)).isoformat() + "Z"
+
+    def carregar(self):
+        doc = self.ref.get()
+        return doc.to_dict() if doc.exists else None
+
+    def reservar(self):
+        """Carrega o checkpoint e reserva a transição para esta chamada.
+
+        A reserva usa precondição de `update_time`, então duas retomadas
+        simultâneas não processam as mesmas páginas. Retorna None se não existir.
+        """
+        doc = self.ref.get()
+        if not doc.exists:
+            return None
+        estado = doc.to_dict()
+        if estado["estado"] != EM_ANDAMENTO:
+            return estado
+        if estado.get("reservado_ate", "") > agora_iso():
+            raise TransicaoEmExecucao()
+        estado["reservado_ate"] = self._fim_reserva()
+        try:
+            self.ref.update({"reservado_ate": estado["reservado_ate"]},
+                            option=self.db.write_option(last_update_time=doc.update_time))
+        except gexc.FailedPrecondition:
+            raise TransicaoEmExecucao()
+        return estado
+
+    def executar(self, estado):
+        """Processa páginas até concluir ou esgotar a duração da chamada; retorna o estado salvo."""
+        limite = time.monotonic() + self.duracao_maxima
+        filtros = filtros_consulta(estado["filtro"])
+        destino = estado["status_destino"]
+        estado["cursor"] = cursor_repositorio(estado["cursor"])
+        base = {campo: estado[campo] for campo in ("atualizados", "conflitos", "falhas")}
+
+        # Um único escritor por chamada, para o throttling não recomeçar a cada página
+        contadores = Contadores()
+        if EVENTOS_PEDIDOS or RESUMO_PEDIDOS:
+            executor = ThreadPoolExecutor(max_workers=PARALELISMO)
+            ritmo = Ritmo(OPS_MAXIMO)
+            aplicar = lambda registros: self._aplicar_transacoes(executor, ritmo, contadores, registros, destino)
+            encerrar = executor.shutdown
+        else:
+            bulk = self.db.bulk_writer(BulkWriterOptions(initial_ops_per_second=OPS_INICIAL,
+                                                         max_ops_per_second=OPS_MAXIMO))
+            bulk.on_write_result(contadores.sucesso)
+            bulk.on_write_error(contadores.erro)
+            aplicar = lambda registros: self._aplicar_bulk(bulk, registros, destino)
+            encerrar = bulk.close
+        try:
+            while estado["estado"] == EM_ANDAMENTO and time.monotonic() < limite:
+                registros, proximo = self.repositorio.consultar(filtros, ordem="data_criacao",
+                                                                limite=self.tamanho_pagina, cursor=estado["cursor"])
+                aplicar([registro for registro in registros if registro.dados.get("status") != destino])
+                estado["processados"] += len(registros)
+                if proximo is None:
+                    estado["estado"] = CONCLUIDA
+                else:
+                    estado["cursor"] = proximo
+                self._salvar(estado, base, contadores)
+        finally:
+            encerrar()
+
+        estado["reservado_ate"] = ""
+        self._salvar(estado, base, contadores)
+        return estado
+
+    def _salvar(self, estado, base, contadores):
+        """Grava o checkpoint; só é chamado depois das escritas da página."""
+        for campo in ("atualizados", "conflitos", "falhas"):
+            estado[campo] = base[campo] + contadores.totais[campo]
+        estado["atualizado_em"] = agora_iso()
+        self.ref.update({campo: estado[campo] for campo in
+                         ("estado", "cursor", "processados", "atualizados", "conflitos", "falhas",
+                          "atualizado_em", "reservado_ate")})
+
+    def _aplicar_bulk(self, bulk, registros, destino):
+        """Enfileira as atualizações da página e espera a confirmação de todas (flush)."""
+        colecao = self.db.collection(COLECAO)
+        for registro in registros:
+            # Precondição: só altera se o pedido não mudou desde a leitura
+            bulk.update(colecao.document(registro.id), {"status": destino, "ultima_atualizacao": agora_iso()},
+                        option=self.db.write_option(last_update_time=registro.versao))
+        bulk.flush()
+
+    def _aplicar_transacoes(self, executor, ritmo, contadores, registros, destino):
+        """Grava a página pelo repositório e espera todas as transações.
+
+        Os pedidos de um mesmo dono são gravados em sequência, para as
+        transações do resumo dele não disputarem entre si.
+        """
+        grupos = defaultdict(list)
+        for registro in registros:
+            grupos[registro.dados.get("user_id")].append(registro)
+
+        def gravar(grupo):
+            for registro in grupo:
+                contadores.registrar(self._transicionar(ritmo, registro, destino))
+
+        for _ in executor.map(gravar, grupos.values()):
+            pass
+
+    def _transicionar(self, ritmo, registro, destino):
+        """Grava o status, o evento e o resumo de um pedido; retorna "atualizados", "conflitos" ou "falhas".
+
+        Cada pedido leva o próprio carimbo, para a sincronização incremental
+        ver as alterações da página na ordem em que foram gravadas.
+        """
+        atualizacao = {"status": destino, "ultima_atualizacao": agora_iso()}
+        eventos = evento_atualizacao(registro.id, registro.dados, atualizacao)
+        resumos = resumos_atualizacao(registro.dados.get("user_id"), registro.id, atualizacao)
+        for tentativa in range(TENTATIVAS):
+            ritmo.aguardar()
+            try:
+                # Precondição: só altera se o pedido não mudou desde a leitura
+                self.repositorio.atualizar(registro.id, atualizacao, versao=registro.versao,
+                                           eventos=eventos, resumos=resumos)
+                return "atualizados"
+            except (ConflitoVersao, PedidoNaoEncontrado):
+                # O pedido mudou ou foi removido depois de lido: não é repetido
+                return "conflitos"
+            except Exception:
+                if tentativa + 1 < TENTATIVAS:
+                    time.sleep(ESPERA_TENTATIVA * 2 ** tentativa)
+        return "falhas"
@@ -3,6 +3,8 @@ import json
 import firebase_admin
 from firebase_admin import auth, credentials
 from flask import request
+from captura import capturar
+from perfilador import perfilar
 
 # Inicializa Firebase Admin SDK
 if not firebase_admin._apps:
@@ -24,6 +26,8 @@ def verificar_autenticacao():
         return None, json.dumps({"error": "Token inválido ou expirado"}), 401
 
 @functions_framework.http
+@capturar
+@perfilar
 def validate_token(request):
     """Verifica se o token JWT do Firebase é válido."""
     